@@ -9,39 +9,59 @@ Features:
 - Response caching for repeated queries
 - Rate limiting for API protection
 - Health and metrics endpoints for monitoring
+
+Heavy dependencies are imported on first use: numpy and the index modules
+when the data is loaded, the OpenAI client on the first /qa request. Run
+`python api/rag_api.py --profile-startup` to see the time per startup phase.
 """
 import asyncio
 import hashlib
-import json
-import numpy as np
 import os
-import pickle
+import sys
 import time
 from collections import defaultdict
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from threading import Lock
-from typing import Dict, List, Optional
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+_IMPORT_STARTED = time.perf_counter()
 
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from openai import OpenAI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from jsonl_io import iter_records, resolve_path
+
+_IMPORT_FINISHED = time.perf_counter()
+
+if TYPE_CHECKING:
+    import numpy as np
+    from kb_index import IndexBundle
+    from query_encoder import QueryEncoder
 
 # ============================================================================
 # Configuration
 # ============================================================================
 
-# Data paths - use environment variable or default
+# Data paths - use environment variable or default; .jsonl.zst is used when
+# only the compressed file is present
 DATA_DIR = Path(os.getenv("DATA_DIR", "/home/ubuntu/klinicka-knowledge-base/data"))
-EMBEDDINGS_FILE = DATA_DIR / "knowledge_base_embeddings.jsonl"
-KNOWLEDGE_FILE = DATA_DIR / "knowledge_base_final.jsonl"
+EMBEDDINGS_FILE = resolve_path(DATA_DIR / "knowledge_base_embeddings.jsonl")
+KNOWLEDGE_FILE = resolve_path(DATA_DIR / "knowledge_base_final.jsonl")
 VECTORIZER_FILE = DATA_DIR / "tfidf_vectorizer.pkl"
 SVD_FILE = DATA_DIR / "svd_model.pkl"
 
+# Index bundle built by scripts/kb_index.py; used instead of the files above
+# when present
+INDEX_DIR = Path(os.getenv("INDEX_DIR", str(DATA_DIR / "index")))
+
 # Rate limiting configuration
 RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "60"))  # requests per window
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # seconds
@@ -224,50 +244,106 @@ response_cache = ResponseCache()
 # Data Loading
 # ============================================================================
 
-knowledge_units: Dict[str, dict] = {}
-embeddings: Dict[str, np.ndarray] = {}
+knowledge_units: Mapping = {}
+embeddings: Dict[str, "np.ndarray"] = {}
 embedding_ids: List[str] = []
-embedding_matrix: Optional[np.ndarray] = None
-vectorizer = None
-svd = None
+embedding_matrix: Optional["np.ndarray"] = None
+encoder: Optional["QueryEncoder"] = None
 data_loaded = False
-
-def load_data():
-    """Load knowledge base data at startup."""
-    global knowledge_units, embeddings, embedding_ids, embedding_matrix, vectorizer, svd, data_loaded
+index_bundle: Optional["IndexBundle"] = None
+index_problems: List[str] = []
+
+def load_bundle(path: Path, verify: bool = True) -> bool:
+    """Open the index bundle; the encoder is loaded and the checksums verified in the background."""
+    global knowledge_units, embedding_ids, embedding_matrix, index_bundle, data_loaded
+    from kb_index import IndexBundle
+
+    index_bundle = IndexBundle(path)
+    knowledge_units = index_bundle.units
+    embedding_ids = index_bundle.ids
+    embedding_matrix = index_bundle.matrix
+    data_loaded = True
+    if verify:
+        Thread(target=verify_bundle, args=(index_bundle,), daemon=True).start()
+    print(f"Loaded index {index_bundle.version}: {len(embedding_ids)} units")
+    return True
+
+def verify_bundle(bundle: "IndexBundle"):
+    """Warm up the encoder and checksum the bundle files; a damaged bundle takes search out of service.
+
+    Runs in a background thread, so any failure (a BundleError, an unreadable
+    file) is recorded as a problem rather than ending the thread unnoticed.
+    """
+    problems = []
+    try:
+        query_encoder()
+    except Exception as e:
+        problems.append(f"encoder: {e}")
+    try:
+        problems.extend(bundle.verify())
+    except Exception as e:
+        problems.append(f"checksums: {e}")
+    bundle.verified = not problems
+    for problem in problems:
+        print(f"Index verification failed: {problem}")
+    index_problems.extend(problems)
+
+def query_encoder() -> Optional["QueryEncoder"]:
+    """The query encoder; loaded from the index bundle on first use."""
+    global encoder
+    if encoder is None and index_bundle is not None:
+        encoder = index_bundle.encoder()
+    return encoder
+
+def load_data(verify: bool = True):
+    """Load knowledge base data at startup (verify=False skips the background bundle check)."""
+    global knowledge_units, embeddings, embedding_ids, embedding_matrix, encoder, data_loaded
 
     if data_loaded:
         return True
 
     try:
+        from kb_index import MANIFEST_NAME
+
+        if (INDEX_DIR / MANIFEST_NAME).exists():
+            return load_bundle(INDEX_DIR, verify)
+
+        import pickle
+        import numpy as np
+        from query_encoder import QueryEncoder
+
         # Check if data files exist
         if not KNOWLEDGE_FILE.exists():
             print(f"Warning: Knowledge file not found at {KNOWLEDGE_FILE}")
             return False
 
         # Load knowledge units
-        with open(KNOWLEDGE_FILE, 'r', encoding='utf-8') as f:
-            for line in f:
-                unit = json.loads(line.strip())
-                knowledge_units[unit['id']] = unit
+        for unit in iter_records(KNOWLEDGE_FILE):
+            knowledge_units[unit['id']] = unit
 
-        # Load embeddings if available
+        # Load embeddings if available; vectors without a unit are dropped
         if EMBEDDINGS_FILE.exists():
             emb_list = []
-            with open(EMBEDDINGS_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    data = json.loads(line.strip())
-                    embedding_ids.append(data['id'])
-                    emb_list.append(data['embedding'])
+            skipped = 0
+            for data in iter_records(EMBEDDINGS_FILE):
+                if data['id'] not in knowledge_units:
+                    skipped += 1
+                    continue
+                embedding_ids.append(data['id'])
+                emb_list.append(data['embedding'])
 
             embedding_matrix = np.array(emb_list)
+            if skipped:
+                print(f"Warning: {skipped} embeddings have no knowledge unit; "
+                      f"build a checked index with scripts/kb_index.py")
 
-        # Load vectorizer and SVD if available
+        # Load vectorizer and SVD if available (unpickling them needs sklearn)
         if VECTORIZER_FILE.exists() and SVD_FILE.exists():
             with open(VECTORIZER_FILE, 'rb') as f:
                 vectorizer = pickle.load(f)
             with open(SVD_FILE, 'rb') as f:
                 svd = pickle.load(f)
+            encoder = QueryEncoder.from_sklearn(vectorizer, svd)
 
         data_loaded = True
         print(f"Loaded {len(knowledge_units)} knowledge units")
@@ -337,6 +413,8 @@ class HealthResponse(BaseModel):
     embeddings: int
     data_loaded: bool
     timestamp: str
+    index_version: Optional[str] = None
+    index_verified: Optional[bool] = None
 
 class MetricsResponse(BaseModel):
     uptime_seconds: float
@@ -399,21 +477,23 @@ async def rate_limit_middleware(request: Request, call_next):
 # Core Functions
 # ============================================================================
 
-def embed_query(query: str) -> np.ndarray:
-    """Embed a query using TF-IDF + SVD pipeline."""
-    if vectorizer is None or svd is None:
+def embed_query(query: str) -> "np.ndarray":
+    """Embed a query using the TF-IDF + SVD encoder (normalized)."""
+    query_model = query_encoder()
+    if query_model is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Embedding models not loaded"
         )
 
-    tfidf = vectorizer.transform([query])
-    embedding = svd.transform(tfidf)
-    # Normalize
-    norm = np.linalg.norm(embedding)
-    if norm > 0:
-        embedding = embedding / norm
-    return embedding[0]
+    return query_model.encode(query)
+
+@lru_cache(maxsize=1)
+def openai_client():
+    """The OpenAI client, imported and created on the first Q&A request."""
+    from openai import OpenAI
+
+    return OpenAI()
 
 def search(query: str, top_k: int = 5) -> List[dict]:
     """Search for relevant knowledge units."""
@@ -422,6 +502,13 @@ def search(query: str, top_k: int = 5) -> List[dict]:
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Embeddings not loaded"
         )
+    if index_problems:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Index bundle failed verification"
+        )
+
+    import numpy as np
 
     query_embedding = embed_query(query)
 
@@ -478,12 +565,14 @@ def health_endpoint():
     - Number of loaded embeddings
     """
     return HealthResponse(
-        status="healthy" if data_loaded else "degraded",
+        status="healthy" if data_loaded and not index_problems else "degraded",
         version="1.0.0",
         knowledge_units=len(knowledge_units),
         embeddings=len(embedding_ids),
         data_loaded=data_loaded,
-        timestamp=datetime.now().isoformat()
+        timestamp=datetime.now().isoformat(),
+        index_version=index_bundle.version if index_bundle else None,
+        index_verified=index_bundle.verified if index_bundle else None
     )
 
 @app.get("/metrics", response_model=MetricsResponse)
@@ -585,8 +674,7 @@ INSTRUKCE:
 
 ODPOVĚĎ:"""
 
-        client = OpenAI()
-        response = client.chat.completions.create(
+        response = openai_client().chat.completions.create(
             model="gpt-4.1-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
@@ -632,6 +720,60 @@ def clear_cache():
 # Main Entry Point
 # ============================================================================
 
+# ============================================================================
+# Startup Profile
+# ============================================================================
+
+def profile_startup() -> List[tuple]:
+    """Load everything a running server needs, timing each phase as (phase, seconds)."""
+    phases = [("import api (fastapi, pydantic)", _IMPORT_FINISHED - _IMPORT_STARTED)]
+
+    def timed(phase, step):
+        started = time.perf_counter()
+        result = step()
+        phases.append((phase, time.perf_counter() - started))
+        return result
+
+    def import_index_modules():
+        import numpy
+        import kb_index
+        import query_encoder
+
+    timed("import numpy + index modules", import_index_modules)
+    if timed("load data", lambda: load_data(verify=False)):
+        timed("load query encoder", query_encoder)
+        if index_bundle is not None:
+            index_problems.extend(timed("verify index", index_bundle.verify))
+        if embedding_matrix is not None and encoder is not None and not index_problems:
+            timed("first search", lambda: search("úhrada výkonu", top_k=5))
+    timed("import openai (first /qa)", lambda: __import__("openai"))
+    return phases
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Klinická Knowledge Base RAG API")
+    parser.add_argument('--host', default="0.0.0.0", help="Bind address")
+    parser.add_argument('--port', type=int, default=8000, help="Port")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Time the import and load phases instead of serving")
+    parser.add_argument('--json', action='store_true',
+                        help="With --profile-startup: print the phases as JSON on the last line")
+    args = parser.parse_args()
+
+    if not args.profile_startup:
+        import uvicorn
+        uvicorn.run(app, host=args.host, port=args.port)
+        sys.exit(0)
+
+    phases = profile_startup()
+    if args.json:
+        print(json.dumps({"phases": [{"phase": phase, "seconds": seconds} for phase, seconds in phases]}))
+    else:
+        print("\nStartup profile")
+        for phase, seconds in phases:
+            print(f"  {phase:<34} {seconds * 1000:8.1f} ms")
+        print(f"  {'total':<34} {sum(s for _, s in phases) * 1000:8.1f} ms")
+        if index_problems:
+            print("\n⚠ Index problems: " + "; ".join(index_problems))
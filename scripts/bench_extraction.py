@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Extraction throughput benchmark against a fake OpenAI-compatible server.
+
+Runs llm_extract_v2-style pipelines (chunk → chat completion → parse units)
+against a local stub, so chunk size, concurrency and prompt layout can be
+compared without spending money. The stub simulates:
+- a fixed per-request latency, prompt prefill and generation token rates,
+- provider-side prompt caching of repeated prompt prefixes,
+- injected server errors (500) and rate limiting (429 with Retry-After).
+
+For every combination of chunker, concurrency and prompt layout it reports
+chunks/s, units/s, p50/p95 latency and retry overhead. Results are saved as
+JSON under benchmarks/extraction/ and compared with the previous run.
+
+Usage:
+    python3 scripts/bench_extraction.py
+    python3 scripts/bench_extraction.py --input sources/uhradova_vyhlaska_2026.pdf \\
+        --chunkers tokens:2500 tokens:3500:150 --concurrency 1 4 8 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+
+from openai import APIConnectionError, APIStatusError, OpenAI
+
+from chunker import Tokenizer, chunk_text
+from llm_output import ParseStats, parse_units, response_format
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BENCH_DIR = PROJECT_ROOT / "benchmarks" / "extraction"
+
+MODEL = "gpt-4.1-nano"
+MAX_RETRIES = 5
+
+# Prompt caching is simulated on prefixes of whole blocks, from ~1024 tokens on
+CACHE_MIN_CHARS = 3072
+CACHE_BLOCK_CHARS = 384
+
+# Static part of the prompt: instructions plus the unit schema, as sent in
+# structured-output mode
+STATIC_INSTRUCTIONS = (
+    "Jsi expert na české zdravotnictví. Extrahuj znalostní jednotky z textu.\n"
+    "Identifikuj pravidla, výjimky, rizika, anti-patterny, podmínky a definice.\n"
+    "Každá jednotka musí být atomická, s konkrétními čísly, procenty a částkami.\n"
+    "VÝSTUP: JSON objekt {\"units\": [...]} se seznamem jednotek.\n\n"
+    "SCHÉMA JEDNOTKY:\n"
+    + json.dumps(response_format()["json_schema"]["schema"], ensure_ascii=False, indent=2)
+)
+
+SAMPLE_SENTENCES = [
+    "Hodnota bodu pro ambulantní specialisty činí 1,15 Kč.",
+    "Zdravotní pojišťovna uhradí péči do výše regulačního limitu PURO.",
+    "Navýšení hodnoty bodu se poskytne při splnění podmínek objednávkového systému.",
+    "Podle § 7 odst. 2 se úhrada stanoví na základě referenčního období.",
+    "Výjimku tvoří poskytovatelé s méně než 50 unikátními pojištěnci.",
+    "Regulační srážky se neuplatní, pokud poskytovatel zdůvodní překročení limitu.",
+]
+
+
+def synthetic_text(paragraphs: int, seed: int = 0) -> str:
+    """Deterministic Czech-like document text."""
+    rng = random.Random(seed)
+    return "\n\n".join(
+        " ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(2, 12)))
+        for _ in range(paragraphs)
+    )
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+# ── Fake server ──────────────────────────────────────────────────────────────
+
+@dataclass
+class ServerConfig:
+    latency: float = 0.5          # fixed seconds per request
+    prefill_rate: float = 5000    # uncached prompt tokens per second
+    token_rate: float = 100       # generated tokens per second
+    error_rate: float = 0.0       # share of requests answered with 500
+    rate_limit_rate: float = 0.0  # share of requests answered with 429
+    retry_after: float = 1.0      # Retry-After of 429 responses (s, before scaling)
+    units_per_1k: float = 2.0     # units generated per 1000 prompt tokens of text
+    time_scale: float = 0.02      # multiplier for all simulated delays
+    seed: int = 0
+
+
+class FakeLLMServer:
+    """OpenAI-compatible /v1/chat/completions stub running in a thread."""
+
+    def __init__(self, config: ServerConfig):
+        self.config = config
+        self.tokenizer = Tokenizer(MODEL)
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._prefixes = set()
+        self.requests = 0
+        self.injected_errors = 0
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                status, headers, payload = server.handle(self.path, body)
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _cached_chars(self, prompt: str) -> int:
+        """Length of the longest previously seen prompt prefix (whole blocks)."""
+        boundaries = range(CACHE_MIN_CHARS, len(prompt) + 1, CACHE_BLOCK_CHARS)
+        hashes = [hashlib.sha1(prompt[:end].encode('utf-8')).digest() for end in boundaries]
+        with self._lock:
+            cached = 0
+            for end, digest in zip(boundaries, hashes):
+                if digest not in self._prefixes:
+                    break
+                cached = end
+            self._prefixes.update(hashes)
+        return cached
+
+    def _fake_units(self, text_tokens: int, prompt: str) -> list:
+        count = max(1, round(text_tokens / 1000 * self.config.units_per_1k))
+        seed = int.from_bytes(hashlib.sha1(prompt.encode('utf-8')).digest()[:4], 'big')
+        rng = random.Random(seed)
+        return [{
+            "id": f"ku-bench-{seed % 10000:04d}-{i:02d}",
+            "type": rng.choice(["rule", "exception", "risk", "condition", "definition"]),
+            "domain": "uhrady",
+            "title": rng.choice(SAMPLE_SENTENCES)[:80],
+            "description": " ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(3)),
+            "version": "2026",
+            "tags": ["benchmark"],
+        } for i in range(count)]
+
+    def handle(self, path: str, body: dict):
+        if not path.endswith('/chat/completions'):
+            return 404, {}, {"error": {"message": f"Unknown endpoint {path}"}}
+        cfg = self.config
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+        if roll < cfg.rate_limit_rate:
+            with self._lock:
+                self.injected_errors += 1
+            return 429, {'Retry-After': f"{cfg.retry_after * cfg.time_scale:.3f}"}, {
+                "error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            with self._lock:
+                self.injected_errors += 1
+            time.sleep(cfg.latency * cfg.time_scale)
+            return 500, {}, {"error": {"message": "Injected server error", "type": "server_error"}}
+
+        messages = body.get('messages') or []
+        prompt = "\n".join(m.get('content') or '' for m in messages)
+        prompt_tokens = self.tokenizer.count(prompt)
+        cached_tokens = self.tokenizer.count(prompt[:self._cached_chars(prompt)])
+        text_tokens = max(0, prompt_tokens - self.tokenizer.count(STATIC_INSTRUCTIONS))
+
+        content = json.dumps({"units": self._fake_units(text_tokens, prompt)}, ensure_ascii=False)
+        completion_tokens = self.tokenizer.count(content)
+
+        delay = (cfg.latency
+                 + (prompt_tokens - cached_tokens) / cfg.prefill_rate
+                 + completion_tokens / cfg.token_rate)
+        time.sleep(delay * cfg.time_scale)
+
+        return 200, {}, {
+            "id": f"chatcmpl-bench-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', MODEL),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens,
+                      "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens,
+                      "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+        }
+
+
+# ── Pipeline ─────────────────────────────────────────────────────────────────
+
+@dataclass
+class BenchCase:
+    chunker: str      # "tokens:<max_tokens>[:<overlap>]"
+    concurrency: int
+    layout: str       # "static-first" or "text-first"
+
+    @property
+    def key(self) -> str:
+        return f"{self.chunker} x{self.concurrency} {self.layout}"
+
+
+def make_chunks(text: str, chunker: str) -> List[str]:
+    kind, _, spec = chunker.partition(':')
+    if kind != 'tokens':
+        raise ValueError(f"Unknown chunker: {chunker} (expected tokens:<max>[:<overlap>])")
+    max_tokens, _, overlap = spec.partition(':')
+    return list(chunk_text(text, int(max_tokens), int(overlap or 0), model=MODEL))
+
+
+def build_messages(chunk: str, layout: str) -> list:
+    if layout == 'static-first':
+        user = f"{STATIC_INSTRUCTIONS}\n\nTEXT:\n{chunk}"
+    elif layout == 'text-first':
+        user = f"TEXT:\n{chunk}\n\n{STATIC_INSTRUCTIONS}"
+    else:
+        raise ValueError(f"Unknown layout: {layout}")
+    return [{"role": "system", "content": "Vracíš pouze validní JSON."},
+            {"role": "user", "content": user}]
+
+
+def _call_with_retries(client, messages: list, backoff_scale: float):
+    """One chunk: (response, successful call latency, retries, seconds lost to retries)."""
+    retries = 0
+    lost = 0.0
+    for attempt in range(MAX_RETRIES + 1):
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                model=MODEL, messages=messages, temperature=0.1, max_tokens=4000,
+                response_format=response_format())
+            return response, time.perf_counter() - started, retries, lost
+        except (APIStatusError, APIConnectionError) as e:
+            status = getattr(e, 'status_code', None)
+            if status is not None and status not in (429, 500, 502, 503, 504):
+                raise
+            if attempt == MAX_RETRIES:
+                raise
+            retry_after = None
+            if getattr(e, 'response', None) is not None:
+                retry_after = e.response.headers.get('retry-after')
+            wait = float(retry_after) if retry_after else 0.5 * 2 ** attempt * backoff_scale
+            time.sleep(wait)
+            retries += 1
+            lost += time.perf_counter() - started
+
+
+def run_case(text: str, case: BenchCase, base_url: str, backoff_scale: float) -> dict:
+    chunks = make_chunks(text, case.chunker)
+    client = OpenAI(base_url=base_url, api_key="bench", max_retries=0, timeout=120)
+    stats = ParseStats()
+    lock = threading.Lock()
+    latencies, chunk_times = [], []
+    totals = {'retries': 0, 'retry_s': 0.0, 'failed': 0, 'units': 0,
+              'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+
+    def process(chunk):
+        started = time.perf_counter()
+        try:
+            response, latency, retries, lost = _call_with_retries(
+                client, build_messages(chunk, case.layout), backoff_scale)
+        except Exception:
+            with lock:
+                totals['failed'] += 1
+            return
+        units = parse_units(response.choices[0].message.content, stats)
+        usage = response.usage
+        cached = getattr(usage.prompt_tokens_details, 'cached_tokens', 0) or 0
+        with lock:
+            latencies.append(latency)
+            chunk_times.append(time.perf_counter() - started)
+            totals['retries'] += retries
+            totals['retry_s'] += lost
+            totals['units'] += len(units)
+            totals['prompt_tokens'] += usage.prompt_tokens
+            totals['cached_tokens'] += cached
+            totals['completion_tokens'] += usage.completion_tokens
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=case.concurrency) as pool:
+        list(pool.map(process, chunks))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        **asdict(case),
+        'chunks': len(chunks),
+        'wall_s': round(wall, 3),
+        'chunks_per_s': round(len(chunks) / wall, 3),
+        'units_per_s': round(totals['units'] / wall, 3),
+        'units': totals['units'],
+        'failed_chunks': totals['failed'],
+        'latency_p50_s': round(percentile(latencies, 50), 4),
+        'latency_p95_s': round(percentile(latencies, 95), 4),
+        'chunk_p95_s': round(percentile(chunk_times, 95), 4),
+        'retries': totals['retries'],
+        'retry_overhead': round(totals['retry_s'] / sum(chunk_times), 4) if chunk_times else 0.0,
+        'prompt_tokens': totals['prompt_tokens'],
+        'cached_share': round(totals['cached_tokens'] / totals['prompt_tokens'], 4)
+                        if totals['prompt_tokens'] else 0.0,
+        'completion_tokens': totals['completion_tokens'],
+        'units_dropped': stats.dropped,
+    }
+
+
+def run_benchmark(text: str, cases: List[BenchCase], server_config: ServerConfig) -> dict:
+    results = []
+    for case in cases:
+        # Fresh server per case, so prompt-cache state does not leak between cases
+        with FakeLLMServer(server_config) as server:
+            results.append(run_case(text, case, server.base_url, server_config.time_scale))
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'model': MODEL,
+        'server': asdict(server_config),
+        'input': {'chars': len(text), 'tokens': Tokenizer(MODEL).count(text)},
+        'results': results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_report(report: dict, out_dir: Path = BENCH_DIR) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"extraction_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def previous_report(out_dir: Path = BENCH_DIR, exclude: Optional[Path] = None) -> Optional[dict]:
+    reports = sorted(p for p in out_dir.glob("extraction_*.json") if p != exclude)
+    if not reports:
+        return None
+    with open(reports[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_report(report: dict, previous: Optional[dict] = None):
+    before = {}
+    if previous:
+        before = {BenchCase(r['chunker'], r['concurrency'], r['layout']).key: r
+                  for r in previous['results']}
+
+    print(f"\nInput: {report['input']['tokens']:,} tokens | time scale {report['server']['time_scale']}")
+    print(f"{'case':<32} {'chunks':>6} {'chunks/s':>9} {'units/s':>8} {'p50 s':>7} {'p95 s':>7} "
+          f"{'retries':>7} {'retry%':>7} {'cached':>7} {'vs prev':>8}")
+    for r in report['results']:
+        key = BenchCase(r['chunker'], r['concurrency'], r['layout']).key
+        delta = ""
+        if key in before and before[key]['chunks_per_s']:
+            delta = f"{r['chunks_per_s'] / before[key]['chunks_per_s'] - 1:+.0%}"
+        print(f"{key:<32} {r['chunks']:>6} {r['chunks_per_s']:>9.2f} {r['units_per_s']:>8.2f} "
+              f"{r['latency_p50_s']:>7.3f} {r['latency_p95_s']:>7.3f} {r['retries']:>7} "
+              f"{r['retry_overhead']:>7.1%} {r['cached_share']:>7.0%} {delta:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extraction throughput benchmark with a fake LLM server')
+    parser.add_argument('--input', type=Path, help='Text or PDF file (default: synthetic text)')
+    parser.add_argument('--paragraphs', type=int, default=400, help='Size of the synthetic text')
+    parser.add_argument('--chunkers', nargs='+', default=['tokens:2500', 'tokens:3500', 'tokens:3500:150'])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4, 8])
+    parser.add_argument('--layouts', nargs='+', default=['static-first', 'text-first'],
+                        choices=['static-first', 'text-first'])
+    defaults = ServerConfig()
+    parser.add_argument('--latency', type=float, default=defaults.latency)
+    parser.add_argument('--prefill-rate', type=float, default=defaults.prefill_rate)
+    parser.add_argument('--token-rate', type=float, default=defaults.token_rate)
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate)
+    parser.add_argument('--rate-limit-rate', type=float, default=defaults.rate_limit_rate)
+    parser.add_argument('--time-scale', type=float, default=defaults.time_scale,
+                        help='Multiplier for simulated delays (1.0 = real time)')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--output-dir', type=Path, default=BENCH_DIR)
+    parser.add_argument('--no-save', action='store_true', help='Do not write the JSON report')
+    args = parser.parse_args()
+
+    if args.input and args.input.suffix.lower() == '.pdf':
+        from pdf_text import extract_pdf_pages
+        text = extract_pdf_pages(args.input).text
+    elif args.input:
+        text = args.input.read_text(encoding='utf-8')
+    else:
+        text = synthetic_text(args.paragraphs, args.seed)
+
+    server_config = ServerConfig(
+        latency=args.latency, prefill_rate=args.prefill_rate, token_rate=args.token_rate,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        time_scale=args.time_scale, seed=args.seed)
+    cases = [BenchCase(chunker, concurrency, layout)
+             for chunker in args.chunkers
+             for concurrency in args.concurrency
+             for layout in args.layouts]
+
+    print(f"Running {len(cases)} benchmark cases...")
+    report = run_benchmark(text, cases, server_config)
+
+    path = None
+    if not args.no_save:
+        path = save_report(report, args.output_dir)
+    print_report(report, previous_report(args.output_dir, exclude=path))
+    if path:
+        print(f"\n✓ Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
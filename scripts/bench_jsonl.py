@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+JSONL parse throughput benchmark.
+
+Compares the per-script loop the loaders used to have
+(`json.loads(line.strip())` over a text file) with jsonl_io's readers:
+streaming `iter_records()` (orjson when installed), parallel
+`read_records()` with several worker counts, and both on a seekable
+.jsonl.zst copy. Throughput is reported in MB/s of uncompressed JSONL and in
+records/s, best of --repeat runs.
+
+The input is a knowledge-base file repeated up to --size-mb, so the numbers
+reflect real unit shapes. Results are saved as JSON under benchmarks/jsonl/
+and compared with the previous run.
+
+Usage:
+    python3 scripts/bench_jsonl.py
+    python3 scripts/bench_jsonl.py --input data/knowledge_base_embeddings.jsonl --size-mb 256 --workers 2 4 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import jsonl_io
+from jsonl_io import iter_records, read_records
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BENCH_DIR = PROJECT_ROOT / "benchmarks" / "jsonl"
+DEFAULT_INPUT = PROJECT_ROOT / "data" / "knowledge_base_mvp.jsonl"
+
+
+def make_input(source: Path, size_mb: float, out_dir: Path) -> List[Path]:
+    """`source` repeated to about size_mb, as .jsonl and .jsonl.zst."""
+    lines = [line for line in source.read_bytes().splitlines(keepends=True) if line.strip()]
+    block = b"".join(lines)
+    repeats = max(1, round(size_mb * 1024 * 1024 / len(block)))
+    plain = out_dir / "bench.jsonl"
+    with open(plain, 'wb') as f:
+        for _ in range(repeats):
+            f.write(block)
+    compressed = jsonl_io.compress_file(plain, out_dir / "bench.jsonl.zst")
+    return [plain, compressed]
+
+
+def json_loop(path: Path) -> int:
+    """The loaders' former loop: stdlib json, one line at a time."""
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                json.loads(line)
+                count += 1
+    return count
+
+
+def cases(plain: Path, compressed: Path, workers: List[int]) -> List[tuple]:
+    result = [
+        ("json loop", plain, json_loop),
+        ("iter_records", plain, lambda p: sum(1 for _ in iter_records(p))),
+        ("iter_records .zst", compressed, lambda p: sum(1 for _ in iter_records(p))),
+    ]
+    for n in workers:
+        result.append((f"read_records -j{n}", plain, lambda p, n=n: len(read_records(p, workers=n))))
+        result.append((f"read_records .zst -j{n}", compressed, lambda p, n=n: len(read_records(p, workers=n))))
+    return result
+
+
+def measure(fn: Callable[[Path], int], path: Path, repeat: int) -> tuple:
+    best = None
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = fn(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def run_benchmark(source: Path, size_mb: float, workers: List[int], repeat: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench_jsonl_") as tmp:
+        plain, compressed = make_input(source, size_mb, Path(tmp))
+        data_mb = plain.stat().st_size / (1024 * 1024)
+        results = []
+        for name, path, fn in cases(plain, compressed, workers):
+            seconds, count = measure(fn, path, repeat)
+            results.append({
+                'case': name,
+                'seconds': round(seconds, 4),
+                'records': count,
+                'mb_per_s': round(data_mb / seconds, 1),
+                'records_per_s': round(count / seconds),
+            })
+        return {
+            'created_at': datetime.now().isoformat(),
+            'git_commit': _git_commit(),
+            'backend': 'orjson' if jsonl_io.orjson is not None else 'json',
+            'cpus': os.cpu_count(),
+            'input': {
+                'source': str(source),
+                'size_mb': round(data_mb, 1),
+                'compressed_mb': round(compressed.stat().st_size / (1024 * 1024), 1),
+            },
+            'results': results,
+        }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_report(report: dict, out_dir: Path = BENCH_DIR) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"jsonl_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def previous_report(out_dir: Path = BENCH_DIR, exclude: Optional[Path] = None) -> Optional[dict]:
+    reports = sorted(p for p in out_dir.glob("jsonl_*.json") if p != exclude)
+    if not reports:
+        return None
+    with open(reports[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_report(report: dict, previous: Optional[dict] = None):
+    before = {r['case']: r for r in previous['results']} if previous else {}
+    baseline = report['results'][0]['mb_per_s']
+    info = report['input']
+    print(f"\nInput: {info['size_mb']} MB ({info['compressed_mb']} MB as .zst) | "
+          f"parser: {report['backend']} | {report['cpus']} CPUs")
+    print(f"{'case':<26} {'seconds':>8} {'MB/s':>8} {'records/s':>11} {'vs loop':>8} {'vs prev':>8}")
+    for r in report['results']:
+        delta = ""
+        if r['case'] in before and before[r['case']]['mb_per_s']:
+            delta = f"{r['mb_per_s'] / before[r['case']]['mb_per_s'] - 1:+.0%}"
+        print(f"{r['case']:<26} {r['seconds']:>8.3f} {r['mb_per_s']:>8.1f} {r['records_per_s']:>11,} "
+              f"{r['mb_per_s'] / baseline:>7.1f}x {delta:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSONL parse throughput benchmark')
+    parser.add_argument('--input', type=Path, default=DEFAULT_INPUT, help='JSONL file whose lines are repeated')
+    parser.add_argument('--size-mb', type=float, default=64, help='Size of the benchmark file')
+    parser.add_argument('--workers', nargs='+', type=int, default=[2, 4], help='read_records worker counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case (best is reported)')
+    parser.add_argument('--output-dir', type=Path, default=BENCH_DIR)
+    parser.add_argument('--no-save', action='store_true', help='Do not write the JSON report')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.input, args.size_mb, args.workers, args.repeat)
+    previous = None
+    if not args.no_save:
+        path = save_report(report, args.output_dir)
+        previous = previous_report(args.output_dir, exclude=path)
+        print(f"Report: {path}")
+    print_report(report, previous)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
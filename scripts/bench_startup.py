@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+API cold-start benchmark.
+
+Starts `api/rag_api.py --profile-startup --json` in --repeat fresh Python
+processes and reports the median time of each startup phase: importing the
+web stack, importing numpy and the index modules, loading the data, loading
+the query encoder, verifying the index, the first search, and importing the
+OpenAI client (paid on the first /qa request, not at startup). "ready" is the
+time until the API can answer a search; "process" is the whole wall time of
+the subprocess, interpreter start-up and exit included.
+
+Results are saved as JSON under benchmarks/startup/ and compared with the
+previous run, so a new heavy import shows up as a regression.
+
+Usage:
+    python3 scripts/bench_startup.py
+    python3 scripts/bench_startup.py --index-dir build/index --repeat 9
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BENCH_DIR = PROJECT_ROOT / "benchmarks" / "startup"
+API_SCRIPT = PROJECT_ROOT / "api" / "rag_api.py"
+
+# Phases a request can wait for before the first search is answered
+LAZY_PHASES = ("import openai (first /qa)",)
+
+
+def run_once(env: dict) -> tuple:
+    """One cold start: (process wall seconds, {phase: seconds})."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, str(API_SCRIPT), '--profile-startup', '--json'],
+                          capture_output=True, text=True, env=env)
+    elapsed = time.perf_counter() - started
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup profile failed (exit {proc.returncode}): {proc.stderr.strip()[-500:]}")
+    phases = json.loads(lines[-1])['phases']
+    return elapsed, {p['phase']: p['seconds'] for p in phases}
+
+
+def run_benchmark(repeat: int, data_dir: Optional[Path] = None, index_dir: Optional[Path] = None) -> dict:
+    env = dict(os.environ)
+    if data_dir is not None:
+        env['DATA_DIR'] = str(data_dir)
+    if index_dir is not None:
+        env['INDEX_DIR'] = str(index_dir)
+
+    runs = [run_once(env) for _ in range(repeat)]
+    names: List[str] = []
+    for _, phases in runs:
+        names.extend(name for name in phases if name not in names)
+    results = []
+    for name in names:
+        samples = [phases[name] for _, phases in runs if name in phases]
+        results.append({
+            'phase': name,
+            'median_ms': round(statistics.median(samples) * 1000, 1),
+            'min_ms': round(min(samples) * 1000, 1),
+            'max_ms': round(max(samples) * 1000, 1),
+        })
+    ready = [sum(s for name, s in phases.items() if name not in LAZY_PHASES) for _, phases in runs]
+    return {
+        'created_at': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'repeat': repeat,
+        'data_dir': env.get('DATA_DIR'),
+        'index_dir': env.get('INDEX_DIR'),
+        'ready_ms': round(statistics.median(ready) * 1000, 1),
+        'process_ms': round(statistics.median(elapsed for elapsed, _ in runs) * 1000, 1),
+        'results': results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_report(report: dict, out_dir: Path = BENCH_DIR) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"startup_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def previous_report(out_dir: Path = BENCH_DIR, exclude: Optional[Path] = None) -> Optional[dict]:
+    reports = sorted(p for p in out_dir.glob("startup_*.json") if p != exclude)
+    if not reports:
+        return None
+    with open(reports[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _delta(now: float, before: Optional[float]) -> str:
+    return f"{now / before - 1:+.0%}" if before else ""
+
+
+def print_report(report: dict, previous: Optional[dict] = None):
+    before = {r['phase']: r['median_ms'] for r in previous['results']} if previous else {}
+    print(f"\nCold start, median of {report['repeat']} runs | Python {report['python']} | {report['cpus']} CPUs")
+    print(f"{'phase':<34} {'median ms':>10} {'min':>8} {'max':>8} {'vs prev':>8}")
+    for r in report['results']:
+        print(f"{r['phase']:<34} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f} {r['max_ms']:>8.1f} "
+              f"{_delta(r['median_ms'], before.get(r['phase'])):>8}")
+    for key, label in (('ready_ms', "ready to search"), ('process_ms', "process wall time")):
+        print(f"{label:<34} {report[key]:>10.1f} {'':>8} {'':>8} "
+              f"{_delta(report[key], previous.get(key) if previous else None):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API cold-start benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Cold starts (the median is reported)')
+    parser.add_argument('--data-dir', type=Path, help='DATA_DIR for the API (default: its environment)')
+    parser.add_argument('--index-dir', type=Path, help='INDEX_DIR for the API (default: DATA_DIR/index)')
+    parser.add_argument('--output-dir', type=Path, default=BENCH_DIR)
+    parser.add_argument('--no-save', action='store_true', help='Do not write the JSON report')
+    args = parser.parse_args()
+
+    try:
+        report = run_benchmark(args.repeat, args.data_dir, args.index_dir)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    previous = None
+    if not args.no_save:
+        path = save_report(report, args.output_dir)
+        previous = previous_report(args.output_dir, exclude=path)
+        print(f"Report: {path}")
+    print_report(report, previous)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
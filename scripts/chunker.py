@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Token-aware text chunker for the LLM extraction scripts.
+
+Chunks are measured in model tokens rather than characters:
+- tokens are counted with tiktoken (in requirements.txt), so chunks match
+  the model's context budget exactly; without it, or when its encoding
+  cannot be loaded, a conservative characters-per-token estimate is used
+  and a warning is printed,
+- text is split on paragraphs; paragraphs over the budget are split on
+  sentence boundaries, then lines, and only as a last resort mid-sentence,
+- consecutive chunks can share `overlap_tokens` of trailing context,
+- chunks are yielded lazily, so callers can start LLM calls before the
+  whole document is chunked.
+
+Usage:
+    from chunker import chunk_text
+
+    for chunk in chunk_text(text, max_tokens=2500, overlap_tokens=150):
+        ...
+
+    python3 scripts/chunker.py document.txt --max-tokens 2500
+"""
+import argparse
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+# Model whose tokenizer is used for counting
+DEFAULT_MODEL = "gpt-4.1-mini"
+
+# Fallback estimate when tiktoken is not installed (Czech legal text is
+# ~3.3 chars/token with o200k_base; erring low keeps chunks within budget)
+CHARS_PER_TOKEN = 3.0
+
+PARAGRAPH_SEPARATOR = "\n\n"
+SEPARATOR_TOKENS = 1
+
+# Sentence end followed by the start of a new sentence. Requiring an upper-case
+# letter keeps abbreviations like "č. 3" or "odst. 2" in one piece.
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ„"(§])')
+
+
+class Tokenizer:
+    """Token counting with tiktoken, or an estimate if it is unavailable."""
+
+    def __init__(self, model: str = DEFAULT_MODEL):
+        self.model = model
+        self._encoding = _load_encoding(model)
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """Cut text into pieces of at most max_tokens, ignoring boundaries."""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return [self._encoding.decode(tokens[i:i + max_tokens])
+                    for i in range(0, len(tokens), max_tokens)]
+        size = max(1, int(max_tokens * CHARS_PER_TOKEN))
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        print(f"⚠ tiktoken not installed; estimating tokens at {CHARS_PER_TOKEN} chars/token")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encodings are downloaded on first use; offline that fails
+        print(f"⚠ tiktoken encoding for {model} unavailable ({e}); estimating tokens")
+        return None
+
+
+def _pieces(text: str, max_tokens: int, tokenizer: Tokenizer) -> Iterator[Tuple[str, int]]:
+    """Yield (piece, tokens) with every piece within max_tokens.
+
+    Paragraphs are kept whole when they fit; otherwise they are broken into
+    sentences, then lines, then hard cuts.
+    """
+    for paragraph in text.split(PARAGRAPH_SEPARATOR):
+        if not paragraph.strip():
+            continue
+        tokens = tokenizer.count(paragraph)
+        if tokens <= max_tokens:
+            yield paragraph, tokens
+            continue
+        yield from _split_oversized(paragraph, max_tokens, tokenizer)
+
+
+def _split_oversized(paragraph: str, max_tokens: int, tokenizer: Tokenizer) -> Iterator[Tuple[str, int]]:
+    for splitter, joiner in ((SENTENCE_BOUNDARY.split, " "), (str.splitlines, "\n")):
+        parts = [p for p in splitter(paragraph) if p.strip()]
+        if len(parts) > 1:
+            break
+    else:
+        for part in tokenizer.split(paragraph, max_tokens):
+            yield part, tokenizer.count(part)
+        return
+
+    # Regroup the parts into pieces that fill the budget
+    current, current_tokens = [], 0
+    for part in parts:
+        tokens = tokenizer.count(part)
+        if tokens > max_tokens:
+            if current:
+                yield joiner.join(current), current_tokens
+                current, current_tokens = [], 0
+            yield from _split_oversized(part, max_tokens, tokenizer)
+            continue
+        if current and current_tokens + 1 + tokens > max_tokens:
+            yield joiner.join(current), current_tokens
+            current, current_tokens = [], 0
+        current_tokens += tokens + (1 if current else 0)
+        current.append(part)
+    if current:
+        yield joiner.join(current), current_tokens
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0,
+               model: str = DEFAULT_MODEL, tokenizer: Tokenizer = None) -> Iterator[str]:
+    """Yield chunks of text of at most max_tokens tokens each.
+
+    Each chunk after the first starts with up to overlap_tokens of whole
+    pieces (paragraphs or sentences) from the end of the previous chunk.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be between 0 and max_tokens")
+    tokenizer = tokenizer or Tokenizer(model)
+
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    fresh = False  # current holds something beyond the overlap
+
+    for piece, tokens in _pieces(text, max_tokens, tokenizer):
+        needed = tokens + (SEPARATOR_TOKENS if current else 0)
+        if current and current_tokens + needed > max_tokens:
+            if fresh:
+                yield PARAGRAPH_SEPARATOR.join(p for p, _ in current)
+            current, current_tokens = _overlap_tail(current, overlap_tokens, max_tokens - tokens)
+            fresh = False
+            needed = tokens + (SEPARATOR_TOKENS if current else 0)
+        current.append((piece, tokens))
+        current_tokens += needed
+        fresh = True
+
+    if fresh:
+        yield PARAGRAPH_SEPARATOR.join(p for p, _ in current)
+
+
+def _overlap_tail(pieces: List[Tuple[str, int]], overlap_tokens: int, room: int):
+    """Trailing pieces totalling at most overlap_tokens (and fitting in room)."""
+    limit = min(overlap_tokens, room - SEPARATOR_TOKENS)
+    tail, total = [], 0
+    for piece, tokens in reversed(pieces):
+        cost = tokens + (SEPARATOR_TOKENS if tail else 0)
+        if total + cost > limit:
+            break
+        tail.insert(0, (piece, tokens))
+        total += cost
+    return tail, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show how a text would be chunked')
+    parser.add_argument('source', type=Path, help='Text file (or PDF)')
+    parser.add_argument('--max-tokens', type=int, default=2500)
+    parser.add_argument('--overlap', type=int, default=0)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    args = parser.parse_args()
+
+    if args.source.suffix.lower() == '.pdf':
+        from pdf_text import extract_pdf_pages
+        text = extract_pdf_pages(args.source).text
+    else:
+        text = args.source.read_text(encoding='utf-8')
+
+    tokenizer = Tokenizer(args.model)
+    print(f"Tokenizer: {'tiktoken' if tokenizer.exact else f'estimate ({CHARS_PER_TOKEN} chars/token)'}")
+    print(f"Document: {tokenizer.count(text):,} tokens")
+    for i, chunk in enumerate(chunk_text(text, args.max_tokens, args.overlap, tokenizer=tokenizer), 1):
+        print(f"  chunk {i}: {tokenizer.count(chunk):,} tokens, {len(chunk):,} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,181 +1,480 @@
 #!/usr/bin/env python3
 """
 Data Audit Script for Knowledge Base Analysis
-Analyzes the knowledge_base_final.jsonl file and generates comprehensive statistics.
+Audits every knowledge-base JSONL file (data/*.jsonl, data/extracted/*.jsonl)
+and generates comprehensive statistics plus a cross-version drift report.
+
+Each file is read once, in a worker process, into an `AuditAccumulator`:
+counters, min/max/sum and length histograms that merge by addition, so
+per-directory totals are plain sums of the per-file results. Checks that
+need every ID (duplicates, orphan references) and the version drift run as
+external sorts (kb_merge.external_sort), so memory does not grow with the
+corpus. The ID checks of a directory run over the union of its files, since
+data/ holds overlapping releases of the same units.
+
+Outputs:
+- docs/analysis/data_statistics.json: statistics of the primary dataset
+- docs/analysis/data_audit.json: statistics of every file and directory
+- docs/analysis/drift_report.md: units added/removed/changed per domain
+  between consecutive KB versions
+
+Usage:
+    python3 scripts/data_audit.py
+    python3 scripts/data_audit.py --drift data/knowledge_base_final.jsonl data/knowledge_base_mvp.jsonl
 """
 
+import argparse
+import hashlib
 import json
-from pathlib import Path
+import os
+import sys
+import tempfile
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-import statistics
+from itertools import groupby
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import ZST_SUFFIX, resolve_path
+from kb_merge import external_sort, iter_units
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / 'data'
+ANALYSIS_DIR = PROJECT_ROOT / 'docs' / 'analysis'
+PRIMARY_DATASET = DATA_DIR / 'knowledge_base_final.jsonl'
+STATISTICS_PATH = ANALYSIS_DIR / 'data_statistics.json'
+AUDIT_PATH = ANALYSIS_DIR / 'data_audit.json'
+DRIFT_REPORT_PATH = ANALYSIS_DIR / 'drift_report.md'
+
+# Files audited by default (.jsonl, or .jsonl.zst when only that exists);
+# embeddings are vectors, not knowledge units
+AUDIT_GLOBS = [DATA_DIR / '*.jsonl', DATA_DIR / 'extracted' / '*.jsonl']
+AUDIT_EXCLUDE = {'knowledge_base_embeddings.jsonl'}
+
+# KB releases in build order (pilot → Phase 1 → dedup → Phase 2 → Phase 3 MVP)
+KB_VERSIONS = [
+    'pilot_knowledge_units.jsonl',
+    'knowledge_base_expanded.jsonl',
+    'knowledge_base_v2.jsonl',
+    'knowledge_base_v3.jsonl',
+    'knowledge_base_final.jsonl',
+    'knowledge_base_mvp.jsonl',
+]
 
-def load_jsonl(file_path: Path) -> list[dict]:
-    """Load JSONL file into list of dictionaries."""
-    data = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                data.append(json.loads(line))
-    return data
+ORPHAN_SAMPLES = 10
+RUN_SIZE = 50_000
 
-def analyze_dataset(data: list[dict]) -> dict:
-    """Perform comprehensive analysis of the dataset."""
 
-    # Basic counts
-    total_units = len(data)
+@dataclass
+class LengthStats:
+    """Mergeable length statistics; the histogram gives an exact median."""
+    count: int = 0
+    total: int = 0
+    min: Optional[int] = None
+    max: Optional[int] = None
+    histogram: Counter = field(default_factory=Counter)
 
-    # Domain distribution
-    domain_counts = Counter(unit.get('domain', 'unknown') for unit in data)
+    def add(self, value: int):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.histogram[value] += 1
 
-    # Type distribution
-    type_counts = Counter(unit.get('type', 'unknown') for unit in data)
+    def merge(self, other: 'LengthStats'):
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        self.histogram.update(other.histogram)
 
-    # Version/year distribution
-    version_counts = Counter(unit.get('version', 'unknown') for unit in data)
+    def median(self):
+        if not self.count:
+            return 0
+        ordered = sorted(self.histogram.items())
+
+        def nth(n):
+            seen = 0
+            for value, count in ordered:
+                seen += count
+                if seen > n:
+                    return value
+
+        middle = self.count // 2
+        if self.count % 2:
+            return nth(middle)
+        return (nth(middle - 1) + nth(middle)) / 2
+
+    def summary(self, median=True) -> dict:
+        result = {
+            'min': self.min or 0,
+            'max': self.max or 0,
+            'mean': round(self.total / self.count, 2) if self.count else 0,
+        }
+        if median:
+            result['median'] = self.median()
+        return result
+
+
+@dataclass
+class AuditAccumulator:
+    """Statistics of a stream of units, filled in one pass and mergeable."""
+    total_units: int = 0
+    domains: Counter = field(default_factory=Counter)
+    types: Counter = field(default_factory=Counter)
+    versions: Counter = field(default_factory=Counter)
+    validity_years: Counter = field(default_factory=Counter)
+    specialties: Counter = field(default_factory=Counter)
+    units_with_all: int = 0
+    sources: Counter = field(default_factory=Counter)
+    description_length: LengthStats = field(default_factory=LengthStats)
+    title_length: LengthStats = field(default_factory=LengthStats)
+    content_size: LengthStats = field(default_factory=LengthStats)
+    related_references: int = 0
+    units_with_no_relations: int = 0
+    tags: Counter = field(default_factory=Counter)
+    tag_assignments: int = 0
+    # Filled in by the ID checks (check_ids); not additive across files
+    unique_ids: int = 0
+    orphan_count: int = 0
+    orphan_samples: list = field(default_factory=list)
+
+    def add(self, unit: dict):
+        self.total_units += 1
+        self.domains[unit.get('domain', 'unknown')] += 1
+        self.types[unit.get('type', 'unknown')] += 1
+        self.versions[unit.get('version', 'unknown')] += 1
 
-    # Specialty analysis
-    specialty_counts = Counter()
-    specialty_coverage = defaultdict(list)
-    units_with_all = 0
-    for unit in data:
         applicability = unit.get('applicability', {})
         specialties = applicability.get('specialties', [])
-        if specialties == ['all'] or 'all' in specialties:
-            units_with_all += 1
-            specialty_counts['all'] += 1
+        if 'all' in specialties:
+            self.units_with_all += 1
+            self.specialties['all'] += 1
         else:
-            for spec in specialties:
-                specialty_counts[spec] += 1
-                specialty_coverage[spec].append(unit['id'])
-
-    # Source analysis
-    source_counts = Counter()
-    for unit in data:
-        source = unit.get('source', {})
-        source_name = source.get('name', 'unknown')
-        source_counts[source_name] += 1
-
-    # Content length analysis
-    description_lengths = []
-    title_lengths = []
-    content_sizes = []
-
-    for unit in data:
-        description_lengths.append(len(unit.get('description', '')))
-        title_lengths.append(len(unit.get('title', '')))
-        content_sizes.append(len(json.dumps(unit.get('content', {}), ensure_ascii=False)))
-
-    # Related units analysis
-    related_units_counts = []
-    orphan_references = []
-    all_ids = {unit['id'] for unit in data}
-
-    for unit in data:
+            self.specialties.update(specialties)
+        valid_from = applicability.get('valid_from', '')
+        if valid_from:
+            self.validity_years[valid_from.split('-')[0]] += 1
+
+        self.sources[unit.get('source', {}).get('name', 'unknown')] += 1
+        self.description_length.add(len(unit.get('description', '')))
+        self.title_length.add(len(unit.get('title', '')))
+        self.content_size.add(len(json.dumps(unit.get('content', {}), ensure_ascii=False)))
+
         related = unit.get('related_units', [])
-        related_units_counts.append(len(related))
-        for ref in related:
-            if ref not in all_ids:
-                orphan_references.append({'unit_id': unit['id'], 'orphan_ref': ref})
-
-    # Tags analysis
-    all_tags = Counter()
-    tags_per_unit = []
-    for unit in data:
+        self.related_references += len(related)
+        self.units_with_no_relations += not related
+
         tags = unit.get('tags', [])
-        tags_per_unit.append(len(tags))
-        for tag in tags:
-            all_tags[tag] += 1
+        self.tag_assignments += len(tags)
+        self.tags.update(tags)
 
-    # Validity period analysis
-    validity_years = Counter()
-    for unit in data:
-        applicability = unit.get('applicability', {})
-        valid_from = applicability.get('valid_from', '')
-        if valid_from:
-            year = valid_from.split('-')[0]
-            validity_years[year] += 1
-
-    # Compile statistics
-    stats = {
-        'metadata': {
-            'analysis_date': datetime.now().isoformat(),
-            'source_file': 'data/knowledge_base_final.jsonl'
-        },
-        'overview': {
-            'total_units': total_units,
-            'unique_ids': len(all_ids),
-            'duplicates': total_units - len(all_ids)
-        },
-        'domain_distribution': dict(domain_counts.most_common()),
-        'type_distribution': dict(type_counts.most_common()),
-        'version_distribution': dict(version_counts.most_common()),
-        'validity_year_distribution': dict(validity_years.most_common()),
-        'specialty_coverage': {
-            'total_specialty_assignments': sum(specialty_counts.values()),
-            'units_with_all_specialties': units_with_all,
-            'unique_specialties': len(specialty_counts),
-            'specialty_distribution': dict(specialty_counts.most_common(30))
-        },
-        'source_distribution': dict(source_counts.most_common()),
-        'content_quality': {
-            'description_length': {
-                'min': min(description_lengths) if description_lengths else 0,
-                'max': max(description_lengths) if description_lengths else 0,
-                'mean': round(statistics.mean(description_lengths), 2) if description_lengths else 0,
-                'median': statistics.median(description_lengths) if description_lengths else 0
+    def merge(self, other: 'AuditAccumulator') -> 'AuditAccumulator':
+        """Add another accumulator's counts.
+
+        The ID statistics are left alone: files may share IDs, so they are
+        computed by check_ids() over the merged files instead.
+        """
+        for name in ('total_units', 'units_with_all', 'related_references', 'units_with_no_relations',
+                     'tag_assignments'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in ('domains', 'types', 'versions', 'validity_years', 'specialties', 'sources', 'tags'):
+            getattr(self, name).update(getattr(other, name))
+        for name in ('description_length', 'title_length', 'content_size'):
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def set_ids(self, other: 'AuditAccumulator') -> 'AuditAccumulator':
+        """Take the ID statistics of `other`, e.g. check_directory_ids() of the merged files."""
+        self.unique_ids, self.orphan_count, self.orphan_samples = \
+            other.unique_ids, other.orphan_count, list(other.orphan_samples)
+        return self
+
+    def to_stats(self, source_file: str) -> dict:
+        """The data_statistics.json structure."""
+        total = self.total_units
+        return {
+            'metadata': {
+                'analysis_date': datetime.now().isoformat(),
+                'source_file': source_file
+            },
+            'overview': {
+                'total_units': total,
+                'unique_ids': self.unique_ids,
+                'duplicates': total - self.unique_ids
+            },
+            'domain_distribution': dict(self.domains.most_common()),
+            'type_distribution': dict(self.types.most_common()),
+            'version_distribution': dict(self.versions.most_common()),
+            'validity_year_distribution': dict(self.validity_years.most_common()),
+            'specialty_coverage': {
+                'total_specialty_assignments': sum(self.specialties.values()),
+                'units_with_all_specialties': self.units_with_all,
+                'unique_specialties': len(self.specialties),
+                'specialty_distribution': dict(self.specialties.most_common(30))
             },
-            'title_length': {
-                'min': min(title_lengths) if title_lengths else 0,
-                'max': max(title_lengths) if title_lengths else 0,
-                'mean': round(statistics.mean(title_lengths), 2) if title_lengths else 0,
-                'median': statistics.median(title_lengths) if title_lengths else 0
+            'source_distribution': dict(self.sources.most_common()),
+            'content_quality': {
+                'description_length': self.description_length.summary(),
+                'title_length': self.title_length.summary(),
+                'content_size_bytes': self.content_size.summary(median=False)
             },
-            'content_size_bytes': {
-                'min': min(content_sizes) if content_sizes else 0,
-                'max': max(content_sizes) if content_sizes else 0,
-                'mean': round(statistics.mean(content_sizes), 2) if content_sizes else 0
+            'relationships': {
+                'total_related_references': self.related_references,
+                'mean_related_per_unit': round(self.related_references / total, 2) if total else 0,
+                'units_with_no_relations': self.units_with_no_relations,
+                'orphan_references_count': self.orphan_count,
+                'orphan_references': self.orphan_samples  # First 10 for reference
+            },
+            'tags': {
+                'total_tag_assignments': self.tag_assignments,
+                'unique_tags': len(self.tags),
+                'mean_tags_per_unit': round(self.tag_assignments / total, 2) if total else 0,
+                'top_30_tags': dict(self.tags.most_common(30))
             }
-        },
-        'relationships': {
-            'total_related_references': sum(related_units_counts),
-            'mean_related_per_unit': round(statistics.mean(related_units_counts), 2) if related_units_counts else 0,
-            'units_with_no_relations': related_units_counts.count(0),
-            'orphan_references_count': len(orphan_references),
-            'orphan_references': orphan_references[:10]  # First 10 for reference
-        },
-        'tags': {
-            'total_tag_assignments': sum(tags_per_unit),
-            'unique_tags': len(all_tags),
-            'mean_tags_per_unit': round(statistics.mean(tags_per_unit), 2) if tags_per_unit else 0,
-            'top_30_tags': dict(all_tags.most_common(30))
         }
-    }
 
-    return stats
+
+def unit_digest(unit: dict) -> str:
+    """Fingerprint of a unit's full content, independent of key order."""
+    canonical = json.dumps(unit, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.md5(canonical.encode('utf-8')).hexdigest()
+
+
+def check_ids(units, acc: AuditAccumulator, run_size: int = RUN_SIZE) -> AuditAccumulator:
+    """Count the unique IDs and orphan references of `units` into `acc` via an external sort.
+
+    Sort records are "<id>\\t0" for a unit and "<id>\\t1\\t<unit id>" for a
+    reference, so each ID's definitions sort before the references to it.
+    """
+    def id_records():
+        for unit in units:
+            unit_id = json.dumps(unit.get('id'), ensure_ascii=False)
+            yield f"{unit_id}\t0\n"
+            for ref in unit.get('related_units', []):
+                yield f"{json.dumps(ref, ensure_ascii=False)}\t1\t{unit_id}\n"
+
+    acc.unique_ids, acc.orphan_count, acc.orphan_samples = 0, 0, []
+    with tempfile.TemporaryDirectory(prefix='kb_audit_') as tmp:
+        records = external_sort(id_records(), Path(tmp), run_size)
+        for key, group in groupby(records, key=lambda line: line.split('\t', 1)[0]):
+            defined = False
+            for line in group:
+                parts = line.rstrip('\n').split('\t')
+                if parts[1] == '0':
+                    defined = True
+                elif not defined:
+                    acc.orphan_count += 1
+                    if len(acc.orphan_samples) < ORPHAN_SAMPLES:
+                        acc.orphan_samples.append({'unit_id': json.loads(parts[2]),
+                                                   'orphan_ref': json.loads(key)})
+            acc.unique_ids += defined
+    return acc
+
+
+def audit_file(path: Path, run_size: int = RUN_SIZE) -> AuditAccumulator:
+    """One pass over a file; IDs and references are spilled to an external sort."""
+    acc = AuditAccumulator()
+
+    def units():
+        for unit in iter_units(Path(path)):
+            acc.add(unit)
+            yield unit
+
+    return check_ids(units(), acc, run_size)
+
+
+def check_directory_ids(paths, run_size: int = RUN_SIZE) -> AuditAccumulator:
+    """ID statistics over the union of several files (only the ID fields are filled in)."""
+    def units():
+        for path in paths:
+            yield from iter_units(Path(path))
+
+    return check_ids(units(), AuditAccumulator(), run_size)
+
+
+def drift(old_path: Path, new_path: Path, run_size: int = RUN_SIZE) -> dict:
+    """Units added, removed and changed per domain between two versions.
+
+    Both files go into one external sort keyed by ID; each ID group then
+    holds the old ("0") and new ("1") fingerprints side by side.
+    """
+    counts = defaultdict(Counter)
+
+    def records():
+        for side, path in (('0', old_path), ('1', new_path)):
+            for unit in iter_units(Path(path)):
+                unit_id = json.dumps(unit.get('id'), ensure_ascii=False)
+                yield f"{unit_id}\t{side}\t{unit.get('domain', 'unknown')}\t{unit_digest(unit)}\n"
+
+    with tempfile.TemporaryDirectory(prefix='kb_drift_') as tmp:
+        for _, group in groupby(external_sort(records(), Path(tmp), run_size),
+                                key=lambda line: line.split('\t', 1)[0]):
+            sides = defaultdict(list)
+            for line in group:
+                _, side, domain, digest = line.rstrip('\n').split('\t')
+                sides[side].append((domain, digest))
+            old, new = sides.get('0'), sides.get('1')
+            if not old:
+                counts[new[0][0]]['added'] += 1
+            elif not new:
+                counts[old[0][0]]['removed'] += 1
+            elif sorted(d for _, d in old) != sorted(d for _, d in new):
+                counts[new[0][0]]['changed'] += 1
+            else:
+                counts[new[0][0]]['unchanged'] += 1
+
+    domains = {domain: {key: c[key] for key in ('added', 'removed', 'changed', 'unchanged')}
+               for domain, c in sorted(counts.items())}
+    totals = {key: sum(d[key] for d in domains.values()) for key in ('added', 'removed', 'changed', 'unchanged')}
+    return {'from': Path(old_path).name, 'to': Path(new_path).name, 'totals': totals, 'domains': domains}
+
+
+def audit_files(paths, workers: Optional[int] = None) -> dict:
+    """Audit files in parallel; returns {path: AuditAccumulator}."""
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=workers or min(len(paths), os.cpu_count() or 1) or 1) as pool:
+        return dict(zip(paths, pool.map(audit_file, paths)))
+
+
+def audit_directories(paths_by_directory: dict, workers: Optional[int] = None) -> dict:
+    """check_directory_ids() of each {name: [paths]}, in parallel; returns {name: AuditAccumulator}."""
+    names = list(paths_by_directory)
+    if not names:
+        return {}
+    with ProcessPoolExecutor(max_workers=workers or min(len(names), os.cpu_count() or 1)) as pool:
+        return dict(zip(names, pool.map(check_directory_ids, (paths_by_directory[n] for n in names))))
+
+
+def drift_chain(versions, workers: Optional[int] = None) -> list:
+    """Drift between each pair of consecutive versions, in parallel."""
+    pairs = list(zip(versions, versions[1:]))
+    if not pairs:
+        return []
+    with ProcessPoolExecutor(max_workers=workers or min(len(pairs), os.cpu_count() or 1)) as pool:
+        return list(pool.map(drift, *zip(*pairs)))
+
+
+def default_audit_files() -> list:
+    files = []
+    for pattern in AUDIT_GLOBS:
+        names = {p.name.removesuffix(ZST_SUFFIX) for p in pattern.parent.glob(pattern.name + '*')
+                 if p.name.endswith(('.jsonl', '.jsonl' + ZST_SUFFIX))}
+        files.extend(resolve_path(pattern.parent / name) for name in sorted(names - AUDIT_EXCLUDE))
+    return files
+
+
+def relative(path: Path) -> str:
+    try:
+        return str(Path(path).resolve().relative_to(PROJECT_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def generate_drift_report(drifts: list, report_path: Path):
+    """Markdown report of the version-to-version drift."""
+    report = f"""---
+type: report
+title: Knowledge Base Version Drift
+created: {datetime.now().strftime('%Y-%m-%d')}
+tags:
+  - data-audit
+  - drift
+related:
+  - "[[data_statistics]]"
+---
+
+# Knowledge Base Version Drift
+
+Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+Units are matched by ID; "changed" means any field differs.
+
+## Summary
+
+| From | To | Added | Removed | Changed | Unchanged |
+|------|----|-------|---------|---------|-----------|
+"""
+    for d in drifts:
+        t = d['totals']
+        report += f"| {d['from']} | {d['to']} | +{t['added']} | -{t['removed']} | {t['changed']} | {t['unchanged']} |\n"
+
+    for d in drifts:
+        report += f"""
+## {d['from']} → {d['to']}
+
+| Domain | Added | Removed | Changed | Unchanged |
+|--------|-------|---------|---------|-----------|
+"""
+        for domain, c in d['domains'].items():
+            report += f"| {domain} | +{c['added']} | -{c['removed']} | {c['changed']} | {c['unchanged']} |\n"
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(report)
+    return report_path
+
 
 def main():
-    # Paths
-    project_root = Path(__file__).parent.parent
-    data_file = project_root / 'data' / 'knowledge_base_final.jsonl'
-    output_file = project_root / 'docs' / 'analysis' / 'data_statistics.json'
+    parser = argparse.ArgumentParser(description="Audit knowledge-base JSONL files")
+    parser.add_argument('files', nargs='*', type=Path,
+                        help="Files to audit (default: data/*.jsonl and data/extracted/*.jsonl)")
+    parser.add_argument('--primary', type=resolve_path, default=resolve_path(PRIMARY_DATASET),
+                        help="Dataset written to data_statistics.json")
+    parser.add_argument('--drift', nargs='*', type=Path,
+                        help="KB versions to compare, oldest first (default: the release chain)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
 
-    # Ensure output directory exists
-    output_file.parent.mkdir(parents=True, exist_ok=True)
+    files = args.files or default_audit_files()
+    if args.primary.exists() and args.primary.resolve() not in {f.resolve() for f in files}:
+        files.append(args.primary)
+    versions = args.drift if args.drift is not None else [resolve_path(DATA_DIR / name) for name in KB_VERSIONS]
+    versions = [v for v in versions if v.exists()]
 
-    # Load and analyze data
-    print(f"Loading data from {data_file}...")
-    data = load_jsonl(data_file)
-    print(f"Loaded {len(data)} knowledge units")
+    print(f"Auditing {len(files)} files...")
+    results = audit_files(files, args.workers)
 
-    print("Analyzing dataset...")
-    stats = analyze_dataset(data)
+    per_file = {}
+    per_directory = defaultdict(AuditAccumulator)
+    directory_files = defaultdict(list)
+    for path, acc in results.items():
+        per_file[relative(path)] = acc.to_stats(relative(path))
+        per_directory[relative(Path(path).parent)].merge(acc)
+        directory_files[relative(Path(path).parent)].append(path)
+        print(f"  ✓ {relative(path)}: {acc.total_units} units")
 
-    # Save results
-    print(f"Saving statistics to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
+    # The releases in a directory share IDs: duplicates and orphans are checked over their union
+    for name, ids in audit_directories(directory_files, args.workers).items():
+        per_directory[name].set_ids(ids)
+
+    print(f"Comparing {len(versions)} KB versions...")
+    drifts = drift_chain(versions, args.workers)
+
+    ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
+    primary = next(acc for path, acc in results.items() if Path(path).resolve() == args.primary.resolve())
+    stats = primary.to_stats(relative(args.primary))
+    print(f"Saving statistics to {STATISTICS_PATH}...")
+    with open(STATISTICS_PATH, 'w', encoding='utf-8') as f:
         json.dump(stats, f, ensure_ascii=False, indent=2)
 
+    audit = {
+        'metadata': {'analysis_date': datetime.now().isoformat(), 'files': len(per_file)},
+        'directories': {name: acc.to_stats(name) for name, acc in sorted(per_directory.items())},
+        'files': per_file,
+        'drift': drifts,
+    }
+    with open(AUDIT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(audit, f, ensure_ascii=False, indent=2)
+    print(f"Saving full audit to {AUDIT_PATH}...")
+    print(f"Drift report saved to {generate_drift_report(drifts, DRIFT_REPORT_PATH)}")
+
     print("Analysis complete!")
 
     # Print summary
@@ -191,6 +490,10 @@ def main():
     for version, count in stats['version_distribution'].items():
         print(f"  {version}: {count}")
     print(f"\nOrphan references: {stats['relationships']['orphan_references_count']}")
+    print(f"\nVersion drift:")
+    for d in drifts:
+        t = d['totals']
+        print(f"  {d['from']} → {d['to']}: +{t['added']} -{t['removed']} ~{t['changed']}")
 
 if __name__ == '__main__':
     main()
@@ -9,15 +9,21 @@ Focus areas:
 - PURO limits and calculations
 - Regulační omezení (regulatory limits)
 """
+import argparse
 import os
 import sys
 import json
-import subprocess
 import uuid
 from pathlib import Path
 from datetime import datetime
 from openai import OpenAI
 
+from chunker import chunk_text
+from llm_output import ParseStats, parse_units, response_format
+from llm_usage import BudgetExceeded, add_budget_arguments, scheduler_from_args
+from pdf_text import extract_pdf_pages
+from segmenter import segment_document
+
 # Initialize OpenAI client
 client = OpenAI()
 
@@ -29,6 +35,11 @@ SCHEMA_PATH = PROJECT_ROOT / "schemas/knowledge_unit.schema.json"
 OUTPUT_DIR = PROJECT_ROOT / "data/extracted"
 OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 
+# LLM model and chunk budget (tokens of source text per request)
+MODEL = "gpt-4o-mini"  # Use mini for cost-effectiveness
+CHUNK_TOKENS = 2500
+CHUNK_OVERLAP = 150
+
 # Document metadata
 DOCUMENT_METADATA = {
     "name": "Úhradová vyhláška 2026 - Ambulantní specialisté",
@@ -37,11 +48,15 @@ DOCUMENT_METADATA = {
     "retrieved_at": "2026-02-03T00:00:00Z"
 }
 
-# Specialized extraction prompt for ambulatory specialists
-EXTRACTION_PROMPT = """Jsi expert na české zdravotnictví a úhradové mechanismy. Extrahuj znalostní jednotky z textu Úhradové vyhlášky 2026 zaměřené na ambulantní specialisty.
+# Sections of the decree sent to the LLM (see segmenter.py for selector syntax)
+SECTIONS = ["§7", "priloha:3"]
 
-TEXT:
-{text}
+# Recovered/dropped units across the run (see llm_output.py)
+PARSE_STATS = ParseStats()
+
+# Specialized extraction prompt for ambulatory specialists. Per-chunk values
+# go last so the static prefix can be served from the provider's prompt cache.
+EXTRACTION_PROMPT = """Jsi expert na české zdravotnictví a úhradové mechanismy. Extrahuj znalostní jednotky z textu Úhradové vyhlášky 2026 zaměřené na ambulantní specialisty.
 
 KONTEXT: Úhradová vyhláška 2026 - Příloha č. 3 (Ambulantní specialisté)
 
@@ -54,7 +69,7 @@ FOKUS EXTRAKCE:
 
 Pro každou identifikovanou znalostní jednotku vytvoř JSON objekt:
 {{
-  "id": "{uuid_prefix}-XXX",
+  "id": "<PREFIX ID>-XXX",
   "type": "rule|exception|risk|anti_pattern|condition|definition",
   "domain": "uhrady",
   "title": "Stručný název (50-150 znaků)",
@@ -73,116 +88,67 @@ Pro každou identifikovanou znalostní jednotku vytvoř JSON objekt:
   "tags": ["ambulantní_specialisté", "hodnota_bodu", "bonifikace", ...]
 }}
 
-VÝSTUP: Pouze validní JSON objekty, jeden na řádek (JSONL formát). Bez markdown bloků, bez komentářů.
-Extrahuj 3-8 jednotek z tohoto textu.
+VÝSTUP: JSON objekt {{"units": [...]}} se seznamem jednotek. Bez markdown bloků, bez komentářů.
+Extrahuj 3-8 jednotek z následujícího textu.
+
+PREFIX ID: {uuid_prefix}
+
+TEXT:
+{text}
 """
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF using pdftotext."""
-    try:
-        result = subprocess.run(
-            ['pdftotext', '-layout', str(pdf_path), '-'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Error extracting text: {e}")
-        return None
-
-def extract_appendix3_content(full_text):
-    """Extract content specifically from Příloha č. 3 (pages related to AS)."""
-    lines = full_text.split('\n')
-
-    # Find start of Příloha č. 3
-    start_idx = None
-    end_idx = None
-
-    for i, line in enumerate(lines):
-        if 'Příloha č. 3' in line and 'vyhlášce' in line:
-            start_idx = i
-        elif start_idx and 'Příloha č. 4' in line and 'vyhlášce' in line:
-            end_idx = i
-            break
-
-    if start_idx is None:
-        print("Warning: Could not find Příloha č. 3, using full text")
-        return full_text
-
-    if end_idx is None:
-        end_idx = min(start_idx + 2000, len(lines))  # Take about 2000 lines after start
-
-    appendix3_text = '\n'.join(lines[start_idx:end_idx])
-    print(f"Extracted Příloha č. 3: lines {start_idx} to {end_idx} ({end_idx - start_idx} lines)")
-    return appendix3_text
-
-def chunk_text(text, max_chars=10000):
-    """Split text into chunks for processing."""
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = ""
-
-    for para in paragraphs:
-        if len(current_chunk) + len(para) < max_chars:
-            current_chunk += para + "\n\n"
-        else:
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = para + "\n\n"
-
-    if current_chunk:
-        chunks.append(current_chunk)
-
-    return chunks
-
-def extract_with_llm(text, chunk_id):
+def select_sections(doc, selectors=SECTIONS):
+    """Return (section, text) pairs for the selected sections of the decree."""
+    tree = segment_document(doc.text, doc.page_offsets)
+    sections = tree.select(selectors)
+
+    if not sections:
+        print(f"Warning: None of {selectors} found, using full text")
+        return [(None, doc.text)]
+
+    for section in sections:
+        print(f"  {section.key}: pages {section.page_start}-{section.page_end} "
+              f"({section.length:,} characters)")
+    return [(section, tree.text_of(section)) for section in sections]
+
+def extract_with_llm(text, chunk_id, scheduler):
     """Use LLM to extract knowledge units."""
     uuid_prefix = f"ku-as-2026-{chunk_id:03d}"
 
     prompt = EXTRACTION_PROMPT.format(
-        text=text[:8000],  # Limit text length
+        text=text,
         uuid_prefix=uuid_prefix,
         retrieved_at=DOCUMENT_METADATA["retrieved_at"]
     )
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use mini for cost-effectiveness
+        response = scheduler.complete(
+            client,
+            document=DOCUMENT_METADATA["name"],
+            chunk=chunk_id,
+            model=MODEL,
             messages=[
-                {"role": "system", "content": "Jsi expert na české zdravotnictví a úhradové vyhlášky. Extrahuj strukturované znalostní jednotky. Vracíš pouze validní JSON objekty, jeden na řádek."},
+                {"role": "system", "content": "Jsi expert na české zdravotnictví a úhradové vyhlášky. Extrahuj strukturované znalostní jednotky. Vracíš pouze validní JSON."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.1,
-            max_tokens=4000
+            max_tokens=4000,
+            response_format=response_format()
         )
 
-        content = response.choices[0].message.content.strip()
-
-        # Parse JSON Lines
-        units = []
-        for line in content.split('\n'):
-            line = line.strip()
-            if line and line.startswith('{'):
-                try:
-                    # Fix common issues
-                    line = line.rstrip(',')
-                    unit = json.loads(line)
-
-                    # Ensure valid UUID format
-                    if not unit.get('id') or not is_valid_uuid_format(unit['id']):
-                        unit['id'] = str(uuid.uuid4())
+        units = parse_units(response.choices[0].message.content, PARSE_STATS)
+        for unit in units:
+            # Ensure valid UUID format
+            if not unit.get('id') or not is_valid_uuid_format(unit['id']):
+                unit['id'] = str(uuid.uuid4())
 
-                    units.append(unit)
-                except json.JSONDecodeError as e:
-                    print(f"  JSON parse error: {e}")
-                    continue
-
-        return units, response.usage
+        return units
 
+    except BudgetExceeded:
+        raise
     except Exception as e:
         print(f"Error calling LLM: {e}")
-        return [], None
+        return []
 
 def is_valid_uuid_format(s):
     """Check if string looks like a UUID or valid ID."""
@@ -193,7 +159,7 @@ def is_valid_uuid_format(s):
         # Allow custom ID formats like ku-as-2026-001
         return s.startswith('ku-')
 
-def process_document():
+def process_document(scheduler):
     """Process the payment decree document."""
     print(f"\n{'='*80}")
     print(f"EXTRACTION: Ambulatory Specialists Methodology 2026")
@@ -208,36 +174,38 @@ def process_document():
 
     # Extract text from PDF
     print("Step 1: Extracting text from PDF...")
-    full_text = extract_text_from_pdf(pdf_path)
-    if not full_text:
-        print("Error: Could not extract text from PDF")
+    try:
+        doc = extract_pdf_pages(pdf_path)
+    except Exception as e:
+        print(f"Error: Could not extract text from PDF: {e}")
         sys.exit(1)
-    print(f"  Total text: {len(full_text):,} characters")
+    print(f"  Total text: {len(doc.text):,} characters, {len(doc.pages)} pages")
 
-    # Extract Příloha č. 3 content
-    print("\nStep 2: Extracting Příloha č. 3 (Ambulatory Specialists)...")
-    as_text = extract_appendix3_content(full_text)
-    print(f"  Relevant text: {len(as_text):,} characters")
+    # Select the sections relevant for ambulatory specialists
+    print(f"\nStep 2: Selecting sections {', '.join(SECTIONS)}...")
+    sections = select_sections(doc)
+    relevant = sum(len(text) for _, text in sections)
+    print(f"  Relevant text: {relevant:,} characters "
+          f"({relevant / max(len(doc.text), 1):.0%} of document)")
 
-    # Chunk the text
+    # Chunk each section separately so chunks never span two sections
     print("\nStep 3: Chunking text for processing...")
-    chunks = chunk_text(as_text, max_chars=8000)
-    print(f"  Created {len(chunks)} chunks")
+    chunks = (chunk for _, text in sections
+              for chunk in chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP, model=MODEL))
+    print(f"  Up to {CHUNK_TOKENS:,} tokens per chunk, {CHUNK_OVERLAP} tokens overlap")
 
     # Process each chunk
     print("\nStep 4: Extracting knowledge units with LLM...")
     all_units = []
-    total_input_tokens = 0
-    total_output_tokens = 0
 
     with open(output_path, 'w', encoding='utf-8') as f:
         for i, chunk in enumerate(chunks, 1):
-            print(f"\n  Processing chunk {i}/{len(chunks)}...")
-            units, usage = extract_with_llm(chunk, i)
-
-            if usage:
-                total_input_tokens += usage.prompt_tokens
-                total_output_tokens += usage.completion_tokens
+            print(f"\n  Processing chunk {i}...")
+            try:
+                units = extract_with_llm(chunk, i, scheduler)
+            except BudgetExceeded as e:
+                print(f"  Stopping: {e}")
+                break
 
             for unit in units:
                 f.write(json.dumps(unit, ensure_ascii=False) + '\n')
@@ -245,6 +213,7 @@ def process_document():
                 all_units.append(unit)
 
             print(f"    Extracted {len(units)} units (total: {len(all_units)})")
+            print(f"    {scheduler.ledger.progress_line()}")
 
     # Print statistics
     print(f"\n{'='*80}")
@@ -252,14 +221,8 @@ def process_document():
     print(f"{'='*80}")
     print(f"  Total units extracted: {len(all_units)}")
     print(f"  Output file: {output_path}")
-    print(f"  Input tokens: {total_input_tokens:,}")
-    print(f"  Output tokens: {total_output_tokens:,}")
-
-    # Estimate cost (GPT-4o-mini pricing)
-    input_cost = total_input_tokens * 0.00015 / 1000
-    output_cost = total_output_tokens * 0.0006 / 1000
-    total_cost = input_cost + output_cost
-    print(f"  Estimated cost: ${total_cost:.4f}")
+    print(f"  Parsing: {PARSE_STATS.summary()}")
+    scheduler.ledger.print_summary()
 
     # Analyze extracted unit types
     type_counts = {}
@@ -273,5 +236,11 @@ def process_document():
 
     return len(all_units)
 
+def main():
+    parser = argparse.ArgumentParser(description='Extract AS 2026 knowledge units from the payment decree')
+    add_budget_arguments(parser)
+    args = parser.parse_args()
+    process_document(scheduler_from_args('extract_as_2026', args))
+
 if __name__ == "__main__":
-    process_document()
+    main()
@@ -15,7 +15,7 @@ from pathlib import Path
 from datetime import datetime
 
 # Paths
-BASE_DIR = Path("/Users/petrsovadina/Desktop/Develope/personal/klinicka-knowledge-base")
+BASE_DIR = Path(__file__).resolve().parent.parent
 OUTPUT_DIR = BASE_DIR / "data/extracted"
 OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 OUTPUT_FILE = OUTPUT_DIR / "vzp_dodatek_as_2026.jsonl"
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
-import json
+import sys
 from pathlib import Path
 from collections import defaultdict
 
-DATA_DIR = Path("/home/ubuntu/klinicka-knowledge-base/data")
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import JsonlWriter, iter_records
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 INPUT_PATH = DATA_DIR / "knowledge_base_v2.jsonl"
 OUTPUT_PATH = DATA_DIR / "knowledge_base_v3.jsonl"
 
@@ -16,11 +20,9 @@ def fix_duplicates():
     id_map = defaultdict(list)
     
     # Load units
-    with open(INPUT_PATH, 'r', encoding='utf-8') as f:
-        for line in f:
-            unit = json.loads(line)
-            units.append(unit)
-            id_map[unit['id']].append(unit)
+    for unit in iter_records(INPUT_PATH):
+        units.append(unit)
+        id_map[unit['id']].append(unit)
 
     # Identify and fix duplicates
     fixed_units = []
@@ -42,9 +44,9 @@ def fix_duplicates():
             fixed_units.append(unit)
 
     # Write fixed units
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+    with JsonlWriter(OUTPUT_PATH) as f:
         for unit in fixed_units:
-            f.write(json.dumps(unit, ensure_ascii=False) + '\n')
+            f.write_record(unit)
             
     print(f"Total units loaded: {len(units)}")
     print(f"Total duplicates fixed: {fixed_count}")
@@ -3,13 +3,17 @@
 Generate embeddings for knowledge units using sklearn TF-IDF.
 Simple but effective for MVP.
 """
-import json
 import numpy as np
 from pathlib import Path
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.decomposition import TruncatedSVD
 import pickle
 import argparse
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import JsonlWriter, read_records, resolve_path
 
 # Paths - use relative paths from script location
 SCRIPT_DIR = Path(__file__).parent.absolute()
@@ -42,10 +46,13 @@ def create_embedding_text(unit):
 def main():
     parser = argparse.ArgumentParser(description='Generate embeddings for knowledge units')
     parser.add_argument('--input', '-i', default=DEFAULT_INPUT_FILE,
-                        help=f'Input JSONL file (default: {DEFAULT_INPUT_FILE})')
+                        help=f'Input JSONL file, .jsonl or .jsonl.zst (default: {DEFAULT_INPUT_FILE})')
+    parser.add_argument('--output', '-o', type=Path, default=OUTPUT_FILE,
+                        help='Embeddings file; a .zst suffix writes compressed JSONL')
     args = parser.parse_args()
 
-    input_file = DATA_DIR / args.input
+    input_file = resolve_path(DATA_DIR / args.input)
+    output_file = args.output
 
     print("="*80)
     print("GENERATING EMBEDDINGS (TF-IDF + SVD)")
@@ -54,12 +61,7 @@ def main():
     print()
 
     # Load knowledge units
-    units = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                units.append(json.loads(line))
+    units = read_records(input_file)
     
     print(f"Loaded {len(units)} knowledge units")
     
@@ -96,8 +98,8 @@ def main():
     print(f"✓ Saved vectorizer and SVD model")
     
     # Save embeddings
-    print(f"Saving embeddings to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    print(f"Saving embeddings to {output_file}...")
+    with JsonlWriter(output_file) as f:
         for i, unit in enumerate(units):
             result = {
                 "id": unit["id"],
@@ -109,7 +111,7 @@ def main():
                     "version": unit.get("version", "unknown")
                 }
             }
-            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+            f.write_record(result)
     
     print(f"✓ Saved {len(units)} embeddings")
     
@@ -120,8 +122,8 @@ def main():
     print("="*80)
     print(f"Total embeddings: {len(units)}")
     print(f"Embedding dimension: {embeddings.shape[1]}")
-    print(f"Output file: {OUTPUT_FILE}")
-    print(f"File size: {OUTPUT_FILE.stat().st_size / 1024:.1f} KB")
+    print(f"Output file: {output_file}")
+    print(f"File size: {output_file.stat().st_size / 1024:.1f} KB")
     print("="*80)
 
 if __name__ == "__main__":
@@ -1,10 +1,67 @@
 #!/usr/bin/env python3
+"""
+Upload the knowledge base to the Hugging Face dataset repository.
+
+`full` uploads one file as data/knowledge_base_final.jsonl (plus
+sources/metadata.json), the way releases have been published so far: the
+whole file goes up on every release.
+
+`build`, `verify` and `push` publish a dataset as deterministic shards, so a
+release uploads only what changed:
+
+- build:  split the dataset into --shards files by a hash of the unit ID
+          (shard i holds the IDs whose 64-bit sha256 prefix falls into the
+          i-th of N equal ranges), with units sorted by ID inside a shard.
+          The same units always give byte-identical shards, whatever the
+          input order. manifest.json records each shard's range, unit
+          count, size and sha256.
+- verify: check the shards against the manifest, offline: hashes, sizes,
+          and that every unit sits in the shard its ID maps to.
+- push:   fetch the remote manifest, and commit only the shards whose hash
+          differs (plus deletions of shards that are gone and the new
+          manifest) in one Hugging Face commit.
+
+Shards are built into build/hf/shards/<dataset>/ and published under
+data/shards/<dataset>/ in the repository. Pushing needs HF_TOKEN.
+
+Usage:
+    python3 scripts/hf_upload.py build data/knowledge_base_final.jsonl
+    python3 scripts/hf_upload.py verify
+    python3 scripts/hf_upload.py push --dry-run
+    python3 scripts/hf_upload.py full data/knowledge_base_final.jsonl
+"""
+import argparse
+import hashlib
+import json
 import os
 import sys
-from huggingface_hub import HfApi
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import iter_lines, loads, resolve_path
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DEFAULT_INPUT = PROJECT_ROOT / "data" / "knowledge_base_final.jsonl"
+SHARD_DIR = PROJECT_ROOT / "build" / "hf" / "shards"
+
+REPO_ID = "petrsovadina/klinicka-knowledge-base"
+REMOTE_ROOT = "data/shards"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+SHARD_COUNT = 16
+HASH_BLOCK = 1 << 20
+
 
 def upload_to_hf(file_path):
     """Uploads a file to the Hugging Face dataset."""
+    from huggingface_hub import HfApi
+
     if not os.path.exists(file_path):
         print(f"Error: File not found at {file_path}")
         sys.exit(1)
@@ -15,11 +72,11 @@ def upload_to_hf(file_path):
         print("Error: HF_TOKEN environment variable not set.")
         sys.exit(1)
 
-    repo_id = "petrsovadina/klinicka-knowledge-base"
-    
+    repo_id = REPO_ID
+
     try:
         api = HfApi(token=hf_token)
-        
+
         # Upload the file, renaming it to the final name in the repo
         api.upload_file(
             path_or_fileobj=file_path,
@@ -29,10 +86,10 @@ def upload_to_hf(file_path):
             commit_message=f"Phase 3 Progress: Updated knowledge base with {os.path.basename(file_path)} (456 units)"
         )
         print(f"✓ Successfully uploaded {file_path} to {repo_id} as data/knowledge_base_final.jsonl")
-        
+
         # Also upload the metadata file
         api.upload_file(
-            path_or_fileobj="sources/metadata.json",
+            path_or_fileobj=str(PROJECT_ROOT / "sources" / "metadata.json"),
             path_in_repo="sources/metadata.json",
             repo_id=repo_id,
             repo_type="dataset",
@@ -44,11 +101,312 @@ def upload_to_hf(file_path):
         print(f"Error during Hugging Face upload: {e}")
         sys.exit(1)
 
+
+class ShardError(Exception):
+    """A shard set that cannot be published (missing or inconsistent manifest)."""
+
+
+def _id_hash(unit_id: str) -> int:
+    return int.from_bytes(hashlib.sha256(unit_id.encode('utf-8')).digest()[:8], 'big')
+
+
+def shard_of(unit_id: str, count: int) -> int:
+    """The shard (0..count-1) whose hash range holds unit_id."""
+    return (_id_hash(unit_id) * count) >> 64
+
+
+def shard_range(index: int, count: int) -> List[str]:
+    """[low, high) bounds of a shard's 64-bit hash range, as hex."""
+    low = -(-(index << 64) // count)
+    high = -(-((index + 1) << 64) // count)
+    return [f"{low:016x}", f"{high:016x}" if high < 1 << 64 else "1" + "0" * 16]
+
+
+def shard_name(dataset: str, index: int, count: int) -> str:
+    return f"{dataset}-{index:05d}-of-{count:05d}.jsonl"
+
+
+def _unit_id(line: bytes) -> str:
+    unit_id = loads(line).get("id")
+    return unit_id if isinstance(unit_id, str) else json.dumps(unit_id)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: Path, data: dict):
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    partial.replace(path)
+
+
+def load_manifest(shard_dir: Path) -> dict:
+    path = Path(shard_dir) / MANIFEST_NAME
+    if not path.exists():
+        raise ShardError(f"No manifest in {shard_dir}; run `hf_upload.py build` first")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_shards(input_path: Path, shard_dir: Path, count: int = SHARD_COUNT,
+                 dataset: Optional[str] = None) -> dict:
+    """Split input_path into `count` ID-hash shards in shard_dir and write the manifest.
+
+    Lines are copied as they are. Memory holds one shard at a time (for the
+    sort), not the dataset.
+    """
+    input_path = resolve_path(input_path)
+    dataset = dataset or input_path.name.split(".")[0]
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    parse_errors = 0
+
+    with tempfile.TemporaryDirectory(prefix="hf_shards_", dir=shard_dir) as tmp:
+        buckets = [open(Path(tmp) / f"{i}.jsonl", 'wb') for i in range(count)]
+        try:
+            for line_num, raw in enumerate(iter_lines(input_path), 1):
+                line = raw.rstrip(b"\r\n")
+                if not line.strip():
+                    continue
+                try:
+                    unit_id = _unit_id(line)
+                except (ValueError, AttributeError) as e:
+                    print(f"⚠ Error in {input_path.name} line {line_num}: {e}")
+                    parse_errors += 1
+                    continue
+                buckets[shard_of(unit_id, count)].write(line + b"\n")
+        finally:
+            for bucket in buckets:
+                bucket.close()
+
+        shards = []
+        for index in range(count):
+            lines = (Path(tmp) / f"{index}.jsonl").read_bytes().splitlines(keepends=True)
+            lines.sort(key=lambda line: (_unit_id(line), line))
+            name = shard_name(dataset, index, count)
+            path = shard_dir / name
+            partial = path.with_name(name + ".partial")
+            partial.write_bytes(b"".join(lines))
+            partial.replace(path)
+            shards.append({
+                "path": name,
+                "range": shard_range(index, count),
+                "units": len(lines),
+                "bytes": path.stat().st_size,
+                "sha256": file_sha256(path),
+            })
+
+    names = {shard["path"] for shard in shards}
+    for stale in shard_dir.glob(f"{dataset}-*-of-*.jsonl"):
+        if stale.name not in names:
+            stale.unlink()
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "dataset": dataset,
+        "source": input_path.name,
+        "created_at": datetime.now().isoformat(),
+        "id_hash": "sha256[:8] of the unit ID, split into equal ranges",
+        "shard_count": count,
+        "units": sum(shard["units"] for shard in shards),
+        "parse_errors": parse_errors,
+        "sha256": hashlib.sha256("".join(shard["sha256"] for shard in shards).encode()).hexdigest(),
+        "shards": shards,
+    }
+    _write_json(shard_dir / MANIFEST_NAME, manifest)
+    return manifest
+
+
+def verify_shards(shard_dir: Path, deep: bool = True) -> List[str]:
+    """Problems found in shard_dir against its manifest (empty when it is intact)."""
+    shard_dir = Path(shard_dir)
+    manifest = load_manifest(shard_dir)
+    count = manifest["shard_count"]
+    problems = []
+    for index, shard in enumerate(manifest["shards"]):
+        path = shard_dir / shard["path"]
+        if not path.exists():
+            problems.append(f"{shard['path']}: missing")
+            continue
+        if path.stat().st_size != shard["bytes"] or file_sha256(path) != shard["sha256"]:
+            problems.append(f"{shard['path']}: content does not match the manifest")
+            continue
+        if deep:
+            ids = [_unit_id(line) for line in path.read_bytes().splitlines() if line.strip()]
+            misplaced = sum(1 for unit_id in ids if shard_of(unit_id, count) != index)
+            if misplaced:
+                problems.append(f"{shard['path']}: {misplaced} units belong to another shard")
+            if ids != sorted(ids):
+                problems.append(f"{shard['path']}: units are not sorted by ID")
+    listed = {shard["path"] for shard in manifest["shards"]}
+    for path in sorted(shard_dir.glob(f"{manifest['dataset']}-*-of-*.jsonl")):
+        if path.name not in listed:
+            problems.append(f"{path.name}: not in the manifest")
+    return problems
+
+
+def plan_upload(local: dict, remote: Optional[dict]) -> dict:
+    """Which shards to upload, delete or keep, comparing manifests by path and hash."""
+    remote_hashes = {shard["path"]: shard["sha256"] for shard in (remote or {}).get("shards", [])}
+    local_paths = {shard["path"] for shard in local["shards"]}
+    plan = {"upload": [], "unchanged": [], "delete": [], "bytes": 0}
+    for shard in local["shards"]:
+        if remote_hashes.get(shard["path"]) == shard["sha256"]:
+            plan["unchanged"].append(shard["path"])
+        else:
+            plan["upload"].append(shard["path"])
+            plan["bytes"] += shard["bytes"]
+    plan["delete"] = sorted(path for path in remote_hashes if path not in local_paths)
+    return plan
+
+
+def remote_dir(dataset: str) -> str:
+    return f"{REMOTE_ROOT}/{dataset}"
+
+
+def fetch_remote_manifest(repo_id: str, dataset: str, token: Optional[str] = None) -> Optional[dict]:
+    """The manifest published in the repository, or None before the first push."""
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import EntryNotFoundError
+
+    try:
+        path = hf_hub_download(repo_id, f"{remote_dir(dataset)}/{MANIFEST_NAME}", repo_type="dataset",
+                               token=token)
+    except EntryNotFoundError:
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def push_shards(shard_dir: Path, api, repo_id: str, remote: Optional[dict], dry_run: bool = False,
+                message: Optional[str] = None) -> dict:
+    """Commit the changed shards and the manifest of shard_dir; returns the plan."""
+    from huggingface_hub import CommitOperationAdd, CommitOperationDelete
+
+    shard_dir = Path(shard_dir)
+    problems = verify_shards(shard_dir, deep=False)
+    if problems:
+        raise ShardError("Local shards do not match their manifest: " + "; ".join(problems))
+    local = load_manifest(shard_dir)
+    plan = plan_upload(local, remote)
+    plan["up_to_date"] = bool(remote) and remote.get("sha256") == local["sha256"] and not plan["delete"]
+    if dry_run or plan["up_to_date"]:
+        return plan
+
+    prefix = remote_dir(local["dataset"])
+    operations = [CommitOperationAdd(f"{prefix}/{name}", str(shard_dir / name)) for name in plan["upload"]]
+    operations += [CommitOperationDelete(f"{prefix}/{name}") for name in plan["delete"]]
+    operations.append(CommitOperationAdd(f"{prefix}/{MANIFEST_NAME}", str(shard_dir / MANIFEST_NAME)))
+    api.create_commit(
+        repo_id=repo_id,
+        repo_type="dataset",
+        operations=operations,
+        commit_message=message or (f"Update {local['dataset']}: {len(plan['upload'])} of "
+                                   f"{len(local['shards'])} shards changed ({local['units']} units)"),
+    )
+    return plan
+
+
+def print_plan(plan: dict, local: dict):
+    if plan.get("up_to_date"):
+        print(f"✓ {local['dataset']} is up to date ({len(local['shards'])} shards, {local['units']} units)")
+        return
+    print(f"{local['dataset']}: {len(plan['upload'])} to upload ({plan['bytes'] / 1024:.0f} KB), "
+          f"{len(plan['unchanged'])} unchanged, {len(plan['delete'])} to delete")
+    for name in plan["upload"]:
+        print(f"  + {name}")
+    for name in plan["delete"]:
+        print(f"  - {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload the knowledge base to Hugging Face")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    full = commands.add_parser("full", help="Upload one file as data/knowledge_base_final.jsonl")
+    full.add_argument("file", help="JSONL file to upload")
+
+    build = commands.add_parser("build", help="Split a dataset into ID-hash shards with a manifest")
+    build.add_argument("input", nargs="?", type=Path, default=DEFAULT_INPUT, help="Dataset JSONL (.jsonl or .jsonl.zst)")
+    build.add_argument("--shards", type=int, help=f"Shard count (default: the existing manifest's, else {SHARD_COUNT})")
+    build.add_argument("--dataset", help="Dataset name (default: the input file name)")
+
+    verify = commands.add_parser("verify", help="Check the local shards against their manifest (offline)")
+    push = commands.add_parser("push", help="Upload the shards that differ from the remote manifest")
+    push.add_argument("--repo", default=REPO_ID, help="Dataset repository")
+    push.add_argument("--dry-run", action="store_true", help="Only show what would be uploaded")
+    push.add_argument("--remote-manifest", type=Path, help="Compare with this manifest instead of fetching it")
+    push.add_argument("-m", "--message", help="Commit message")
+    for command in (verify, push):
+        command.add_argument("--dataset", default=DEFAULT_INPUT.name.split(".")[0], help="Dataset name")
+    for command in (build, verify, push):
+        command.add_argument("--shard-dir", type=Path, default=SHARD_DIR, help="Root directory of the shards")
+    args = parser.parse_args()
+
+    if args.command == "full":
+        upload_to_hf(args.file)
+        return 0
+
+    if args.command == "build":
+        input_path = resolve_path(args.input)
+        if not input_path.exists():
+            print(f"✗ File not found: {input_path}")
+            return 1
+        dataset = args.dataset or input_path.name.split(".")[0]
+        shard_dir = args.shard_dir / dataset
+        count = args.shards
+        if count is None:
+            count = load_manifest(shard_dir)["shard_count"] if (shard_dir / MANIFEST_NAME).exists() else SHARD_COUNT
+        manifest = build_shards(input_path, shard_dir, count, dataset)
+        print(f"✓ {manifest['units']} units in {count} shards: {shard_dir}")
+        if manifest["parse_errors"]:
+            print(f"  ⚠ {manifest['parse_errors']} unparseable lines skipped")
+        return 0
+
+    shard_dir = args.shard_dir / args.dataset
+    try:
+        if args.command == "verify":
+            problems = verify_shards(shard_dir)
+            for problem in problems:
+                print(f"✗ {problem}")
+            if not problems:
+                manifest = load_manifest(shard_dir)
+                print(f"✓ {len(manifest['shards'])} shards, {manifest['units']} units match the manifest")
+            return 1 if problems else 0
+
+        token = os.environ.get("HF_TOKEN")
+        if not token and not args.dry_run:
+            print("Error: HF_TOKEN environment variable not set.")
+            return 1
+        if args.remote_manifest:
+            with open(args.remote_manifest, 'r', encoding='utf-8') as f:
+                remote = json.load(f)
+        else:
+            remote = fetch_remote_manifest(args.repo, args.dataset, token)
+        local = load_manifest(shard_dir)
+        if remote and remote.get("shard_count") != local["shard_count"]:
+            print(f"⚠ Remote uses {remote.get('shard_count')} shards, local {local['shard_count']}: "
+                  f"every shard is replaced (rebuild with --shards {remote.get('shard_count')} to keep deltas small)")
+        api = None
+        if not args.dry_run:
+            from huggingface_hub import HfApi
+            api = HfApi(token=token)
+        plan = push_shards(shard_dir, api, args.repo, remote, args.dry_run, args.message)
+    except ShardError as e:
+        print(f"✗ {e}")
+        return 1
+    print_plan(plan, local)
+    if not args.dry_run and not plan["up_to_date"]:
+        print(f"✓ Pushed to {args.repo}: {remote_dir(args.dataset)}/")
+    return 0
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python3 hf_upload.py <path_to_jsonl_file>")
-        sys.exit(1)
-    
-    # Change directory to the project root for correct path resolution
-    os.chdir("/home/ubuntu/klinicka-knowledge-base")
-    upload_to_hf(sys.argv[1])
+    sys.exit(main())
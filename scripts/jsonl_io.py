@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Shared JSONL reading and writing, plain (.jsonl) or zstd-compressed (.jsonl.zst).
+
+Records are parsed with orjson when it is installed (several times faster
+than the json module) and with json otherwise; lines are written in the
+dataset's format, json.dumps(..., ensure_ascii=False).
+
+- `iter_records()` streams parsed records, reporting broken lines to an
+  `on_error(line_num, error)` hook instead of failing,
+- `read_records()` parses large files in chunks across worker processes.
+
+Compressed files use the Zstandard seekable format: the lines are cut into
+independent zstd frames of about FRAME_SIZE uncompressed bytes (always at
+line boundaries), followed by a seek table in a skippable frame. Any zstd
+tool can still decompress the file as a whole; with the seek table,
+
+- `iter_lines(path, workers=N)` decodes frames in parallel,
+- `LineReader(path).read_line(offset)` reads the line at an uncompressed
+  byte offset by decoding a single frame.
+
+Readers accept either form: `resolve_path()` falls back to `<name>.zst`
+when `<name>` does not exist, so code that defaults to data/*.jsonl keeps
+working when only the compressed files are deployed.
+
+The zstandard package is only needed for .zst files.
+
+Usage:
+    from jsonl_io import JsonlWriter, iter_records, read_records
+
+    for unit in iter_records("data/knowledge_base_mvp.jsonl"):   # or .jsonl.zst
+        ...
+    units = read_records("data/big.jsonl", workers=8)
+
+    with JsonlWriter("data/knowledge_base_mvp.jsonl.zst") as out:
+        out.write_record(unit)
+
+    python3 scripts/jsonl_io.py compress data/*.jsonl
+    python3 scripts/jsonl_io.py info data/knowledge_base_embeddings.jsonl.zst
+"""
+import argparse
+import io
+import json
+import os
+import struct
+import sys
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import repeat
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ZST_SUFFIX = ".zst"
+FRAME_SIZE = 1 << 20       # Uncompressed bytes per frame
+ZSTD_LEVEL = 9
+
+# Zstandard seekable format (contrib/seekable_format in the zstd repository)
+SKIPPABLE_MAGIC = 0x184D2A5E
+SEEKABLE_MAGIC = 0x8F92EAB1
+FOOTER = struct.Struct("<IBI")         # number of frames, descriptor, magic
+ENTRY = struct.Struct("<II")           # compressed size, decompressed size
+CHECKSUM_FLAG = 0x80
+
+# read_records() parses files from this size on in parallel, in chunks of at
+# least CHUNK_BYTES (uncompressed)
+PARALLEL_MIN_BYTES = 32 << 20
+CHUNK_BYTES = 4 << 20
+
+ErrorHook = Callable[[int, Exception], None]
+
+
+def loads(data) -> Any:
+    """Parse one JSON document (str or bytes), with orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # json also accepts NaN and big integers, and words its errors as usual
+    return json.loads(data)
+
+
+def dumps(record) -> str:
+    """One JSONL line (without newline) in the dataset's format."""
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Compressed JSONL (.zst) needs the 'zstandard' package: pip install zstandard") from None
+    return zstandard
+
+
+def is_compressed(path) -> bool:
+    return Path(path).suffix == ZST_SUFFIX
+
+
+def resolve_path(path) -> Path:
+    """The path itself, or its .zst sibling when only that exists."""
+    path = Path(path)
+    if path.exists() or is_compressed(path):
+        return path
+    compressed = path.with_name(path.name + ZST_SUFFIX)
+    return compressed if compressed.exists() else path
+
+
+@dataclass(frozen=True)
+class Frame:
+    offset: int          # in the compressed file
+    size: int
+    data_offset: int     # in the uncompressed stream
+    data_size: int
+
+
+def read_seek_table(f: IO[bytes]) -> Optional[List[Frame]]:
+    """Frames of a seekable .zst file, or None if it has no seek table."""
+    end = f.seek(0, io.SEEK_END)
+    if end < FOOTER.size + 8:
+        return None
+    f.seek(end - FOOTER.size)
+    count, descriptor, magic = FOOTER.unpack(f.read(FOOTER.size))
+    if magic != SEEKABLE_MAGIC:
+        return None
+    entry_size = ENTRY.size + (4 if descriptor & CHECKSUM_FLAG else 0)
+    table_size = count * entry_size + FOOTER.size
+    if end < table_size + 8:
+        return None
+    f.seek(end - table_size - 8)
+    skippable, frame_size = struct.unpack("<II", f.read(8))
+    if skippable != SKIPPABLE_MAGIC or frame_size != table_size:
+        return None
+    entries = f.read(count * entry_size)
+
+    frames = []
+    offset = data_offset = 0
+    for i in range(count):
+        size, data_size = ENTRY.unpack_from(entries, i * entry_size)
+        frames.append(Frame(offset, size, data_offset, data_size))
+        offset += size
+        data_offset += data_size
+    return frames
+
+
+def _seek_table(frames: List[Frame]) -> bytes:
+    entries = b"".join(ENTRY.pack(frame.size, frame.data_size) for frame in frames)
+    footer = FOOTER.pack(len(frames), 0, SEEKABLE_MAGIC)
+    return struct.pack("<II", SKIPPABLE_MAGIC, len(entries) + len(footer)) + entries + footer
+
+
+class JsonlWriter:
+    """Write JSONL lines; a .zst path gets seekable frames of about FRAME_SIZE bytes.
+
+    The file is written to '<path>.partial' and renamed on close, so readers
+    never see a half-written file; on an exception the partial file is removed.
+    """
+
+    def __init__(self, path, level: int = ZSTD_LEVEL, frame_size: int = FRAME_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._partial = self.path.with_name(self.path.name + ".partial")
+        self._file = open(self._partial, 'wb')
+        self._compressor = _zstd().ZstdCompressor(level=level) if is_compressed(self.path) else None
+        self._frame_size = frame_size
+        self._buffer = []
+        self._buffered = 0
+        self._frames: List[Frame] = []
+        self.lines = 0
+
+    def write(self, line: str):
+        """Write one line (newline added if missing)."""
+        if not line.endswith("\n"):
+            line += "\n"
+        data = line.encode('utf-8')
+        self.lines += 1
+        if self._compressor is None:
+            self._file.write(data)
+            return
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self._frame_size:
+            self._flush_frame()
+
+    def write_record(self, record):
+        self.write(dumps(record) + "\n")
+
+    def _flush_frame(self):
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        compressed = self._compressor.compress(data)
+        last = self._frames[-1] if self._frames else Frame(0, 0, 0, 0)
+        self._frames.append(Frame(last.offset + last.size, len(compressed),
+                                  last.data_offset + last.data_size, len(data)))
+        self._file.write(compressed)
+        self._buffer = []
+        self._buffered = 0
+
+    def close(self):
+        if self._compressor is not None:
+            self._flush_frame()
+            self._file.write(_seek_table(self._frames))
+        self._file.close()
+        self._partial.replace(self.path)
+
+    def abort(self):
+        self._file.close()
+        self._partial.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+_local = threading.local()
+
+
+def _decompress_frame(data: bytes, size: int) -> bytes:
+    # Decompressor contexts are not thread-safe: one per thread
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _local.decompressor = _zstd().ZstdDecompressor()
+    return decompressor.decompress(data, max_output_size=size)
+
+
+@contextmanager
+def open_binary(path) -> Iterator[IO[bytes]]:
+    """Binary stream of the (decompressed) file contents."""
+    path = resolve_path(path)
+    with open(path, 'rb') as f:
+        if not is_compressed(path):
+            yield f
+            return
+        reader = _zstd().ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        with io.BufferedReader(reader) as stream:
+            yield stream
+
+
+@contextmanager
+def open_text(path) -> Iterator[IO[str]]:
+    """Text stream of a .jsonl or .jsonl.zst file, for `for line in f` loops."""
+    with open_binary(path) as stream:
+        with io.TextIOWrapper(stream, encoding='utf-8') as text:
+            yield text
+
+
+def iter_lines(path, workers: int = 1) -> Iterator[bytes]:
+    """Raw lines (with their newline) of a .jsonl or .jsonl.zst file.
+
+    With workers > 1 the frames of a seekable file are decoded in parallel
+    (zstd releases the GIL), keeping at most 2 * workers frames in flight.
+    """
+    path = resolve_path(path)
+    if is_compressed(path) and workers > 1:
+        with open(path, 'rb') as f:
+            frames = read_seek_table(f)
+            if frames:
+                yield from _iter_parallel(f, frames, workers)
+                return
+    with open_binary(path) as stream:
+        yield from stream
+
+
+def _iter_parallel(f: IO[bytes], frames: List[Frame], workers: int) -> Iterator[bytes]:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for frame in frames:
+            f.seek(frame.offset)
+            pending.append(pool.submit(_decompress_frame, f.read(frame.size), frame.data_size))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result().splitlines(keepends=True)
+        while pending:
+            yield from pending.popleft().result().splitlines(keepends=True)
+
+
+def _warning(path: Path) -> ErrorHook:
+    def warn(line_num: int, error: Exception):
+        print(f"⚠ Error in {path.name} line {line_num}: {error}")
+    return warn
+
+
+def iter_numbered(path, on_error: Optional[ErrorHook] = None, workers: int = 1) -> Iterator[Tuple[int, Any]]:
+    """(line number, record) for every non-blank line that parses.
+
+    Broken lines go to `on_error(line_num, error)`; by default a warning is
+    printed and the line skipped.
+    """
+    path = resolve_path(path)
+    on_error = on_error or _warning(path)
+    for line_num, line in enumerate(iter_lines(path, workers), 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, loads(line)
+        except ValueError as e:
+            on_error(line_num, e)
+
+
+def iter_records(path, on_error: Optional[ErrorHook] = None, workers: int = 1) -> Iterator[Any]:
+    """Records of a .jsonl or .jsonl.zst file, streamed (see iter_numbered)."""
+    for _, record in iter_numbered(path, on_error, workers):
+        yield record
+
+
+def _chunks(path: Path, target: int) -> list:
+    """Split a file into chunks of about `target` uncompressed bytes, at line boundaries.
+
+    A chunk is ("plain", start, end) or ("zst", [(offset, size, data_size), ...]).
+    """
+    if is_compressed(path):
+        with open(path, 'rb') as f:
+            frames = read_seek_table(f)
+        if not frames:
+            return []
+        chunks, current, current_size = [], [], 0
+        for frame in frames:
+            current.append((frame.offset, frame.size, frame.data_size))
+            current_size += frame.data_size
+            if current_size >= target:
+                chunks.append(("zst", current))
+                current, current_size = [], 0
+        if current:
+            chunks.append(("zst", current))
+        return chunks
+
+    size = path.stat().st_size
+    chunks, start = [], 0
+    with open(path, 'rb') as f:
+        while start < size:
+            f.seek(min(start + target, size))
+            f.readline()
+            end = min(f.tell(), size)
+            chunks.append(("plain", start, end))
+            start = end
+    return chunks
+
+
+def _parse_chunk(path: str, chunk: tuple) -> Tuple[list, list, int]:
+    """Worker: (records, [(line in chunk, error message)], lines in chunk)."""
+    with open(path, 'rb') as f:
+        if chunk[0] == "plain":
+            f.seek(chunk[1])
+            data = f.read(chunk[2] - chunk[1])
+        else:
+            parts = []
+            for offset, size, data_size in chunk[1]:
+                f.seek(offset)
+                parts.append(_decompress_frame(f.read(size), data_size))
+            data = b"".join(parts)
+    records, errors = [], []
+    lines = data.split(b"\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    for line_num, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(loads(line))
+        except ValueError as e:
+            errors.append((line_num, str(e)))
+    return records, errors, len(lines)
+
+
+def read_records(path, workers: Optional[int] = None, on_error: Optional[ErrorHook] = None) -> list:
+    """All records of a file, in order.
+
+    Files of at least PARALLEL_MIN_BYTES (or any file, with workers > 1) are
+    split into line-aligned chunks that worker processes parse; smaller files
+    are parsed in-process. Broken lines are reported as in iter_numbered.
+    """
+    path = resolve_path(path)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if path.stat().st_size >= PARALLEL_MIN_BYTES else 1
+    chunks = _chunks(path, max(CHUNK_BYTES, path.stat().st_size // (workers * 4))) if workers > 1 else []
+    if len(chunks) < 2:
+        return list(iter_records(path, on_error))
+
+    on_error = on_error or _warning(path)
+    records = []
+    first_line = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_records, errors, line_count in pool.map(_parse_chunk, repeat(str(path)), chunks):
+            records.extend(chunk_records)
+            for line_num, message in errors:
+                on_error(first_line + line_num, ValueError(message))
+            first_line += line_count
+    return records
+
+
+class LineReader:
+    """Random access to lines by uncompressed byte offset (e.g. offsets recorded while streaming)."""
+
+    def __init__(self, path):
+        self.path = resolve_path(path)
+        self._file = open(self.path, 'rb')
+        self._frames = None
+        if is_compressed(self.path):
+            self._frames = read_seek_table(self._file)
+            if self._frames is None:
+                self._file.close()
+                raise ValueError(f"{self.path} has no seek table; recompress it with jsonl_io.py compress")
+            self._starts = [frame.data_offset for frame in self._frames]
+            self._cached = (None, b"")
+
+    def _frame_data(self, index: int) -> bytes:
+        if self._cached[0] != index:
+            frame = self._frames[index]
+            self._file.seek(frame.offset)
+            self._cached = (index, _decompress_frame(self._file.read(frame.size), frame.data_size))
+        return self._cached[1]
+
+    def read_line(self, offset: int) -> bytes:
+        if self._frames is None:
+            self._file.seek(offset)
+            return self._file.readline()
+        index = bisect_right(self._starts, offset) - 1
+        if index < 0:
+            raise ValueError(f"Offset out of range: {offset}")
+        data = self._frame_data(index)
+        start = offset - self._frames[index].data_offset
+        end = data.find(b"\n", start)
+        return data[start:] if end == -1 else data[start:end + 1]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def compress_file(source: Path, output: Optional[Path] = None, level: int = ZSTD_LEVEL,
+                  frame_size: int = FRAME_SIZE) -> Path:
+    output = output or source.with_name(source.name + ZST_SUFFIX)
+    with JsonlWriter(output, level, frame_size) as out, open(source, 'rb') as f:
+        for line in f:
+            out.write(line.decode('utf-8'))
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress and inspect seekable .jsonl.zst files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    comp = sub.add_parser("compress", help="Write <file>.zst next to each file")
+    comp.add_argument("files", nargs="+", type=Path)
+    comp.add_argument("--level", type=int, default=ZSTD_LEVEL, help=f"zstd level (default: {ZSTD_LEVEL})")
+    comp.add_argument("--frame-size", type=int, default=FRAME_SIZE, help="Uncompressed bytes per frame")
+    decomp = sub.add_parser("decompress", help="Write <file> without .zst")
+    decomp.add_argument("files", nargs="+", type=Path)
+    info = sub.add_parser("info", help="Show frames and compression ratio")
+    info.add_argument("files", nargs="+", type=Path)
+    args = parser.parse_args()
+
+    for path in args.files:
+        if args.command == "compress":
+            output = compress_file(path, level=args.level, frame_size=args.frame_size)
+            ratio = path.stat().st_size / max(1, output.stat().st_size)
+            print(f"✓ {output.name}: {path.stat().st_size / 1024:.0f} KB → "
+                  f"{output.stat().st_size / 1024:.0f} KB ({ratio:.1f}x)")
+        elif args.command == "decompress":
+            if not is_compressed(path):
+                print(f"⚠ Skipping {path}: not a .zst file")
+                continue
+            with JsonlWriter(path.with_suffix("")) as out:
+                for line in iter_lines(path):
+                    out.write(line.decode('utf-8'))
+            print(f"✓ {path.with_suffix('').name}")
+        else:
+            with open(path, 'rb') as f:
+                frames = read_seek_table(f)
+            size = path.stat().st_size
+            if not frames:
+                print(f"{path.name}: {size / 1024:.0f} KB, no seek table (not seekable)")
+                continue
+            data_size = sum(frame.data_size for frame in frames)
+            print(f"{path.name}: {len(frames)} frames, {data_size / 1024:.0f} KB → {size / 1024:.0f} KB "
+                  f"({data_size / max(1, size):.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
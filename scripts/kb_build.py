@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Incremental knowledge-base build: download → extract → merge → validate → embed → index/export.
+
+The release pipeline is declared as a DAG of stages (STAGES). Each stage is
+one of the existing scripts plus the files it reads and writes; a stage
+depends on every stage whose outputs match its inputs. A build:
+
+- hashes each stage's inputs (including the script itself) and skips the
+  stage when the hash and its outputs are unchanged since the last run,
+- runs independent stages in parallel (--jobs),
+- records every stage's status, duration and input/output hashes in
+  build/manifest.json, a reproducible record of what went into the build.
+
+Stage output goes to build/logs/<stage>.log. Stages that need an API key
+are skipped (their existing outputs are used) when it is not set.
+
+Explicit stages - the network download and the extractions, which call a
+paid LLM or regenerate unit IDs - are not built by default: they run only
+when named as targets or with --allow-paid, otherwise their existing
+outputs are used as they are.
+
+Usage:
+    python3 scripts/kb_build.py build                  # everything but the explicit stages
+    python3 scripts/kb_build.py build embed            # embed and what it needs
+    python3 scripts/kb_build.py build extract-as       # run an explicit stage
+    python3 scripts/kb_build.py build --allow-paid     # everything
+    python3 scripts/kb_build.py build --dry-run        # show what would run
+    python3 scripts/kb_build.py build merge-mvp --force
+    python3 scripts/kb_build.py list
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BUILD_DIR = PROJECT_ROOT / "build"
+STATE_PATH = BUILD_DIR / "state.json"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+LOG_DIR = BUILD_DIR / "logs"
+
+HASH_BLOCK = 1 << 20
+MISSING = "missing"
+
+# Files shared by several stages
+SCHEMA = "schemas/knowledge_unit.schema.json"
+MERGE_ENGINE = ["scripts/kb_merge.py", "scripts/kb_validate.py", SCHEMA]
+LLM_SUPPORT = ["scripts/segmenter.py", "scripts/chunker.py", "scripts/pdf_text.py",
+               "scripts/llm_usage.py", "scripts/llm_output.py"]
+BASE_DATASET = "data/knowledge_base_final.jsonl"
+MVP_DATASET = "data/knowledge_base_mvp.jsonl"
+VZP_SOURCES = ["data/extracted/vzp_metodika_as_2026.jsonl",
+               "data/extracted/vzp_dodatek_as_2026.jsonl",
+               "data/extracted/vzp_metodika_pl_2026.jsonl"]
+PHASE3_SOURCES = ["data/extracted/zpmv_metodika_2026.jsonl",
+                  "data/extracted/ozp_metodika_2026.jsonl",
+                  "data/extracted/cpzp_metodika_2026.jsonl",
+                  "data/extracted/year_comparison_2025_2026.jsonl",
+                  "data/extracted/infoprolekare_articles.jsonl"]
+
+
+@dataclass
+class Stage:
+    """One build step: a script run with arguments, and the files it reads and writes.
+
+    `inputs` and `outputs` are project-relative paths or glob patterns.
+    `exclude` drops matching files from the input globs; `after` adds
+    ordering-only dependencies (e.g. embed only after validate). An
+    `explicit` stage only runs when it is named or explicit stages are
+    allowed.
+    """
+    name: str
+    script: str
+    args: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    exclude: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+    env: List[str] = field(default_factory=list)
+    explicit: bool = False
+
+    @property
+    def command(self) -> List[str]:
+        return [sys.executable, str(PROJECT_ROOT / self.script), *self.args]
+
+    def all_inputs(self) -> List[str]:
+        return [self.script, *self.inputs]
+
+
+STAGES = [
+    Stage("download", "scripts/download_sources.py",
+          outputs=["sources/metadata.json", "sources/*.pdf", "sources/*.html"],
+          explicit=True),
+    Stage("extract-as", "scripts/extract_as_2026.py",
+          inputs=[*LLM_SUPPORT, "sources/uhradova_vyhlaska_2026.pdf"],
+          outputs=["data/extracted/vzp_metodika_as_2026.jsonl"],
+          env=["OPENAI_API_KEY"], explicit=True),
+    Stage("extract-as-dodatek", "scripts/extract_as_dodatek_2026.py",
+          outputs=["data/extracted/vzp_dodatek_as_2026.jsonl"], explicit=True),
+    Stage("extract-pl", "scripts/extract_pl_2026.py",
+          outputs=["data/extracted/vzp_metodika_pl_2026.jsonl"], explicit=True),
+    Stage("merge-vzp", "scripts/merge_and_validate.py",
+          inputs=[*MERGE_ENGINE, BASE_DATASET, *VZP_SOURCES],
+          outputs=["data/knowledge_base_expanded_v2.jsonl", "docs/analysis/merge_report_phase02.md"]),
+    Stage("merge-mvp", "scripts/merge_phase3_final.py",
+          inputs=[*MERGE_ENGINE, BASE_DATASET, *PHASE3_SOURCES],
+          outputs=[MVP_DATASET, "data/knowledge_base_phase3.jsonl", "docs/analysis/merge_report_phase03.md"]),
+    Stage("validate", "scripts/kb_validate.py", args=[MVP_DATASET],
+          inputs=[SCHEMA, MVP_DATASET]),
+    Stage("embed", "scripts/generate_embeddings.py", args=["--input", Path(MVP_DATASET).name],
+          inputs=[MVP_DATASET],
+          outputs=["data/knowledge_base_embeddings.jsonl", "data/tfidf_vectorizer.pkl", "data/svd_model.pkl"],
+          after=["validate"]),
+    Stage("index", "scripts/kb_index.py", args=["build"],
+          inputs=[MVP_DATASET, "data/knowledge_base_embeddings.jsonl", "data/tfidf_vectorizer.pkl",
+                  "data/svd_model.pkl"],
+          outputs=["data/index/*"]),
+    Stage("export-parquet", "scripts/kb_parquet.py",
+          inputs=[MVP_DATASET, "data/knowledge_base_embeddings.jsonl"],
+          outputs=["build/hf/data/*.parquet"],
+          after=["validate"]),
+    Stage("audit", "scripts/data_audit.py",
+          inputs=["scripts/kb_merge.py", "data/*.jsonl", "data/extracted/*.jsonl"],
+          exclude=["data/knowledge_base_embeddings.jsonl"],
+          outputs=["docs/analysis/data_statistics.json", "docs/analysis/data_audit.json",
+                   "docs/analysis/drift_report.md"]),
+]
+
+
+class BuildError(Exception):
+    """Invalid stage graph."""
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(c in pattern for c in "*?[")
+
+
+def _glob_match(path: str, pattern: str) -> bool:
+    """fnmatch per path component, so '*' does not cross directories (as in Path.glob)."""
+    parts, pattern_parts = path.split("/"), pattern.split("/")
+    return len(parts) == len(pattern_parts) and all(map(fnmatch.fnmatch, parts, pattern_parts))
+
+
+def _matches(output: str, input_: str) -> bool:
+    return _glob_match(output, input_) or _glob_match(input_, output)
+
+
+def dependencies(stages: List[Stage]) -> Dict[str, set]:
+    """Stage name → names of the stages it depends on."""
+    names = {stage.name for stage in stages}
+    deps = {}
+    for stage in stages:
+        found = set(stage.after)
+        unknown = found - names
+        if unknown:
+            raise BuildError(f"{stage.name}: unknown stages in 'after': {sorted(unknown)}")
+        for other in stages:
+            if other is stage:
+                continue
+            outputs = [o for o in other.outputs if not any(_matches(o, x) for x in stage.exclude)]
+            if any(_matches(o, i) for o in outputs for i in stage.all_inputs()):
+                found.add(other.name)
+        deps[stage.name] = found
+    return deps
+
+
+def topological_order(deps: Dict[str, set]) -> List[str]:
+    order = []
+    done = set()
+    visiting = set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in visiting:
+            raise BuildError(f"Dependency cycle: {' → '.join(path + [name])}")
+        visiting.add(name)
+        for dep in sorted(deps[name]):
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in sorted(deps):
+        visit(name, [])
+    return order
+
+
+def select(deps: Dict[str, set], targets: List[str]) -> set:
+    """Targets plus everything they depend on."""
+    selected = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in deps:
+            raise BuildError(f"Unknown stage: {name} (see `kb_build.py list`)")
+        if name not in selected:
+            selected.add(name)
+            stack.extend(deps[name])
+    return selected
+
+
+class HashCache:
+    """sha256 of files, reused while size and mtime are unchanged."""
+
+    def __init__(self, entries: Optional[dict] = None):
+        self.entries = entries or {}
+
+    def file_hash(self, rel: str) -> str:
+        path = PROJECT_ROOT / rel
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return MISSING
+        cached = self.entries.get(rel)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                digest.update(block)
+        self.entries[rel] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def hashes(self, patterns: List[str], exclude: List[str] = ()) -> Dict[str, str]:
+        """Hashes of the files matching the patterns (plain paths may be missing)."""
+        result = {}
+        for pattern in patterns:
+            if _is_glob(pattern):
+                for path in sorted(PROJECT_ROOT.glob(pattern)):
+                    rel = path.relative_to(PROJECT_ROOT).as_posix()
+                    if path.is_file() and not any(_glob_match(rel, x) for x in exclude):
+                        result[rel] = self.file_hash(rel)
+            else:
+                result[pattern] = self.file_hash(pattern)
+        return result
+
+
+def stage_key(stage: Stage, input_hashes: Dict[str, str]) -> str:
+    payload = json.dumps({"args": stage.args, "inputs": input_hashes}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_state(path: Path = STATE_PATH) -> dict:
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"stages": {}, "hashes": {}}
+
+
+def save_json(path: Path, data: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp.replace(path)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class Builder:
+    """Runs the selected stages of the DAG, in parallel where possible."""
+
+    def __init__(self, stages: List[Stage] = STAGES, jobs: int = 4, force: Optional[set] = None,
+                 dry_run: bool = False, allow: Optional[set] = None, state_path: Path = STATE_PATH,
+                 log_dir: Path = LOG_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.deps = dependencies(stages)
+        topological_order(self.deps)  # fail early on cycles
+        self.jobs = jobs
+        self.force = force or set()
+        self.dry_run = dry_run
+        self.allow = allow or set()  # explicit stages allowed to run
+        self.state_path = state_path
+        self.log_dir = log_dir
+        self.state = load_state(state_path)
+        self.cache = HashCache(self.state.get("hashes"))
+        self.results = {}
+
+    def is_current(self, stage: Stage, key: str) -> bool:
+        previous = self.state["stages"].get(stage.name)
+        if not previous or previous.get("key") != key or stage.name in self.force:
+            return False
+        outputs = self.cache.hashes(stage.outputs)
+        return outputs == previous.get("outputs") and MISSING not in outputs.values()
+
+    def default_targets(self) -> List[str]:
+        return [name for name, stage in self.stages.items() if not stage.explicit]
+
+    def run_stage(self, stage: Stage, upstream_changes: bool = False) -> dict:
+        """Run the stage unless it is current; `upstream_changes`: a dependency would run (dry run)."""
+        inputs = self.cache.hashes(stage.all_inputs(), stage.exclude)
+        key = stage_key(stage, inputs)
+        record = {"status": None, "key": key, "inputs": inputs, "duration_s": 0.0}
+
+        if not upstream_changes and self.is_current(stage, key):
+            record.update(status="cached", outputs=self.state["stages"][stage.name]["outputs"])
+            return record
+        missing_env = [name for name in stage.env if not os.environ.get(name)]
+        if missing_env:
+            record.update(status="skipped", reason=f"{', '.join(missing_env)} not set",
+                          outputs=self.cache.hashes(stage.outputs))
+            return record
+        if stage.explicit and stage.name not in self.allow:
+            record.update(status="skipped", reason="explicit stage; name it or pass --allow-paid",
+                          outputs=self.cache.hashes(stage.outputs))
+            return record
+        if self.dry_run:
+            record.update(status="would-run", outputs={})
+            if upstream_changes:
+                record["reason"] = "an upstream stage would run"
+            return record
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.log_dir / f"{stage.name}.log"
+        started = time.monotonic()
+        with open(log_path, 'w', encoding='utf-8') as log:
+            returncode = subprocess.run(stage.command, cwd=PROJECT_ROOT, stdout=log,
+                                        stderr=subprocess.STDOUT).returncode
+        record["duration_s"] = round(time.monotonic() - started, 3)
+        record["log"] = str(log_path.relative_to(PROJECT_ROOT)) if log_path.is_relative_to(PROJECT_ROOT) \
+            else str(log_path)
+        if returncode != 0:
+            record.update(status="failed", returncode=returncode, outputs={})
+            return record
+        record.update(status="built", outputs=self.cache.hashes(stage.outputs))
+        return record
+
+    def build(self, targets: Optional[List[str]] = None) -> bool:
+        """Build the targets (default: all but the explicit stages) and what they depend on.
+
+        Explicit stages named as targets are allowed to run.
+        """
+        self.allow = self.allow | set(targets or [])
+        selected = select(self.deps, targets or self.default_targets())
+        pending = set(selected)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, self.jobs)) as pool:
+            while pending or running:
+                for name in sorted(pending):
+                    deps = self.deps[name] & selected
+                    if any(self.results.get(d, {}).get("status") in ("failed", "blocked") for d in deps):
+                        self.results[name] = {"status": "blocked", "duration_s": 0.0}
+                        self.report(name)
+                        pending.discard(name)
+                    elif all(d in self.results for d in deps):
+                        # A dry run cannot know the new outputs: what follows a stage that would run is stale
+                        upstream = self.dry_run and any(self.results[d]["status"] == "would-run" for d in deps)
+                        running[pool.submit(self.run_stage, self.stages[name], upstream)] = name
+                        pending.discard(name)
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    self.results[name] = future.result()
+                    self.report(name)
+
+        if not self.dry_run:
+            self.save()
+        return not any(r["status"] in ("failed", "blocked") for r in self.results.values())
+
+    def report(self, name: str):
+        result = self.results[name]
+        status = result["status"]
+        marks = {"built": "✓", "cached": "⊙", "skipped": "⚠", "would-run": "→", "failed": "✗", "blocked": "✗"}
+        detail = {
+            "built": f"built in {result['duration_s']:.1f}s",
+            "cached": "up to date",
+            "skipped": f"skipped ({result.get('reason', '')})",
+            "would-run": f"would run ({result['reason']})" if result.get("reason") else "would run",
+            "failed": f"failed (exit {result.get('returncode')}, see {result.get('log')})",
+            "blocked": "not run (a dependency failed)",
+        }[status]
+        print(f"{marks[status]} {name}: {detail}", flush=True)
+
+    def save(self):
+        for name, result in self.results.items():
+            if result["status"] == "built":
+                self.state["stages"][name] = {k: result[k] for k in ("key", "inputs", "outputs", "duration_s")}
+                self.state["stages"][name]["built_at"] = datetime.now().isoformat()
+            elif result["status"] == "failed":
+                self.state["stages"].pop(name, None)
+        self.state["hashes"] = self.cache.entries
+        save_json(self.state_path, self.state)
+
+        manifest = {
+            "built_at": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": sys.version.split()[0],
+            "stages": {name: {**self.results[name], "command": self.stages[name].command[1:]}
+                       for name in topological_order(self.deps) if name in self.results},
+        }
+        save_json(self.state_path.parent / MANIFEST_PATH.name, manifest)
+
+
+def print_stages(builder: Builder):
+    """The DAG in build order, with the current state of each stage.
+
+    A stage after a stale one is stale too. Explicit stages are marked.
+    """
+    stale = set()
+    for name in topological_order(builder.deps):
+        stage = builder.stages[name]
+        key = stage_key(stage, builder.cache.hashes(stage.all_inputs(), stage.exclude))
+        if builder.deps[name] & stale or not builder.is_current(stage, key):
+            stale.add(name)
+        state = "stale" if name in stale else "up to date"
+        deps = ", ".join(sorted(builder.deps[name])) or "-"
+        print(f"{name:<20} {state:<11} after: {deps}{'  (explicit)' if stage.explicit else ''}")
+        print(f"{'':<20} {' '.join(stage.command[1:])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental knowledge-base build")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build stages whose inputs changed")
+    build.add_argument("targets", nargs="*",
+                       help="Stages to build (default: all but the explicit ones), with their dependencies")
+    build.add_argument("--force", nargs="*", metavar="STAGE",
+                       help="Re-run these stages (all selected stages if none given)")
+    build.add_argument("--allow-paid", action="store_true",
+                       help="Also run the explicit stages (download, LLM and other extractions) when stale")
+    build.add_argument("--dry-run", action="store_true", help="Only show what would run")
+    build.add_argument("-j", "--jobs", type=int, default=4, help="Stages run in parallel (default: 4)")
+    sub.add_parser("list", help="Show stages, dependencies and whether they are up to date")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print_stages(Builder())
+        return 0
+
+    builder = Builder(jobs=args.jobs, dry_run=args.dry_run)
+    if args.allow_paid:
+        builder.allow = {name for name, stage in builder.stages.items() if stage.explicit}
+    if args.force is not None:
+        builder.force = set(args.force) or select(builder.deps, args.targets or builder.default_targets())
+    started = time.monotonic()
+    ok = builder.build(args.targets)
+    print(f"\n{'✓ Build complete' if ok else '✗ Build failed'} in {time.monotonic() - started:.1f}s")
+    if not args.dry_run:
+        print(f"Manifest: {MANIFEST_PATH}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Diff two knowledge-base versions unit by unit.
+
+Both files are streamed once. Every unit becomes a small sort record
+(id, side, line fingerprint, byte offset) and the records of both sides go
+through one external sort (kb_merge.external_sort), so memory is bounded by
+the sort run size, not by the file size. Each ID group then tells whether
+the unit was added, removed, modified or left unchanged; only modified units
+are read back (by offset) to compute field-level deltas. The ID is taken
+from the start of the line without parsing it when the line begins with
+it, as the dataset files do.
+
+Units are matched by ID. Lines are fingerprinted as they are (cheap);
+when the lines of an ID differ, the parsed units are compared, so a unit
+that was only re-serialized (key order, escaping) counts as unchanged. When an ID
+occurs more than once on a side, identical copies are paired first and the
+rest are paired in file order.
+
+The change set is written as JSONL, one record per change in ID order, so
+later steps (incremental embedding, cache invalidation, HF delta uploads)
+can act on the changed units only:
+
+    {"op": "added", "id": "ku-700", "domain": "uhrady", "new": {...unit...}}
+    {"op": "removed", "id": "ku-12", "domain": "kodovani"}
+    {"op": "modified", "id": "ku-3", "domain": "uhrady",
+     "fields": {"description": {"old": "...", "new": "..."},
+                "content.body": {"old": "..."}}, "new": {...unit...}}
+
+A missing "old" or "new" means the field did not exist on that side.
+Nested objects are compared key by key (dotted paths), lists as a whole.
+
+Usage:
+    python3 scripts/kb_diff.py data/knowledge_base_v3.jsonl data/knowledge_base_final.jsonl
+    python3 scripts/kb_diff.py v3 final -o changes.jsonl --summary summary.json
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from itertools import groupby
+from json.encoder import encode_basestring
+from pathlib import Path
+from typing import Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import LineReader, iter_lines, loads, resolve_path
+from kb_merge import RUN_SIZE, external_sort
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+OLD, NEW = "0", "1"
+
+
+def resolve_version(name: str) -> Path:
+    """A path, or a version name: 'final' → data/knowledge_base_final.jsonl."""
+    path = Path(name)
+    if path.exists() or path.suffix:
+        return path
+    return DATA_DIR / f"knowledge_base_{name}.jsonl"
+
+
+# The ID as the leading JSON string of a line, read without parsing the line
+ID_PREFIX = re.compile(rb'\{\s*"id"\s*:\s*("[^"\\\x00-\x1f]*")\s*[,}]')
+
+
+def _sort_id(line: bytes) -> str:
+    """Tab- and newline-free JSON of a line's ID, for the sort records."""
+    match = ID_PREFIX.match(line)
+    if match:
+        return match.group(1).decode('utf-8')
+    unit_id = loads(line).get("id")
+    return encode_basestring(unit_id) if isinstance(unit_id, str) else json.dumps(unit_id)
+
+
+def field_deltas(old: dict, new: dict, prefix: str = "") -> dict:
+    """{path: {"old": ..., "new": ...}} for every field that differs."""
+    deltas = {}
+    for key in sorted(set(old) | set(new), key=str):
+        path = f"{prefix}{key}"
+        if key in old and key in new:
+            if old[key] == new[key]:
+                continue
+            if isinstance(old[key], dict) and isinstance(new[key], dict):
+                deltas.update(field_deltas(old[key], new[key], f"{path}."))
+                continue
+        delta = {}
+        if key in old:
+            delta["old"] = old[key]
+        if key in new:
+            delta["new"] = new[key]
+        deltas[path] = delta
+    return deltas
+
+
+def _records(path: Path, side: str, stats: dict) -> Iterator[str]:
+    """Sort records "<id>\\t<side>\\t<fingerprint>\\t<offset>" of one file."""
+    offset = 0
+    for line_num, raw in enumerate(iter_lines(path), 1):
+        line_offset = offset
+        offset += len(raw)
+        line = raw.rstrip(b"\r\n")
+        if not line.strip():
+            continue
+        try:
+            unit_id = _sort_id(line)
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError) as e:
+            # stderr: with `-o -` stdout carries the change set
+            print(f"⚠ Error in {path.name} line {line_num}: {e}", file=sys.stderr)
+            stats["parse_errors"] += 1
+            continue
+        yield f"{unit_id}\t{side}\t{hashlib.md5(line).hexdigest()}\t{line_offset}\n"
+
+
+def _pair(old: list, new: list):
+    """Match the (fingerprint, offset) entries of one ID: identical copies first."""
+    new_left = list(new)
+    unmatched_old = []
+    for entry in old:
+        same = next((i for i, other in enumerate(new_left) if other[0] == entry[0]), None)
+        if same is None:
+            unmatched_old.append(entry)
+        else:
+            yield entry, new_left.pop(same)
+    for i in range(max(len(unmatched_old), len(new_left))):
+        yield (unmatched_old[i] if i < len(unmatched_old) else None,
+               new_left[i] if i < len(new_left) else None)
+
+
+def _read_at(reader: LineReader, offset: int) -> dict:
+    return loads(reader.read_line(offset))
+
+
+def new_stats() -> dict:
+    return {
+        "added": 0, "removed": 0, "modified": 0, "unchanged": 0, "parse_errors": 0,
+        "by_domain": defaultdict(Counter),
+        "fields": Counter(),
+    }
+
+
+def diff_files(old_path: Path, new_path: Path, stats: Optional[dict] = None, with_units: bool = True,
+               run_size: int = RUN_SIZE) -> Iterator[dict]:
+    """Stream the changes from old_path to new_path, in ID order.
+
+    `stats` (see new_stats) is filled in as the changes are consumed. With
+    `with_units=False` added and modified units are reported without their
+    new body.
+    """
+    stats = stats if stats is not None else new_stats()
+    old_path, new_path = resolve_path(old_path), resolve_path(new_path)
+
+    def records():
+        yield from _records(old_path, OLD, stats)
+        yield from _records(new_path, NEW, stats)
+
+    with tempfile.TemporaryDirectory(prefix="kb_diff_") as tmp, \
+            LineReader(old_path) as old_file, LineReader(new_path) as new_file:
+        sorted_records = external_sort(records(), Path(tmp), run_size)
+        try:
+            yield from _changes(sorted_records, old_file, new_file, stats, with_units)
+        finally:
+            sorted_records.close()
+
+
+def _changes(sorted_records, old_file, new_file, stats: dict, with_units: bool) -> Iterator[dict]:
+    for unit_id, group in groupby(sorted_records, key=lambda line: line.split('\t', 1)[0]):
+        sides = {OLD: [], NEW: []}
+        for line in group:
+            _, side, digest, offset = line.rstrip('\n').split('\t')
+            sides[side].append((digest, int(offset)))
+        if len(sides[OLD]) == 1 and len(sides[NEW]) == 1 and sides[OLD][0][0] == sides[NEW][0][0]:
+            stats["unchanged"] += 1
+            continue
+
+        unit_id = json.loads(unit_id)
+        for old, new in _pair(sides[OLD], sides[NEW]):
+            old_unit = _read_at(old_file, old[1]) if old else None
+            new_unit = _read_at(new_file, new[1]) if new else None
+            domain = (new_unit or old_unit).get("domain", "unknown")
+            if old is None:
+                change = {"op": "added", "id": unit_id, "domain": domain}
+            elif new is None:
+                change = {"op": "removed", "id": unit_id, "domain": domain}
+            else:
+                fields = field_deltas(old_unit, new_unit) if old[0] != new[0] else {}
+                if not fields:
+                    stats["unchanged"] += 1
+                    continue
+                change = {"op": "modified", "id": unit_id, "domain": domain, "fields": fields}
+                stats["fields"].update(fields.keys())
+            if new is not None and with_units:
+                change["new"] = new_unit
+            stats[change["op"]] += 1
+            stats["by_domain"][domain][change["op"]] += 1
+            yield change
+
+
+def summary(stats: dict, old_path: Path, new_path: Path) -> dict:
+    """JSON-serializable summary of a diff."""
+    return {
+        "old": str(old_path),
+        "new": str(new_path),
+        **{key: stats[key] for key in ("added", "removed", "modified", "unchanged", "parse_errors")},
+        "by_domain": {domain: dict(counts) for domain, counts in sorted(stats["by_domain"].items())},
+        "fields": dict(stats["fields"].most_common()),
+    }
+
+
+def print_summary(result: dict):
+    print(f"\n{result['old']} → {result['new']}")
+    print(f"  +{result['added']} added, -{result['removed']} removed, "
+          f"~{result['modified']} modified, {result['unchanged']} unchanged")
+    if result["parse_errors"]:
+        print(f"  ⚠ {result['parse_errors']} unparseable lines skipped")
+    for domain, counts in result["by_domain"].items():
+        print(f"  {domain}: " + ", ".join(f"{op} {counts[op]}" for op in ("added", "removed", "modified")
+                                          if op in counts))
+    if result["fields"]:
+        top = list(result["fields"].items())[:10]
+        print("  Fields changed: " + ", ".join(f"{field} ({n})" for field, n in top))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two knowledge-base versions")
+    parser.add_argument("old", help="Old version (path or name, e.g. v3)")
+    parser.add_argument("new", help="New version (path or name, e.g. final)")
+    parser.add_argument("-o", "--output", type=Path, help="Write the change set as JSONL ('-' for stdout)")
+    parser.add_argument("--summary", type=Path, help="Write the summary as JSON")
+    parser.add_argument("--no-units", action="store_true", help="Omit the new bodies of added and modified units")
+    parser.add_argument("--run-size", type=int, default=RUN_SIZE, help="Records per external-sort run")
+    args = parser.parse_args()
+
+    old_path, new_path = resolve_path(resolve_version(args.old)), resolve_path(resolve_version(args.new))
+    for path in (old_path, new_path):
+        if not path.exists():
+            print(f"✗ File not found: {path}", file=sys.stderr)
+            return 1
+
+    stats = new_stats()
+    changes = diff_files(old_path, new_path, stats, with_units=not args.no_units, run_size=args.run_size)
+    if args.output is None:
+        for _ in changes:
+            pass
+    elif str(args.output) == "-":
+        for change in changes:
+            sys.stdout.write(json.dumps(change, ensure_ascii=False) + "\n")
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for change in changes:
+                f.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+    result = summary(stats, old_path, new_path)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if str(args.output) != "-":
+        print_summary(result)
+        if args.output:
+            print(f"  Change set: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Versioned search-index bundle for the RAG API.
+
+The API used to combine a knowledge-base file, an embeddings file and two
+pickles at startup without checking that they belong together (a vector
+without a unit only failed inside search()). `build` checks them once and
+writes a single directory the API opens instead:
+
+    data/index/
+        manifest.json     format, version, counts, source and file checksums
+        ids.json          unit ID of every row
+        units.jsonl       the unit lines, in row order
+        unit_offsets.npy  int64 byte offsets of the lines (rows + 1)
+        embeddings.npy    float32 matrix, one normalized row per unit
+        encoder.npz       the query encoder, exported from the fitted TF-IDF
+                          vectorizer and SVD (see query_encoder.py)
+
+The build fails when a unit has no vector or a vector no unit, on duplicate
+IDs, on a dimension mismatch, and when the encoder does not reproduce the
+stored vectors of a sample of units (pickles from a different embedding run),
+or when the exported encoder does not match sklearn on that sample.
+The version is derived from the file checksums, so identical inputs give the
+same version.
+
+IndexBundle opens a bundle with memory maps (the matrix and the unit lines
+are not read at open) after a structural check of sizes and shapes; units
+are parsed on access, the encoder is loaded on first use, and verify()
+checks the checksums, e.g. from a background thread. Opening and querying a
+bundle needs numpy only; building it also needs sklearn for the pickles.
+
+Usage:
+    python3 scripts/kb_index.py build
+    python3 scripts/kb_index.py build --units data/knowledge_base_final.jsonl -o /tmp/index
+    python3 scripts/kb_index.py verify
+    python3 scripts/kb_index.py info
+"""
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import pickle
+import shutil
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import iter_lines, iter_records, loads, resolve_path
+from query_encoder import QueryEncoder
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DATA_DIR = PROJECT_ROOT / "data"
+INDEX_DIR = DATA_DIR / "index"
+DEFAULT_UNITS = DATA_DIR / "knowledge_base_mvp.jsonl"
+DEFAULT_EMBEDDINGS = DATA_DIR / "knowledge_base_embeddings.jsonl"
+DEFAULT_VECTORIZER = DATA_DIR / "tfidf_vectorizer.pkl"
+DEFAULT_SVD = DATA_DIR / "svd_model.pkl"
+
+FORMAT = 2
+MANIFEST_NAME = "manifest.json"
+IDS_NAME = "ids.json"
+UNITS_NAME = "units.jsonl"
+OFFSETS_NAME = "unit_offsets.npy"
+MATRIX_NAME = "embeddings.npy"
+ENCODER_NAME = "encoder.npz"
+BUNDLE_FILES = [IDS_NAME, UNITS_NAME, OFFSETS_NAME, MATRIX_NAME, ENCODER_NAME]
+
+# Units whose vectors are re-encoded at build time, and the cosine they must reach
+ENCODER_SAMPLE = 50
+ENCODER_MIN_COSINE = 0.999
+# Agreement required between the exported encoder and sklearn
+EXPORT_MIN_COSINE = 0.99999
+HASH_BLOCK = 1 << 20
+
+
+class BundleError(Exception):
+    """Inputs that do not match, or a missing or damaged bundle."""
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source(path: Path) -> dict:
+    try:
+        name = str(path.resolve().relative_to(PROJECT_ROOT))
+    except ValueError:
+        name = str(path)
+    return {"path": name, "sha256": file_sha256(path)}
+
+
+def _read_units(path: Path) -> tuple:
+    """(ids, raw lines) of a knowledge-base file; fails on broken lines and duplicate IDs."""
+    ids, lines, seen = [], [], set()
+    for line_num, raw in enumerate(iter_lines(path), 1):
+        line = raw.rstrip(b"\r\n")
+        if not line.strip():
+            continue
+        try:
+            unit_id = loads(line)["id"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise BundleError(f"{path.name} line {line_num}: not a knowledge unit ({e})") from None
+        if unit_id in seen:
+            raise BundleError(f"{path.name} line {line_num}: duplicate unit ID {unit_id}")
+        seen.add(unit_id)
+        ids.append(unit_id)
+        lines.append(line + b"\n")
+    return ids, lines
+
+
+def _read_embeddings(path: Path) -> dict:
+    vectors = {}
+    dim = None
+    for line_num, record in enumerate(iter_records(path), 1):
+        unit_id = record.get("id")
+        vector = np.asarray(record.get("embedding"), dtype=np.float32)
+        if dim is None:
+            dim = vector.size
+        if vector.ndim != 1 or vector.size != dim or dim == 0:
+            raise BundleError(f"{path.name}: embedding of {unit_id} has {vector.size} values, expected {dim}")
+        if unit_id in vectors:
+            raise BundleError(f"{path.name}: duplicate embedding for {unit_id}")
+        vectors[unit_id] = vector
+    return vectors
+
+
+def _examples(ids) -> str:
+    ids = sorted(ids, key=str)
+    return ", ".join(map(str, ids[:5])) + (f" and {len(ids) - 5} more" if len(ids) > 5 else "")
+
+
+def encode(encoder: tuple, texts: List[str]) -> np.ndarray:
+    """Normalized query/unit vectors from (vectorizer, svd)."""
+    vectorizer, svd = encoder
+    vectors = svd.transform(vectorizer.transform(texts))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def check_encoder(encoder: tuple, units: List[dict], matrix: np.ndarray, sample: int = ENCODER_SAMPLE,
+                  exported: Optional[QueryEncoder] = None):
+    """Fail unless the encoder reproduces the stored vectors of the first `sample` units,
+    and the exported encoder (if given) agrees with it."""
+    from generate_embeddings import create_embedding_text
+
+    vectorizer, svd = encoder
+    components = getattr(svd, "components_", None)
+    if components is None or components.shape[0] != matrix.shape[1]:
+        raise BundleError(f"Encoder output has {None if components is None else components.shape[0]} "
+                          f"dimensions, the embeddings {matrix.shape[1]}")
+    count = min(sample, len(units))
+    if count == 0:
+        return
+    texts = [create_embedding_text(unit) for unit in units[:count]]
+    encoded = encode(encoder, texts)
+    stored = matrix[:count].astype(np.float64)
+    cosine = np.sum(encoded * stored, axis=1) / np.maximum(np.linalg.norm(stored, axis=1), 1e-12)
+    worst = int(np.argmin(cosine))
+    if cosine[worst] < ENCODER_MIN_COSINE:
+        raise BundleError(f"The encoder does not reproduce the stored embeddings (cosine {cosine[worst]:.3f} "
+                          f"for {units[worst].get('id')}); were the pickles saved by the same embedding run?")
+    if exported is not None:
+        agreement = np.sum(exported.encode_batch(texts) * encoded, axis=1)
+        worst = int(np.argmin(agreement))
+        if agreement[worst] < EXPORT_MIN_COSINE:
+            raise BundleError(f"The exported encoder differs from sklearn (cosine {agreement[worst]:.6f} "
+                              f"for {units[worst].get('id')})")
+
+
+def build_bundle(out_dir: Path, units_path: Path = DEFAULT_UNITS, embeddings_path: Path = DEFAULT_EMBEDDINGS,
+                 vectorizer_path: Path = DEFAULT_VECTORIZER, svd_path: Path = DEFAULT_SVD) -> dict:
+    """Check the inputs against each other and write the bundle to out_dir; returns its manifest."""
+    units_path, embeddings_path = resolve_path(units_path), resolve_path(embeddings_path)
+    for path in (units_path, embeddings_path, vectorizer_path, svd_path):
+        if not Path(path).exists():
+            raise BundleError(f"File not found: {path}")
+
+    ids, lines = _read_units(units_path)
+    vectors = _read_embeddings(embeddings_path)
+    missing = set(ids) - set(vectors)
+    extra = set(vectors) - set(ids)
+    if missing or extra:
+        problems = []
+        if missing:
+            problems.append(f"{len(missing)} units without an embedding ({_examples(missing)})")
+        if extra:
+            problems.append(f"{len(extra)} embeddings without a unit ({_examples(extra)})")
+        raise BundleError(f"{units_path.name} and {embeddings_path.name} do not match: " + "; ".join(problems))
+    matrix = np.stack([vectors[unit_id] for unit_id in ids]) if ids else np.zeros((0, 0), np.float32)
+
+    with open(vectorizer_path, 'rb') as f:
+        vectorizer = pickle.load(f)
+    with open(svd_path, 'rb') as f:
+        svd = pickle.load(f)
+    try:
+        exported = QueryEncoder.from_sklearn(vectorizer, svd)
+    except ValueError as e:
+        raise BundleError(str(e)) from None
+    check_encoder((vectorizer, svd), [loads(line) for line in lines[:ENCODER_SAMPLE]], matrix, exported=exported)
+
+    out_dir = Path(out_dir)
+    partial = out_dir.with_name(out_dir.name + ".partial")
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+    try:
+        offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+        np.cumsum([len(line) for line in lines], out=offsets[1:])
+        (partial / UNITS_NAME).write_bytes(b"".join(lines))
+        np.save(partial / OFFSETS_NAME, offsets)
+        np.save(partial / MATRIX_NAME, np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(partial / IDS_NAME, 'w', encoding='utf-8') as f:
+            json.dump(ids, f, ensure_ascii=False)
+        exported.save(partial / ENCODER_NAME)
+
+        files = {name: {"bytes": (partial / name).stat().st_size, "sha256": file_sha256(partial / name)}
+                 for name in BUNDLE_FILES}
+        manifest = {
+            "format": FORMAT,
+            "version": hashlib.sha256("".join(files[name]["sha256"] for name in BUNDLE_FILES).encode())
+                              .hexdigest()[:12],
+            "created_at": datetime.now().isoformat(),
+            "count": len(ids),
+            "dim": int(matrix.shape[1]),
+            "dtype": "float32",
+            "sources": {
+                "units": _source(units_path),
+                "embeddings": _source(embeddings_path),
+                "vectorizer": _source(Path(vectorizer_path)),
+                "svd": _source(Path(svd_path)),
+            },
+            "files": files,
+        }
+        with open(partial / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+
+    old = out_dir.with_name(out_dir.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if out_dir.exists():
+        out_dir.replace(old)
+    partial.replace(out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+class UnitView(Mapping):
+    """Read-only {unit id: unit} view of a bundle; units are parsed on access."""
+
+    def __init__(self, bundle: "IndexBundle"):
+        self._bundle = bundle
+
+    def __getitem__(self, unit_id) -> dict:
+        return self._bundle.unit(self._bundle.rows[unit_id])
+
+    def __contains__(self, unit_id) -> bool:
+        return unit_id in self._bundle.rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._bundle.ids)
+
+    def __len__(self) -> int:
+        return len(self._bundle.ids)
+
+
+class IndexBundle:
+    """An opened index bundle: ids, memory-mapped matrix and units, lazy encoder."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        manifest_path = self.path / MANIFEST_NAME
+        if not manifest_path.exists():
+            raise BundleError(f"No index bundle in {self.path}; run `kb_index.py build` first")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT:
+            raise BundleError(f"{self.path}: bundle format {self.manifest.get('format')}, expected {FORMAT}")
+        for name in BUNDLE_FILES:
+            path = self.path / name
+            if not path.exists() or path.stat().st_size != self.manifest["files"][name]["bytes"]:
+                raise BundleError(f"{self.path}: {name} is missing or has the wrong size")
+
+        with open(self.path / IDS_NAME, 'r', encoding='utf-8') as f:
+            self.ids: List[str] = json.load(f)
+        self.rows = {unit_id: row for row, unit_id in enumerate(self.ids)}
+        self.matrix = np.load(self.path / MATRIX_NAME, mmap_mode='r')
+        self._offsets = np.load(self.path / OFFSETS_NAME, mmap_mode='r')
+        count, dim = self.manifest["count"], self.manifest["dim"]
+        if (len(self.ids) != count or len(self.rows) != count or self.matrix.dtype != np.float32
+                or self.matrix.shape != (count, dim) or len(self._offsets) != count + 1
+                or self._offsets[-1] != self.manifest["files"][UNITS_NAME]["bytes"]):
+            raise BundleError(f"{self.path}: ids, matrix and units do not line up with the manifest")
+
+        self._units_file = open(self.path / UNITS_NAME, 'rb')
+        self._units = mmap.mmap(self._units_file.fileno(), 0, access=mmap.ACCESS_READ) if count else b""
+        self.units = UnitView(self)
+        self._encoder = None
+        self._encoder_lock = Lock()
+        self.verified: Optional[bool] = None
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    def unit(self, row: int) -> dict:
+        return loads(self._units[int(self._offsets[row]):int(self._offsets[row + 1])])
+
+    def get(self, unit_id) -> Optional[dict]:
+        row = self.rows.get(unit_id)
+        return None if row is None else self.unit(row)
+
+    def encoder(self) -> QueryEncoder:
+        """The query encoder, loaded on first use after checking the file's checksum."""
+        with self._encoder_lock:
+            if self._encoder is None:
+                data = (self.path / ENCODER_NAME).read_bytes()
+                if hashlib.sha256(data).hexdigest() != self.manifest["files"][ENCODER_NAME]["sha256"]:
+                    raise BundleError(f"{self.path}: {ENCODER_NAME} does not match the manifest")
+                self._encoder = QueryEncoder.load(io.BytesIO(data))
+            return self._encoder
+
+    def verify(self) -> List[str]:
+        """Checksum every bundle file against the manifest; returns the problems."""
+        problems = [f"{name}: checksum does not match the manifest" for name in BUNDLE_FILES
+                    if file_sha256(self.path / name) != self.manifest["files"][name]["sha256"]]
+        self.verified = not problems
+        return problems
+
+    def close(self):
+        if isinstance(self._units, mmap.mmap):
+            self._units.close()
+        self._units_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and check the API's index bundle")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Check the inputs and write the bundle")
+    build.add_argument("--units", type=Path, default=DEFAULT_UNITS, help="Knowledge-base JSONL")
+    build.add_argument("--embeddings", type=Path, default=DEFAULT_EMBEDDINGS, help="Embeddings JSONL")
+    build.add_argument("--vectorizer", type=Path, default=DEFAULT_VECTORIZER, help="Pickled TF-IDF vectorizer")
+    build.add_argument("--svd", type=Path, default=DEFAULT_SVD, help="Pickled SVD model")
+    for name in ("verify", "info"):
+        commands.add_parser(name, help="Checksum the bundle" if name == "verify" else "Show the manifest")
+    for command in commands.choices.values():
+        command.add_argument("--index", "-o", type=Path, default=INDEX_DIR, help="Bundle directory")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            manifest = build_bundle(args.index, args.units, args.embeddings, args.vectorizer, args.svd)
+            print(f"✓ Index {manifest['version']}: {manifest['count']} units × {manifest['dim']} dims → {args.index}")
+            return 0
+
+        with IndexBundle(args.index) as bundle:
+            if args.command == "info":
+                print(json.dumps(bundle.manifest, ensure_ascii=False, indent=2))
+                return 0
+            problems = bundle.verify()
+            for problem in problems:
+                print(f"✗ {problem}")
+            if not problems:
+                print(f"✓ Index {bundle.version}: {len(bundle.ids)} units, all checksums match")
+            return 1 if problems else 0
+    except BundleError as e:
+        print(f"✗ {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Streaming merge engine for knowledge-unit JSONL files.
+
+Merges any number of JSONL inputs into one dataset in a single pass:
+- base inputs (the existing knowledge base) are copied through unchanged
+  and indexed,
+- new inputs are validated against the schema and deduplicated against
+  everything kept so far by content hash and id, and against near-duplicate
+  title + description in the same domain (base units always, other new
+  units only with an internal threshold),
+- kept units are written to the output as they are read.
+
+Two strategies:
+- in-memory: hash and id indexes plus a per-domain word index for
+  near-duplicates; memory grows with the number of kept units,
+- external: sorted runs on disk, merged by content hash, then by id, then
+  back into input order; memory is bounded by the run size. Used when the
+  inputs exceed --max-memory-mb (e.g. the WikiSkripta corpus) or with
+  --external. Near-duplicate detection needs every kept unit at hand and
+  is skipped in this mode.
+
+Usage:
+    python3 scripts/kb_merge.py data/extracted/*.jsonl \\
+        --base data/knowledge_base_final.jsonl -o data/knowledge_base_merged.jsonl
+    python3 scripts/kb_merge.py corpus/*.jsonl --base data/knowledge_base_mvp.jsonl \\
+        -o merged.jsonl --external --run-size 20000
+"""
+import argparse
+import hashlib
+import heapq
+import json
+import re
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from itertools import groupby
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import JsonlWriter, dumps, iter_records, loads
+from kb_validate import UnitValidator, load_schema
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+SCHEMA_PATH = PROJECT_ROOT / "schemas" / "knowledge_unit.schema.json"
+
+# Fields checked when no schema is available
+REQUIRED_FIELDS = ['id', 'type', 'domain', 'title', 'description', 'version', 'source', 'content', 'applicability']
+
+DEFAULT_THRESHOLD = 0.75   # Jaccard similarity for near-duplicates
+DESCRIPTION_WORDS = 50     # Description words compared for near-duplicates
+MAX_MEMORY_MB = 256        # Input size above which the external strategy is used
+RUN_SIZE = 50_000          # Records per sorted run in the external strategy
+MAX_DETAILS = 100          # Duplicate / error samples kept for reports
+
+KeepHook = Callable[[dict, bool], None]
+
+
+def iter_units(file_path: Path, stats: Optional[dict] = None) -> Iterator[dict]:
+    """Stream units from a JSONL (or .jsonl.zst) file, skipping (and counting) broken lines."""
+    def on_error(line_num, error):
+        print(f"⚠ Error in {Path(file_path).name} line {line_num}: {error}")
+        if stats is not None:
+            stats['parse_errors'] += 1
+
+    return iter_records(file_path, on_error)
+
+
+PUNCTUATION = re.compile(r'[^\w\s]')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Normalize text for comparison - lowercase, remove extra spaces, punctuation."""
+    if not text:
+        return ""
+    text = PUNCTUATION.sub(' ', text.lower())
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def content_hash(unit):
+    """Generate a hash based on title + description for duplicate detection."""
+    title = normalize_text(unit.get('title', ''))
+    desc = normalize_text(unit.get('description', ''))
+    combined = f"{title}|{desc}"
+    return hashlib.md5(combined.encode('utf-8')).hexdigest()
+
+
+def word_set(unit):
+    """Words compared for near-duplicates: title + first words of the description."""
+    title = normalize_text(unit.get('title', ''))
+    desc = normalize_text(unit.get('description', ''))
+    return set(title.split() + desc.split()[:DESCRIPTION_WORDS])
+
+
+def similarity_score(unit1, unit2):
+    """Calculate simple similarity between two units based on normalized title and description."""
+    if normalize_text(unit1.get('title', '')) == normalize_text(unit2.get('title', '')):
+        return 1.0
+
+    words1 = word_set(unit1)
+    words2 = word_set(unit2)
+    if not words1 or not words2:
+        return 0.0
+    return len(words1 & words2) / len(words1 | words2)
+
+
+def validate_unit(unit, file_name, validator: Optional[UnitValidator]):
+    """(is_valid, error) for a unit; the error lists every schema violation."""
+    if validator is None:
+        missing = [field for field in REQUIRED_FIELDS if field not in unit]
+        if missing:
+            return False, f"{file_name} - {unit.get('id', 'unknown')}: Missing required fields {missing}"
+        return True, None
+
+    errors = validator.errors(unit)
+    if errors:
+        return False, f"{file_name} - {unit.get('id', 'unknown')}: {'; '.join(errors)}"
+    return True, None
+
+
+def _threshold(is_base, threshold, internal_threshold):
+    if is_base:
+        return threshold
+    return internal_threshold if internal_threshold is not None else float('inf')
+
+
+class NearDuplicateIndex:
+    """Inverted word index over kept units, one namespace per domain.
+
+    Candidates are the units sharing at least one word, so a lookup costs
+    the length of the posting lists instead of a scan of all kept units.
+    """
+
+    def __init__(self):
+        self.titles = {}                    # (domain, title) -> ref
+        self.postings = defaultdict(list)   # (domain, word) -> [ref]
+        self.units = []                     # ref -> (title, is_base, word count)
+
+    def add(self, unit, is_base):
+        domain = unit.get('domain')
+        words = word_set(unit)
+        ref = len(self.units)
+        self.units.append((unit.get('title', ''), is_base, len(words)))
+        self.titles.setdefault((domain, normalize_text(unit.get('title', ''))), ref)
+        for word in words:
+            self.postings[(domain, word)].append(ref)
+
+    def match(self, unit, threshold, internal_threshold):
+        """(title, is_base, score) of the closest kept unit above its threshold, or None."""
+        domain = unit.get('domain')
+        ref = self.titles.get((domain, normalize_text(unit.get('title', ''))))
+        if ref is not None:
+            title, is_base, _ = self.units[ref]
+            if _threshold(is_base, threshold, internal_threshold) <= 1.0:
+                return title, is_base, 1.0
+
+        words = word_set(unit)
+        overlap = Counter()
+        for word in words:
+            overlap.update(self.postings.get((domain, word), ()))
+
+        best = None
+        for ref, shared in overlap.items():
+            title, is_base, size = self.units[ref]
+            score = shared / (len(words) + size - shared)
+            if score >= _threshold(is_base, threshold, internal_threshold):
+                if best is None or score > best[2]:
+                    best = (title, is_base, score)
+        return best
+
+
+def new_stats():
+    """Counters filled in by the merge; the keys the merge reports read."""
+    return {
+        'strategy': None,
+        'existing_count': 0,
+        'new_count': 0,
+        'parse_errors': 0,
+        'valid_count': 0,
+        'invalid_count': 0,
+        'duplicate_count': 0,
+        'duplicate_external_count': 0,
+        'duplicate_internal_count': 0,
+        'id_collision_count': 0,
+        'added_count': 0,
+        'final_count': 0,
+        'source_stats': {},
+        'duplicate_details': [],
+        'validation_errors': [],
+        'domain_before': defaultdict(int),
+        'domain_added': defaultdict(int),
+        'type_before': defaultdict(int),
+        'type_added': defaultdict(int),
+    }
+
+
+def _sample(stats, key, item):
+    if len(stats[key]) < MAX_DETAILS:
+        stats[key].append(item)
+
+
+def _duplicate(stats, unit, existing_title, existing_is_base, reason, score):
+    stats['duplicate_count'] += 1
+    stats['duplicate_external_count' if existing_is_base else 'duplicate_internal_count'] += 1
+    _sample(stats, 'duplicate_details', {
+        'new_title': unit.get('title', ''),
+        'existing_title': existing_title,
+        'score': score,
+        'reason': reason,
+        'internal': not existing_is_base,
+    })
+
+
+def stream_inputs(base_paths, new_paths, validator, stats) -> Iterator[tuple]:
+    """Yield (is_base, unit) for every base unit and every valid new unit."""
+    for is_base, paths in ((True, base_paths), (False, new_paths)):
+        for path in map(Path, paths):
+            if not path.exists():
+                print(f"⚠ File not found: {path}")
+                if not is_base:
+                    stats['source_stats'][path.name] = 0
+                continue
+
+            count = 0
+            for unit in iter_units(path, stats):
+                count += 1
+                if is_base:
+                    stats['existing_count'] += 1
+                else:
+                    stats['new_count'] += 1
+                    is_valid, error = validate_unit(unit, path.name, validator)
+                    if not is_valid:
+                        stats['invalid_count'] += 1
+                        _sample(stats, 'validation_errors', error)
+                        continue
+                    stats['valid_count'] += 1
+                yield is_base, unit
+
+            if not is_base:
+                stats['source_stats'][path.name] = count
+            print(f"✓ Read {count} units from {path.name}{' (base)' if is_base else ''}")
+
+
+class _Writer:
+    """Writes kept units and updates the before/added counters."""
+
+    def __init__(self, out, stats, added_out=None, on_keep: Optional[KeepHook] = None):
+        self.out = out
+        self.stats = stats
+        self.added_out = added_out
+        self.on_keep = on_keep
+
+    def write(self, line, unit, is_base):
+        self.out.write(line + '\n')
+        self.stats['final_count'] += 1
+        if is_base:
+            self.stats['domain_before'][unit.get('domain', 'unknown')] += 1
+            self.stats['type_before'][unit.get('type', 'unknown')] += 1
+        else:
+            self.stats['added_count'] += 1
+            self.stats['domain_added'][unit.get('domain', 'unknown')] += 1
+            self.stats['type_added'][unit.get('type', 'unknown')] += 1
+            if self.added_out is not None:
+                self.added_out.write(line + '\n')
+        if self.on_keep:
+            self.on_keep(unit, is_base)
+
+
+def merge_in_memory(units: Iterable[tuple], writer: _Writer, threshold=DEFAULT_THRESHOLD,
+                    internal_threshold=None, near_duplicates=True):
+    """Single pass over (is_base, unit) pairs with in-memory indexes."""
+    stats = writer.stats
+    hashes = {}  # content hash -> (title, is_base) of the first unit with it
+    ids = set()
+    near = NearDuplicateIndex() if near_duplicates else None
+
+    for is_base, unit in units:
+        digest = content_hash(unit)
+        if not is_base:
+            if digest in hashes:
+                title, existing_is_base = hashes[digest]
+                _duplicate(stats, unit, title, existing_is_base, 'exact_match', 1.0)
+                continue
+            match = near.match(unit, threshold, internal_threshold) if near else None
+            if match:
+                _duplicate(stats, unit, match[0], match[1], 'similar', match[2])
+                continue
+            if unit.get('id') in ids:
+                stats['id_collision_count'] += 1
+                continue
+
+        hashes.setdefault(digest, (unit.get('title', ''), is_base))
+        ids.add(unit.get('id'))
+        if near:
+            near.add(unit, is_base)
+        writer.write(dumps(unit), unit, is_base)
+
+
+# ── External strategy ──
+# Records are text lines "<key>\t<seq>\t<is_base>\t<id>\t<unit json>", so runs
+# sort as plain strings: by key, then by input position. Keys are hex digests,
+# JSON-encoded ids or nothing (input order); json.dumps escapes tabs/newlines.
+
+def _record(seq, is_base, unit):
+    return (f"{seq:012d}\t{int(is_base)}\t{json.dumps(unit.get('id'))}\t"
+            f"{dumps(unit)}\n")
+
+
+def _fields(record):
+    """(seq, is_base, id_json, unit_json) of a record without its key."""
+    seq, is_base, id_json, line = record.rstrip('\n').split('\t', 3)
+    return seq, is_base == '1', id_json, line
+
+
+def _write_run(lines, tmp_dir: Path, index: int) -> Path:
+    path = tmp_dir / f"run_{index:05d}.txt"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    return path
+
+
+def external_sort(lines: Iterable[str], tmp_dir: Path, run_size: int = RUN_SIZE) -> Iterator[str]:
+    """Sort text lines using at most `run_size` lines of memory (plus one per run)."""
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    runs = []
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= run_size:
+            batch.sort()
+            runs.append(_write_run(batch, tmp_dir, len(runs)))
+            batch = []
+    if batch:
+        batch.sort()
+        runs.append(_write_run(batch, tmp_dir, len(runs)))
+
+    files = [open(path, 'r', encoding='utf-8') for path in runs]
+    try:
+        yield from heapq.merge(*files)
+    finally:
+        for f in files:
+            f.close()
+        for path in runs:
+            path.unlink()
+
+
+def _keyed(records: Iterable[str]):
+    """Group sorted "<key>\t<record>" lines by key."""
+    return groupby(records, key=lambda line: line.split('\t', 1)[0])
+
+
+def merge_external(units: Iterable[tuple], writer: _Writer, tmp_dir: Path, run_size: int = RUN_SIZE):
+    """Exact-duplicate and id dedup with bounded memory, via three external sorts."""
+    stats = writer.stats
+    by_hash = (f"{content_hash(unit)}\t{_record(seq, is_base, unit)}"
+               for seq, (is_base, unit) in enumerate(units))
+
+    def dedup_by_hash(records):
+        """Keep the first unit per content hash (base units are always kept); re-key by id."""
+        for _, group in _keyed(records):
+            first = None
+            for line in group:
+                record = line.split('\t', 1)[1]
+                _, is_base, id_json, unit_json = _fields(record)
+                if first is not None and not is_base:
+                    _duplicate(stats, loads(unit_json), loads(first[1]).get('title', ''),
+                               first[0], 'exact_match', 1.0)
+                    continue
+                first = first or (is_base, unit_json)
+                yield f"{id_json}\t{record}"
+
+    def dedup_by_id(records):
+        """Keep the first unit per id (base units are always kept); re-key by input order."""
+        for _, group in _keyed(records):
+            seen = False
+            for line in group:
+                record = line.split('\t', 1)[1]
+                _, is_base, _, _ = _fields(record)
+                if seen and not is_base:
+                    stats['id_collision_count'] += 1
+                    continue
+                seen = True
+                yield record
+
+    unique_hashes = dedup_by_hash(external_sort(by_hash, tmp_dir / "hash", run_size))
+    unique_ids = dedup_by_id(external_sort(unique_hashes, tmp_dir / "id", run_size))
+    for record in external_sort(unique_ids, tmp_dir / "order", run_size):
+        _, is_base, _, unit_json = _fields(record)
+        writer.write(unit_json, loads(unit_json), is_base)
+
+
+def input_size_mb(paths) -> float:
+    return sum(Path(p).stat().st_size for p in paths if Path(p).exists()) / (1024 * 1024)
+
+
+def merge_files(base_paths, new_paths, output_path: Path, schema: Optional[dict] = None,
+                threshold: float = DEFAULT_THRESHOLD, internal_threshold: Optional[float] = None,
+                added_path: Optional[Path] = None, external: Optional[bool] = None,
+                max_memory_mb: float = MAX_MEMORY_MB, run_size: int = RUN_SIZE,
+                on_keep: Optional[KeepHook] = None) -> dict:
+    """Merge base and new JSONL files into `output_path`; returns merge stats.
+
+    `external=None` picks the strategy from the total input size. The output
+    (and `added_path`, which receives only the added units) is written to a
+    temporary file first, so a base input may also be the output.
+    """
+    output_path = Path(output_path)
+    stats = new_stats()
+    if external is None:
+        external = input_size_mb(list(base_paths) + list(new_paths)) > max_memory_mb
+    stats['strategy'] = 'external' if external else 'in-memory'
+
+    targets = [output_path] + ([Path(added_path)] if added_path else [])
+
+    validator = UnitValidator(schema) if schema is not None else None
+    units = stream_inputs(base_paths, new_paths, validator, stats)
+    with ExitStack() as stack:
+        out, *added_out = [stack.enter_context(JsonlWriter(path)) for path in targets]
+        writer = _Writer(out, stats, added_out[0] if added_out else None, on_keep)
+        if external:
+            with tempfile.TemporaryDirectory(prefix="kb_merge_", dir=output_path.parent) as tmp:
+                merge_external(units, writer, Path(tmp), run_size)
+        else:
+            merge_in_memory(units, writer, threshold, internal_threshold)
+
+    stats['output_path'] = output_path.name
+    stats['file_size'] = output_path.stat().st_size / 1024
+    if added_path:
+        stats['added_file_size'] = Path(added_path).stat().st_size / 1024
+    return stats
+
+
+def print_summary(stats):
+    print(f"Strategy: {stats['strategy']}")
+    print(f"Existing units: {stats['existing_count']}")
+    print(f"New units: {stats['new_count']} ({stats['parse_errors']} unreadable lines)")
+    print(f"Valid: {stats['valid_count']}, Invalid: {stats['invalid_count']}")
+    print(f"Duplicates removed: {stats['duplicate_count']} "
+          f"({stats['duplicate_external_count']} vs existing, {stats['duplicate_internal_count']} within new)")
+    print(f"ID collisions skipped: {stats['id_collision_count']}")
+    print(f"Units added: {stats['added_count']}")
+    print(f"Final dataset size: {stats['final_count']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge knowledge-unit JSONL files")
+    parser.add_argument("inputs", nargs="+", type=Path, help="New JSONL files to validate and merge")
+    parser.add_argument("--base", nargs="+", type=Path, default=[],
+                        help="Existing dataset(s), copied through without validation")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Merged JSONL output")
+    parser.add_argument("--added-output", type=Path, help="Also write only the added units here")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Near-duplicate similarity vs base units (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--internal-threshold", type=float,
+                        help="Near-duplicate similarity among new units (default: exact duplicates only)")
+    parser.add_argument("--schema", type=Path, default=SCHEMA_PATH, help="Knowledge unit JSON schema")
+    parser.add_argument("--external", action="store_true", help="Force the external (on-disk) strategy")
+    parser.add_argument("--max-memory-mb", type=float, default=MAX_MEMORY_MB,
+                        help=f"Input size above which the external strategy is used (default: {MAX_MEMORY_MB})")
+    parser.add_argument("--run-size", type=int, default=RUN_SIZE,
+                        help=f"Records per sorted run in the external strategy (default: {RUN_SIZE})")
+    args = parser.parse_args()
+
+    schema = load_schema(args.schema)
+    stats = merge_files(args.base, args.inputs, args.output, schema=schema,
+                        threshold=args.threshold, internal_threshold=args.internal_threshold,
+                        added_path=args.added_output, external=True if args.external else None,
+                        max_memory_mb=args.max_memory_mb, run_size=args.run_size)
+
+    for error in stats['validation_errors'][:5]:
+        print(f"  ✗ {error}")
+    print()
+    print_summary(stats)
+    print(f"✓ Wrote {stats['final_count']} units to {args.output} ({stats['file_size']:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Export the knowledge base (and its embeddings) as sharded Parquet.
+
+The JSONL files are convenient to build and diff, but consumers have to
+parse every line, including 256 JSON floats per embedding, to read any
+column. The export writes one flat Arrow table instead:
+
+    id, type, domain, title, description, version       string
+    source_name, source_url, source_retrieved_at        string
+    applicability_specialties                           list<string>
+    applicability_valid_from, applicability_valid_to    string
+    applicability_insurance_companies                   list<string>
+    applicability_practice_types                        list<string>
+    content                                             string (JSON)
+    related_units, tags                                 list<string>
+    extra                                               string (JSON), fields without a column
+    embedding                                           fixed_size_list<float32>[dim], with --embeddings
+
+`content` differs per unit type, so it stays a JSON string. Values that do
+not fit their column, keys the schema does not know and explicit nulls go to
+`extra`, so a null column always means a missing key and unit_from_row()
+gives back the original unit.
+
+Units are streamed into row groups of --row-group-size rows; a new shard is
+started every --shard-rows rows. Shards follow the Hugging Face naming
+(train-00000-of-00002.parquet) and are renamed into place only when the
+whole export succeeded, replacing the shards of a previous export.
+
+Needs the pyarrow package.
+
+Usage:
+    python3 scripts/kb_parquet.py
+    python3 scripts/kb_parquet.py --input data/knowledge_base_final.jsonl --no-embeddings -o build/hf/final
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import dumps, iter_records, resolve_path
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DEFAULT_INPUT = PROJECT_ROOT / "data" / "knowledge_base_mvp.jsonl"
+DEFAULT_EMBEDDINGS = PROJECT_ROOT / "data" / "knowledge_base_embeddings.jsonl"
+DEFAULT_OUTPUT = PROJECT_ROOT / "build" / "hf" / "data"
+
+SPLIT = "train"
+ROW_GROUP_SIZE = 10_000
+SHARD_ROWS = 500_000
+COMPRESSION = "zstd"
+
+STRING_FIELDS = ["id", "type", "domain", "title", "description", "version"]
+LIST_FIELDS = ["related_units", "tags"]
+# Nested object -> {key: is_list}
+NESTED_FIELDS = {
+    "source": {"name": False, "url": False, "retrieved_at": False},
+    "applicability": {"specialties": True, "valid_from": False, "valid_to": False,
+                      "insurance_companies": True, "practice_types": True},
+}
+
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401 - used as pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export needs the 'pyarrow' package: pip install pyarrow") from None
+    return pyarrow
+
+
+def arrow_schema(embedding_dim: Optional[int] = None, metadata: Optional[dict] = None):
+    """The Arrow schema of the export; with an embedding column when embedding_dim is given."""
+    pa = _pa()
+    strings = pa.list_(pa.string())
+    fields = [pa.field(name, pa.string()) for name in STRING_FIELDS]
+    for parent, keys in NESTED_FIELDS.items():
+        fields += [pa.field(f"{parent}_{key}", strings if is_list else pa.string())
+                   for key, is_list in keys.items()]
+    fields.append(pa.field("content", pa.string()))
+    fields += [pa.field(name, strings) for name in LIST_FIELDS]
+    fields.append(pa.field("extra", pa.string()))
+    if embedding_dim:
+        fields.append(pa.field("embedding", pa.list_(pa.float32(), embedding_dim)))
+    return pa.schema(fields, metadata=metadata)
+
+
+def _fits(value, is_list: bool) -> bool:
+    if is_list:
+        return isinstance(value, list) and all(isinstance(item, str) for item in value)
+    return isinstance(value, str)
+
+
+def unit_to_row(unit: dict) -> dict:
+    """Flatten a unit into the export columns (without the embedding)."""
+    row = {}
+    extra = {}
+    for key, value in unit.items():
+        if key in NESTED_FIELDS and isinstance(value, dict):
+            nested = NESTED_FIELDS[key]
+            rest = {}
+            for sub_key, sub_value in value.items():
+                if sub_key in nested and _fits(sub_value, nested[sub_key]):
+                    row[f"{key}_{sub_key}"] = sub_value
+                else:
+                    rest[sub_key] = sub_value
+            if rest or not value:
+                extra[key] = rest
+        elif key == "content" and value is not None:
+            row["content"] = dumps(value)
+        elif (key in STRING_FIELDS or key in LIST_FIELDS) and _fits(value, key in LIST_FIELDS):
+            row[key] = value
+        else:
+            extra[key] = value
+    row["extra"] = dumps(extra) if extra else None
+    return row
+
+
+def unit_from_row(row: dict) -> dict:
+    """Rebuild a unit from an exported row (as returned by Table.to_pylist())."""
+    unit = {}
+    for key in STRING_FIELDS + ["content"] + LIST_FIELDS + list(NESTED_FIELDS):
+        if key in NESTED_FIELDS:
+            nested = {}
+            for sub_key in NESTED_FIELDS[key]:
+                value = row.get(f"{key}_{sub_key}")
+                if value is not None:
+                    nested[sub_key] = value
+            if nested:
+                unit[key] = nested
+        elif row.get(key) is not None:
+            unit[key] = json.loads(row[key]) if key == "content" else row[key]
+    if row.get("extra"):
+        for key, value in json.loads(row["extra"]).items():
+            if key in NESTED_FIELDS and isinstance(value, dict):
+                unit.setdefault(key, {}).update(value)
+            else:
+                unit[key] = value
+    return unit
+
+
+def load_embeddings(path: Path, stats: dict) -> dict:
+    """{unit id: float32 vector} from an embeddings JSONL file."""
+    vectors = {}
+    dim = None
+    for record in iter_records(path):
+        vector = np.asarray(record.get("embedding") or [], dtype=np.float32)
+        if dim is None and vector.size:
+            dim = vector.size
+        if vector.ndim != 1 or vector.size != dim:
+            print(f"⚠ Skipping embedding of {record.get('id')}: {vector.size} values, expected {dim}")
+            stats["bad_embeddings"] += 1
+            continue
+        vectors[record.get("id")] = vector
+    return vectors
+
+
+class ShardWriter:
+    """Write Arrow batches into row groups and numbered Parquet shards.
+
+    Shards are written as '<split>-NNNNN.parquet.partial' and renamed to
+    '<split>-NNNNN-of-MMMMM.parquet' by close(); abort() removes them.
+    """
+
+    def __init__(self, out_dir: Path, schema, split: str = SPLIT, shard_rows: int = SHARD_ROWS,
+                 row_group_size: int = ROW_GROUP_SIZE, compression: str = COMPRESSION):
+        self.out_dir = Path(out_dir)
+        self.schema = schema
+        self.split = split
+        self.shard_rows = shard_rows
+        self.row_group_size = min(row_group_size, shard_rows)
+        self.compression = compression
+        self.partials: List[Path] = []
+        self.paths: List[Path] = []
+        self._writer = None
+        self._shard_count = 0
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, table):
+        """Append a table of at most row_group_size rows as one row group."""
+        offset = 0
+        while offset < table.num_rows:
+            if self._writer is None or self._shard_count >= self.shard_rows:
+                self._open_shard()
+            part = table.slice(offset, self.shard_rows - self._shard_count)
+            self._writer.write_table(part, row_group_size=self.row_group_size)
+            self._shard_count += part.num_rows
+            offset += part.num_rows
+
+    def _open_shard(self):
+        self._close_shard()
+        partial = self.out_dir / f"{self.split}-{len(self.partials):05d}.parquet.partial"
+        self.partials.append(partial)
+        self._writer = _pa().parquet.ParquetWriter(partial, self.schema, compression=self.compression)
+        self._shard_count = 0
+
+    def _close_shard(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self) -> List[Path]:
+        self._close_shard()
+        if not self.partials:
+            # An empty export still gets one (empty) shard with the schema
+            self._open_shard()
+            self._close_shard()
+        total = len(self.partials)
+        for stale in self.out_dir.glob(f"{self.split}-*-of-*.parquet"):
+            stale.unlink()
+        for index, partial in enumerate(self.partials):
+            path = self.out_dir / f"{self.split}-{index:05d}-of-{total:05d}.parquet"
+            partial.replace(path)
+            self.paths.append(path)
+        return self.paths
+
+    def abort(self):
+        self._close_shard()
+        for partial in self.partials:
+            partial.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def _embedding_column(ids: List[str], vectors: dict, dim: int, stats: dict):
+    pa = _pa()
+    flat = np.zeros((len(ids), dim), dtype=np.float32)
+    missing = np.zeros(len(ids), dtype=bool)
+    for i, unit_id in enumerate(ids):
+        vector = vectors.get(unit_id)
+        if vector is None:
+            missing[i] = True
+        else:
+            flat[i] = vector
+    stats["without_embedding"] += int(missing.sum())
+    return pa.FixedSizeListArray.from_arrays(pa.array(flat.reshape(-1)), dim,
+                                              mask=pa.array(missing) if missing.any() else None)
+
+
+def _batches(units: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for unit in units:
+        batch.append(unit)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export(input_path: Path, out_dir: Path, embeddings_path: Optional[Path] = None, split: str = SPLIT,
+           shard_rows: int = SHARD_ROWS, row_group_size: int = ROW_GROUP_SIZE,
+           compression: str = COMPRESSION) -> dict:
+    """Export input_path (joined with embeddings_path, if given) into Parquet shards in out_dir."""
+    pa = _pa()
+    stats = {"units": 0, "parse_errors": 0, "bad_embeddings": 0, "without_embedding": 0, "embedding_dim": None}
+    input_path = resolve_path(input_path)
+    vectors = {}
+    if embeddings_path is not None:
+        vectors = load_embeddings(resolve_path(embeddings_path), stats)
+        if vectors:
+            stats["embedding_dim"] = len(next(iter(vectors.values())))
+    dim = stats["embedding_dim"]
+
+    metadata = {"kb.source": input_path.name}
+    if dim:
+        metadata["kb.embeddings"] = Path(embeddings_path).name
+        metadata["kb.embedding_dim"] = str(dim)
+    schema = arrow_schema(dim, metadata)
+
+    def on_error(line_num, error):
+        print(f"⚠ Error in {input_path.name} line {line_num}: {error}")
+        stats["parse_errors"] += 1
+
+    with ShardWriter(out_dir, schema, split, shard_rows, row_group_size, compression) as writer:
+        for batch in _batches(iter_records(input_path, on_error), writer.row_group_size):
+            rows = [unit_to_row(unit) for unit in batch]
+            if dim:
+                columns = pa.Table.from_pylist(rows, schema=schema.remove(schema.get_field_index("embedding")))
+                embedding = _embedding_column([row.get("id") for row in rows], vectors, dim, stats)
+                table = columns.append_column(schema.field("embedding"), embedding)
+            else:
+                table = pa.Table.from_pylist(rows, schema=schema)
+            writer.write(table.replace_schema_metadata(schema.metadata))
+            stats["units"] += len(rows)
+    stats["shards"] = [str(path) for path in writer.paths]
+    stats["bytes"] = sum(path.stat().st_size for path in writer.paths)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the knowledge base as sharded Parquet")
+    parser.add_argument("--input", "-i", type=Path, default=DEFAULT_INPUT, help="Knowledge-base JSONL (.jsonl or .jsonl.zst)")
+    parser.add_argument("--embeddings", "-e", type=Path, default=DEFAULT_EMBEDDINGS, help="Embeddings JSONL to join by id")
+    parser.add_argument("--no-embeddings", action="store_true", help="Export without the embedding column")
+    parser.add_argument("--output", "-o", type=Path, default=DEFAULT_OUTPUT, help="Directory for the shards")
+    parser.add_argument("--split", default=SPLIT, help="Shard name prefix (dataset split)")
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS, help="Rows per Parquet file")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE, help="Rows per row group")
+    parser.add_argument("--compression", default=COMPRESSION, help="Parquet codec (zstd, snappy, none)")
+    args = parser.parse_args()
+
+    input_path = resolve_path(args.input)
+    if not input_path.exists():
+        print(f"✗ File not found: {input_path}")
+        return 1
+    embeddings_path = None
+    if not args.no_embeddings:
+        embeddings_path = resolve_path(args.embeddings)
+        if not embeddings_path.exists():
+            print(f"⚠ Embeddings not found: {embeddings_path} (exporting without them)")
+            embeddings_path = None
+
+    try:
+        stats = export(input_path, args.output, embeddings_path, args.split, args.shard_rows,
+                       args.row_group_size, args.compression)
+    except ImportError as e:
+        print(f"✗ {e}")
+        return 1
+
+    print(f"✓ Exported {stats['units']} units from {input_path.name} "
+          f"into {len(stats['shards'])} shard(s), {stats['bytes'] / 1024:.0f} KB")
+    if stats["embedding_dim"]:
+        print(f"  Embeddings: {stats['embedding_dim']} dims, {stats['without_embedding']} units without one")
+    if stats["parse_errors"] or stats["bad_embeddings"]:
+        print(f"  ⚠ {stats['parse_errors']} unparseable lines, {stats['bad_embeddings']} bad embeddings skipped")
+    for path in stats["shards"]:
+        print(f"  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for knowledge-base versions.
+
+data/ holds several near-identical releases (final, final_backup, v2, v3,
+mvp, expanded, ...). The store keeps every distinct unit once, keyed by the
+sha256 of its JSONL line, and each version as a manifest of (id, hash)
+pairs in file order:
+
+    data/store/
+        objects.jsonl        pack of unique unit lines (append-only)
+        index.json           hash → [offset, length] in the pack
+        versions/<name>.json manifest of one version
+
+Lines are stored byte for byte, and the manifest records the file's blank
+lines and whether it ends with a newline, so a checked-out version is
+identical to the imported file (same sha256; decompressed, for .jsonl.zst
+inputs). Checkout streams the lines straight from the memory-mapped pack.
+
+Usage:
+    python3 scripts/kb_store.py import                         # all data/*.jsonl
+    python3 scripts/kb_store.py import data/knowledge_base_mvp.jsonl --name mvp
+    python3 scripts/kb_store.py list
+    python3 scripts/kb_store.py checkout mvp -o /tmp/kb.jsonl
+    python3 scripts/kb_store.py verify
+    python3 scripts/kb_store.py gc                             # after removing versions
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import ZST_SUFFIX, iter_lines, loads
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DATA_DIR = PROJECT_ROOT / "data"
+STORE_DIR = DATA_DIR / "store"
+
+PACK_NAME = "objects.jsonl"
+INDEX_NAME = "index.json"
+VERSIONS_DIR = "versions"
+
+# Files imported by default; embeddings are vectors, not knowledge units
+IMPORT_EXCLUDE = {"knowledge_base_embeddings.jsonl"}
+VERSION_PREFIX = "knowledge_base_"
+
+
+class StoreError(Exception):
+    """Missing version or object, or a corrupt store."""
+
+
+def line_hash(line: bytes) -> str:
+    return hashlib.sha256(line).hexdigest()
+
+
+def version_name(path: Path) -> str:
+    """Default version name of a dataset file: knowledge_base_mvp.jsonl(.zst) → mvp."""
+    stem = Path(path.name.removesuffix(ZST_SUFFIX)).stem
+    return stem[len(VERSION_PREFIX):] if stem.startswith(VERSION_PREFIX) else stem
+
+
+def _save_json(path: Path, data: dict, indent: Optional[int] = 2):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    tmp.replace(path)
+
+
+class UnitStore:
+    """Unit lines stored once by content hash, versions as (id, hash) manifests."""
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+        self.pack_path = self.root / PACK_NAME
+        self.index_path = self.root / INDEX_NAME
+        self.versions_dir = self.root / VERSIONS_DIR
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        self.pack_path.touch(exist_ok=True)
+        self.objects: Dict[str, List[int]] = {}
+        self._load_index()
+
+    # --- objects ---
+
+    def _load_index(self):
+        indexed_size = 0
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.objects = index["objects"]
+            indexed_size = index["pack_size"]
+        pack_size = self.pack_path.stat().st_size
+        if indexed_size > pack_size:
+            raise StoreError(f"{self.pack_path} is shorter than its index (truncated pack?)")
+        if indexed_size < pack_size:
+            # Objects appended after the index was last saved (interrupted import)
+            self._scan_pack(indexed_size)
+            self._save_index()
+
+    def _scan_pack(self, offset: int):
+        with open(self.pack_path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                line = raw.rstrip(b"\n")
+                if line:
+                    self.objects.setdefault(line_hash(line), [offset, len(line)])
+                offset += len(raw)
+
+    def _save_index(self):
+        _save_json(self.index_path, {"pack_size": self.pack_path.stat().st_size, "objects": self.objects},
+                   indent=None)
+
+    @contextmanager
+    def _appender(self):
+        """Append to the pack; the index is saved once at the end."""
+        with open(self.pack_path, 'ab') as pack:
+            offset = pack.tell()
+
+            def put(line: bytes) -> str:
+                nonlocal offset
+                digest = line_hash(line)
+                if digest not in self.objects:
+                    pack.write(line + b"\n")
+                    self.objects[digest] = [offset, len(line)]
+                    offset += len(line) + 1
+                return digest
+
+            try:
+                yield put
+            finally:
+                pack.flush()
+                os.fsync(pack.fileno())
+                self._save_index()
+
+    def put(self, unit: dict) -> str:
+        """Store one unit (serialized as in the dataset files); returns its hash."""
+        with self._appender() as put:
+            return put(json.dumps(unit, ensure_ascii=False).encode('utf-8'))
+
+    @contextmanager
+    def _reader(self):
+        with open(self.pack_path, 'rb') as f:
+            if not self.objects:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pack:
+                yield pack
+
+    def _slice(self, pack, digest: str) -> bytes:
+        try:
+            offset, length = self.objects[digest]
+        except KeyError:
+            raise StoreError(f"Object not in store: {digest}") from None
+        return pack[offset:offset + length]
+
+    def get(self, digest: str) -> dict:
+        with self._reader() as pack:
+            return json.loads(self._slice(pack, digest))
+
+    # --- versions ---
+
+    def versions(self) -> List[str]:
+        return sorted(path.stem for path in self.versions_dir.glob("*.json"))
+
+    def manifest(self, name: str) -> dict:
+        path = self.versions_dir / f"{name}.json"
+        if not path.exists():
+            raise StoreError(f"Unknown version: {name} (have: {', '.join(self.versions()) or 'none'})")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def import_file(self, path: Path, name: Optional[str] = None) -> dict:
+        """Add a JSONL dataset as a version; returns its manifest."""
+        path = Path(path)
+        name = name or version_name(path)
+        entries = []
+        blank_lines = []
+        final_newline = True
+        file_digest = hashlib.sha256()
+        new_objects = len(self.objects)
+        size = 0
+        with self._appender() as put:
+            for index, raw in enumerate(iter_lines(path)):
+                file_digest.update(raw)
+                size += len(raw)
+                final_newline = raw.endswith(b"\n")
+                line = raw[:-1] if final_newline else raw
+                if not line.strip():
+                    blank_lines.append([index, line.decode('ascii')])
+                    continue
+                unit_id = loads(line).get("id")
+                entries.append([unit_id, put(line)])
+
+        manifest = {
+            "name": name,
+            "source": path.resolve().relative_to(PROJECT_ROOT).as_posix()
+            if path.resolve().is_relative_to(PROJECT_ROOT) else str(path),
+            "imported_at": datetime.now().isoformat(),
+            "units": len(entries),
+            "new_objects": len(self.objects) - new_objects,
+            "size": size,
+            "sha256": file_digest.hexdigest(),
+            "blank_lines": blank_lines,
+            "final_newline": final_newline,
+            "entries": entries,
+        }
+        _save_json(self.versions_dir / f"{name}.json", manifest, indent=None)
+        return manifest
+
+    def iter_lines(self, name: str) -> Iterator[Tuple[str, bytes]]:
+        """(id, raw JSONL line) of a version, in file order."""
+        entries = self.manifest(name)["entries"]
+        with self._reader() as pack:
+            for unit_id, digest in entries:
+                yield unit_id, self._slice(pack, digest)
+
+    def _file_lines(self, manifest: dict, pack) -> Iterator[bytes]:
+        """The imported file's raw lines: units from the pack, blank lines and final newline from the manifest."""
+        blanks = {index: text.encode('ascii') for index, text in manifest.get("blank_lines", [])}
+        entries = iter(manifest["entries"])
+        total = len(manifest["entries"]) + len(blanks)
+        for index in range(total):
+            line = blanks[index] if index in blanks else self._slice(pack, next(entries)[1])
+            if index < total - 1 or manifest.get("final_newline", True):
+                line += b"\n"
+            yield line
+
+    def iter_units(self, name: str) -> Iterator[dict]:
+        for _, line in self.iter_lines(name):
+            yield json.loads(line)
+
+    def checkout(self, name: str, output_path: Path) -> Path:
+        """Write a version as JSONL (streamed, atomically replaced)."""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        partial = output_path.with_name(output_path.name + ".partial")
+        manifest = self.manifest(name)
+        with self._reader() as pack, open(partial, 'wb') as out:
+            for line in self._file_lines(manifest, pack):
+                out.write(line)
+        partial.replace(output_path)
+        return output_path
+
+    def remove(self, name: str):
+        self.manifest(name)
+        (self.versions_dir / f"{name}.json").unlink()
+
+    # --- maintenance ---
+
+    def verify(self) -> List[str]:
+        """Problems found: corrupt objects, missing objects, version checksums."""
+        problems = []
+        with self._reader() as pack:
+            for digest in self.objects:
+                if line_hash(self._slice(pack, digest)) != digest:
+                    problems.append(f"object {digest[:12]}: content does not match its hash")
+            for name in self.versions():
+                manifest = self.manifest(name)
+                missing = sum(digest not in self.objects for _, digest in manifest["entries"])
+                if missing:
+                    problems.append(f"version {name}: {missing} objects missing")
+                    continue
+                file_digest = hashlib.sha256()
+                for line in self._file_lines(manifest, pack):
+                    file_digest.update(line)
+                if file_digest.hexdigest() != manifest["sha256"]:
+                    problems.append(f"version {name}: checksum does not match the imported file")
+        return problems
+
+    def gc(self) -> int:
+        """Rewrite the pack with only the objects some version references; returns objects removed."""
+        referenced = set()
+        for name in self.versions():
+            referenced.update(digest for _, digest in self.manifest(name)["entries"])
+        unused = len(self.objects) - len(referenced & set(self.objects))
+        if not unused:
+            return 0
+
+        partial = self.pack_path.with_name(PACK_NAME + ".partial")
+        objects = {}
+        with self._reader() as pack, open(partial, 'wb') as out:
+            for digest in sorted(referenced & set(self.objects), key=lambda d: self.objects[d][0]):
+                line = self._slice(pack, digest)
+                objects[digest] = [out.tell(), len(line)]
+                out.write(line + b"\n")
+        partial.replace(self.pack_path)
+        self.objects = objects
+        self._save_index()
+        return unused
+
+    def stats(self) -> dict:
+        versions = [self.manifest(name) for name in self.versions()]
+        return {
+            "versions": len(versions),
+            "objects": len(self.objects),
+            "units": sum(m["units"] for m in versions),
+            "logical_size": sum(m["size"] for m in versions),
+            "pack_size": self.pack_path.stat().st_size,
+        }
+
+
+def default_import_files() -> List[Path]:
+    return [path for path in sorted(DATA_DIR.glob("*.jsonl")) if path.name not in IMPORT_EXCLUDE]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed store for KB versions")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="Store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Add JSONL datasets as versions")
+    imp.add_argument("files", nargs="*", type=Path, help="Datasets (default: data/*.jsonl)")
+    imp.add_argument("--name", help="Version name (single file; default: from the file name)")
+    sub.add_parser("list", help="List versions")
+    co = sub.add_parser("checkout", help="Write a version as JSONL")
+    co.add_argument("name")
+    co.add_argument("-o", "--output", type=Path, help="Output path (default: data/knowledge_base_<name>.jsonl)")
+    rm = sub.add_parser("remove", help="Remove a version (run gc to drop its objects)")
+    rm.add_argument("name")
+    sub.add_parser("verify", help="Check objects and version checksums")
+    sub.add_parser("gc", help="Drop objects no version references")
+    args = parser.parse_args()
+
+    store = UnitStore(args.store)
+
+    if args.command == "import":
+        files = args.files or default_import_files()
+        if args.name and len(files) != 1:
+            parser.error("--name needs exactly one file")
+        for path in files:
+            manifest = store.import_file(path, args.name)
+            print(f"✓ {manifest['name']}: {manifest['units']} units, {manifest['new_objects']} new objects")
+    elif args.command == "list":
+        for name in store.versions():
+            manifest = store.manifest(name)
+            print(f"{name:<24} {manifest['units']:>6} units  {manifest['sha256'][:12]}  {manifest['source']}")
+    elif args.command == "checkout":
+        output = args.output or DATA_DIR / f"{VERSION_PREFIX}{args.name}.jsonl"
+        store.checkout(args.name, output)
+        print(f"✓ {args.name} → {output}")
+    elif args.command == "remove":
+        store.remove(args.name)
+        print(f"✓ Removed {args.name}")
+    elif args.command == "verify":
+        problems = store.verify()
+        for problem in problems:
+            print(f"✗ {problem}")
+        if problems:
+            return 1
+        print(f"✓ {len(store.objects)} objects, {len(store.versions())} versions OK")
+    elif args.command == "gc":
+        print(f"✓ Removed {store.gc()} unused objects")
+
+    if args.command in ("import", "gc"):
+        stats = store.stats()
+        ratio = stats["pack_size"] / stats["logical_size"] if stats["logical_size"] else 0
+        print(f"\n{stats['versions']} versions, {stats['units']} units → {stats['objects']} objects; "
+              f"{stats['logical_size'] / 1024:.0f} KB → {stats['pack_size'] / 1024:.0f} KB ({ratio:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except StoreError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Shared knowledge-unit validation.
+
+The knowledge unit schema (schemas/knowledge_unit.schema.json) asks for
+UUIDs, but the dataset uses practical 'ku-*' IDs. `relax_schema()` relaxes
+the ID fields once, and `UnitValidator` compiles the result into a single
+jsonschema validator that is reused for every unit. Validation reports every
+error of a unit, not just the first one.
+
+- `get_validator()` returns the cached validator for a schema file,
+- `validate_units()` validates a batch, across a process pool for large
+  batches (each worker compiles the schema once),
+- `strict_ids=True` additionally requires UUID or 'ku-NNN[-slug]' IDs, as the
+  published dataset does; the merge inputs only need string IDs.
+
+Used by kb_merge.py (and the merge scripts), validate_dataset.py and
+upload_to_hf.py.
+
+Usage:
+    from kb_validate import get_validator, validate_units
+
+    errors = get_validator().errors(unit)          # [] when valid
+    all_errors = validate_units(units, workers=4)  # one list per unit
+
+    python3 scripts/kb_validate.py data/knowledge_base_mvp.jsonl --strict-ids
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import jsonschema
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import iter_records
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+SCHEMA_PATH = PROJECT_ROOT / "schemas" / "knowledge_unit.schema.json"
+
+# ID formats accepted with strict_ids: a UUID, or the practical
+# ku-NNN / ku-NNN-slug / ku-NNN-slug-YYYY form (slug may contain Czech letters)
+UUID_REGEX = r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'
+PRACTICAL_ID_REGEX = r'^[kK][uU]-\d{1,4}(-[\w-]+)?(-\d{4})?$'
+
+# Formats checked by the validator; the others in the schema are annotations
+CHECKED_FORMATS = ("date",)
+
+# Batches smaller than this are validated in-process
+MIN_POOL_BATCH = 2000
+POOL_CHUNK_SIZE = 500
+
+
+def load_schema(schema_path: Path = SCHEMA_PATH) -> Optional[dict]:
+    """Load the JSON schema for validation."""
+    if not schema_path.exists():
+        print(f"⚠ Schema file not found: {schema_path}")
+        return None
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def relax_schema(schema: dict, strict_ids: bool = False) -> dict:
+    """Copy of the schema that accepts the dataset's ID format."""
+    relaxed = copy.deepcopy(schema)
+    properties = relaxed.get('properties', {})
+    id_schema = {"type": "string"}
+    if strict_ids:
+        id_schema["anyOf"] = [{"pattern": UUID_REGEX}, {"pattern": PRACTICAL_ID_REGEX}]
+    if 'id' in properties:
+        properties['id'] = id_schema
+    if 'related_units' in properties:
+        properties['related_units'] = {"type": "array", "items": {"type": "string"}}
+    return relaxed
+
+
+def _error_path(error) -> str:
+    path = ""
+    for part in error.absolute_path:
+        path += f"[{part}]" if isinstance(part, int) else (f".{part}" if path else str(part))
+    return path
+
+
+class UnitValidator:
+    """Relaxed knowledge-unit schema, compiled once."""
+
+    def __init__(self, schema: dict, strict_ids: bool = False):
+        relaxed = relax_schema(schema, strict_ids)
+        cls = jsonschema.validators.validator_for(relaxed)
+        cls.check_schema(relaxed)
+        self._validator = cls(relaxed, format_checker=jsonschema.FormatChecker(CHECKED_FORMATS))
+
+    def errors(self, unit) -> List[str]:
+        """All validation errors of a unit, as 'path: message' strings."""
+        found = sorted(self._validator.iter_errors(unit), key=lambda e: list(map(str, e.absolute_path)))
+        messages = []
+        for error in found:
+            path = _error_path(error)
+            messages.append(f"{path}: {error.message}" if path else error.message)
+        return messages
+
+    def is_valid(self, unit) -> bool:
+        return self._validator.is_valid(unit)
+
+
+@lru_cache(maxsize=None)
+def get_validator(schema_path: Path = SCHEMA_PATH, strict_ids: bool = False) -> UnitValidator:
+    """Cached validator for a schema file."""
+    schema = load_schema(Path(schema_path))
+    if schema is None:
+        raise FileNotFoundError(schema_path)
+    return UnitValidator(schema, strict_ids)
+
+
+# Worker side of the process pool: the validator is compiled once per worker
+_worker_validator = None
+
+
+def _init_worker(schema_path, strict_ids):
+    global _worker_validator
+    _worker_validator = get_validator(Path(schema_path), strict_ids)
+
+
+def _validate_one(unit):
+    return _worker_validator.errors(unit)
+
+
+def validate_units(units: Iterable[dict], schema_path: Path = SCHEMA_PATH, strict_ids: bool = False,
+                   workers: Optional[int] = None) -> List[List[str]]:
+    """Errors for each unit, in input order.
+
+    `workers=None` uses a process pool (one worker per CPU) for batches of at
+    least MIN_POOL_BATCH units; `workers=1` always validates in-process.
+    """
+    units = list(units)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(units) >= MIN_POOL_BATCH else 1
+    if workers <= 1:
+        validator = get_validator(Path(schema_path), strict_ids)
+        return [validator.errors(unit) for unit in units]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(schema_path), strict_ids)) as pool:
+        return list(pool.map(_validate_one, units, chunksize=POOL_CHUNK_SIZE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate knowledge units against the schema")
+    parser.add_argument("files", nargs="+", type=Path, help="JSONL files to validate")
+    parser.add_argument("--schema", type=Path, default=SCHEMA_PATH, help="Knowledge unit JSON schema")
+    parser.add_argument("--strict-ids", action="store_true", help="Require UUID or ku-NNN[-slug] IDs")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: automatic)")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.files:
+        def on_error(line_num, error):
+            nonlocal failed
+            print(f"✗ {path.name} line {line_num}: invalid JSON: {error}")
+            failed += 1
+
+        units = list(iter_records(path, on_error))
+
+        results = validate_units(units, args.schema, args.strict_ids, args.workers)
+        invalid = [(unit, errors) for unit, errors in zip(units, results) if errors]
+        failed += len(invalid)
+        mark = "✗" if invalid else "✓"
+        print(f"{mark} {path.name}: {len(units) - len(invalid)}/{len(units)} units valid")
+        for unit, errors in invalid[:10]:
+            for error in errors:
+                print(f"  - {unit.get('id', 'unknown')}: {error}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
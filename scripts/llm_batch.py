@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Offline batch-file mode for bulk LLM extraction.
+
+Instead of one interactive call per chunk, every chunk request is written
+to a JSONL batch file in the OpenAI Batch API format, submitted for
+asynchronous processing, and the results file is later ingested into the
+normal extraction output.
+
+Files next to a batch file `batch.jsonl`:
+    batch.state.json      - batch id, status and file ids after submission
+    batch.results.jsonl   - downloaded results (one line per request)
+    batch.errors.jsonl    - downloaded error file, if any
+    batch.done            - ingest checkpoint: custom_ids already ingested
+    batch.pending.json    - output sizes before the result being ingested
+    batch.outputs.json    - outputs the run has started (replaced) so far
+    batch.retry.jsonl     - failed or missing requests, to resubmit
+
+Ingestion is resumable: results already listed in the checkpoint are
+skipped, so an interrupted ingest can simply be re-run. `OutputFiles`
+keeps the outputs consistent with the checkpoint: the first write of a run
+to an output replaces it (leftovers of an earlier extraction go), later
+writes - also from resumed ingests and retry batches - append, and units
+of a result that did not reach the checkpoint are cut off before it is
+ingested again.
+
+`run_batch_locally()` is a local stand-in for the batch service: it
+consumes a batch file and writes a results file in the same format, using
+any function that answers a chat completion request body.
+
+Usage:
+    from llm_batch import write_batch, submit_batch, fetch_batch, ingest_results
+
+    write_batch(batch_path, requests)          # (custom_id, body) pairs
+    submit_batch(client, batch_path)
+    fetch_batch(client, batch_path)            # -> status; downloads results
+    ingest_results(results_path(batch_path), handle)
+"""
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Set, Tuple
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+
+# Batch statuses after which nothing more will happen
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchError(Exception):
+    """Batch could not be submitted or its results are unavailable."""
+
+
+def state_path(batch_path: Path) -> Path:
+    return batch_path.with_suffix('.state.json')
+
+
+def results_path(batch_path: Path) -> Path:
+    return batch_path.with_suffix('.results.jsonl')
+
+
+def errors_path(batch_path: Path) -> Path:
+    return batch_path.with_suffix('.errors.jsonl')
+
+
+def checkpoint_path(results: Path) -> Path:
+    return results.with_suffix('').with_suffix('.done')
+
+
+def pending_path(results: Path) -> Path:
+    return results.with_suffix('').with_suffix('.pending.json')
+
+
+def outputs_path(results: Path) -> Path:
+    return results.with_suffix('').with_suffix('.outputs.json')
+
+
+def run_root(batch_path: Path) -> Path:
+    """The original batch of a run: `batch.retry.retry.jsonl` -> `batch.jsonl`."""
+    stem = batch_path.stem
+    while stem.endswith('.retry'):
+        stem = stem[:-len('.retry')]
+    return batch_path.with_name(stem + batch_path.suffix)
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp.replace(path)
+
+
+def load_state(batch_path: Path) -> dict:
+    path = state_path(batch_path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ── Batch file ───────────────────────────────────────────────────────────────
+
+def batch_request(custom_id: str, body: dict) -> dict:
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def write_batch(batch_path: Path, requests: Iterable[Tuple[str, dict]]) -> int:
+    """Write (custom_id, request body) pairs to a batch file; returns the count."""
+    batch_path.parent.mkdir(parents=True, exist_ok=True)
+    seen = set()
+    count = 0
+    with open(batch_path, 'w', encoding='utf-8') as f:
+        for custom_id, body in requests:
+            if custom_id in seen:
+                raise ValueError(f"Duplicate custom_id in batch: {custom_id}")
+            seen.add(custom_id)
+            f.write(json.dumps(batch_request(custom_id, body), ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def iter_batch(batch_path: Path) -> Iterator[dict]:
+    with open(batch_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# ── Submission ───────────────────────────────────────────────────────────────
+
+def submit_batch(client, batch_path: Path, metadata: Optional[dict] = None) -> str:
+    """Upload the batch file and create the batch; returns the batch id."""
+    state = load_state(batch_path)
+    if state.get('batch_id') and state.get('status') not in FINAL_STATUSES:
+        raise BatchError(f"Batch already submitted: {state['batch_id']} ({state.get('status')})")
+
+    with open(batch_path, 'rb') as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=COMPLETION_WINDOW,
+        metadata=metadata,
+    )
+    _write_json(state_path(batch_path), {
+        'batch_id': batch.id,
+        'input_file_id': uploaded.id,
+        'status': batch.status,
+        'submitted_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    })
+    return batch.id
+
+
+def fetch_batch(client, batch_path: Path) -> str:
+    """Refresh the batch status; download the results once it has finished."""
+    state = load_state(batch_path)
+    if not state.get('batch_id'):
+        raise BatchError(f"Batch not submitted: {batch_path}")
+
+    batch = client.batches.retrieve(state['batch_id'])
+    state['status'] = batch.status
+    counts = getattr(batch, 'request_counts', None)
+    if counts is not None:
+        state['request_counts'] = {'total': counts.total, 'completed': counts.completed,
+                                   'failed': counts.failed}
+
+    if batch.status in FINAL_STATUSES:
+        if batch.output_file_id:
+            _download(client, batch.output_file_id, results_path(batch_path))
+            state['output_file_id'] = batch.output_file_id
+        if getattr(batch, 'error_file_id', None):
+            _download(client, batch.error_file_id, errors_path(batch_path))
+            state['error_file_id'] = batch.error_file_id
+    _write_json(state_path(batch_path), state)
+    return batch.status
+
+
+def _download(client, file_id: str, path: Path):
+    content = client.files.content(file_id)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(content.read())
+    tmp.replace(path)
+
+
+# ── Local stand-in ───────────────────────────────────────────────────────────
+
+def run_batch_locally(batch_path: Path, respond: Callable[[dict], dict],
+                      output_path: Optional[Path] = None) -> Path:
+    """Process a batch file locally and write a results file in batch format.
+
+    `respond` receives a request body and returns a chat completion response
+    body (dict); exceptions become error records, as in the batch service.
+    """
+    output_path = output_path or results_path(batch_path)
+    with open(output_path, 'w', encoding='utf-8') as out:
+        for request in iter_batch(batch_path):
+            record = {"id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                      "custom_id": request["custom_id"], "response": None, "error": None}
+            try:
+                record["response"] = {"status_code": 200,
+                                      "request_id": uuid.uuid4().hex,
+                                      "body": respond(request["body"])}
+            except Exception as e:
+                record["error"] = {"code": type(e).__name__, "message": str(e)}
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return output_path
+
+
+# ── Ingestion ────────────────────────────────────────────────────────────────
+
+def iter_results(results: Path) -> Iterator[Tuple[str, Optional[str], Optional[dict], Optional[str]]]:
+    """Yield (custom_id, content, usage, error) for every result line."""
+    with open(results, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            custom_id = record['custom_id']
+            response = record.get('response') or {}
+            body = response.get('body') or {}
+            if record.get('error') or response.get('status_code', 200) != 200:
+                error = record.get('error') or body.get('error') or {}
+                yield custom_id, None, body.get('usage'), error.get('message') or str(error)
+                continue
+            choices = body.get('choices') or [{}]
+            content = (choices[0].get('message') or {}).get('content')
+            yield custom_id, content, body.get('usage'), None
+
+
+def load_checkpoint(results: Path) -> Set[str]:
+    path = checkpoint_path(results)
+    if not path.exists():
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def ingest_results(results: Path, handle: Callable[[str, str, Optional[dict]], int],
+                   on_error: Optional[Callable[[str, str, Optional[dict]], None]] = None) -> dict:
+    """Feed successful results to `handle(custom_id, content, usage)`.
+
+    `handle` returns the number of units it stored. Every processed result
+    (successful or failed) is appended to the checkpoint right after it is
+    handled, so re-running skips it.
+    """
+    done = load_checkpoint(results)
+    stats = {'ingested': 0, 'skipped': 0, 'failed': 0, 'units': 0, 'failed_ids': []}
+
+    with open(checkpoint_path(results), 'a', encoding='utf-8') as checkpoint:
+        for custom_id, content, usage, error in iter_results(results):
+            if custom_id in done:
+                stats['skipped'] += 1
+                continue
+            if error is not None or content is None:
+                stats['failed'] += 1
+                stats['failed_ids'].append(custom_id)
+                if on_error:
+                    on_error(custom_id, error or "empty response", usage)
+            else:
+                stats['units'] += handle(custom_id, content, usage)
+                stats['ingested'] += 1
+            checkpoint.write(custom_id + '\n')
+            checkpoint.flush()
+            done.add(custom_id)
+    return stats
+
+
+class OutputFiles:
+    """Append-only output files written from an ingest, consistent with its checkpoint.
+
+    Create it before `ingest_results()` and call `write()` from the handler.
+    The outputs a run has started are listed next to the checkpoint of its
+    original batch: the first write to an output replaces the file, every
+    later one (in this ingest, a resumed one or a retry batch) appends.
+    Before a result's lines are appended, the output's size is recorded in
+    the pending file; when the next ingest finds that the result never
+    reached the checkpoint, it truncates the output back to that size.
+    """
+
+    def __init__(self, batch_path: Path, path_for: Callable[[str], Path]):
+        self.results = results_path(batch_path)
+        self.path_for = path_for
+        self.files = {}
+        self.started_path = outputs_path(results_path(run_root(batch_path)))
+        self.started = set()
+        if self.started_path.exists():
+            with open(self.started_path, 'r', encoding='utf-8') as f:
+                self.started = set(json.load(f)['outputs'])
+        self._recover()
+
+    def _recover(self):
+        pending = pending_path(self.results)
+        if not pending.exists():
+            return
+        with open(pending, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state['custom_id'] not in load_checkpoint(self.results):
+            output = Path(state['output'])
+            if output.exists() and output.stat().st_size > state['size']:
+                with open(output, 'r+b') as f:
+                    f.truncate(state['size'])
+
+    def write(self, custom_id: str, key: str, lines: Iterable[str]):
+        """Append `lines` of result `custom_id` to the output of `key`."""
+        output = str(self.path_for(key))
+        if key not in self.files:
+            if output in self.started:
+                self.files[key] = open(output, 'a', encoding='utf-8')
+            else:
+                # Replace first, then record: a crash in between replaces it again
+                self.files[key] = open(output, 'w', encoding='utf-8')
+                self.started.add(output)
+                _write_json(self.started_path, {'outputs': sorted(self.started)})
+        f = self.files[key]
+        _write_json(pending_path(self.results), {'custom_id': custom_id, 'output': output,
+                                                 'size': f.tell()})
+        for line in lines:
+            f.write(line + '\n')
+        f.flush()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_retry_batch(batch_path: Path, failed_ids: Iterable[str]) -> Optional[Path]:
+    """Write the failed or missing requests of a batch to `<batch>.retry.jsonl`."""
+    failed = set(failed_ids)
+    results = results_path(batch_path)
+    if results.exists():
+        answered = {custom_id for custom_id, *_ in iter_results(results)}
+    else:
+        answered = set()
+    retry = [r for r in iter_batch(batch_path)
+             if r['custom_id'] in failed or r['custom_id'] not in answered]
+    if not retry:
+        return None
+    retry_path = batch_path.with_suffix('.retry.jsonl')
+    write_batch(retry_path, ((r['custom_id'], r['body']) for r in retry))
+    return retry_path
@@ -2,13 +2,18 @@
 """
 LLM-assisted extraction of knowledge units from source documents.
 """
+import argparse
 import os
 import sys
 import json
-import subprocess
 from pathlib import Path
 from openai import OpenAI
 
+from chunker import chunk_text
+from llm_output import ParseStats, parse_units, response_format
+from llm_usage import BudgetExceeded, add_budget_arguments, scheduler_from_args
+from pdf_text import extract_text_from_pdf
+
 # Initialize OpenAI client (API key from environment)
 client = OpenAI()
 
@@ -18,15 +23,22 @@ SCHEMA_PATH = Path("/home/ubuntu/klinicka-knowledge-base/schemas/knowledge_unit.
 OUTPUT_DIR = Path("/home/ubuntu/klinicka-knowledge-base/data/extracted")
 OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 
+# LLM model and chunk budget (tokens of source text per request)
+MODEL = "gpt-4.1-mini"
+CHUNK_TOKENS = 2500
+CHUNK_OVERLAP = 150
+
+# Recovered/dropped units across the run (see llm_output.py)
+PARSE_STATS = ParseStats()
+
 # Load JSON schema
 with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
     SCHEMA = json.load(f)
 
-# Extraction prompt template
-EXTRACTION_PROMPT = """Jsi expert na české zdravotnictví a úhradové mechanismy ambulantní péče. Tvým úkolem je extrahovat znalostní jednotky z následujícího textu.
-
-TEXT Z DOKUMENTU:
-{text}
+# Extraction prompt template. The chunk text goes last: everything before it
+# is identical for all chunks of a document and can be served from the
+# provider's prompt cache.
+EXTRACTION_PROMPT = """Jsi expert na české zdravotnictví a úhradové mechanismy ambulantní péče. Tvým úkolem je extrahovat znalostní jednotky z textu dokumentu uvedeného na konci.
 
 KONTEXT:
 - Dokument: {document_name}
@@ -97,45 +109,14 @@ DŮLEŽITÉ PRAVIDLA:
 - Pokud text neobsahuje relevantní znalosti, vrať prázdný seznam
 
 VÝSTUP:
-Vrať pouze validní JSON objekty, jeden na řádek (JSON Lines formát).
-Nezačínej ani nekončíš markdown blokem (```json), pouze čisté JSON objekty.
-"""
+Vrať JSON objekt {{"units": [...]}} se seznamem znalostních jednotek.
+Nezačínej ani nekončíš markdown blokem (```json), pouze čistý JSON.
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF using pdftotext."""
-    try:
-        result = subprocess.run(
-            ['pdftotext', '-layout', str(pdf_path), '-'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Error extracting text from {pdf_path}: {e}")
-        return None
-
-def chunk_text(text, max_chars=8000):
-    """Split text into chunks for LLM processing."""
-    # Simple chunking by paragraphs
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = ""
-    
-    for para in paragraphs:
-        if len(current_chunk) + len(para) < max_chars:
-            current_chunk += para + "\n\n"
-        else:
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = para + "\n\n"
-    
-    if current_chunk:
-        chunks.append(current_chunk)
-    
-    return chunks
+TEXT Z DOKUMENTU:
+{text}
+"""
 
-def extract_with_llm(text, document_name, year, source_url, retrieved_at):
+def extract_with_llm(text, document_name, year, source_url, retrieved_at, scheduler, chunk_id=None):
     """Use LLM to extract knowledge units from text."""
     prompt = EXTRACTION_PROMPT.format(
         text=text,
@@ -146,37 +127,29 @@ def extract_with_llm(text, document_name, year, source_url, retrieved_at):
     )
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
+        response = scheduler.complete(
+            client,
+            document=document_name,
+            chunk=chunk_id,
+            model=MODEL,
             messages=[
                 {"role": "system", "content": "Jsi expert na české zdravotnictví a strukturování znalostí. Vracíš pouze validní JSON objekty."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.1,
-            max_tokens=4000
+            max_tokens=4000,
+            response_format=response_format()
         )
         
-        content = response.choices[0].message.content.strip()
-        
-        # Parse JSON Lines
-        units = []
-        for line in content.split('\n'):
-            line = line.strip()
-            if line and line.startswith('{'):
-                try:
-                    unit = json.loads(line)
-                    units.append(unit)
-                except json.JSONDecodeError as e:
-                    print(f"Warning: Failed to parse JSON line: {e}")
-                    continue
-        
-        return units
+        return parse_units(response.choices[0].message.content, PARSE_STATS)
     
+    except BudgetExceeded:
+        raise
     except Exception as e:
         print(f"Error calling LLM: {e}")
         return []
 
-def process_document(pdf_path, metadata):
+def process_document(pdf_path, metadata, scheduler):
     """Process a single document and extract knowledge units."""
     print(f"\n{'='*80}")
     print(f"Processing: {metadata['name']}")
@@ -193,28 +166,39 @@ def process_document(pdf_path, metadata):
     print(f"✓ Extracted {text_length:,} characters")
     
     # Chunk text
-    chunks = chunk_text(text, max_chars=8000)
-    print(f"✓ Split into {len(chunks)} chunks")
+    chunks = chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP, model=MODEL)
     
     # Extract from each chunk
     all_units = []
     for i, chunk in enumerate(chunks, 1):
-        print(f"\nProcessing chunk {i}/{len(chunks)}...")
-        units = extract_with_llm(
-            text=chunk,
-            document_name=metadata['name'],
-            year=metadata['year'],
-            source_url=metadata['url'],
-            retrieved_at=metadata.get('retrieved_at', '2025-12-14T00:00:00Z')
-        )
+        print(f"\nProcessing chunk {i}...")
+        try:
+            units = extract_with_llm(
+                text=chunk,
+                document_name=metadata['name'],
+                year=metadata['year'],
+                source_url=metadata['url'],
+                retrieved_at=metadata.get('retrieved_at', '2025-12-14T00:00:00Z'),
+                scheduler=scheduler,
+                chunk_id=i
+            )
+        except BudgetExceeded as e:
+            print(f"⚠ Stopping: {e}")
+            break
         print(f"✓ Extracted {len(units)} knowledge units from chunk {i}")
+        print(f"  {scheduler.ledger.progress_line()}")
         all_units.extend(units)
     
     return all_units
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 llm_extract.py <pdf_filename>")
+    parser = argparse.ArgumentParser(description='Extract knowledge units from a source PDF')
+    parser.add_argument('pdf_filename', nargs='?', help='PDF file in sources/')
+    add_budget_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.pdf_filename:
+        print("Usage: python3 llm_extract.py <pdf_filename> [--max-cost USD] [--max-tokens N] [--tpm N]")
         print("\nAvailable documents:")
         metadata_path = SOURCES_DIR / "metadata.json"
         if metadata_path.exists():
@@ -224,7 +208,7 @@ def main():
                     print(f"  - {source['filename']}: {source['name']}")
         sys.exit(1)
     
-    filename = sys.argv[1]
+    filename = args.pdf_filename
     pdf_path = SOURCES_DIR / filename
     
     if not pdf_path.exists():
@@ -249,7 +233,8 @@ def main():
         sys.exit(1)
     
     # Process document
-    units = process_document(pdf_path, doc_metadata)
+    scheduler = scheduler_from_args('llm_extract', args)
+    units = process_document(pdf_path, doc_metadata, scheduler)
     
     # Save results
     output_filename = pdf_path.stem + "_extracted.jsonl"
@@ -263,6 +248,8 @@ def main():
     print(f"✓ EXTRACTION COMPLETE")
     print(f"Total units extracted: {len(units)}")
     print(f"Saved to: {output_path}")
+    print(f"  Parsing: {PARSE_STATS.summary()}")
+    scheduler.ledger.print_summary()
     print(f"{'='*80}")
 
 if __name__ == "__main__":
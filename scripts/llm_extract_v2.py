@@ -1,14 +1,31 @@
 #!/usr/bin/env python3
 """
 LLM-assisted extraction v2 with progressive writing and optimizations.
+
+Interactive:
+    python3 llm_extract_v2.py <pdf_filename> [--max-cost USD] [--tpm N]
+
+Offline batch mode (all sources in metadata.json, or one PDF):
+    python3 llm_extract_v2.py --batch prepare [pdf_filename]
+    python3 llm_extract_v2.py --batch submit --batch-file <batch.jsonl>
+    python3 llm_extract_v2.py --batch status --batch-file <batch.jsonl>
+    python3 llm_extract_v2.py --batch ingest --batch-file <batch.jsonl>
 """
+import argparse
 import os
 import sys
 import json
-import subprocess
+import time
 from pathlib import Path
 from openai import OpenAI
 
+from chunker import chunk_text
+from llm_batch import (OutputFiles, fetch_batch, ingest_results, results_path, submit_batch,
+                       write_batch, write_retry_batch)
+from llm_output import ParseStats, parse_units, response_format
+from llm_usage import BudgetExceeded, UsageLedger, add_budget_arguments, scheduler_from_args
+from pdf_text import extract_text_from_pdf
+
 # Initialize OpenAI client
 client = OpenAI()
 
@@ -18,22 +35,35 @@ SCHEMA_PATH = Path("/home/ubuntu/klinicka-knowledge-base/schemas/knowledge_unit.
 OUTPUT_DIR = Path("/home/ubuntu/klinicka-knowledge-base/data/extracted")
 OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 
+# LLM model and chunk budget (tokens of source text per request)
+MODEL = "gpt-4.1-nano"  # Faster model
+CHUNK_TOKENS = 3500
+CHUNK_OVERLAP = 150
+TEMPERATURE = 0.1
+MAX_COMPLETION_TOKENS = 4000
+
+# Batch mode: chunks are extracted independently, so each chunk gets its own
+# block of ids instead of continuing from the previous chunk
+BATCH_DIR = OUTPUT_DIR / "batches"
+BATCH_ID_BLOCK = 50
+
+# Recovered/dropped units across the run (see llm_output.py)
+PARSE_STATS = ParseStats()
+
 # Load JSON schema
 with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
     SCHEMA = json.load(f)
 
-# Extraction prompt template (shorter, more focused)
-EXTRACTION_PROMPT = """Jsi expert na české zdravotnictví. Extrahuj znalostní jednotky z textu.
-
-TEXT:
-{text}
+# Extraction prompt template (shorter, more focused). Per-chunk values go
+# last so the prefix can be served from the provider's prompt cache.
+EXTRACTION_PROMPT = """Jsi expert na české zdravotnictví. Extrahuj znalostní jednotky z textu na konci.
 
 KONTEXT: {document_name} ({year})
 
 ÚKOL:
 Identifikuj pravidla, výjimky, rizika, anti-patterny, podmínky a definice.
 Pro každou jednotku vytvoř JSON objekt s těmito poli:
-- id: "ku-XXX-slug" (použij čísla od {start_id})
+- id: "ku-XXX-slug" (čísla podle ČÍSLOVÁNÍ ID níže)
 - type: rule|exception|risk|anti_pattern|condition|definition
 - domain: uhrady|provoz|compliance|financni-rizika|legislativa
 - title: Stručný název (50-150 znaků)
@@ -45,44 +75,18 @@ Pro každou jednotku vytvoř JSON objekt s těmito poli:
 - related_units: []
 - tags: [klíčová slova]
 
-VÝSTUP: Pouze validní JSON objekty, jeden na řádek. Bez markdown bloků.
+VÝSTUP: JSON objekt {{"units": [...]}} se seznamem jednotek. Bez markdown bloků.
+
+ČÍSLOVÁNÍ ID: od {start_id}
+
+TEXT:
+{text}
 """
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF using pdftotext."""
-    try:
-        result = subprocess.run(
-            ['pdftotext', '-layout', str(pdf_path), '-'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Error extracting text: {e}")
-        return None
-
-def chunk_text(text, max_chars=12000):
-    """Split text into larger chunks for efficiency."""
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = ""
-    
-    for para in paragraphs:
-        if len(current_chunk) + len(para) < max_chars:
-            current_chunk += para + "\n\n"
-        else:
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = para + "\n\n"
-    
-    if current_chunk:
-        chunks.append(current_chunk)
-    
-    return chunks
-
-def extract_with_llm(text, document_name, year, source_url, retrieved_at, start_id):
-    """Use LLM to extract knowledge units."""
+SYSTEM_PROMPT = "Jsi expert na české zdravotnictví. Vracíš pouze validní JSON objekty."
+
+def build_messages(text, document_name, year, source_url, retrieved_at, start_id):
+    """Chat messages for one chunk."""
     prompt = EXTRACTION_PROMPT.format(
         text=text,
         document_name=document_name,
@@ -91,38 +95,36 @@ def extract_with_llm(text, document_name, year, source_url, retrieved_at, start_
         retrieved_at=retrieved_at,
         start_id=start_id
     )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def extract_with_llm(text, document_name, year, source_url, retrieved_at, start_id, scheduler, chunk_id=None):
+    """Use LLM to extract knowledge units."""
+    messages = build_messages(text, document_name, year, source_url, retrieved_at, start_id)
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-nano",  # Faster model
-            messages=[
-                {"role": "system", "content": "Jsi expert na české zdravotnictví. Vracíš pouze validní JSON objekty."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=4000
+        response = scheduler.complete(
+            client,
+            document=document_name,
+            chunk=chunk_id,
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_COMPLETION_TOKENS,
+            response_format=response_format()
         )
         
-        content = response.choices[0].message.content.strip()
-        
-        # Parse JSON Lines
-        units = []
-        for line in content.split('\n'):
-            line = line.strip()
-            if line and line.startswith('{'):
-                try:
-                    unit = json.loads(line)
-                    units.append(unit)
-                except json.JSONDecodeError:
-                    continue
-        
-        return units
+        return parse_units(response.choices[0].message.content, PARSE_STATS)
     
+    except BudgetExceeded:
+        raise
     except Exception as e:
         print(f"Error calling LLM: {e}")
         return []
 
-def process_document(pdf_path, metadata, output_path):
+def process_document(pdf_path, metadata, output_path, scheduler):
     """Process document with progressive writing."""
     print(f"\n{'='*80}")
     print(f"Processing: {metadata['name']}")
@@ -137,8 +139,7 @@ def process_document(pdf_path, metadata, output_path):
     print(f"✓ Extracted {len(text):,} characters")
     
     # Chunk text (larger chunks = fewer API calls)
-    chunks = chunk_text(text, max_chars=12000)
-    print(f"✓ Split into {len(chunks)} chunks")
+    chunks = chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP, model=MODEL)
     
     # Open output file for progressive writing
     total_units = 0
@@ -146,15 +147,21 @@ def process_document(pdf_path, metadata, output_path):
     
     with open(output_path, 'w', encoding='utf-8') as f:
         for i, chunk in enumerate(chunks, 1):
-            print(f"\nProcessing chunk {i}/{len(chunks)}...")
-            units = extract_with_llm(
-                text=chunk,
-                document_name=metadata['name'],
-                year=metadata['year'],
-                source_url=metadata['url'],
-                retrieved_at=metadata.get('retrieved_at', '2025-12-14T00:00:00Z'),
-                start_id=start_id
-            )
+            print(f"\nProcessing chunk {i}...")
+            try:
+                units = extract_with_llm(
+                    text=chunk,
+                    document_name=metadata['name'],
+                    year=metadata['year'],
+                    source_url=metadata['url'],
+                    retrieved_at=metadata.get('retrieved_at', '2025-12-14T00:00:00Z'),
+                    start_id=start_id,
+                    scheduler=scheduler,
+                    chunk_id=i
+                )
+            except BudgetExceeded as e:
+                print(f"⚠ Stopping: {e}")
+                break
             
             # Write immediately
             for unit in units:
@@ -164,47 +171,162 @@ def process_document(pdf_path, metadata, output_path):
             
             total_units += len(units)
             print(f"✓ Extracted {len(units)} units (total: {total_units})")
+            print(f"  {scheduler.ledger.progress_line()}")
     
     return total_units
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 llm_extract_v2.py <pdf_filename>")
+def load_sources():
+    """Source documents from sources/metadata.json, keyed by filename."""
+    metadata_path = SOURCES_DIR / "metadata.json"
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata_all = json.load(f)
+    
+    sources = {}
+    for source in metadata_all['sources']:
+        source['retrieved_at'] = metadata_all['downloaded_at']
+        sources[source['filename']] = source
+    return sources
+
+def output_path_for(filename):
+    return OUTPUT_DIR / (Path(filename).stem + "_v2_extracted.jsonl")
+
+# ── Batch mode ───────────────────────────────────────────────────────────────
+
+def batch_requests(sources):
+    """Yield (custom_id, request body) for every chunk of every source."""
+    for filename, metadata in sources.items():
+        pdf_path = SOURCES_DIR / filename
+        if not pdf_path.exists():
+            print(f"⚠ Skipping missing file: {pdf_path}")
+            continue
+        text = extract_text_from_pdf(pdf_path)
+        if not text:
+            continue
+        chunks = chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP, model=MODEL)
+        count = 0
+        for i, chunk in enumerate(chunks, 1):
+            count = i
+            messages = build_messages(
+                chunk,
+                document_name=metadata['name'],
+                year=metadata['year'],
+                source_url=metadata['url'],
+                retrieved_at=metadata.get('retrieved_at', '2025-12-14T00:00:00Z'),
+                start_id=22 + (i - 1) * BATCH_ID_BLOCK
+            )
+            body = {"model": MODEL, "messages": messages,
+                    "temperature": TEMPERATURE, "max_tokens": MAX_COMPLETION_TOKENS,
+                    "response_format": response_format()}
+            yield f"{filename}::{i:04d}", body
+        print(f"✓ {filename}: {count} chunks")
+
+def batch_prepare(filenames=None):
+    sources = load_sources()
+    if filenames:
+        missing = [name for name in filenames if name not in sources]
+        if missing:
+            print(f"Error: Metadata not found for {', '.join(missing)}")
+            sys.exit(1)
+        sources = {name: sources[name] for name in filenames}
+    
+    batch_path = BATCH_DIR / f"llm_extract_v2_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    count = write_batch(batch_path, batch_requests(sources))
+    print(f"\n✓ Wrote {count} requests to {batch_path}")
+    return batch_path
+
+def batch_ingest(batch_path):
+    """Write units from a finished batch into the per-document outputs."""
+    results = results_path(batch_path)
+    if not results.exists():
+        print(f"Error: Results not downloaded yet: {results}")
+        sys.exit(1)
+    
+    # The run's first ingest replaces the outputs; resumed ingests and retry
+    # batches append to them
+    ledger = UsageLedger('llm_extract_v2_batch')
+    outputs = OutputFiles(batch_path, output_path_for)
+    
+    def handle(custom_id, content, usage):
+        filename, chunk = custom_id.rsplit('::', 1)
+        ledger.record(filename, int(chunk), MODEL, usage, 0.0, batch=True)
+        units = parse_units(content, PARSE_STATS)
+        outputs.write(custom_id, filename, (json.dumps(unit, ensure_ascii=False) for unit in units))
+        return len(units)
+    
+    def on_error(custom_id, error, usage):
+        filename, chunk = custom_id.rsplit('::', 1)
+        ledger.record(filename, int(chunk), MODEL, usage, 0.0, error=error, batch=True)
+    
+    with outputs:
+        stats = ingest_results(results, handle, on_error)
+    
+    print(f"✓ Ingested {stats['ingested']} results ({stats['skipped']} already done), "
+          f"{stats['units']} units")
+    print(f"  Parsing: {PARSE_STATS.summary()}")
+    for filename in outputs.files:
+        print(f"  → {output_path_for(filename)}")
+    if stats['failed']:
+        retry = write_retry_batch(batch_path, stats['failed_ids'])
+        print(f"⚠ {stats['failed']} requests failed; resubmit with --batch submit --batch-file {retry}")
+    ledger.print_summary()
+
+def run_batch(args):
+    if args.batch == 'prepare':
+        batch_prepare([args.pdf_filename] if args.pdf_filename else None)
+        return
+    if not args.batch_file:
+        print(f"Error: --batch {args.batch} needs --batch-file")
         sys.exit(1)
+    if args.batch == 'submit':
+        batch_id = submit_batch(client, args.batch_file, metadata={"script": "llm_extract_v2"})
+        print(f"✓ Submitted batch {batch_id}")
+    elif args.batch == 'status':
+        status = fetch_batch(client, args.batch_file)
+        print(f"Batch status: {status}")
+        if results_path(args.batch_file).exists():
+            print(f"✓ Results: {results_path(args.batch_file)}")
+    elif args.batch == 'ingest':
+        batch_ingest(args.batch_file)
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract knowledge units from a source PDF (progressive writing)')
+    parser.add_argument('pdf_filename', nargs='?', help='PDF file in sources/ (batch prepare: all sources if omitted)')
+    add_budget_arguments(parser)
+    parser.add_argument('--batch', choices=['prepare', 'submit', 'status', 'ingest'],
+                        help='Offline batch mode instead of interactive calls')
+    parser.add_argument('--batch-file', type=Path, help='Batch file for submit/status/ingest')
+    args = parser.parse_args()
     
-    filename = sys.argv[1]
+    if args.batch:
+        run_batch(args)
+        return
+    if not args.pdf_filename:
+        parser.error("pdf_filename is required")
+    
+    filename = args.pdf_filename
     pdf_path = SOURCES_DIR / filename
     
     if not pdf_path.exists():
         print(f"Error: File not found: {pdf_path}")
         sys.exit(1)
     
-    # Load metadata
-    metadata_path = SOURCES_DIR / "metadata.json"
-    with open(metadata_path, 'r', encoding='utf-8') as f:
-        metadata_all = json.load(f)
-    
-    doc_metadata = None
-    for source in metadata_all['sources']:
-        if source['filename'] == filename:
-            doc_metadata = source
-            doc_metadata['retrieved_at'] = metadata_all['downloaded_at']
-            break
-    
+    doc_metadata = load_sources().get(filename)
     if not doc_metadata:
         print(f"Error: Metadata not found")
         sys.exit(1)
     
     # Process
-    output_filename = pdf_path.stem + "_v2_extracted.jsonl"
-    output_path = OUTPUT_DIR / output_filename
+    output_path = output_path_for(filename)
     
-    total = process_document(pdf_path, doc_metadata, output_path)
+    scheduler = scheduler_from_args('llm_extract_v2', args)
+    total = process_document(pdf_path, doc_metadata, output_path, scheduler)
     
     print(f"\n{'='*80}")
     print(f"✓ EXTRACTION COMPLETE")
     print(f"Total units: {total}")
     print(f"Saved to: {output_path}")
+    print(f"Parsing: {PARSE_STATS.summary()}")
+    scheduler.ledger.print_summary()
     print(f"{'='*80}")
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Structured LLM output for the extraction scripts.
+
+- `response_format()` builds a JSON-schema response format from
+  schemas/knowledge_unit.schema.json, so the model returns
+  {"units": [<knowledge unit>, ...]} instead of free text,
+- `parse_units()` is a tolerant parser for whatever comes back: the
+  {"units": [...]} envelope, a bare JSON array, JSON Lines, pretty-printed
+  objects, ```json fenced blocks, and objects with trailing commas,
+- `ParseStats` counts recovered, repaired and dropped units across a run.
+
+Usage:
+    from llm_output import ParseStats, parse_units, response_format
+
+    stats = ParseStats()
+    response = client.chat.completions.create(..., response_format=response_format())
+    units = parse_units(response.choices[0].message.content, stats)
+    print(stats.summary())
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+SCHEMA_PATH = PROJECT_ROOT / "schemas" / "knowledge_unit.schema.json"
+
+# String formats accepted in structured-output schemas; others are dropped
+SUPPORTED_FORMATS = {"date-time", "date", "time", "duration", "email", "hostname", "ipv4", "ipv6", "uuid"}
+
+# Keys that identify a decoded object as a knowledge unit
+UNIT_KEYS = {"title", "type", "description"}
+
+_OPEN_RE = re.compile(r"[{\[]")
+_FENCE_RE = re.compile(r"```(?:json|jsonl)?\s*\n(.*?)```", re.DOTALL)
+# A string literal (kept as is) or a comma before a closing bracket
+_TRAILING_COMMA_RE = re.compile(r'("(?:[^"\\]|\\.)*")|,\s*([}\]])')
+_DECODER = json.JSONDecoder()
+
+
+@dataclass
+class ParseStats:
+    """Parser metrics, accumulated over all responses of a run."""
+    responses: int = 0
+    units: int = 0
+    repaired: int = 0
+    dropped: int = 0
+    empty: int = 0
+
+    def summary(self) -> str:
+        total = self.units + self.dropped
+        rate = self.units / total if total else 1.0
+        return (f"{self.units} units recovered ({self.repaired} repaired), "
+                f"{self.dropped} dropped ({rate:.0%} recovered) "
+                f"from {self.responses} responses ({self.empty} empty)")
+
+
+def _strip_unsupported(schema):
+    if isinstance(schema, dict):
+        schema.pop("$schema", None)
+        schema.pop("$id", None)
+        if schema.get("format") and schema["format"] not in SUPPORTED_FORMATS:
+            del schema["format"]
+        for value in schema.values():
+            _strip_unsupported(value)
+    elif isinstance(schema, list):
+        for item in schema:
+            _strip_unsupported(item)
+    return schema
+
+
+@lru_cache(maxsize=None)
+def _unit_schema(schema_path: Path) -> str:
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return json.dumps(_strip_unsupported(json.load(f)))
+
+
+def response_format(schema_path: Path = SCHEMA_PATH, name: str = "knowledge_units") -> dict:
+    """`response_format` for chat completions: {"units": [knowledge unit, ...]}.
+
+    Non-strict, because strict mode would require every optional field of the
+    unit schema and forbid the free-form `content` object.
+    """
+    unit = json.loads(_unit_schema(Path(schema_path)))
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": False,
+            "schema": {
+                "type": "object",
+                "properties": {"units": {"type": "array", "items": unit}},
+                "required": ["units"],
+            },
+        },
+    }
+
+
+def _matching_end(text: str, start: int) -> Optional[int]:
+    """Index just past the bracket closing the one at `start`, or None if unbalanced."""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in '{[':
+            depth += 1
+        elif c in '}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Drop commas before closing brackets, leaving string contents untouched."""
+    return _TRAILING_COMMA_RE.sub(lambda m: m.group(1) or m.group(2), text)
+
+
+def _expand(value) -> Iterator[dict]:
+    """Units contained in a decoded JSON value."""
+    if isinstance(value, list):
+        for item in value:
+            yield from _expand(item)
+    elif isinstance(value, dict):
+        if isinstance(value.get("units"), list):
+            yield from _expand(value["units"])
+        elif UNIT_KEYS & value.keys():
+            yield value
+
+
+def _scan(text: str, stats: ParseStats) -> Iterator[dict]:
+    """Decode consecutive JSON values in text, repairing or skipping broken ones."""
+    position = 0
+    truncated = False
+    while True:
+        match = _OPEN_RE.search(text, position)
+        if not match:
+            # The unit cut off by a truncated response is lost
+            stats.dropped += truncated
+            return
+        start = match.start()
+        try:
+            value, end = _DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            end = _matching_end(text, start)
+            if end is None:
+                # Truncated output (e.g. max_tokens reached): recover the
+                # complete units inside the unfinished envelope or array
+                truncated = True
+                position = start + 1
+                continue
+            try:
+                value = json.loads(_strip_trailing_commas(text[start:end]))
+            except json.JSONDecodeError:
+                # Broken array: salvage its elements one by one
+                if text[start] == '[':
+                    position = start + 1
+                    continue
+                stats.dropped += 1
+                position = end
+                continue
+            repaired = list(_expand(value))
+            stats.repaired += len(repaired)
+            yield from repaired
+            position = end
+            continue
+        yield from _expand(value)
+        position = end
+
+
+def iter_units(content: Optional[str], stats: Optional[ParseStats] = None) -> Iterator[dict]:
+    """Yield knowledge units from a model response, as tolerantly as possible."""
+    stats = stats if stats is not None else ParseStats()
+    stats.responses += 1
+    if not content or not content.strip():
+        stats.empty += 1
+        return
+
+    fenced = _FENCE_RE.findall(content)
+    for block in (fenced or [content]):
+        for unit in _scan(block, stats):
+            stats.units += 1
+            yield unit
+
+
+def parse_units(content: Optional[str], stats: Optional[ParseStats] = None) -> list:
+    return list(iter_units(content, stats))
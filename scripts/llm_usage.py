@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+LLM usage accounting and budget-aware request scheduling for the
+extraction scripts.
+
+- UsageLedger records prompt, cached and completion tokens, latency and
+  cost of every LLM call (per run, document, chunk and model) and appends
+  them to a local JSONL ledger,
+- ExtractionScheduler wraps `client.chat.completions.create()`: it keeps a
+  run within a token and/or cost budget and below a tokens-per-minute
+  limit, and records every call in the ledger,
+- throughput (chunks/min, tokens/s) is available while a run progresses.
+
+Usage:
+    from llm_usage import UsageLedger, ExtractionScheduler, BudgetExceeded
+
+    ledger = UsageLedger(run_name="llm_extract")
+    scheduler = ExtractionScheduler(ledger, max_cost=2.0, tpm_limit=200_000)
+    response = scheduler.complete(client, document="...", chunk=1,
+                                  model=MODEL, messages=[...], max_tokens=4000)
+    print(ledger.progress_line())
+
+    python3 scripts/llm_usage.py                  # summary of the ledger
+    python3 scripts/llm_usage.py --run <run_id>   # one run only
+"""
+import argparse
+import json
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from chunker import Tokenizer
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+LEDGER_PATH = PROJECT_ROOT / "logs" / "llm_usage.jsonl"
+
+# USD per 1M tokens: (input, cached input, output)
+PRICING = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+# Batch API requests are billed at a discount to interactive ones
+BATCH_DISCOUNT = 0.5
+
+# Rate-limit window for tokens-per-minute accounting
+TPM_WINDOW = 60.0
+
+
+class BudgetExceeded(Exception):
+    """The next request would exceed the run's token or cost budget."""
+
+
+def usage_tokens(usage):
+    """(prompt, cached, completion) tokens from an OpenAI usage object or dict."""
+    if usage is None:
+        return 0, 0, 0
+    if isinstance(usage, dict):
+        cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+        return usage.get('prompt_tokens') or 0, cached, usage.get('completion_tokens') or 0
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = getattr(details, 'cached_tokens', None) or 0
+    return usage.prompt_tokens or 0, cached, usage.completion_tokens or 0
+
+
+def call_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int,
+              batch: bool = False) -> Optional[float]:
+    """Cost of one call in USD, or None for a model without known pricing."""
+    prices = PRICING.get(model)
+    if prices is None:
+        # Dated snapshots ("gpt-4o-mini-2024-07-18") are priced as their base model
+        base = max((name for name in PRICING if model.startswith(name + "-")), key=len, default=None)
+        prices = PRICING.get(base)
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    cost = ((prompt_tokens - cached_tokens) * input_price
+            + cached_tokens * cached_price
+            + completion_tokens * output_price) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+class UsageLedger:
+    """Per-run usage totals, persisted call by call to a JSONL ledger."""
+
+    def __init__(self, run_name: str, path: Path = LEDGER_PATH, clock=time.monotonic):
+        self.run_name = run_name
+        self.run_id = f"{run_name}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.path = Path(path) if path else None
+        self._clock = clock
+        self.started = clock()
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.unpriced = 0  # calls of models without PRICING, not in self.cost
+        self.latency = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def record(self, document: str, chunk, model: str, usage, latency: float,
+               error: Optional[str] = None, batch: bool = False) -> dict:
+        prompt, cached, completion = usage_tokens(usage)
+        cost = call_cost(model, prompt, cached, completion, batch=batch)
+
+        self.calls += 1
+        self.errors += error is not None
+        self.prompt_tokens += prompt
+        self.cached_tokens += cached
+        self.completion_tokens += completion
+        self.cost += cost or 0.0
+        self.unpriced += cost is None and error is None
+        self.latency += latency
+
+        entry = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'run_id': self.run_id,
+            'document': document,
+            'chunk': chunk,
+            'model': model,
+            'prompt_tokens': prompt,
+            'cached_tokens': cached,
+            'completion_tokens': completion,
+            'latency_s': round(latency, 3),
+            'cost_usd': round(cost, 6) if cost is not None else None,
+        }
+        if batch:
+            entry['batch'] = True
+        if error:
+            entry['error'] = error
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return entry
+
+    def throughput(self) -> dict:
+        elapsed = max(self._clock() - self.started, 1e-9)
+        return {
+            'elapsed_s': elapsed,
+            'chunks_per_min': self.calls * 60 / elapsed,
+            'tokens_per_s': self.total_tokens / elapsed,
+        }
+
+    def progress_line(self) -> str:
+        rate = self.throughput()
+        cache_share = self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+        return (f"{self.calls} calls | {rate['chunks_per_min']:.1f} chunks/min | "
+                f"{rate['tokens_per_s']:.0f} tok/s | {self.total_tokens:,} tokens "
+                f"({cache_share:.0%} cached) | ${self.cost:.4f}")
+
+    def print_summary(self):
+        rate = self.throughput()
+        print(f"  Run: {self.run_id}")
+        print(f"  LLM calls: {self.calls} ({self.errors} failed)")
+        print(f"  Prompt tokens: {self.prompt_tokens:,} ({self.cached_tokens:,} cached)")
+        print(f"  Completion tokens: {self.completion_tokens:,}")
+        print(f"  Cost: ${self.cost:.4f}")
+        if self.unpriced:
+            print(f"  ⚠ {self.unpriced} calls of models without pricing are not in the cost")
+        print(f"  Throughput: {rate['chunks_per_min']:.1f} chunks/min, {rate['tokens_per_s']:.0f} tokens/s")
+        if self.path:
+            print(f"  Ledger: {self.path}")
+
+
+class ExtractionScheduler:
+    """Runs chat completions within a token/cost budget and a TPM limit."""
+
+    def __init__(self, ledger: UsageLedger, max_tokens: Optional[int] = None,
+                 max_cost: Optional[float] = None, tpm_limit: Optional[int] = None,
+                 sleep=time.sleep, clock=time.monotonic):
+        self.ledger = ledger
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.tpm_limit = tpm_limit
+        self._sleep = sleep
+        self._clock = clock
+        self._window = deque()  # (time, tokens) of calls in the last TPM_WINDOW seconds
+        self.waited = 0.0
+
+    def estimate(self, model: str, messages: list, max_completion: int):
+        """Expected (prompt, completion) tokens of a call.
+
+        The prompt is counted; the completion is the run's average so far,
+        or max_completion before the first call.
+        """
+        tokenizer = Tokenizer(model)
+        prompt = sum(tokenizer.count(m.get('content') or '') + 4 for m in messages)
+        completed = self.ledger.calls - self.ledger.errors
+        completion = (self.ledger.completion_tokens // completed) if completed else max_completion
+        return prompt, min(completion, max_completion)
+
+    def check_budget(self, model: str, prompt_tokens: int, completion_tokens: int):
+        estimated_tokens = prompt_tokens + completion_tokens
+        if self.max_tokens is not None and self.ledger.total_tokens + estimated_tokens > self.max_tokens:
+            raise BudgetExceeded(
+                f"token budget {self.max_tokens:,} reached "
+                f"({self.ledger.total_tokens:,} used, next call ~{estimated_tokens:,})")
+        if self.max_cost is not None:
+            estimated_cost = call_cost(model, prompt_tokens, 0, completion_tokens)
+            if estimated_cost is None:
+                # The cost of the call could not be counted, so the budget could not hold
+                raise BudgetExceeded(
+                    f"cost budget ${self.max_cost:.2f} set, but {model} has no pricing (add it to PRICING)")
+            if self.ledger.cost + estimated_cost > self.max_cost:
+                raise BudgetExceeded(
+                    f"cost budget ${self.max_cost:.2f} reached (${self.ledger.cost:.4f} spent)")
+
+    def _window_tokens(self) -> int:
+        horizon = self._clock() - TPM_WINDOW
+        while self._window and self._window[0][0] <= horizon:
+            self._window.popleft()
+        return sum(tokens for _, tokens in self._window)
+
+    def wait_for_capacity(self, estimated_tokens: int):
+        """Sleep until the next call fits under the tokens-per-minute limit."""
+        if not self.tpm_limit:
+            return
+        while self._window and self._window_tokens() + estimated_tokens > self.tpm_limit:
+            wait = max(self._window[0][0] + TPM_WINDOW - self._clock(), 0.05)
+            self._sleep(wait)
+            self.waited += wait
+
+    def complete(self, client, document: str, chunk, model: str, messages: list, **kwargs):
+        """Call client.chat.completions.create() with accounting.
+
+        Raises BudgetExceeded before the call if it would not fit the budget;
+        API errors are recorded in the ledger and re-raised.
+        """
+        prompt_tokens, completion_tokens = self.estimate(model, messages, kwargs.get('max_tokens') or 4000)
+        self.check_budget(model, prompt_tokens, completion_tokens)
+        self.wait_for_capacity(prompt_tokens + completion_tokens)
+
+        started = self._clock()
+        try:
+            response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+        except Exception as e:
+            self.ledger.record(document, chunk, model, None, self._clock() - started, error=str(e))
+            raise
+        self.ledger.record(document, chunk, model, response.usage, self._clock() - started)
+        prompt, _, completion = usage_tokens(response.usage)
+        self._window.append((self._clock(), prompt + completion))
+        return response
+
+
+def add_budget_arguments(parser: argparse.ArgumentParser):
+    """Add --max-tokens / --max-cost / --tpm options to an extraction CLI."""
+    parser.add_argument('--max-tokens', type=int, default=None, help='Token budget for the run')
+    parser.add_argument('--max-cost', type=float, default=None, help='Cost budget for the run (USD)')
+    parser.add_argument('--tpm', type=int, default=None, help='Tokens-per-minute limit')
+
+
+def scheduler_from_args(run_name: str, args) -> ExtractionScheduler:
+    ledger = UsageLedger(run_name)
+    return ExtractionScheduler(ledger, max_tokens=args.max_tokens,
+                               max_cost=args.max_cost, tpm_limit=args.tpm)
+
+
+def load_ledger(path: Path = LEDGER_PATH):
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize the LLM usage ledger')
+    parser.add_argument('--ledger', type=Path, default=LEDGER_PATH)
+    parser.add_argument('--run', help='Only this run_id')
+    parser.add_argument('--by', choices=['run_id', 'document', 'model'], default='run_id')
+    args = parser.parse_args()
+
+    entries = [e for e in load_ledger(args.ledger) if not args.run or e['run_id'] == args.run]
+    if not entries:
+        print(f"No ledger entries in {args.ledger}")
+        return
+
+    groups = defaultdict(lambda: defaultdict(float))
+    for e in entries:
+        g = groups[e[args.by]]
+        g['calls'] += 1
+        g['errors'] += 'error' in e
+        g['prompt'] += e['prompt_tokens']
+        g['cached'] += e['cached_tokens']
+        g['completion'] += e['completion_tokens']
+        g['cost'] += e['cost_usd'] or 0.0
+        g['latency'] += e['latency_s']
+
+    print(f"{args.by:<45} {'calls':>6} {'prompt':>10} {'cached':>8} {'compl.':>9} {'avg s':>6} {'cost $':>9}")
+    for key, g in sorted(groups.items()):
+        print(f"{str(key)[:45]:<45} {int(g['calls']):>6} {int(g['prompt']):>10,} {int(g['cached']):>8,} "
+              f"{int(g['completion']):>9,} {g['latency'] / g['calls']:>6.1f} {g['cost']:>9.4f}")
+    total = sum(g['cost'] for g in groups.values())
+    print(f"\nTotal cost: ${total:.4f} over {len(entries)} calls")
+
+
+if __name__ == "__main__":
+    main()
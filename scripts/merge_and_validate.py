@@ -3,14 +3,22 @@
 Merge and validate all extracted knowledge units.
 Supports duplicate detection based on title + content similarity.
 Phase 02: Merging VZP sources into expanded knowledge base v2.
+
+Thin wrapper around the streaming merge engine (kb_merge.py) with the
+Phase 02 inputs, thresholds and report.
+
+Usage:
+    python3 scripts/merge_and_validate.py
+    python3 scripts/merge_and_validate.py data/extracted/other.jsonl --output data/out.jsonl
 """
-import json
-import jsonschema
-from pathlib import Path
-from collections import defaultdict
+import argparse
+import sys
 from datetime import datetime
-import hashlib
-import re
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from kb_merge import load_schema, merge_files
 
 # Get script directory to compute relative paths
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -31,136 +39,9 @@ VZP_SOURCE_FILES = [
     "vzp_metodika_pl_2026.jsonl"
 ]
 
-def load_schema():
-    """Load the JSON schema for validation."""
-    if not SCHEMA_PATH.exists():
-        print(f"⚠ Schema file not found: {SCHEMA_PATH}")
-        return None
-    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def load_units(file_path):
-    """Load units from JSONL file."""
-    units = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                unit = json.loads(line)
-                unit['_source_file'] = file_path.name  # Track source for reporting
-                units.append(unit)
-            except json.JSONDecodeError as e:
-                print(f"⚠ Error in {file_path.name} line {line_num}: {e}")
-    return units
-
-def normalize_text(text):
-    """Normalize text for comparison - lowercase, remove extra spaces, punctuation."""
-    if not text:
-        return ""
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-def content_hash(unit):
-    """Generate a hash based on title + description for duplicate detection."""
-    title = normalize_text(unit.get('title', ''))
-    desc = normalize_text(unit.get('description', ''))
-    combined = f"{title}|{desc}"
-    return hashlib.md5(combined.encode('utf-8')).hexdigest()
-
-def similarity_score(unit1, unit2):
-    """Calculate simple similarity between two units based on normalized title and description."""
-    title1 = normalize_text(unit1.get('title', ''))
-    title2 = normalize_text(unit2.get('title', ''))
-    desc1 = normalize_text(unit1.get('description', ''))
-    desc2 = normalize_text(unit2.get('description', ''))
-
-    # Check if titles are nearly identical
-    if title1 == title2:
-        return 1.0
-
-    # Check word overlap
-    words1 = set(title1.split() + desc1.split()[:50])  # First 50 words of desc
-    words2 = set(title2.split() + desc2.split()[:50])
-
-    if not words1 or not words2:
-        return 0.0
-
-    intersection = len(words1 & words2)
-    union = len(words1 | words2)
-
-    return intersection / union if union > 0 else 0.0
-
-def find_duplicates(new_units, existing_units, threshold=0.75):
-    """Find potential duplicates between new and existing units."""
-    duplicates = []
-    existing_hashes = {content_hash(u): u for u in existing_units}
-
-    for new_unit in new_units:
-        new_hash = content_hash(new_unit)
-
-        # Exact hash match
-        if new_hash in existing_hashes:
-            duplicates.append({
-                'new': new_unit,
-                'existing': existing_hashes[new_hash],
-                'reason': 'exact_match',
-                'score': 1.0
-            })
-            continue
-
-        # Check similarity for near-duplicates (only check against same domain)
-        for existing in existing_units:
-            if existing.get('domain') != new_unit.get('domain'):
-                continue
-
-            score = similarity_score(new_unit, existing)
-            if score >= threshold:
-                duplicates.append({
-                    'new': new_unit,
-                    'existing': existing,
-                    'reason': 'similar',
-                    'score': score
-                })
-                break  # Found a duplicate, stop searching
-
-    return duplicates
-
-def validate_unit(unit, file_name, schema):
-    """Validate a single unit against schema.
-
-    Note: The schema requires UUID format for 'id' field, but our data uses custom
-    'ku-*' format. We validate structural requirements while being lenient on ID format.
-    """
-    if schema is None:
-        # No schema available, do basic validation
-        required_fields = ['id', 'type', 'domain', 'title', 'description', 'version', 'source', 'content', 'applicability']
-        for field in required_fields:
-            if field not in unit:
-                return False, f"{file_name} - {unit.get('id', 'unknown')}: Missing required field '{field}'"
-        return True, None
-
-    try:
-        # Create modified schema that accepts our ID format
-        relaxed_schema = schema.copy()
-        if 'properties' in relaxed_schema and 'id' in relaxed_schema['properties']:
-            relaxed_schema['properties'] = relaxed_schema['properties'].copy()
-            relaxed_schema['properties']['id'] = {"type": "string"}  # Accept any string
-
-        # Also relax related_units if present
-        if 'properties' in relaxed_schema and 'related_units' in relaxed_schema['properties']:
-            relaxed_schema['properties']['related_units'] = {
-                "type": "array",
-                "items": {"type": "string"}
-            }
-
-        jsonschema.validate(instance=unit, schema=relaxed_schema)
-        return True, None
-    except jsonschema.ValidationError as e:
-        return False, f"{file_name} - {unit.get('id', 'unknown')}: {e.message}"
+# Near-duplicate similarity threshold (title + description)
+DUPLICATE_THRESHOLD = 0.75
+
 
 def generate_report(stats, report_path):
     """Generate a markdown report of the merge operation."""
@@ -187,10 +68,11 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 | Metric | Count |
 |--------|-------|
 | Total units before merge | {stats['existing_count']} |
-| New VZP units processed | {stats['new_vzp_count']} |
+| New VZP units processed | {stats['new_count']} |
 | Valid units | {stats['valid_count']} |
 | Invalid units (rejected) | {stats['invalid_count']} |
 | Duplicates detected | {stats['duplicate_count']} |
+| ID collisions (skipped) | {stats['id_collision_count']} |
 | Units added to dataset | {stats['added_count']} |
 | **Final dataset size** | **{stats['final_count']}** |
 
@@ -211,8 +93,8 @@ Threshold: 75% similarity (title + description)
         report += "|----------|---------------|------------|\n"
         for dup in stats['duplicate_details'][:20]:  # Show first 20
             report += f"| {dup['new_title'][:40]}... | {dup['existing_title'][:40]}... | {dup['score']:.0%} |\n"
-        if len(stats['duplicate_details']) > 20:
-            report += f"\n*...and {len(stats['duplicate_details']) - 20} more duplicates*\n"
+        if stats['duplicate_count'] > 20:
+            report += f"\n*...and {stats['duplicate_count'] - 20} more duplicates*\n"
     else:
         report += "*No duplicates detected*\n"
 
@@ -247,8 +129,8 @@ Threshold: 75% similarity (title + description)
     if stats.get('validation_errors'):
         for error in stats['validation_errors'][:10]:
             report += f"- {error}\n"
-        if len(stats['validation_errors']) > 10:
-            report += f"\n*...and {len(stats['validation_errors']) - 10} more errors*\n"
+        if stats['invalid_count'] > 10:
+            report += f"\n*...and {stats['invalid_count'] - 10} more errors*\n"
     else:
         report += "*All units passed validation*\n"
 
@@ -266,161 +148,43 @@ Threshold: 75% similarity (title + description)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Phase 02: merge VZP extractions into the knowledge base")
+    parser.add_argument("sources", nargs="*", type=Path,
+                        default=[EXTRACTED_DIR / name for name in VZP_SOURCE_FILES],
+                        help="New JSONL files (default: the Phase 02 VZP extractions)")
+    parser.add_argument("--base", type=Path, default=MAIN_DATASET_PATH, help="Existing dataset")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH, help="Merged dataset")
+    parser.add_argument("--external", action="store_true", help="Use the on-disk merge strategy")
+    args = parser.parse_args()
+
     print("="*80)
     print("PHASE 02: MERGING AND VALIDATING VZP KNOWLEDGE UNITS")
     print("="*80)
     print()
 
     # Load schema
-    schema = load_schema()
+    schema = load_schema(SCHEMA_PATH)
     if schema:
         print(f"✓ Loaded schema from {SCHEMA_PATH}")
     else:
         print("⚠ Running without schema validation")
 
-    # Stats for reporting
-    stats = {
-        'source_stats': {},
-        'validation_errors': [],
-        'duplicate_details': [],
-        'domain_before': defaultdict(int),
-        'domain_added': defaultdict(int),
-        'type_before': defaultdict(int),
-        'type_added': defaultdict(int)
-    }
-
-    # Load existing main dataset
-    existing_units = []
-    if MAIN_DATASET_PATH.exists():
-        existing_units = load_units(MAIN_DATASET_PATH)
-        print(f"✓ Loaded {len(existing_units)} units from main dataset: {MAIN_DATASET_PATH.name}")
-
-        # Count domains and types in existing dataset
-        for unit in existing_units:
-            stats['domain_before'][unit.get('domain', 'unknown')] += 1
-            stats['type_before'][unit.get('type', 'unknown')] += 1
-    else:
-        print(f"⚠ Main dataset not found: {MAIN_DATASET_PATH}")
-
-    stats['existing_count'] = len(existing_units)
-
-    # Load new VZP source files
-    new_vzp_units = []
-    print("\n--- Loading VZP Source Files ---")
-    for vzp_file in VZP_SOURCE_FILES:
-        file_path = EXTRACTED_DIR / vzp_file
-        if file_path.exists():
-            units = load_units(file_path)
-            new_vzp_units.extend(units)
-            stats['source_stats'][vzp_file] = len(units)
-            print(f"✓ Loaded {len(units)} units from {vzp_file}")
-        else:
-            print(f"⚠ File not found: {vzp_file}")
-            stats['source_stats'][vzp_file] = 0
-
-    stats['new_vzp_count'] = len(new_vzp_units)
-    print(f"\nTotal new VZP units: {len(new_vzp_units)}")
-
-    # Validate new units
-    print("\n--- Validating New Units ---")
-    valid_new_units = []
-    for unit in new_vzp_units:
-        is_valid, error = validate_unit(unit, unit.get('_source_file', 'unknown'), schema)
-        if is_valid:
-            valid_new_units.append(unit)
-        else:
-            stats['validation_errors'].append(error)
-
-    stats['valid_count'] = len(valid_new_units)
-    stats['invalid_count'] = len(stats['validation_errors'])
-    print(f"✓ Valid units: {len(valid_new_units)}")
+    print("\n--- Merging ---")
+    stats = merge_files([args.base], args.sources, args.output, schema=schema,
+                        threshold=DUPLICATE_THRESHOLD, external=True if args.external else None)
+
     if stats['validation_errors']:
-        print(f"✗ Invalid units: {len(stats['validation_errors'])}")
+        print(f"✗ Invalid units: {stats['invalid_count']}")
         for error in stats['validation_errors'][:5]:
             print(f"  - {error}")
-
-    # Detect duplicates
-    print("\n--- Detecting Duplicates ---")
-    duplicates = find_duplicates(valid_new_units, existing_units, threshold=0.75)
-    duplicate_ids = {d['new']['id'] for d in duplicates}
-
-    stats['duplicate_count'] = len(duplicates)
-    for dup in duplicates:
-        stats['duplicate_details'].append({
-            'new_title': dup['new'].get('title', ''),
-            'existing_title': dup['existing'].get('title', ''),
-            'score': dup['score'],
-            'reason': dup['reason']
-        })
-
-    if duplicates:
-        print(f"⚠ Found {len(duplicates)} potential duplicates:")
-        for dup in duplicates[:5]:
-            print(f"  - {dup['new'].get('title', '')[:50]}... ({dup['reason']}, {dup['score']:.0%})")
-        if len(duplicates) > 5:
-            print(f"  ... and {len(duplicates) - 5} more")
-    else:
-        print("✓ No duplicates detected")
-
-    # Filter out duplicates and prepare units to add
-    units_to_add = [u for u in valid_new_units if u['id'] not in duplicate_ids]
-    stats['added_count'] = len(units_to_add)
-
-    # Count domains and types for added units
-    for unit in units_to_add:
-        stats['domain_added'][unit.get('domain', 'unknown')] += 1
-        stats['type_added'][unit.get('type', 'unknown')] += 1
-
-    # Check for duplicate IDs within new units
-    print("\n--- Checking for Duplicate IDs within New Units ---")
-    id_counts = defaultdict(int)
-    for unit in units_to_add:
-        id_counts[unit['id']] += 1
-
-    internal_duplicates = {id: count for id, count in id_counts.items() if count > 1}
-    if internal_duplicates:
-        print(f"⚠ Found {len(internal_duplicates)} duplicate IDs within new units:")
-        for id, count in list(internal_duplicates.items())[:5]:
-            print(f"  - {id}: {count} occurrences")
-        # Keep only first occurrence
-        seen_ids = set()
-        deduped_units = []
-        for unit in units_to_add:
-            if unit['id'] not in seen_ids:
-                seen_ids.add(unit['id'])
-                deduped_units.append(unit)
-        units_to_add = deduped_units
-        stats['added_count'] = len(units_to_add)
-    else:
-        print("✓ No duplicate IDs within new units")
-
-    # Also check for ID collisions with existing dataset
-    existing_ids = {u['id'] for u in existing_units}
-    id_collisions = [u for u in units_to_add if u['id'] in existing_ids]
-    if id_collisions:
-        print(f"⚠ Found {len(id_collisions)} ID collisions with existing dataset - skipping these")
-        units_to_add = [u for u in units_to_add if u['id'] not in existing_ids]
-        stats['added_count'] = len(units_to_add)
-
-    # Merge datasets
-    print("\n--- Merging Datasets ---")
-    merged_units = existing_units + units_to_add
-    stats['final_count'] = len(merged_units)
-    print(f"✓ Final dataset: {len(existing_units)} existing + {len(units_to_add)} new = {len(merged_units)} total")
-
-    # Write merged dataset
-    print(f"\n--- Writing Output ---")
-    # Remove internal tracking field before writing
-    for unit in merged_units:
-        unit.pop('_source_file', None)
-
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        for unit in merged_units:
-            f.write(json.dumps(unit, ensure_ascii=False) + '\n')
-
-    stats['output_path'] = OUTPUT_PATH.name
-    stats['file_size'] = OUTPUT_PATH.stat().st_size / 1024
-    print(f"✓ Wrote {len(merged_units)} units to {OUTPUT_PATH}")
+    if stats['duplicate_details']:
+        print(f"⚠ Found {stats['duplicate_count']} potential duplicates:")
+        for dup in stats['duplicate_details'][:5]:
+            print(f"  - {dup['new_title'][:50]}... ({dup['reason']}, {dup['score']:.0%})")
+    if stats['id_collision_count']:
+        print(f"⚠ Skipped {stats['id_collision_count']} units with an ID already in the dataset")
+
+    print(f"✓ Wrote {stats['final_count']} units to {args.output}")
     print(f"  File size: {stats['file_size']:.1f} KB")
 
     # Generate report
@@ -433,12 +197,12 @@ def main():
     print("SUMMARY")
     print(f"{'='*80}")
     print(f"Existing units: {stats['existing_count']}")
-    print(f"New VZP units: {stats['new_vzp_count']}")
+    print(f"New VZP units: {stats['new_count']}")
     print(f"Valid: {stats['valid_count']}, Invalid: {stats['invalid_count']}")
     print(f"Duplicates removed: {stats['duplicate_count']}")
     print(f"Units added: {stats['added_count']}")
     print(f"Final dataset size: {stats['final_count']}")
-    print(f"Output: {OUTPUT_PATH}")
+    print(f"Output: {args.output}")
     print(f"{'='*80}")
 
 if __name__ == "__main__":
@@ -8,14 +8,19 @@ Combines:
 Output:
 - data/knowledge_base_phase3.jsonl (intermediate)
 - data/knowledge_base_mvp.jsonl (final MVP dataset)
+
+Thin wrapper around the streaming merge engine (kb_merge.py) with the
+Phase 3 inputs, thresholds and report.
 """
-import json
-import jsonschema
-from pathlib import Path
+import argparse
+import sys
 from collections import defaultdict
 from datetime import datetime
-import hashlib
-import re
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from kb_merge import load_schema, merge_files
 
 # Get script directory to compute relative paths
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -44,171 +49,30 @@ PHASE3_SOURCE_FILES = [
     "infoprolekare_articles.jsonl",
 ]
 
-
-def load_schema():
-    """Load the JSON schema for validation."""
-    if not SCHEMA_PATH.exists():
-        print(f"⚠ Schema file not found: {SCHEMA_PATH}")
-        return None
-    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
-def load_units(file_path):
-    """Load units from JSONL file."""
-    units = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                unit = json.loads(line)
-                unit['_source_file'] = file_path.name
-                units.append(unit)
-            except json.JSONDecodeError as e:
-                print(f"⚠ Error in {file_path.name} line {line_num}: {e}")
-    return units
-
-
-def normalize_text(text):
-    """Normalize text for comparison - lowercase, remove extra spaces, punctuation."""
-    if not text:
-        return ""
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-
-def content_hash(unit):
-    """Generate a hash based on title + description for duplicate detection."""
-    title = normalize_text(unit.get('title', ''))
-    desc = normalize_text(unit.get('description', ''))[:200]  # First 200 chars
-    combined = f"{title}|{desc}"
-    return hashlib.md5(combined.encode('utf-8')).hexdigest()
-
-
-def similarity_score(unit1, unit2):
-    """Calculate simple similarity between two units based on normalized title and description."""
-    title1 = normalize_text(unit1.get('title', ''))
-    title2 = normalize_text(unit2.get('title', ''))
-    desc1 = normalize_text(unit1.get('description', ''))
-    desc2 = normalize_text(unit2.get('description', ''))
-
-    # Check if titles are nearly identical
-    if title1 == title2:
-        return 1.0
-
-    # Check word overlap
-    words1 = set(title1.split() + desc1.split()[:50])
-    words2 = set(title2.split() + desc2.split()[:50])
-
-    if not words1 or not words2:
-        return 0.0
-
-    intersection = len(words1 & words2)
-    union = len(words1 | words2)
-
-    return intersection / union if union > 0 else 0.0
-
-
-def find_duplicates(new_units, existing_units, threshold=0.80):
-    """Find potential duplicates between new and existing units."""
-    duplicates = []
-    existing_hashes = {content_hash(u): u for u in existing_units}
-
-    for new_unit in new_units:
-        new_hash = content_hash(new_unit)
-
-        # Exact hash match
-        if new_hash in existing_hashes:
-            duplicates.append({
-                'new': new_unit,
-                'existing': existing_hashes[new_hash],
-                'reason': 'exact_match',
-                'score': 1.0
-            })
-            continue
-
-        # Check similarity for near-duplicates (only check against same domain)
-        for existing in existing_units:
-            if existing.get('domain') != new_unit.get('domain'):
-                continue
-
-            score = similarity_score(new_unit, existing)
-            if score >= threshold:
-                duplicates.append({
-                    'new': new_unit,
-                    'existing': existing,
-                    'reason': 'similar',
-                    'score': score
-                })
-                break
-
-    return duplicates
-
-
-def validate_unit(unit, file_name, schema):
-    """Validate a single unit against schema with relaxed ID format."""
-    if schema is None:
-        required_fields = ['id', 'type', 'domain', 'title', 'description', 'version', 'source', 'content', 'applicability']
-        for field in required_fields:
-            if field not in unit:
-                return False, f"{file_name} - {unit.get('id', 'unknown')}: Missing required field '{field}'"
-        return True, None
-
-    try:
-        # Create modified schema that accepts our ID format
-        relaxed_schema = schema.copy()
-        if 'properties' in relaxed_schema and 'id' in relaxed_schema['properties']:
-            relaxed_schema['properties'] = relaxed_schema['properties'].copy()
-            relaxed_schema['properties']['id'] = {"type": "string"}
-
-        if 'properties' in relaxed_schema and 'related_units' in relaxed_schema['properties']:
-            relaxed_schema['properties']['related_units'] = {
-                "type": "array",
-                "items": {"type": "string"}
-            }
-
-        jsonschema.validate(instance=unit, schema=relaxed_schema)
-        return True, None
-    except jsonschema.ValidationError as e:
-        return False, f"{file_name} - {unit.get('id', 'unknown')}: {e.message}"
-
-
-def find_internal_duplicates(units, threshold=0.85):
-    """Find duplicates within a single list of units."""
-    duplicates = []
-    seen_hashes = {}
-
-    for i, unit in enumerate(units):
-        unit_hash = content_hash(unit)
-        if unit_hash in seen_hashes:
-            duplicates.append({
-                'index': i,
-                'unit': unit,
-                'duplicate_of_index': seen_hashes[unit_hash],
-                'reason': 'exact_hash'
-            })
-        else:
-            # Also check similarity
-            for j, other in enumerate(units[:i]):
-                if other.get('domain') == unit.get('domain'):
-                    score = similarity_score(unit, other)
-                    if score >= threshold:
-                        duplicates.append({
-                            'index': i,
-                            'unit': unit,
-                            'duplicate_of_index': j,
-                            'reason': 'similar',
-                            'score': score
-                        })
-                        break
-            else:
-                seen_hashes[unit_hash] = i
-
-    return duplicates
+# Near-duplicate similarity thresholds (title + description)
+EXTERNAL_THRESHOLD = 0.80  # Phase 3 unit vs existing dataset
+INTERNAL_THRESHOLD = 0.85  # Phase 3 unit vs other Phase 3 units
+
+
+def source_label(unit, is_base):
+    """Insurance company / source bucket for the report's source distribution."""
+    source_name = unit.get('source', {}).get('name', 'Unknown')
+    if is_base and ('VZP' in source_name or 'VZP' in unit.get('title', '')):
+        return 'VZP'
+    if 'ZP MV' in source_name or 'ZPMV' in source_name:
+        return 'ZP MV ČR'
+    if 'OZP' in source_name:
+        return 'OZP'
+    if 'ČPZP' in source_name or 'CPZP' in source_name:
+        return 'ČPZP'
+    if 'InfoProLekare' in source_name:
+        return 'InfoProLekare.cz'
+    if is_base and ('Úhradová vyhláška' in source_name
+                    or 'uhradova-vyhlaska' in unit.get('source', {}).get('url', '')):
+        return 'Úhradová vyhláška'
+    if not is_base and ('Comparison' in unit.get('title', '') or 'srovnání' in str(unit.get('tags', []))):
+        return 'Year Comparison'
+    return 'Other'
 
 
 def generate_report(stats, report_path):
@@ -237,11 +101,12 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 | Metric | Count |
 |--------|-------|
 | Existing units (Phase 1-2) | {stats['existing_count']} |
-| New Phase 3 units processed | {stats['new_phase3_count']} |
+| New Phase 3 units processed | {stats['new_count']} |
 | Valid units | {stats['valid_count']} |
 | Invalid units (rejected) | {stats['invalid_count']} |
 | Duplicates with existing (removed) | {stats['duplicate_external_count']} |
 | Internal duplicates (removed) | {stats['duplicate_internal_count']} |
+| ID collisions (skipped) | {stats['id_collision_count']} |
 | Units added to dataset | {stats['added_count']} |
 | **Final MVP dataset size** | **{stats['final_count']}** |
 
@@ -258,16 +123,17 @@ External threshold: 80% similarity (title + description)
 Internal threshold: 85% similarity
 
 """
-    if stats.get('duplicate_details'):
+    external = [dup for dup in stats.get('duplicate_details', []) if not dup['internal']]
+    if external:
         report += "### External Duplicates (Phase 3 vs Existing)\n\n"
         report += "| New Unit | Existing Unit | Similarity |\n"
         report += "|----------|---------------|------------|\n"
-        for dup in stats['duplicate_details'][:15]:
+        for dup in external[:15]:
             new_title = dup['new_title'][:35] + "..." if len(dup['new_title']) > 35 else dup['new_title']
             existing_title = dup['existing_title'][:35] + "..." if len(dup['existing_title']) > 35 else dup['existing_title']
             report += f"| {new_title} | {existing_title} | {dup['score']:.0%} |\n"
-        if len(stats['duplicate_details']) > 15:
-            report += f"\n*...and {len(stats['duplicate_details']) - 15} more duplicates*\n"
+        if stats['duplicate_external_count'] > 15:
+            report += f"\n*...and {stats['duplicate_external_count'] - 15} more duplicates*\n"
     else:
         report += "*No external duplicates detected*\n"
 
@@ -311,16 +177,16 @@ Internal threshold: 85% similarity
     if stats.get('validation_errors'):
         for error in stats['validation_errors'][:10]:
             report += f"- {error}\n"
-        if len(stats['validation_errors']) > 10:
-            report += f"\n*...and {len(stats['validation_errors']) - 10} more errors*\n"
+        if stats['invalid_count'] > 10:
+            report += f"\n*...and {stats['invalid_count'] - 10} more errors*\n"
     else:
         report += "*All units passed validation*\n"
 
     report += f"""
 ## Output Files
 
-- Phase 3 merged: `{PHASE3_OUTPUT_PATH.name}` ({stats.get('phase3_file_size', 0):.1f} KB)
-- Final MVP: `{MVP_OUTPUT_PATH.name}` ({stats.get('mvp_file_size', 0):.1f} KB)
+- Phase 3 merged: `{PHASE3_OUTPUT_PATH.name}` ({stats.get('added_file_size', 0):.1f} KB)
+- Final MVP: `{MVP_OUTPUT_PATH.name}` ({stats.get('file_size', 0):.1f} KB)
 
 ## Coverage Summary
 
@@ -338,216 +204,52 @@ This MVP knowledge base covers:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Phase 3: merge extended sources into the MVP dataset")
+    parser.add_argument("sources", nargs="*", type=Path,
+                        default=[EXTRACTED_DIR / name for name in PHASE3_SOURCE_FILES],
+                        help="New JSONL files (default: the Phase 3 extractions)")
+    parser.add_argument("--base", type=Path, default=MAIN_DATASET_PATH, help="Existing dataset")
+    parser.add_argument("--external", action="store_true", help="Use the on-disk merge strategy")
+    args = parser.parse_args()
+
     print("="*80)
     print("PHASE 03 FINAL: MERGING ALL EXTENDED SOURCES")
     print("="*80)
     print()
 
     # Load schema
-    schema = load_schema()
+    schema = load_schema(SCHEMA_PATH)
     if schema:
         print(f"✓ Loaded schema from {SCHEMA_PATH}")
     else:
         print("⚠ Running without schema validation")
 
-    # Stats for reporting
-    stats = {
-        'source_stats': {},
-        'validation_errors': [],
-        'duplicate_details': [],
-        'domain_before': defaultdict(int),
-        'domain_added': defaultdict(int),
-        'type_before': defaultdict(int),
-        'type_added': defaultdict(int),
-        'source_distribution': defaultdict(int),
-    }
-
-    # Load existing main dataset
-    existing_units = []
-    if MAIN_DATASET_PATH.exists():
-        existing_units = load_units(MAIN_DATASET_PATH)
-        print(f"✓ Loaded {len(existing_units)} units from main dataset: {MAIN_DATASET_PATH.name}")
-
-        for unit in existing_units:
-            stats['domain_before'][unit.get('domain', 'unknown')] += 1
-            stats['type_before'][unit.get('type', 'unknown')] += 1
-
-            # Track source distribution
-            source_name = unit.get('source', {}).get('name', 'Unknown')
-            if 'VZP' in source_name or 'VZP' in unit.get('title', ''):
-                stats['source_distribution']['VZP'] += 1
-            elif 'ZP MV' in source_name or 'ZPMV' in source_name:
-                stats['source_distribution']['ZP MV ČR'] += 1
-            elif 'OZP' in source_name:
-                stats['source_distribution']['OZP'] += 1
-            elif 'ČPZP' in source_name or 'CPZP' in source_name:
-                stats['source_distribution']['ČPZP'] += 1
-            elif 'InfoProLekare' in source_name:
-                stats['source_distribution']['InfoProLekare.cz'] += 1
-            elif 'Úhradová vyhláška' in source_name or 'uhradova-vyhlaska' in unit.get('source', {}).get('url', ''):
-                stats['source_distribution']['Úhradová vyhláška'] += 1
-            else:
-                stats['source_distribution']['Other'] += 1
-    else:
-        print(f"⚠ Main dataset not found: {MAIN_DATASET_PATH}")
-
-    stats['existing_count'] = len(existing_units)
-
-    # Load new Phase 3 source files
-    new_phase3_units = []
-    print("\n--- Loading Phase 3 Source Files ---")
-    for phase3_file in PHASE3_SOURCE_FILES:
-        file_path = EXTRACTED_DIR / phase3_file
-        if file_path.exists():
-            units = load_units(file_path)
-            new_phase3_units.extend(units)
-            stats['source_stats'][phase3_file] = len(units)
-            print(f"✓ Loaded {len(units)} units from {phase3_file}")
-        else:
-            print(f"⚠ File not found: {phase3_file}")
-            stats['source_stats'][phase3_file] = 0
-
-    stats['new_phase3_count'] = len(new_phase3_units)
-    print(f"\nTotal new Phase 3 units: {len(new_phase3_units)}")
-
-    # Validate new units
-    print("\n--- Validating New Units ---")
-    valid_new_units = []
-    for unit in new_phase3_units:
-        is_valid, error = validate_unit(unit, unit.get('_source_file', 'unknown'), schema)
-        if is_valid:
-            valid_new_units.append(unit)
-        else:
-            stats['validation_errors'].append(error)
-
-    stats['valid_count'] = len(valid_new_units)
-    stats['invalid_count'] = len(stats['validation_errors'])
-    print(f"✓ Valid units: {len(valid_new_units)}")
-    if stats['validation_errors']:
-        print(f"✗ Invalid units: {len(stats['validation_errors'])}")
-        for error in stats['validation_errors'][:5]:
-            print(f"  - {error}")
+    source_distribution = defaultdict(int)
 
-    # Detect duplicates with existing dataset
-    print("\n--- Detecting External Duplicates (vs Existing Dataset) ---")
-    duplicates = find_duplicates(valid_new_units, existing_units, threshold=0.80)
-    duplicate_ids = {d['new']['id'] for d in duplicates}
-
-    stats['duplicate_external_count'] = len(duplicates)
-    for dup in duplicates:
-        stats['duplicate_details'].append({
-            'new_title': dup['new'].get('title', ''),
-            'existing_title': dup['existing'].get('title', ''),
-            'score': dup['score'],
-            'reason': dup['reason']
-        })
-
-    if duplicates:
-        print(f"⚠ Found {len(duplicates)} potential duplicates with existing dataset:")
-        for dup in duplicates[:5]:
-            print(f"  - {dup['new'].get('title', '')[:50]}... ({dup['reason']}, {dup['score']:.0%})")
-        if len(duplicates) > 5:
-            print(f"  ... and {len(duplicates) - 5} more")
-    else:
-        print("✓ No external duplicates detected")
+    def count_source(unit, is_base):
+        source_distribution[source_label(unit, is_base)] += 1
 
-    # Filter out duplicates
-    units_after_external_dedup = [u for u in valid_new_units if u['id'] not in duplicate_ids]
+    print("\n--- Merging ---")
+    stats = merge_files([args.base], args.sources, MVP_OUTPUT_PATH, schema=schema,
+                        threshold=EXTERNAL_THRESHOLD, internal_threshold=INTERNAL_THRESHOLD,
+                        added_path=PHASE3_OUTPUT_PATH, external=True if args.external else None,
+                        on_keep=count_source)
+    stats['source_distribution'] = source_distribution
 
-    # Check for internal duplicates within Phase 3 units
-    print("\n--- Detecting Internal Duplicates (within Phase 3) ---")
-    internal_duplicates = find_internal_duplicates(units_after_external_dedup, threshold=0.85)
-    internal_dup_indices = {d['index'] for d in internal_duplicates}
+    if stats['validation_errors']:
+        print(f"✗ Invalid units: {stats['invalid_count']}")
+        for error in stats['validation_errors'][:5]:
+            print(f"  - {error}")
+    if stats['duplicate_details']:
+        print(f"⚠ Found {stats['duplicate_count']} potential duplicates:")
+        for dup in stats['duplicate_details'][:5]:
+            print(f"  - {dup['new_title'][:50]}... ({dup['reason']}, {dup['score']:.0%})")
+    if stats['id_collision_count']:
+        print(f"⚠ Skipped {stats['id_collision_count']} units with an ID already in the dataset")
 
-    stats['duplicate_internal_count'] = len(internal_duplicates)
-    if internal_duplicates:
-        print(f"⚠ Found {len(internal_duplicates)} internal duplicates")
-        for dup in internal_duplicates[:3]:
-            print(f"  - Index {dup['index']}: {dup['unit'].get('title', '')[:50]}...")
-    else:
-        print("✓ No internal duplicates detected")
-
-    # Filter out internal duplicates
-    units_to_add = [u for i, u in enumerate(units_after_external_dedup) if i not in internal_dup_indices]
-
-    # Check for duplicate IDs within new units
-    print("\n--- Checking for Duplicate IDs ---")
-    id_counts = defaultdict(int)
-    for unit in units_to_add:
-        id_counts[unit['id']] += 1
-
-    internal_id_duplicates = {id: count for id, count in id_counts.items() if count > 1}
-    if internal_id_duplicates:
-        print(f"⚠ Found {len(internal_id_duplicates)} duplicate IDs within new units")
-        seen_ids = set()
-        deduped_units = []
-        for unit in units_to_add:
-            if unit['id'] not in seen_ids:
-                seen_ids.add(unit['id'])
-                deduped_units.append(unit)
-        units_to_add = deduped_units
-    else:
-        print("✓ No duplicate IDs within new units")
-
-    # Check for ID collisions with existing dataset
-    existing_ids = {u['id'] for u in existing_units}
-    id_collisions = [u for u in units_to_add if u['id'] in existing_ids]
-    if id_collisions:
-        print(f"⚠ Found {len(id_collisions)} ID collisions with existing dataset - skipping these")
-        units_to_add = [u for u in units_to_add if u['id'] not in existing_ids]
-
-    stats['added_count'] = len(units_to_add)
-
-    # Count domains and types for added units
-    for unit in units_to_add:
-        stats['domain_added'][unit.get('domain', 'unknown')] += 1
-        stats['type_added'][unit.get('type', 'unknown')] += 1
-
-        # Track source distribution
-        source_name = unit.get('source', {}).get('name', 'Unknown')
-        if 'ZP MV' in source_name or 'ZPMV' in source_name:
-            stats['source_distribution']['ZP MV ČR'] += 1
-        elif 'OZP' in source_name:
-            stats['source_distribution']['OZP'] += 1
-        elif 'ČPZP' in source_name or 'CPZP' in source_name:
-            stats['source_distribution']['ČPZP'] += 1
-        elif 'InfoProLekare' in source_name:
-            stats['source_distribution']['InfoProLekare.cz'] += 1
-        elif 'Comparison' in unit.get('title', '') or 'srovnání' in str(unit.get('tags', [])):
-            stats['source_distribution']['Year Comparison'] += 1
-        else:
-            stats['source_distribution']['Other'] += 1
-
-    # Merge datasets
-    print("\n--- Merging Datasets ---")
-    merged_units = existing_units + units_to_add
-    stats['final_count'] = len(merged_units)
-    print(f"✓ Final dataset: {len(existing_units)} existing + {len(units_to_add)} new = {len(merged_units)} total")
-
-    # Write Phase 3 output (just new units)
-    print(f"\n--- Writing Phase 3 Output ---")
-    for unit in units_to_add:
-        unit.pop('_source_file', None)
-
-    with open(PHASE3_OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        for unit in units_to_add:
-            f.write(json.dumps(unit, ensure_ascii=False) + '\n')
-
-    stats['phase3_file_size'] = PHASE3_OUTPUT_PATH.stat().st_size / 1024
-    print(f"✓ Wrote {len(units_to_add)} Phase 3 units to {PHASE3_OUTPUT_PATH.name}")
-
-    # Write MVP output (complete merged dataset)
-    print(f"\n--- Writing MVP Output ---")
-    for unit in merged_units:
-        unit.pop('_source_file', None)
-
-    with open(MVP_OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        for unit in merged_units:
-            f.write(json.dumps(unit, ensure_ascii=False) + '\n')
-
-    stats['mvp_file_size'] = MVP_OUTPUT_PATH.stat().st_size / 1024
-    print(f"✓ Wrote {len(merged_units)} units to {MVP_OUTPUT_PATH.name}")
-    print(f"  File size: {stats['mvp_file_size']:.1f} KB")
+    print(f"✓ Wrote {stats['added_count']} Phase 3 units to {PHASE3_OUTPUT_PATH.name}")
+    print(f"✓ Wrote {stats['final_count']} units to {MVP_OUTPUT_PATH.name}")
+    print(f"  File size: {stats['file_size']:.1f} KB")
 
     # Generate report
     print("\n--- Generating Report ---")
@@ -559,7 +261,7 @@ def main():
     print("PHASE 03 FINAL MERGE SUMMARY")
     print(f"{'='*80}")
     print(f"Existing units (Phase 1-2): {stats['existing_count']}")
-    print(f"New Phase 3 units: {stats['new_phase3_count']}")
+    print(f"New Phase 3 units: {stats['new_count']}")
     print(f"Valid: {stats['valid_count']}, Invalid: {stats['invalid_count']}")
     print(f"External duplicates removed: {stats['duplicate_external_count']}")
     print(f"Internal duplicates removed: {stats['duplicate_internal_count']}")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Shared PDF text extraction for the extraction scripts.
+
+Wraps `pdftotext -layout` with:
+- page-range splitting: large PDFs are extracted as independent page ranges,
+  each in its own pdftotext process, running in parallel,
+- a per-page text cache keyed by the PDF's SHA-256, so re-running an
+  extraction on an unchanged PDF does not invoke pdftotext at all,
+- page offsets, so a character position in the text can be mapped back to
+  a page number (for citing pages in knowledge units).
+
+Usage:
+    from pdf_text import extract_text_from_pdf, extract_pdf_pages
+
+    text = extract_text_from_pdf(pdf_path)       # drop-in replacement
+    doc = extract_pdf_pages(pdf_path)            # pages + offsets
+    doc.page_for_offset(12345)                   # -> 1-based page number
+
+    python3 scripts/pdf_text.py sources/uhradova_vyhlaska_2026.pdf
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+# Paths - use relative paths from script location
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+CACHE_DIR = PROJECT_ROOT / ".cache" / "pdf_text"
+
+# Pages per pdftotext invocation
+PAGES_PER_RANGE = 16
+
+# Bump when the extraction command changes so old cache entries are ignored
+CACHE_VERSION = 1
+
+# pdftotext terminates every page with a form feed
+PAGE_SEPARATOR = "\f"
+
+
+@dataclass
+class PdfText:
+    """Extracted text of a PDF, page by page."""
+    sha256: str
+    pages: List[str]
+
+    @property
+    def text(self) -> str:
+        """Full text, identical to `pdftotext -layout file.pdf -`."""
+        return "".join(page + PAGE_SEPARATOR for page in self.pages)
+
+    @property
+    def page_offsets(self) -> List[int]:
+        """Character offset in `text` at which each page starts."""
+        offsets = []
+        position = 0
+        for page in self.pages:
+            offsets.append(position)
+            position += len(page) + len(PAGE_SEPARATOR)
+        return offsets
+
+    def page_for_offset(self, offset: int) -> int:
+        """1-based page number containing the given character offset of `text`."""
+        return max(1, bisect_right(self.page_offsets, offset))
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_pages(pdf_path: Path) -> Optional[int]:
+    """Number of pages according to pdfinfo, or None if unavailable."""
+    try:
+        result = subprocess.run(
+            ['pdfinfo', str(pdf_path)],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    for line in result.stdout.splitlines():
+        if line.startswith('Pages:'):
+            return int(line.split(':', 1)[1])
+    return None
+
+
+def _run_pdftotext(pdf_path: Path, first: Optional[int] = None, last: Optional[int] = None) -> List[str]:
+    """Run pdftotext over a page range and split the output into pages."""
+    cmd = ['pdftotext', '-layout']
+    if first is not None:
+        cmd += ['-f', str(first), '-l', str(last)]
+    cmd += [str(pdf_path), '-']
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    pages = result.stdout.split(PAGE_SEPARATOR)
+    # Trailing separator leaves an empty element after the last page
+    if pages and pages[-1] == '':
+        pages.pop()
+    return pages
+
+
+def _cache_path(sha256: str, cache_dir: Path) -> Path:
+    return cache_dir / f"{sha256}.json"
+
+
+def _load_cached(sha256: str, cache_dir: Path) -> Optional[List[str]]:
+    path = _cache_path(sha256, cache_dir)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if cached.get('version') != CACHE_VERSION:
+        return None
+    return cached['pages']
+
+
+def _store_cached(sha256: str, pages: List[str], source: Path, cache_dir: Path):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = _cache_path(sha256, cache_dir)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'source': source.name, 'pages': pages},
+                  f, ensure_ascii=False)
+    tmp.replace(path)
+
+
+def extract_pdf_pages(pdf_path, cache_dir: Path = CACHE_DIR, workers: Optional[int] = None,
+                      pages_per_range: int = PAGES_PER_RANGE, use_cache: bool = True) -> PdfText:
+    """Extract per-page text of a PDF, using the cache when possible.
+
+    Raises subprocess.CalledProcessError / OSError if pdftotext fails.
+    """
+    pdf_path = Path(pdf_path)
+    sha256 = file_sha256(pdf_path)
+
+    if use_cache:
+        pages = _load_cached(sha256, cache_dir)
+        if pages is not None:
+            return PdfText(sha256, pages)
+
+    page_count = count_pages(pdf_path)
+    if page_count is None or page_count <= pages_per_range:
+        pages = _run_pdftotext(pdf_path)
+    else:
+        ranges = [(first, min(first + pages_per_range - 1, page_count))
+                  for first in range(1, page_count + 1, pages_per_range)]
+        # Each range runs in its own pdftotext process; threads only wait on them
+        workers = workers or min(len(ranges), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(lambda r: _run_pdftotext(pdf_path, *r), ranges)
+            pages = [page for part in parts for page in part]
+
+    if use_cache:
+        _store_cached(sha256, pages, pdf_path, cache_dir)
+    return PdfText(sha256, pages)
+
+
+def extract_text_from_pdf(pdf_path):
+    """Extract text from PDF using pdftotext (cached, page-parallel)."""
+    try:
+        return extract_pdf_pages(pdf_path).text
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error extracting text from {pdf_path}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract (and cache) text of a PDF')
+    parser.add_argument('pdf', type=Path, help='PDF file')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not write the cache')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel pdftotext processes')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    doc = extract_pdf_pages(args.pdf, workers=args.workers, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    print(f"PDF: {args.pdf}")
+    print(f"SHA-256: {doc.sha256}")
+    print(f"Pages: {len(doc.pages)}")
+    print(f"Characters: {len(doc.text):,}")
+    print(f"Time: {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Numpy-only query encoder: the TF-IDF + SVD embedding without sklearn.
+
+The API embeds queries with the TfidfVectorizer and TruncatedSVD fitted by
+generate_embeddings.py. Unpickling them imports sklearn and scipy and ties
+the artifacts to the sklearn version, and transform() is generic code run
+for every query. The fitted state is small, so it is exported instead:
+
+    terms       vocabulary, in column order ('\\n'-joined UTF-8)
+    projection  float32 [terms × dim]: IDF folded into the SVD components
+    config      analyzer settings as JSON (token pattern, n-grams, ...)
+
+Encoding a query then tokenizes it the way the vectorizer does, counts the
+known terms and sums their projection rows, one small sparse-dense product.
+The TF-IDF row normalization is dropped: the result is normalized anyway,
+and scaling the TF-IDF row only scales the projection.
+
+The file is a plain .npz (loaded with allow_pickle=False). Only numpy is
+needed to load and use it; from_sklearn() needs the fitted sklearn objects.
+"""
+import json
+import re
+from collections import Counter
+from typing import Iterable, List
+
+import numpy as np
+
+FORMAT = 1
+
+
+def _text_array(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+
+
+def _array_text(array: np.ndarray) -> str:
+    return array.tobytes().decode('utf-8')
+
+
+class QueryEncoder:
+    """Embeds texts like a fitted TfidfVectorizer followed by TruncatedSVD and L2 normalization."""
+
+    def __init__(self, terms: List[str], projection: np.ndarray, config: dict):
+        if len(terms) != projection.shape[0]:
+            raise ValueError(f"{len(terms)} terms for a projection of {projection.shape[0]} rows")
+        self.terms = terms
+        self.vocabulary = {term: index for index, term in enumerate(terms)}
+        self.projection = np.ascontiguousarray(projection, dtype=np.float32)
+        self.config = config
+        self._token_re = re.compile(config["token_pattern"])
+        self._lowercase = config["lowercase"]
+        self._min_n, self._max_n = config["ngram_range"]
+        self._stop_words = frozenset(config.get("stop_words") or ())
+        self._binary = config.get("binary", False)
+        self._sublinear_tf = config.get("sublinear_tf", False)
+
+    @property
+    def dim(self) -> int:
+        return self.projection.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, svd) -> "QueryEncoder":
+        """Export a fitted TfidfVectorizer and TruncatedSVD (word analyzer, default preprocessing)."""
+        unsupported = {
+            "analyzer": vectorizer.analyzer != "word",
+            "preprocessor": vectorizer.preprocessor is not None,
+            "tokenizer": vectorizer.tokenizer is not None,
+            "strip_accents": vectorizer.strip_accents is not None,
+            "input": vectorizer.input != "content",
+        }
+        names = [name for name, bad in unsupported.items() if bad]
+        if names:
+            raise ValueError(f"Cannot export a vectorizer with custom {', '.join(names)}")
+
+        terms = [None] * len(vectorizer.vocabulary_)
+        for term, index in vectorizer.vocabulary_.items():
+            terms[index] = term
+        idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(terms))
+        projection = idf[:, None] * svd.components_.T
+        stop_words = vectorizer.get_stop_words()
+        config = {
+            "format": FORMAT,
+            "lowercase": bool(vectorizer.lowercase),
+            "token_pattern": vectorizer.token_pattern,
+            "ngram_range": list(vectorizer.ngram_range),
+            "stop_words": sorted(stop_words) if stop_words else None,
+            "binary": bool(vectorizer.binary),
+            "sublinear_tf": bool(vectorizer.sublinear_tf),
+        }
+        return cls(terms, projection, config)
+
+    def save(self, file):
+        """Write the encoder to a path or a binary file object."""
+        if any("\n" in term for term in self.terms):
+            raise ValueError("Terms containing newlines cannot be saved")
+        arrays = {
+            "terms": _text_array("\n".join(self.terms)),
+            "projection": self.projection,
+            "config": _text_array(json.dumps(self.config, ensure_ascii=False)),
+        }
+        if hasattr(file, "write"):
+            np.savez(file, **arrays)
+        else:
+            with open(file, 'wb') as f:
+                np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, file) -> "QueryEncoder":
+        """Read an encoder from a path or a binary file object."""
+        with np.load(file, allow_pickle=False) as data:
+            config = json.loads(_array_text(data["config"]))
+            if config.get("format") != FORMAT:
+                raise ValueError(f"Encoder format {config.get('format')}, expected {FORMAT}")
+            terms = _array_text(data["terms"]).split("\n") if data["terms"].size else []
+            return cls(terms, data["projection"], config)
+
+    def analyze(self, text: str) -> List[str]:
+        """The vectorizer's terms of a text: tokens, then word n-grams."""
+        if self._lowercase:
+            text = text.lower()
+        tokens = self._token_re.findall(text)
+        if self._stop_words:
+            tokens = [token for token in tokens if token not in self._stop_words]
+        if self._max_n == 1:
+            return tokens
+        grams = list(tokens) if self._min_n == 1 else []
+        for n in range(max(self._min_n, 2), min(self._max_n, len(tokens)) + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def encode(self, text: str) -> np.ndarray:
+        """L2-normalized float32 embedding of one text (zeros when no term is known)."""
+        vocabulary = self.vocabulary
+        counts = Counter(vocabulary[term] for term in self.analyze(text) if term in vocabulary)
+        if not counts:
+            return np.zeros(self.dim, dtype=np.float32)
+        rows = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        if self._binary:
+            weights[:] = 1
+        if self._sublinear_tf:
+            weights = 1 + np.log(weights)
+        vector = weights @ self.projection[rows]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def encode_batch(self, texts: Iterable[str]) -> np.ndarray:
+        vectors = [self.encode(text) for text in texts]
+        return np.stack(vectors) if vectors else np.zeros((0, self.dim), dtype=np.float32)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Section-aware segmenter for Czech legal and methodological documents.
+
+Builds a section tree (Příloha, Část, Hlava, Oddíl, §, Článek and markdown
+headings) over the plain text of a source document, with character offsets
+and - when page offsets are known - page ranges for every section.
+Extraction jobs can then send the LLM exactly the sections they need
+instead of the whole document.
+
+Usage:
+    from pdf_text import extract_pdf_pages
+    from segmenter import segment_document
+
+    doc = extract_pdf_pages(pdf_path)
+    tree = segment_document(doc.text, doc.page_offsets)
+    appendix = tree.find("priloha", "3")
+    text = tree.text_of(appendix)
+
+    python3 scripts/segmenter.py sources/uhradova_vyhlaska_2026.pdf
+    python3 scripts/segmenter.py sources/uhradova_vyhlaska_2026.pdf --select priloha:3
+"""
+import argparse
+import re
+import unicodedata
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# Heading patterns, ordered by nesting level (lower = higher in the tree).
+# Headings must start a line and (apart from the "Příloha č. N k vyhlášce ..."
+# header) stand alone on it, so references in running text ("podle přílohy
+# č. 3", "viz § 7") are not taken for headings.
+HEADING_PATTERNS = [
+    ("priloha", 1, re.compile(r'^\s*(?:Příloha|PŘÍLOHA)\s+(?:č\.\s*)?(\d+[a-z]?)\b(.*)$')),
+    ("cast", 2, re.compile(r'^\s*(?:ČÁST|Část)\s+(\w{1,12})\s*$')),
+    ("hlava", 3, re.compile(r'^\s*(?:HLAVA|Hlava)\s+([IVXLC]+|\d+)\s*$')),
+    ("oddil", 4, re.compile(r'^\s*(?:ODDÍL|Oddíl)\s+(\d+|[IVXLC]+)\s*$')),
+    ("paragraf", 5, re.compile(r'^\s*§\s*(\d+[a-z]?)\s*$')),
+    ("clanek", 5, re.compile(r'^\s*(?:Článek|Čl\.)\s*([IVXLC]+|\d+)\s*\.?\s*$')),
+    ("nadpis", 6, re.compile(r'^(#{1,6})\s+(.+)$')),
+]
+
+# Aliases accepted in selectors ("§7", "příloha:3", "cl:II", ...)
+KIND_ALIASES = {
+    "priloha": "priloha", "p": "priloha",
+    "cast": "cast",
+    "hlava": "hlava",
+    "oddil": "oddil",
+    "paragraf": "paragraf", "§": "paragraf", "par": "paragraf",
+    "clanek": "clanek", "cl": "clanek",
+    "nadpis": "nadpis", "heading": "nadpis",
+}
+
+
+@dataclass
+class Section:
+    """One node of the section tree. `end` is exclusive."""
+    kind: str
+    label: str
+    title: str
+    level: int
+    start: int
+    end: int = -1
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    children: List["Section"] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.label}"
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+    def walk(self) -> Iterator["Section"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class SectionTree:
+    """Section tree over a document text."""
+
+    def __init__(self, text: str, root: Section):
+        self.text = text
+        self.root = root
+
+    def sections(self) -> Iterator[Section]:
+        """All sections in document order (without the root)."""
+        for child in self.root.children:
+            yield from child.walk()
+
+    def find_all(self, kind: str, label: Optional[str] = None) -> List[Section]:
+        kind = normalize_kind(kind)
+        return [s for s in self.sections()
+                if s.kind == kind and (label is None or s.label.lower() == label.lower())]
+
+    def find(self, kind: str, label: Optional[str] = None) -> Optional[Section]:
+        found = self.find_all(kind, label)
+        return found[0] if found else None
+
+    def select(self, selectors: List[str]) -> List[Section]:
+        """Sections matching any of the selectors ("priloha:3", "§7", ...)."""
+        selected = []
+        for selector in selectors:
+            kind, label = parse_selector(selector)
+            for section in self.find_all(kind, label):
+                if section not in selected:
+                    selected.append(section)
+        return selected
+
+    def text_of(self, section: Section) -> str:
+        return self.text[section.start:section.end]
+
+    def outline(self) -> str:
+        lines = []
+
+        def visit(section: Section, depth: int):
+            pages = f"  str. {section.page_start}-{section.page_end}" if section.page_start else ""
+            title = f" {section.title}" if section.title else ""
+            lines.append(f"{'  ' * depth}{section.key}{title}"
+                         f"  [{section.start}:{section.end}] {section.length:,} zn.{pages}")
+            for child in section.children:
+                visit(child, depth + 1)
+
+        for child in self.root.children:
+            visit(child, 0)
+        return "\n".join(lines)
+
+
+def strip_diacritics(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_kind(kind: str) -> str:
+    key = strip_diacritics(kind).lower().rstrip(".")
+    if key not in KIND_ALIASES:
+        raise ValueError(f"Unknown section kind: {kind} (expected one of {sorted(set(KIND_ALIASES.values()))})")
+    return KIND_ALIASES[key]
+
+
+def parse_selector(selector: str):
+    """'priloha:3' -> ('priloha', '3'), '§7' -> ('paragraf', '7'), 'priloha' -> ('priloha', None)."""
+    selector = selector.strip()
+    if selector.startswith("§"):
+        return "paragraf", selector[1:].lstrip(":").strip() or None
+    kind, _, label = selector.partition(":")
+    return normalize_kind(kind), label.strip() or None
+
+
+def _match_heading(line: str):
+    for kind, level, pattern in HEADING_PATTERNS:
+        m = pattern.match(line)
+        if not m:
+            continue
+        if kind == "nadpis":
+            return kind, str(len(m.group(1))), m.group(2).strip(), level + len(m.group(1)) - 1
+        groups = [g for g in m.groups() if g is not None]
+        label = groups[0]
+        title = groups[1].strip(" -–") if len(groups) > 1 else ""
+        return kind, label, title, level
+    return None
+
+
+def segment_document(text: str, page_offsets: Optional[List[int]] = None) -> SectionTree:
+    """Build the section tree of a document text.
+
+    `page_offsets` are character offsets at which pages start (see
+    pdf_text.PdfText.page_offsets); when given, sections get page ranges.
+    Repeated page headers ("Příloha č. 3 k vyhlášce ..." on every page) are
+    treated as a continuation of the open section, not as new sections.
+    """
+    root = Section("dokument", "", "", 0, 0, len(text))
+    stack = [root]
+    position = 0
+
+    for line in text.splitlines(keepends=True):
+        heading = _match_heading(line.replace("\f", ""))
+        if heading:
+            kind, label, title, level = heading
+            open_same = next((s for s in stack if s.kind == kind and s.level == level), None)
+            if not (open_same and open_same.label == label):
+                while stack[-1].level >= level:
+                    stack.pop().end = position
+                section = Section(kind, label, title, level, position)
+                stack[-1].children.append(section)
+                stack.append(section)
+        position += len(line)
+
+    while len(stack) > 1:
+        stack.pop().end = len(text)
+
+    if page_offsets:
+        for section in root.walk():
+            section.page_start = bisect_right(page_offsets, section.start)
+            section.page_end = bisect_right(page_offsets, max(section.start, section.end - 1))
+
+    return SectionTree(text, root)
+
+
+def main():
+    from pdf_text import extract_pdf_pages
+
+    parser = argparse.ArgumentParser(description='Print the section outline of a source document')
+    parser.add_argument('source', type=Path, help='PDF or text file')
+    parser.add_argument('--select', nargs='+', metavar='SELECTOR',
+                        help='Print only the text of matching sections, e.g. priloha:3 §7')
+    args = parser.parse_args()
+
+    if args.source.suffix.lower() == '.pdf':
+        doc = extract_pdf_pages(args.source)
+        tree = segment_document(doc.text, doc.page_offsets)
+    else:
+        tree = segment_document(args.source.read_text(encoding='utf-8'))
+
+    if args.select:
+        for section in tree.select(args.select):
+            print(tree.text_of(section))
+    else:
+        print(tree.outline())
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@
 Unit tests for Klinicka Knowledge Base RAG API components.
 Tests caching, rate limiting, and metrics collection.
 """
+import json
+import os
+import subprocess
 import sys
+import tempfile
 import time
 import unittest
 from unittest.mock import MagicMock, patch
@@ -13,8 +17,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "api"))
 
 # Import after path is set
+import rag_api
 from rag_api import ResponseCache, RateLimiter, APIMetrics
 
+API_SCRIPT = Path(__file__).parent.parent / "api" / "rag_api.py"
+
 
 class TestResponseCache(unittest.TestCase):
     """Tests for ResponseCache class."""
@@ -257,6 +264,72 @@ class TestCacheKeyGeneration(unittest.TestCase):
         self.assertIsNotNone(result)
 
 
+class TestIndexVerification(unittest.TestCase):
+    """Tests for the background verification of the index bundle."""
+
+    def setUp(self):
+        problems = patch.object(rag_api, "index_problems", [])
+        problems.start()
+        self.addCleanup(problems.stop)
+
+    def bundle(self, verify, encoder):
+        bundle = MagicMock(verified=None)
+        bundle.verify.side_effect = verify
+        bundle.encoder.side_effect = encoder
+        for name, value in (("index_bundle", bundle), ("encoder", None)):
+            patcher = patch.object(rag_api, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return bundle
+
+    def test_unexpected_error_is_recorded(self):
+        """Test an OSError from the checksums takes search out of service."""
+        bundle = self.bundle(OSError("Input/output error"), lambda: object())
+        with patch("builtins.print"):
+            rag_api.verify_bundle(bundle)
+        self.assertIs(bundle.verified, False)
+        self.assertEqual(rag_api.index_problems, ["checksums: Input/output error"])
+
+    def test_encoder_failure_marks_bundle_unverified(self):
+        """Test a bundle with a bad encoder is not reported as verified."""
+        bundle = self.bundle(lambda: [], ValueError("unsupported pickle protocol"))
+        with patch("builtins.print"):
+            rag_api.verify_bundle(bundle)
+        self.assertIs(bundle.verified, False)
+        self.assertEqual(rag_api.index_problems, ["encoder: unsupported pickle protocol"])
+
+    def test_sound_bundle_is_verified(self):
+        """Test a sound bundle is verified without problems."""
+        bundle = self.bundle(lambda: [], lambda: object())
+        rag_api.verify_bundle(bundle)
+        self.assertIs(bundle.verified, True)
+        self.assertEqual(rag_api.index_problems, [])
+
+
+class TestLazyStartup(unittest.TestCase):
+    """Tests that heavy dependencies stay out of the API's startup."""
+
+    def run_python(self, *args, **env):
+        """Run a fresh interpreter, so modules imported by other tests do not count."""
+        return subprocess.run([sys.executable, *args], capture_output=True, text=True,
+                              env=dict(os.environ, **env), check=True).stdout
+
+    def test_import_skips_heavy_modules(self):
+        """Test importing the API loads neither OpenAI nor numpy."""
+        code = (f"import sys; sys.path.insert(0, {str(API_SCRIPT.parent)!r}); import rag_api; "
+                "print(sorted(m for m in ('openai', 'numpy', 'sklearn') if m in sys.modules))")
+        self.assertEqual(self.run_python("-c", code).strip(), "[]")
+
+    def test_profile_startup_reports_phases(self):
+        """Test --profile-startup times the phases without serving."""
+        with tempfile.TemporaryDirectory() as tmp:
+            out = self.run_python(str(API_SCRIPT), "--profile-startup", "--json", DATA_DIR=tmp, INDEX_DIR=tmp)
+        phases = [p["phase"] for p in json.loads(out.strip().splitlines()[-1])["phases"]]
+        self.assertEqual(phases[0], "import api (fastapi, pydantic)")
+        self.assertIn("load data", phases)
+        self.assertEqual(phases[-1], "import openai (first /qa)")
+
+
 def run_tests():
     """Run all unit tests and return results."""
     loader = unittest.TestLoader()
@@ -267,6 +340,8 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestRateLimiter))
     suite.addTests(loader.loadTestsFromTestCase(TestAPIMetrics))
     suite.addTests(loader.loadTestsFromTestCase(TestCacheKeyGeneration))
+    suite.addTests(loader.loadTestsFromTestCase(TestIndexVerification))
+    suite.addTests(loader.loadTestsFromTestCase(TestLazyStartup))
 
     # Run with verbosity
     runner = unittest.TextTestRunner(verbosity=2)
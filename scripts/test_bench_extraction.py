@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Smoke tests for the extraction benchmark harness (bench_extraction.py).
+Runs the fake LLM server with delays scaled to zero.
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_extraction import (BenchCase, ServerConfig, percentile, previous_report,
+                              run_benchmark, save_report, synthetic_text)
+
+
+class TestBenchmark(unittest.TestCase):
+    """End-to-end runs against the fake server."""
+
+    def setUp(self):
+        self.text = synthetic_text(60, seed=1)
+
+    def test_report_metrics(self):
+        config = ServerConfig(time_scale=0.0)
+        report = run_benchmark(self.text, [BenchCase("tokens:1500", 2, "static-first")], config)
+        result = report["results"][0]
+
+        self.assertGreater(result["chunks"], 1)
+        self.assertEqual(result["failed_chunks"], 0)
+        self.assertGreater(result["units"], 0)
+        self.assertGreater(result["chunks_per_s"], 0)
+        self.assertLessEqual(result["latency_p50_s"], result["latency_p95_s"])
+        # Identical static prefix → later chunks hit the simulated prompt cache
+        self.assertGreater(result["cached_share"], 0)
+
+    def test_text_first_layout_defeats_prompt_cache(self):
+        config = ServerConfig(time_scale=0.0)
+        report = run_benchmark(self.text, [BenchCase("tokens:1500", 1, "text-first")], config)
+        self.assertEqual(report["results"][0]["cached_share"], 0)
+
+    def test_injected_errors_are_retried(self):
+        config = ServerConfig(time_scale=0.0, error_rate=0.3, rate_limit_rate=0.2, seed=3)
+        report = run_benchmark(self.text, [BenchCase("tokens:1000", 4, "static-first")], config)
+        result = report["results"][0]
+        self.assertGreater(result["retries"], 0)
+        self.assertEqual(result["failed_chunks"], 0)
+
+    def test_report_saved_as_json(self):
+        config = ServerConfig(time_scale=0.0)
+        report = run_benchmark(self.text, [BenchCase("tokens:2000", 1, "static-first")], config)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_report(report, Path(tmp))
+            self.assertEqual(json.loads(path.read_text(encoding="utf-8"))["results"],
+                             report["results"])
+            self.assertEqual(previous_report(Path(tmp))["results"], report["results"])
+            self.assertIsNone(previous_report(Path(tmp), exclude=path))
+
+    def test_percentile(self):
+        values = [0.1 * i for i in range(1, 21)]
+        self.assertAlmostEqual(percentile(values, 50), 1.0)
+        self.assertAlmostEqual(percentile(values, 95), 1.9)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestBenchmark))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
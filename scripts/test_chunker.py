@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the token-aware chunker (chunker.py).
+Budgets are checked with a word tokenizer, whose counts are easy to follow,
+and with the default tokenizer (tiktoken, or the estimate without it).
+"""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from chunker import PARAGRAPH_SEPARATOR, Tokenizer, _pieces, chunk_text
+
+
+class WordTokenizer(Tokenizer):
+    """One token per whitespace-separated word."""
+
+    def __init__(self):
+        self.model = "words"
+        self._encoding = None
+
+    def count(self, text):
+        return len(text.split())
+
+    def split(self, text, max_tokens):
+        words = text.split()
+        return [" ".join(words[i:i + max_tokens]) for i in range(0, len(words), max_tokens)]
+
+
+def paragraph(i, words):
+    return " ".join([f"slovo{i}_{n}" for n in range(words - 1)] + [f"konec{i}."])
+
+
+def document():
+    sizes = [3, 12, 1, 7, 15, 2, 9, 4, 11, 6, 5, 8, 14, 2, 3]
+    paragraphs = [paragraph(i, size) for i, size in enumerate(sizes)]
+    # One paragraph over any budget below: sentences, then a run-on sentence
+    paragraphs.insert(7, " ".join(f"Věta {n} má pět slov." for n in range(8)) + " " + paragraph(99, 30))
+    return PARAGRAPH_SEPARATOR.join(paragraphs)
+
+
+class TestChunker(unittest.TestCase):
+
+    def setUp(self):
+        self.tokenizer = WordTokenizer()
+        self.text = document()
+
+    def chunks(self, max_tokens, overlap):
+        return list(chunk_text(self.text, max_tokens, overlap, tokenizer=self.tokenizer))
+
+    def test_every_chunk_within_budget(self):
+        for max_tokens in (5, 8, 20, 40):
+            for overlap in (0, 3, max_tokens - 1):
+                with self.subTest(max_tokens=max_tokens, overlap=overlap):
+                    chunks = self.chunks(max_tokens, overlap)
+                    self.assertGreater(len(chunks), 1)
+                    self.assertLessEqual(max(self.tokenizer.count(c) for c in chunks), max_tokens)
+
+    def test_overlap_is_whole_pieces_within_limit(self):
+        chunks = self.chunks(20, 6)
+        overlaps = 0
+        for previous, chunk in zip(chunks, chunks[1:]):
+            prev_pieces = previous.split(PARAGRAPH_SEPARATOR)
+            pieces = chunk.split(PARAGRAPH_SEPARATOR)
+            shared = max(n for n in range(len(pieces)) if pieces[:n] == prev_pieces[len(prev_pieces) - n:])
+            self.assertLessEqual(sum(self.tokenizer.count(p) for p in pieces[:shared]), 6)
+            self.assertLess(shared, len(pieces))
+            overlaps += shared > 0
+        self.assertGreater(overlaps, 0)
+
+    def test_no_overlap_keeps_every_piece_once_in_order(self):
+        pieces = [p for p, _ in _pieces(self.text, 10, self.tokenizer)]
+        chunks = self.chunks(10, 0)
+        self.assertEqual([p for c in chunks for p in c.split(PARAGRAPH_SEPARATOR)], pieces)
+        self.assertEqual(" ".join(pieces).split(), self.text.split())
+
+    def test_oversized_paragraph_splits_on_sentences_first(self):
+        # Two five-word sentences and their separator fill a budget of 11
+        pieces = [p for p, _ in _pieces(self.text, 11, self.tokenizer)]
+        self.assertIn("Věta 0 má pět slov. Věta 1 má pět slov.", pieces)
+        self.assertIn("Věta 6 má pět slov.", pieces)
+        # The run-on last sentence has no boundary left and is cut hard
+        self.assertIn("Věta 7 má pět slov. " + " ".join(f"slovo99_{n}" for n in range(6)), pieces)
+        self.assertLessEqual(max(self.tokenizer.count(p) for p in pieces), 11)
+
+    def test_invalid_budgets(self):
+        with self.assertRaises(ValueError):
+            list(chunk_text(self.text, 0, tokenizer=self.tokenizer))
+        with self.assertRaises(ValueError):
+            list(chunk_text(self.text, 10, 10, tokenizer=self.tokenizer))
+
+    def test_default_tokenizer_budget(self):
+        tokenizer = Tokenizer()
+        text = PARAGRAPH_SEPARATOR.join(
+            f"§ {i} Zdravotní pojišťovna uhradí výkon č. {i}. Hodnota bodu činí 1,30 Kč. " * (i % 5 + 1)
+            for i in range(60))
+        chunks = list(chunk_text(text, 120, 20, tokenizer=tokenizer))
+        self.assertGreater(len(chunks), 5)
+        self.assertLessEqual(max(tokenizer.count(c) for c in chunks), 120)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestChunker))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
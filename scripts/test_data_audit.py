@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming dataset audit (data_audit.py).
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data_audit import AuditAccumulator, LengthStats, audit_file, check_directory_ids, drift
+
+
+def unit(uid, domain="uhrady", description="popis", related=(), **extra):
+    data = {"id": uid, "type": "rule", "domain": domain, "title": f"Jednotka {uid}",
+            "description": description, "version": "2026", "source": {"name": "Test"},
+            "content": {}, "applicability": {"specialties": ["001"], "valid_from": "2026-01-01"},
+            "related_units": list(related), "tags": ["a"]}
+    data.update(extra)
+    return data
+
+
+def write_jsonl(path, units):
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in units:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return path
+
+
+class TestAccumulators(unittest.TestCase):
+
+    def test_length_stats_median(self):
+        stats = LengthStats()
+        for value in (5, 1, 3, 3):
+            stats.add(value)
+        self.assertEqual(stats.summary(), {'min': 1, 'max': 5, 'mean': 3.0, 'median': 3.0})
+        stats.add(10)
+        self.assertEqual(stats.median(), 3)
+
+    def test_merge_equals_single_pass(self):
+        units = [unit(f"ku-{i}", domain="provoz" if i % 3 else "uhrady", description="x" * i)
+                 for i in range(10)]
+        whole = AuditAccumulator()
+        for u in units:
+            whole.add(u)
+        left, right = AuditAccumulator(), AuditAccumulator()
+        for u in units[:4]:
+            left.add(u)
+        for u in units[4:]:
+            right.add(u)
+        merged = left.merge(right)
+        self.assertEqual(merged.to_stats("x")["domain_distribution"], whole.to_stats("x")["domain_distribution"])
+        self.assertEqual(merged.to_stats("x")["content_quality"], whole.to_stats("x")["content_quality"])
+
+
+class TestFileAudit(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_duplicates_and_orphans(self):
+        path = write_jsonl(self.root / "kb.jsonl", [
+            unit("ku-1", related=["ku-2", "ku-9"]),
+            unit("ku-2"),
+            unit("ku-2"),
+            unit("ku-3", related=["ZP"]),
+        ])
+        stats = audit_file(path, run_size=2).to_stats("kb.jsonl")
+        self.assertEqual(stats["overview"], {"total_units": 4, "unique_ids": 3, "duplicates": 1})
+        self.assertEqual(stats["relationships"]["orphan_references_count"], 2)
+        self.assertEqual({o["orphan_ref"] for o in stats["relationships"]["orphan_references"]}, {"ku-9", "ZP"})
+
+    def test_directory_ids_use_the_union(self):
+        """Releases sharing IDs are not double-counted; references across files resolve."""
+        v1 = write_jsonl(self.root / "v1.jsonl", [unit("ku-1", related=["ku-3"]), unit("ku-2")])
+        v2 = write_jsonl(self.root / "v2.jsonl", [unit("ku-1"), unit("ku-2"), unit("ku-3", related=["ku-9"])])
+        self.assertEqual(audit_file(v1).orphan_count, 1)
+
+        merged = audit_file(v1).merge(audit_file(v2)).set_ids(check_directory_ids([v1, v2], run_size=2))
+        stats = merged.to_stats("dir")
+        self.assertEqual(stats["overview"], {"total_units": 5, "unique_ids": 3, "duplicates": 2})
+        self.assertEqual(stats["relationships"]["orphan_references"], [{"unit_id": "ku-3", "orphan_ref": "ku-9"}])
+
+    def test_drift(self):
+        old = write_jsonl(self.root / "v1.jsonl", [unit("ku-1"), unit("ku-2"), unit("ku-3", domain="provoz")])
+        new = write_jsonl(self.root / "v2.jsonl", [
+            unit("ku-1"),
+            unit("ku-2", description="nový popis"),
+            unit("ku-4", domain="provoz"),
+        ])
+        report = drift(old, new, run_size=2)
+        self.assertEqual(report["totals"], {"added": 1, "removed": 1, "changed": 1, "unchanged": 1})
+        self.assertEqual(report["domains"]["provoz"], {"added": 1, "removed": 1, "changed": 0, "unchanged": 0})
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestAccumulators))
+    suite.addTests(loader.loadTestsFromTestCase(TestFileAudit))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the sharded Hugging Face delta upload (hf_upload.py).
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from hf_upload import (ShardError, build_shards, load_manifest, plan_upload, push_shards, shard_of,
+                       shard_range, verify_shards)
+
+try:
+    import huggingface_hub
+except ImportError:
+    huggingface_hub = None
+
+
+def units(n, changed=()):
+    return [{"id": f"ku-{i:04d}", "title": f"Jednotka {i}" + (" (nová)" if i in changed else "")}
+            for i in range(n)]
+
+
+def write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path
+
+
+class RecordingApi:
+    """Stands in for HfApi: records the commits instead of sending them."""
+
+    def __init__(self):
+        self.commits = []
+
+    def create_commit(self, **kwargs):
+        self.commits.append(kwargs)
+
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.shards = self.dir / "shards"
+
+    def build(self, records, count=8, name="kb.jsonl"):
+        return build_shards(write_jsonl(self.dir / name, records), self.shards, count, "kb")
+
+    def test_ranges_cover_the_hash_space(self):
+        ranges = [shard_range(i, 8) for i in range(8)]
+        self.assertEqual(ranges[0][0], "0" * 16)
+        self.assertEqual(ranges[-1][1], "1" + "0" * 16)
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+        self.assertTrue(all(0 <= shard_of(f"ku-{i}", 8) < 8 for i in range(100)))
+
+    def test_shards_do_not_depend_on_input_order(self):
+        first = self.build(units(300))
+        second = self.build(list(reversed(units(300))))
+        self.assertEqual(first["sha256"], second["sha256"])
+        self.assertEqual(first["units"], 300)
+        self.assertEqual(verify_shards(self.shards), [])
+
+    def test_changed_unit_touches_one_shard(self):
+        remote = self.build(units(300))
+        local = self.build(units(300, changed={42}))
+        plan = plan_upload(local, remote)
+        expected = f"kb-{shard_of('ku-0042', 8):05d}-of-00008.jsonl"
+        self.assertEqual((plan["upload"], plan["delete"], len(plan["unchanged"])), ([expected], [], 7))
+
+    def test_reshard_replaces_and_deletes(self):
+        remote = self.build(units(50), count=4)
+        local = self.build(units(50), count=2)
+        self.assertEqual(sorted(p.name for p in self.shards.glob("kb-*")),
+                         ["kb-00000-of-00002.jsonl", "kb-00001-of-00002.jsonl"])
+        plan = plan_upload(local, remote)
+        self.assertEqual(len(plan["upload"]), 2)
+        self.assertEqual(len(plan["delete"]), 4)
+        self.assertEqual(len(plan_upload(local, None)["upload"]), 2)
+
+    def test_verify_reports_tampering(self):
+        self.build(units(100))
+        manifest = load_manifest(self.shards)
+        victim = self.shards / manifest["shards"][0]["path"]
+        victim.write_bytes(victim.read_bytes() + b'{"id": "x"}\n')
+        (self.shards / "kb-00099-of-00008.jsonl").write_text("")
+        problems = verify_shards(self.shards)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("does not match", problems[0])
+
+    @unittest.skipIf(huggingface_hub is None, "huggingface_hub not installed")
+    def test_push_commits_only_changes(self):
+        remote = self.build(units(200))
+        api = RecordingApi()
+        self.assertTrue(push_shards(self.shards, api, "org/kb", remote)["up_to_date"])
+        self.assertEqual(api.commits, [])
+
+        self.build(units(200, changed={7, 8}))
+        plan = push_shards(self.shards, api, "org/kb", remote)
+        paths = [op.path_in_repo for op in api.commits[0]["operations"]]
+        self.assertEqual(paths, [f"data/shards/kb/{name}" for name in plan["upload"]] + ["data/shards/kb/manifest.json"])
+        self.assertLessEqual(len(plan["upload"]), 2)
+
+        (self.shards / plan["upload"][0]).write_text("")
+        with self.assertRaises(ShardError):
+            push_shards(self.shards, api, "org/kb", remote)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestShards))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared JSONL reader/writer (jsonl_io.py).
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import jsonl_io
+from jsonl_io import (JsonlWriter, LineReader, iter_lines, iter_numbered, iter_records, loads, open_text,
+                      read_records, read_seek_table, resolve_path)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def records(n):
+    return [{"id": f"ku-{i}", "title": f"Jednotka {i}", "description": "ř" * (i % 50)} for i in range(n)]
+
+
+@unittest.skipIf(zstandard is None, "zstandard not installed")
+class TestSeekableJsonl(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.units = records(500)
+        self.plain = self.dir / "kb.jsonl"
+        self.packed = self.dir / "kb.jsonl.zst"
+        for path in (self.plain, self.packed):
+            with JsonlWriter(path, frame_size=4096) as out:
+                for unit in self.units:
+                    out.write_record(unit)
+
+    def test_roundtrip_plain_and_compressed(self):
+        expected = self.plain.read_bytes()
+        self.assertLess(self.packed.stat().st_size, len(expected))
+        self.assertEqual(b"".join(iter_lines(self.packed)), expected)
+        self.assertEqual(b"".join(iter_lines(self.packed, workers=4)), expected)
+        with open_text(self.packed) as f:
+            self.assertEqual([json.loads(line) for line in f], self.units)
+
+    def test_frames_hold_whole_lines(self):
+        with open(self.packed, 'rb') as f:
+            frames = read_seek_table(f)
+        self.assertGreater(len(frames), 5)
+        self.assertEqual(sum(frame.data_size for frame in frames), self.plain.stat().st_size)
+        with open(self.packed, 'rb') as f:
+            for frame in frames:
+                f.seek(frame.offset)
+                data = zstandard.ZstdDecompressor().decompress(f.read(frame.size))
+                self.assertTrue(data.endswith(b"\n"))
+
+    def test_random_access_by_offset(self):
+        offsets = []
+        offset = 0
+        for line in iter_lines(self.plain):
+            offsets.append((offset, line))
+            offset += len(line)
+        with LineReader(self.packed) as reader:
+            for offset, line in offsets[::37] + offsets[-1:]:
+                self.assertEqual(reader.read_line(offset), line)
+
+    def test_resolve_falls_back_to_compressed(self):
+        self.plain.unlink()
+        self.assertEqual(resolve_path(self.plain), self.packed)
+        self.assertEqual(len(list(iter_lines(self.plain))), 500)
+
+    def test_failed_write_leaves_no_file(self):
+        target = self.dir / "broken.jsonl.zst"
+        with self.assertRaises(RuntimeError):
+            with JsonlWriter(target) as out:
+                out.write_record({"id": "ku-1"})
+                raise RuntimeError("interrupted")
+        self.assertEqual(list(self.dir.glob("broken*")), [])
+
+    def test_plain_zstd_stream_is_readable(self):
+        path = self.dir / "other.jsonl.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(self.plain.read_bytes()))
+        self.assertEqual(b"".join(iter_lines(path, workers=2)), self.plain.read_bytes())
+        with self.assertRaises(ValueError):
+            LineReader(path)
+
+
+class TestRecordReaders(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "kb.jsonl"
+        lines = [json.dumps(unit, ensure_ascii=False) for unit in records(2000)]
+        lines[10] = ""
+        lines[1500] = '{"id": "ku-1500", broken'
+        self.path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self.expected = [json.loads(line) for i, line in enumerate(lines) if line and i != 1500]
+
+    def collect(self):
+        errors = []
+        return errors, lambda line_num, error: errors.append(line_num)
+
+    def test_loads_accepts_what_json_accepts(self):
+        self.assertEqual(loads(b'{"a": "\\u0159"}'), {"a": "ř"})
+        self.assertTrue(loads("NaN") != loads("NaN"))
+        with self.assertRaises(ValueError):
+            loads("{broken")
+
+    def test_line_numbers_skip_blank_lines_and_report_errors(self):
+        errors, on_error = self.collect()
+        numbered = list(iter_numbered(self.path, on_error))
+        self.assertEqual(errors, [1501])
+        self.assertEqual(numbered[10], (12, self.expected[10]))
+        self.assertEqual([record for _, record in numbered], self.expected)
+
+    def test_parallel_read_matches_streaming(self):
+        errors, on_error = self.collect()
+        with mock.patch.object(jsonl_io, "CHUNK_BYTES", 16 * 1024):
+            self.assertGreater(len(jsonl_io._chunks(self.path, 16 * 1024)), 2)
+            result = read_records(self.path, workers=2, on_error=on_error)
+        self.assertEqual(result, self.expected)
+        self.assertEqual(errors, [1501])
+
+    @unittest.skipIf(zstandard is None, "zstandard not installed")
+    def test_parallel_read_of_compressed_file(self):
+        packed = jsonl_io.compress_file(self.path, self.path.with_suffix(".jsonl.zst"), frame_size=8192)
+        errors, on_error = self.collect()
+        with mock.patch.object(jsonl_io, "CHUNK_BYTES", 16 * 1024):
+            result = read_records(packed, workers=2, on_error=on_error)
+        self.assertEqual(result, self.expected)
+        self.assertEqual(errors, [1501])
+        self.assertEqual(list(iter_records(packed, lambda *_: None)), self.expected)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSeekableJsonl))
+    suite.addTests(loader.loadTestsFromTestCase(TestRecordReaders))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the incremental KB build orchestrator (kb_build.py).
+"""
+import io
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import kb_build
+from kb_build import Builder, BuildError, Stage, dependencies, select, topological_order
+
+# Appends a line to its output, so the tests can count runs
+COPY_SCRIPT = """import sys
+from pathlib import Path
+src, dst = Path(sys.argv[1]), Path(sys.argv[2])
+dst.write_text(src.read_text().upper())
+with open("runs.log", "a") as f:
+    f.write(dst.name + "\\n")
+"""
+
+
+class TestGraph(unittest.TestCase):
+
+    def test_dependencies_from_outputs(self):
+        stages = [
+            Stage("extract", "x.py", outputs=["data/extracted/a.jsonl"]),
+            Stage("merge", "m.py", inputs=["data/extracted/*.jsonl"], outputs=["data/kb.jsonl"]),
+            Stage("validate", "v.py", inputs=["data/kb.jsonl"]),
+            Stage("embed", "e.py", inputs=["data/kb.jsonl"], outputs=["data/emb.jsonl"], after=["validate"]),
+            Stage("audit", "a.py", inputs=["data/*.jsonl"], exclude=["data/emb.jsonl"]),
+        ]
+        deps = dependencies(stages)
+        self.assertEqual(deps["merge"], {"extract"})
+        self.assertEqual(deps["embed"], {"merge", "validate"})
+        self.assertEqual(deps["audit"], {"merge"})
+        order = topological_order(deps)
+        self.assertLess(order.index("validate"), order.index("embed"))
+        self.assertEqual(select(deps, ["validate"]), {"extract", "merge", "validate"})
+
+    def test_cycle_and_unknown_stage(self):
+        stages = [Stage("a", "a.py", inputs=["b.out"], outputs=["a.out"]),
+                  Stage("b", "b.py", inputs=["a.out"], outputs=["b.out"])]
+        with self.assertRaises(BuildError):
+            topological_order(dependencies(stages))
+        with self.assertRaises(BuildError):
+            dependencies([Stage("a", "a.py", after=["missing"])])
+        with self.assertRaises(BuildError):
+            select({"a": set()}, ["b"])
+
+    def test_release_dag_is_valid(self):
+        order = topological_order(dependencies(kb_build.STAGES))
+        self.assertLess(order.index("merge-mvp"), order.index("validate"))
+        self.assertLess(order.index("validate"), order.index("embed"))
+
+    def test_network_and_extraction_stages_are_explicit(self):
+        explicit = {stage.name for stage in kb_build.STAGES if stage.explicit}
+        self.assertEqual(explicit, {"download", "extract-as", "extract-as-dodatek", "extract-pl"})
+
+
+class TestBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        patcher = mock.patch.object(kb_build, "PROJECT_ROOT", self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        (self.root / "copy.py").write_text(COPY_SCRIPT)
+        (self.root / "in.txt").write_text("hello")
+        self.stages = [
+            Stage("first", "copy.py", args=["in.txt", "mid.txt"], inputs=["in.txt"], outputs=["mid.txt"]),
+            Stage("second", "copy.py", args=["mid.txt", "out.txt"], inputs=["mid.txt"], outputs=["out.txt"]),
+        ]
+
+    def build(self, targets=None, **kwargs):
+        builder = Builder(self.stages, state_path=self.root / "build" / "state.json",
+                          log_dir=self.root / "build" / "logs", **kwargs)
+        with redirect_stdout(io.StringIO()):
+            ok = builder.build(targets)
+        return ok, {name: r["status"] for name, r in builder.results.items()}
+
+    def runs(self):
+        return (self.root / "runs.log").read_text().split()
+
+    def test_unchanged_inputs_are_cached(self):
+        self.assertEqual(self.build(), (True, {"first": "built", "second": "built"}))
+        self.assertEqual((self.root / "out.txt").read_text(), "HELLO")
+        self.assertEqual(self.build(), (True, {"first": "cached", "second": "cached"}))
+        self.assertEqual(self.runs(), ["mid.txt", "out.txt"])
+        self.assertTrue((self.root / "build" / "manifest.json").exists())
+
+    def test_changed_input_rebuilds_downstream(self):
+        self.build()
+        (self.root / "in.txt").write_text("changed")
+        self.assertEqual(self.build(), (True, {"first": "built", "second": "built"}))
+        self.assertEqual((self.root / "out.txt").read_text(), "CHANGED")
+
+    def test_deleted_output_and_force(self):
+        self.build()
+        (self.root / "out.txt").unlink()
+        self.assertEqual(self.build()[1], {"first": "cached", "second": "built"})
+        self.assertEqual(self.build(force={"first"})[1], {"first": "built", "second": "cached"})
+
+    def test_dry_run_and_failure(self):
+        self.assertEqual(self.build(dry_run=True), (True, {"first": "would-run", "second": "would-run"}))
+        self.assertFalse((self.root / "build").exists())
+        (self.root / "in.txt").unlink()
+        self.assertEqual(self.build(), (False, {"first": "failed", "second": "blocked"}))
+
+    def test_dry_run_marks_everything_after_a_stale_stage(self):
+        self.build()
+        (self.root / "in.txt").write_text("changed")
+        self.assertEqual(self.build(dry_run=True)[1], {"first": "would-run", "second": "would-run"})
+        self.assertEqual(self.runs(), ["mid.txt", "out.txt"])
+
+    def test_explicit_stage_runs_only_when_named_or_allowed(self):
+        self.stages[0].explicit = True
+        (self.root / "mid.txt").write_text("existing")
+        # Not a default target, but selected as a dependency: its outputs are used as they are
+        self.assertEqual(self.build(), (True, {"first": "skipped", "second": "built"}))
+        self.assertEqual((self.root / "out.txt").read_text(), "EXISTING")
+        self.assertEqual(self.build(dry_run=True)[1], {"first": "skipped", "second": "cached"})
+
+        self.assertEqual(self.build(["first"])[1], {"first": "built"})
+        (self.root / "in.txt").write_text("changed")
+        self.assertEqual(self.build(allow={"first"})[1], {"first": "built", "second": "built"})
+        self.assertEqual(self.runs(), ["out.txt", "mid.txt", "mid.txt", "out.txt"])
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestGraph))
+    suite.addTests(loader.loadTestsFromTestCase(TestBuilder))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the KB version diff engine (kb_diff.py).
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kb_diff import diff_files, field_deltas, new_stats, summary
+
+KB_DIFF = Path(__file__).parent / "kb_diff.py"
+
+
+def unit(uid, title, domain="uhrady", **extra):
+    return {"id": uid, "domain": domain, "title": title, "content": {"rule": title}, **extra}
+
+
+def write_jsonl(path, units):
+    with open(path, 'w', encoding='utf-8') as f:
+        for u in units:
+            f.write((u if isinstance(u, str) else json.dumps(u, ensure_ascii=False)) + "\n")
+    return path
+
+
+class TestKbDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+    def diff(self, old_units, new_units, **kwargs):
+        old = write_jsonl(self.dir / "old.jsonl", old_units)
+        new = write_jsonl(self.dir / "new.jsonl", new_units)
+        stats = new_stats()
+        changes = list(diff_files(old, new, stats, **kwargs))
+        return changes, summary(stats, old, new)
+
+    def test_added_removed_modified(self):
+        changes, result = self.diff(
+            [unit("ku-1", "A"), unit("ku-2", "B"), unit("ku-3", "C")],
+            [unit("ku-3", "C"), unit("ku-1", "A2"), unit("ku-4", "D", domain="kodovani")],
+            run_size=2,
+        )
+        self.assertEqual([(c["op"], c["id"]) for c in changes],
+                         [("modified", "ku-1"), ("removed", "ku-2"), ("added", "ku-4")])
+        self.assertEqual(changes[0]["fields"], {"title": {"old": "A", "new": "A2"},
+                                                "content.rule": {"old": "A", "new": "A2"}})
+        self.assertEqual(changes[2]["new"]["title"], "D")
+        self.assertEqual((result["added"], result["removed"], result["modified"], result["unchanged"]),
+                         (1, 1, 1, 1))
+        self.assertEqual(result["by_domain"], {"kodovani": {"added": 1},
+                                               "uhrady": {"modified": 1, "removed": 1}})
+
+    def test_reserialized_unit_is_unchanged(self):
+        original = unit("ku-1", "Č")
+        reordered = json.dumps(dict(reversed(list(original.items()))))  # other key order, \u escapes
+        changes, result = self.diff([original], [reordered])
+        self.assertEqual(changes, [])
+        self.assertEqual(result["unchanged"], 1)
+
+    def test_duplicate_ids_and_bad_lines(self):
+        changes, result = self.diff(
+            [unit("ku-1", "A"), unit("ku-1", "B"), "{broken"],
+            [unit("ku-1", "B"), unit("ku-1", "C"), unit("ku-1", "D")],
+            with_units=False,
+        )
+        self.assertEqual([c["op"] for c in changes], ["modified", "added"])
+        self.assertNotIn("new", changes[1])
+        self.assertEqual((result["unchanged"], result["parse_errors"]), (1, 1))
+
+    def test_stdout_change_set_stays_valid_jsonl(self):
+        old = write_jsonl(self.dir / "old.jsonl", [unit("ku-1", "A"), "{broken"])
+        new = write_jsonl(self.dir / "new.jsonl", [unit("ku-1", "B"), unit("ku-2", "C")])
+        run = subprocess.run([sys.executable, str(KB_DIFF), str(old), str(new), "-o", "-"],
+                             capture_output=True, text=True, check=True)
+        changes = [json.loads(line) for line in run.stdout.splitlines()]
+        self.assertEqual([(c["op"], c["id"]) for c in changes], [("modified", "ku-1"), ("added", "ku-2")])
+        self.assertIn("old.jsonl line 2", run.stderr)
+
+    def test_field_deltas(self):
+        self.assertEqual(field_deltas({"a": 1, "b": {"x": 1, "y": [1]}}, {"b": {"x": 1, "y": [2]}, "c": 3}),
+                         {"a": {"old": 1}, "b.y": {"old": [1], "new": [2]}, "c": {"new": 3}})
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestKbDiff))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
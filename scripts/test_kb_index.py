@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the API index bundle (kb_index.py).
+"""
+import json
+import pickle
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generate_embeddings import create_embedding_text
+from kb_index import BundleError, IndexBundle, build_bundle, encode
+
+TOPICS = ["hodnota bodu", "regulace preskripce", "ordinační hodiny", "bonifikace pacientů",
+          "limitace úhrad", "kontrola pojišťovny", "vykazování výkonů", "personální minimum"]
+
+
+def units(n=24):
+    return [{"id": f"ku-{i:03d}", "type": "rule", "domain": "uhrady", "title": f"{TOPICS[i % 8]} {i}",
+             "description": f"Pravidlo o {TOPICS[(i * 3) % 8]} pro rok 2026", "tags": [TOPICS[i % 8]]}
+            for i in range(n)]
+
+
+def write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path
+
+
+class TestIndexBundle(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.units = units()
+        self.inputs = self.write_inputs(self.units, "a")
+        self.index = self.dir / "index"
+
+    def write_inputs(self, records, tag, dim=6):
+        texts = [create_embedding_text(unit) for unit in records]
+        vectorizer = TfidfVectorizer().fit(texts)
+        svd = TruncatedSVD(n_components=dim, random_state=0).fit(vectorizer.transform(texts))
+        vectors = encode((vectorizer, svd), texts)
+        paths = {
+            "units_path": write_jsonl(self.dir / f"kb_{tag}.jsonl", records),
+            "embeddings_path": write_jsonl(self.dir / f"emb_{tag}.jsonl",
+                                           [{"id": u["id"], "embedding": v.tolist()} for u, v in zip(records, vectors)]),
+            "vectorizer_path": self.dir / f"vec_{tag}.pkl",
+            "svd_path": self.dir / f"svd_{tag}.pkl",
+        }
+        paths["vectorizer_path"].write_bytes(pickle.dumps(vectorizer))
+        paths["svd_path"].write_bytes(pickle.dumps(svd))
+        return paths
+
+    def test_build_and_open(self):
+        manifest = build_bundle(self.index, **self.inputs)
+        self.assertEqual((manifest["count"], manifest["dim"]), (24, 6))
+        with IndexBundle(self.index) as bundle:
+            self.assertEqual(bundle.version, manifest["version"])
+            self.assertIsInstance(bundle.matrix, np.memmap)
+            self.assertEqual(bundle.matrix.dtype, np.float32)
+            self.assertEqual(bundle.units["ku-005"], self.units[5])
+            self.assertNotIn("ku-999", bundle.units)
+            self.assertEqual(list(bundle.units), [u["id"] for u in self.units])
+            query = bundle.encoder().encode(create_embedding_text(self.units[7]))
+            self.assertEqual(int(np.argmax(bundle.matrix @ query)), 7)
+            self.assertEqual(bundle.verify(), [])
+            self.assertTrue(bundle.verified)
+
+    def test_mismatched_inputs_fail_the_build(self):
+        write_jsonl(self.inputs["units_path"], self.units[:-1])
+        with self.assertRaisesRegex(BundleError, "1 embeddings without a unit"):
+            build_bundle(self.index, **self.inputs)
+        write_jsonl(self.inputs["units_path"], self.units + [self.units[0]])
+        with self.assertRaisesRegex(BundleError, "duplicate unit ID"):
+            build_bundle(self.index, **self.inputs)
+        self.assertFalse(self.index.exists())
+
+    def test_encoder_from_another_run_fails(self):
+        other = self.write_inputs(list(reversed(self.units)), "b")
+        inputs = dict(self.inputs, vectorizer_path=other["vectorizer_path"], svd_path=other["svd_path"])
+        with self.assertRaisesRegex(BundleError, "does not reproduce"):
+            build_bundle(self.index, **inputs)
+
+    def test_damage_is_detected(self):
+        build_bundle(self.index, **self.inputs)
+        matrix = self.index / "embeddings.npy"
+        data = bytearray(matrix.read_bytes())
+        data[-1] ^= 0xFF
+        matrix.write_bytes(bytes(data))
+        with IndexBundle(self.index) as bundle:
+            self.assertEqual(bundle.verify(), ["embeddings.npy: checksum does not match the manifest"])
+        with open(self.index / "units.jsonl", 'ab') as f:
+            f.write(b"\n")
+        with self.assertRaises(BundleError):
+            IndexBundle(self.index)
+
+    def test_failed_rebuild_keeps_the_old_bundle(self):
+        version = build_bundle(self.index, **self.inputs)["version"]
+        write_jsonl(self.inputs["units_path"], self.units[:-1])
+        with self.assertRaises(BundleError):
+            build_bundle(self.index, **self.inputs)
+        with IndexBundle(self.index) as bundle:
+            self.assertEqual(bundle.version, version)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestIndexBundle))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
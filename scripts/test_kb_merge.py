@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming merge engine (kb_merge.py).
+Both strategies run on small generated JSONL files.
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kb_merge import external_sort, merge_files
+
+
+def unit(uid, title, description, domain="uhrady"):
+    return {"id": uid, "type": "rule", "domain": domain, "title": title, "description": description,
+            "version": "2026", "source": {"name": "Test"}, "content": {},
+            "applicability": {}}
+
+
+def write_jsonl(path, units):
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in units:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return path
+
+
+def read_ids(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+class TestMergeFiles(unittest.TestCase):
+    """merge_files() with base + new inputs."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.base = write_jsonl(root / "base.jsonl", [
+            unit("ku-1", "Hodnota bodu 2026", "Základní hodnota bodu je 0,98 Kč."),
+            unit("ku-2", "Regulace preskripce", "Limit preskripce se počítá z průměru."),
+        ])
+        self.new = write_jsonl(root / "new.jsonl", [
+            unit("ku-3", "Hodnota bodu 2026!", "Základní hodnota bodu je 0,98 Kč"),   # same content hash
+            unit("ku-4", "Bonifikace za vzdělávání", "Navýšení o 2 % za splnění podmínek."),
+            unit("ku-1", "Jiná jednotka", "Stejné ID jako existující jednotka."),     # id collision
+            {"id": "ku-5", "title": "Neúplná jednotka"},                             # invalid
+            unit("ku-6", "Bonifikace za vzdělávání", "Jiný popis.", domain="kodovani"),
+        ])
+        self.output = root / "out.jsonl"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def merge(self, **kwargs):
+        return merge_files([self.base], [self.new], self.output, **kwargs)
+
+    def test_in_memory(self):
+        stats = self.merge(external=False)
+        self.assertEqual(stats['strategy'], 'in-memory')
+        self.assertEqual(read_ids(self.output), ["ku-1", "ku-2", "ku-4", "ku-6"])
+        self.assertEqual(stats['existing_count'], 2)
+        self.assertEqual(stats['invalid_count'], 1)
+        self.assertEqual(stats['duplicate_external_count'], 1)
+        self.assertEqual(stats['id_collision_count'], 1)
+        self.assertEqual(stats['added_count'], 2)
+        self.assertEqual(stats['final_count'], 4)
+        self.assertEqual(stats['domain_added'], {"uhrady": 1, "kodovani": 1})
+
+    def test_external_matches_in_memory(self):
+        expected = self.merge(external=False)
+        expected_output = self.output.read_text(encoding='utf-8')
+        stats = self.merge(external=True, run_size=2)
+        self.assertEqual(stats['strategy'], 'external')
+        self.assertEqual(self.output.read_text(encoding='utf-8'), expected_output)
+        for key in ('duplicate_count', 'id_collision_count', 'added_count', 'final_count'):
+            self.assertEqual(stats[key], expected[key], key)
+
+    def test_near_duplicates_within_new_units(self):
+        near = write_jsonl(Path(self.tmp.name) / "near.jsonl", [
+            unit("ku-7", "Výpočet PURO", "Průměrná úhrada na unikátního pojištěnce se počítá ročně."),
+            unit("ku-8", "Výpočet PURO ročně", "Průměrná úhrada na unikátního pojištěnce se počítá za rok."),
+        ])
+        stats = merge_files([self.base], [near], self.output, threshold=0.75, internal_threshold=0.75)
+        self.assertEqual(read_ids(self.output), ["ku-1", "ku-2", "ku-7"])
+        self.assertEqual(stats['duplicate_internal_count'], 1)
+        self.assertTrue(stats['duplicate_details'][0]['internal'])
+
+        stats = merge_files([self.base], [near], self.output, internal_threshold=0.99)
+        self.assertEqual(stats['added_count'], 2)
+
+    def test_added_output_and_hook(self):
+        added = Path(self.tmp.name) / "added.jsonl"
+        seen = []
+        self.merge(added_path=added, on_keep=lambda u, is_base: seen.append((u["id"], is_base)))
+        self.assertEqual(read_ids(added), ["ku-4", "ku-6"])
+        self.assertEqual(seen, [("ku-1", True), ("ku-2", True), ("ku-4", False), ("ku-6", False)])
+
+    def test_base_may_be_output(self):
+        stats = merge_files([self.base], [self.new], self.base)
+        self.assertEqual(read_ids(self.base), ["ku-1", "ku-2", "ku-4", "ku-6"])
+        self.assertEqual(stats['final_count'], 4)
+
+
+class TestExternalSort(unittest.TestCase):
+
+    def test_sorts_across_runs(self):
+        lines = [f"{n:04d}\n" for n in (7, 3, 9, 1, 5, 2, 8)]
+        with tempfile.TemporaryDirectory() as tmp:
+            result = list(external_sort(lines, Path(tmp) / "runs", run_size=3))
+            self.assertEqual(result, sorted(lines))
+            self.assertEqual(list((Path(tmp) / "runs").iterdir()), [])
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestMergeFiles))
+    suite.addTests(loader.loadTestsFromTestCase(TestExternalSort))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
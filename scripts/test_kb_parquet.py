@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Parquet export (kb_parquet.py).
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from jsonl_io import iter_records
+from kb_parquet import export, unit_from_row, unit_to_row
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATASETS = sorted(path for path in list(DATA_DIR.glob("*.jsonl")) + list(DATA_DIR.glob("extracted/*.jsonl"))
+                  if path.name != "knowledge_base_embeddings.jsonl")
+
+
+def unit(i, **extra):
+    return {
+        "id": f"ku-{i}", "type": "rule", "domain": "uhrady", "title": f"Pravidlo {i}",
+        "description": "Popis", "version": "2026",
+        "source": {"name": "Vyhláška", "url": "https://example.cz", "retrieved_at": "2026-01-01T00:00:00Z"},
+        "content": {"condition": "když", "consequence": "pak", "nested": {"n": i}},
+        "applicability": {"specialties": ["001"], "valid_from": "2026-01-01", "valid_to": None},
+        "related_units": [], "tags": ["úhrada"],
+        **extra,
+    }
+
+
+def write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path
+
+
+class TestRows(unittest.TestCase):
+
+    def test_roundtrip_keeps_odd_values_in_extra(self):
+        odd = unit(1, version=2026, confidence=0.9, tags="jeden")
+        odd["source"]["page"] = 12
+        odd["applicability"]["specialties"] = "all"
+        row = unit_to_row(odd)
+        self.assertNotIn("version", row)
+        self.assertNotIn("applicability_specialties", row)
+        self.assertEqual(json.loads(row["extra"])["source"], {"page": 12})
+        self.assertEqual(unit_from_row(row), odd)
+
+    def test_regular_unit_has_no_extra(self):
+        regular = unit(2)
+        regular["applicability"]["valid_to"] = "2026-12-31"
+        row = unit_to_row(regular)
+        self.assertIsNone(row["extra"])
+        self.assertEqual(row["source_url"], "https://example.cz")
+        self.assertEqual(unit_from_row(row), regular)
+
+    def test_null_and_missing_keys_stay_apart(self):
+        explicit = unit(3)
+        missing = unit(3)
+        del missing["applicability"]["valid_to"]
+        missing["version"] = None
+        self.assertEqual(json.loads(unit_to_row(explicit)["extra"]), {"applicability": {"valid_to": None}})
+        self.assertEqual(json.loads(unit_to_row(missing)["extra"]), {"version": None})
+        self.assertEqual(unit_from_row(unit_to_row(explicit)), explicit)
+        self.assertEqual(unit_from_row(unit_to_row(missing)), missing)
+
+
+@unittest.skipIf(pq is None, "pyarrow not installed")
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.units = [unit(i) for i in range(25)]
+        self.kb = write_jsonl(self.dir / "kb.jsonl", self.units)
+        self.out = self.dir / "out"
+
+    def test_shards_and_row_groups(self):
+        stats = export(self.kb, self.out, shard_rows=10, row_group_size=4)
+        names = sorted(path.name for path in self.out.iterdir())
+        self.assertEqual(names, [f"train-0000{i}-of-00003.parquet" for i in range(3)])
+        self.assertEqual([pq.ParquetFile(self.out / name).metadata.num_row_groups for name in names], [3, 3, 2])
+        self.assertEqual(stats["units"], 25)
+        table = pq.read_table(self.out)
+        self.assertEqual([unit_from_row(row) for row in table.to_pylist()], self.units)
+
+        # A smaller re-export replaces the old shards
+        export(self.kb, self.out)
+        self.assertEqual([path.name for path in self.out.iterdir()], ["train-00000-of-00001.parquet"])
+
+    def test_embeddings_are_fixed_size_float32(self):
+        vectors = [{"id": f"ku-{i}", "embedding": [i / 10, 1.0, -1.0]} for i in range(24)]
+        vectors.append({"id": "ku-bad", "embedding": [1.0]})
+        embeddings = write_jsonl(self.dir / "emb.jsonl", vectors)
+        stats = export(self.kb, self.out, embeddings, row_group_size=10)
+        self.assertEqual((stats["embedding_dim"], stats["bad_embeddings"], stats["without_embedding"]), (3, 1, 1))
+
+        table = pq.read_table(self.out, columns=["id", "embedding"])
+        self.assertEqual(str(table.schema.field("embedding").type), "fixed_size_list<element: float>[3]")
+        self.assertEqual(table.schema.metadata[b"kb.embedding_dim"], b"3")
+        column = table.column("embedding").to_pylist()
+        self.assertAlmostEqual(column[5][0], 0.5, places=6)
+        self.assertIsNone(column[24])
+
+    def test_committed_datasets_roundtrip(self):
+        """Every unit of every committed KB file comes back unchanged from Parquet."""
+        self.assertTrue(DATASETS)
+        for path in DATASETS:
+            with self.subTest(dataset=path.name):
+                out = self.dir / path.stem
+                export(path, out)
+                units = list(iter_records(path))
+                rows = pq.read_table(out).to_pylist()
+                self.assertEqual(len(rows), len(units))
+                changed = [u.get("id") for u, row in zip(units, rows) if unit_from_row(row) != u]
+                self.assertEqual(changed, [])
+
+    def test_empty_input_writes_schema_only_shard(self):
+        empty = write_jsonl(self.dir / "empty.jsonl", [])
+        stats = export(empty, self.out)
+        self.assertEqual(stats["units"], 0)
+        self.assertEqual(pq.read_table(self.out).num_rows, 0)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestRows))
+    suite.addTests(loader.loadTestsFromTestCase(TestExport))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
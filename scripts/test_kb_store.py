@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the content-addressed KB version store (kb_store.py).
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kb_store import StoreError, UnitStore, line_hash, version_name
+
+
+def unit(uid, title):
+    return {"id": uid, "type": "rule", "domain": "uhrady", "title": title, "description": f"Popis {title}."}
+
+
+def write_jsonl(path, units):
+    with open(path, 'w', encoding='utf-8') as f:
+        for u in units:
+            f.write(json.dumps(u, ensure_ascii=False) + "\n")
+    return path
+
+
+class TestUnitStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.store = UnitStore(self.dir / "store")
+        self.v1 = write_jsonl(self.dir / "knowledge_base_v1.jsonl",
+                              [unit("ku-1", "Hodnota bodu"), unit("ku-2", "Úhrada")])
+        self.v2 = write_jsonl(self.dir / "knowledge_base_v2.jsonl",
+                              [unit("ku-1", "Hodnota bodu"), unit("ku-2", "Úhrada 2026"), unit("ku-3", "Nový")])
+
+    def test_shared_units_stored_once(self):
+        self.assertEqual(self.store.import_file(self.v1)["new_objects"], 2)
+        manifest = self.store.import_file(self.v2)
+        self.assertEqual(manifest["name"], "v2")
+        self.assertEqual(manifest["new_objects"], 2)
+        self.assertEqual(len(self.store.objects), 4)
+        self.assertEqual([uid for uid, _ in manifest["entries"]], ["ku-1", "ku-2", "ku-3"])
+        self.assertEqual(self.store.versions(), ["v1", "v2"])
+
+    def test_checkout_is_byte_identical(self):
+        self.store.import_file(self.v1)
+        self.store.import_file(self.v2)
+        for name, source in (("v1", self.v1), ("v2", self.v2)):
+            output = self.store.checkout(name, self.dir / "out" / f"{name}.jsonl")
+            self.assertEqual(output.read_bytes(), source.read_bytes())
+        self.assertEqual([u["title"] for u in self.store.iter_units("v2")], ["Hodnota bodu", "Úhrada 2026", "Nový"])
+
+    def test_blank_lines_and_missing_final_newline(self):
+        """Layout the store does not keep as objects still checks out byte for byte."""
+        lines = [json.dumps(unit(f"ku-{i}", f"Jednotka {i}"), ensure_ascii=False) for i in range(3)]
+        sources = {
+            "no_newline": "\n".join(lines),
+            "blank": "\n" + lines[0] + "\n\n  \t\n" + lines[1] + "\r\n" + lines[2] + "\n",
+            "trailing_blank": "\n".join(lines) + "\n   ",
+            "empty": "",
+        }
+        for name, text in sources.items():
+            with self.subTest(name=name):
+                source = self.dir / f"{name}.jsonl"
+                source.write_bytes(text.encode('utf-8'))
+                manifest = self.store.import_file(source)
+                self.assertEqual(manifest["units"], 0 if name == "empty" else 3)
+                output = self.store.checkout(name, self.dir / "out" / f"{name}.jsonl")
+                self.assertEqual(output.read_bytes(), source.read_bytes())
+        self.assertEqual(self.store.verify(), [])
+
+    def test_reopen_and_interrupted_append(self):
+        self.store.import_file(self.v1)
+        digest = self.store.put(unit("ku-9", "Navíc"))
+        # Simulate an append whose index was never saved
+        with open(self.store.pack_path, 'ab') as pack:
+            pack.write(json.dumps(unit("ku-10", "Ztracený")).encode() + b"\n")
+
+        reopened = UnitStore(self.dir / "store")
+        self.assertEqual(len(reopened.objects), 4)
+        self.assertEqual(reopened.get(digest)["id"], "ku-9")
+        self.assertEqual(reopened.verify(), [])
+
+    def test_gc_and_verify(self):
+        self.store.import_file(self.v1)
+        self.store.import_file(self.v2)
+        self.store.remove("v1")
+        self.assertEqual(self.store.gc(), 1)
+        self.assertEqual(self.store.verify(), [])
+        self.assertEqual(self.store.checkout("v2", self.dir / "v2.jsonl").read_bytes(), self.v2.read_bytes())
+
+        self.store.objects[line_hash(b"{}")] = self.store.objects.pop(next(iter(self.store.objects)))
+        self.assertEqual(len(self.store.verify()), 2)  # the corrupt object and its version
+
+    def test_unknown_version(self):
+        with self.assertRaises(StoreError):
+            self.store.manifest("nope")
+        self.assertEqual(version_name(Path("data/knowledge_base_mvp.jsonl")), "mvp")
+        self.assertEqual(version_name(Path("data/pilot_knowledge_units.jsonl")), "pilot_knowledge_units")
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestUnitStore))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
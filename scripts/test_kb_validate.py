@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared knowledge-unit validator (kb_validate.py).
+"""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from kb_validate import SCHEMA_PATH, get_validator, validate_units
+
+
+def valid_unit(uid="ku-001-hodnota-bodu"):
+    return {
+        "id": uid, "type": "rule", "domain": "uhrady", "title": "Hodnota bodu",
+        "description": "Základní hodnota bodu je 0,98 Kč.", "version": "2026",
+        "source": {"name": "Úhradová vyhláška 2026", "url": "https://mzd.gov.cz/",
+                   "retrieved_at": "2026-02-03T00:00:00Z"},
+        "content": {}, "applicability": {"specialties": ["all"], "valid_from": "2026-01-01"},
+        "related_units": ["ku-002"], "tags": ["2026"],
+    }
+
+
+class TestUnitValidator(unittest.TestCase):
+
+    def test_valid_unit(self):
+        self.assertEqual(get_validator().errors(valid_unit()), [])
+        self.assertTrue(get_validator().is_valid(valid_unit("ku-as-2026-001")))
+
+    def test_reports_all_errors(self):
+        unit = valid_unit()
+        unit["domain"] = "uhrazeni"
+        del unit["source"]["url"]
+        unit["applicability"]["valid_from"] = "1. 1. 2026"
+        unit["tags"] = ["ok", 3]
+
+        errors = get_validator().errors(unit)
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(any(e.startswith("domain:") for e in errors))
+        self.assertTrue(any(e.startswith("source:") and "'url'" in e for e in errors))
+        self.assertTrue(any(e.startswith("applicability.valid_from:") for e in errors))
+        self.assertTrue(any(e.startswith("tags[1]:") for e in errors))
+
+    def test_strict_ids(self):
+        strict = get_validator(SCHEMA_PATH, strict_ids=True)
+        self.assertEqual(strict.errors(valid_unit("ku-12-slug-2026")), [])
+        self.assertEqual(strict.errors(valid_unit("3f2504e0-4f89-11d3-9a0c-0305e82c3301")), [])
+        self.assertEqual(len(strict.errors(valid_unit("ozp-001-rule"))), 1)
+
+    def test_validator_is_cached(self):
+        self.assertIs(get_validator(), get_validator())
+
+    def test_batch_with_process_pool(self):
+        units = [valid_unit(), {"id": "ku-2"}] * 3
+        inline = validate_units(units, workers=1)
+        pooled = validate_units(units, workers=2)
+        self.assertEqual(pooled, inline)
+        self.assertEqual([bool(e) for e in pooled], [False, True] * 3)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestUnitValidator))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
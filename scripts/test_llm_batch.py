@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the offline batch extraction mode (llm_batch.py).
+Uses run_batch_locally() as a stand-in for the batch service.
+"""
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llm_batch import (BatchError, OutputFiles, checkpoint_path, fetch_batch, ingest_results,
+                       iter_batch, load_checkpoint, load_state, results_path, run_batch_locally,
+                       run_root, submit_batch, write_batch, write_retry_batch)
+
+
+def chat_body(text):
+    return {"model": "gpt-4.1-nano", "messages": [{"role": "user", "content": text}], "max_tokens": 100}
+
+
+def echo_units(body):
+    """Stand-in model: one unit per word of the prompt; 'fail' raises."""
+    text = body["messages"][-1]["content"]
+    if "fail" in text:
+        raise RuntimeError("server error")
+    content = "\n".join(json.dumps({"title": word}) for word in text.split())
+    return {"choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5}}
+
+
+class TestLocalBatch(unittest.TestCase):
+    """Batch file → local stand-in → ingest."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.batch = Path(self.tmp.name) / "batch.jsonl"
+        requests = [
+            ("doc.pdf::0001", chat_body("alpha beta")),
+            ("doc.pdf::0002", chat_body("please fail")),
+            ("other.pdf::0001", chat_body("gamma")),
+        ]
+        self.count = write_batch(self.batch, requests)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batch_file_format(self):
+        """Each line is a POST to the chat completions endpoint."""
+        lines = list(iter_batch(self.batch))
+        self.assertEqual(self.count, 3)
+        self.assertEqual(lines[0]["custom_id"], "doc.pdf::0001")
+        self.assertEqual(lines[0]["method"], "POST")
+        self.assertEqual(lines[0]["url"], "/v1/chat/completions")
+        self.assertEqual(lines[0]["body"]["model"], "gpt-4.1-nano")
+
+    def test_duplicate_custom_id_rejected(self):
+        with self.assertRaises(ValueError):
+            write_batch(self.batch, [("a", {}), ("a", {})])
+
+    def test_ingest_results(self):
+        """Successful results reach the handler, failures are reported."""
+        results = run_batch_locally(self.batch, echo_units)
+        self.assertEqual(results, results_path(self.batch))
+
+        seen = {}
+        stats = ingest_results(results, lambda cid, content, usage: seen.setdefault(
+            cid, len(content.splitlines())))
+        self.assertEqual(stats["ingested"], 2)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["units"], 3)
+        self.assertEqual(stats["failed_ids"], ["doc.pdf::0002"])
+        self.assertEqual(set(seen), {"doc.pdf::0001", "other.pdf::0001"})
+
+    def test_ingest_resumes_from_checkpoint(self):
+        """An interrupted ingest continues where it stopped."""
+        results = run_batch_locally(self.batch, echo_units)
+        handled = []
+
+        def interrupted(cid, content, usage):
+            if cid == "other.pdf::0001":
+                raise KeyboardInterrupt
+            handled.append(cid)
+            return 1
+
+        with self.assertRaises(KeyboardInterrupt):
+            ingest_results(results, interrupted)
+        self.assertEqual(load_checkpoint(results), {"doc.pdf::0001", "doc.pdf::0002"})
+
+        stats = ingest_results(results, lambda cid, content, usage: handled.append(cid) or 1)
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(stats["ingested"], 1)
+        self.assertEqual(handled, ["doc.pdf::0001", "other.pdf::0001"])
+        self.assertTrue(checkpoint_path(results).name.endswith("batch.done"))
+
+    def test_retry_batch_contains_failed_requests(self):
+        results = run_batch_locally(self.batch, echo_units)
+        stats = ingest_results(results, lambda cid, content, usage: 0)
+        retry = write_retry_batch(self.batch, stats["failed_ids"])
+        self.assertEqual([r["custom_id"] for r in iter_batch(retry)], ["doc.pdf::0002"])
+        self.assertEqual(run_root(retry), self.batch)
+        self.assertEqual(run_root(retry.with_name("batch.retry.retry.jsonl")), self.batch)
+
+    def output_for(self, filename):
+        return Path(self.tmp.name) / (filename + ".out")
+
+    def ingest(self, batch, fail_on=None):
+        """Ingest like llm_extract_v2: one output line per unit, per document."""
+        outputs = OutputFiles(batch, self.output_for)
+
+        def handle(cid, content, usage):
+            outputs.write(cid, cid.rsplit("::", 1)[0], content.splitlines())
+            if cid == fail_on:
+                raise KeyboardInterrupt
+            return len(content.splitlines())
+
+        with outputs:
+            return ingest_results(results_path(batch), handle)
+
+    def titles(self, filename):
+        return [json.loads(line)["title"] for line in self.output_for(filename).read_text().splitlines()]
+
+    def test_retry_batch_appends_to_the_outputs(self):
+        self.output_for("doc.pdf").write_text('{"title": "stale"}\n')
+        run_batch_locally(self.batch, echo_units)
+        stats = self.ingest(self.batch)
+        self.assertEqual(self.titles("doc.pdf"), ["alpha", "beta"])
+
+        retry = write_retry_batch(self.batch, stats["failed_ids"])
+        run_batch_locally(retry, lambda body: echo_units(chat_body("delta")))
+        self.ingest(retry)
+        self.assertEqual(self.titles("doc.pdf"), ["alpha", "beta", "delta"])
+        self.assertEqual(self.titles("other.pdf"), ["gamma"])
+
+    def test_interrupted_result_is_not_written_twice(self):
+        """Units written before a crash, but not checkpointed, are replaced on resume."""
+        run_batch_locally(self.batch, echo_units)
+        with self.assertRaises(KeyboardInterrupt):
+            self.ingest(self.batch, fail_on="other.pdf::0001")
+        self.assertEqual(self.titles("other.pdf"), ["gamma"])
+        self.assertNotIn("other.pdf::0001", load_checkpoint(results_path(self.batch)))
+
+        stats = self.ingest(self.batch)
+        self.assertEqual((stats["skipped"], stats["ingested"]), (2, 1))
+        self.assertEqual(self.titles("doc.pdf"), ["alpha", "beta"])
+        self.assertEqual(self.titles("other.pdf"), ["gamma"])
+
+
+    def test_resume_replaces_outputs_not_yet_started(self):
+        """An output the run has not written yet is replaced, even on resume."""
+        self.output_for("doc.pdf").write_text('{"title": "stale"}\n')
+        self.output_for("other.pdf").write_text('{"title": "stale"}\n')
+        run_batch_locally(self.batch, echo_units)
+        with self.assertRaises(KeyboardInterrupt):
+            self.ingest(self.batch, fail_on="doc.pdf::0001")
+
+        # doc.pdf was started (and is cut back on resume), other.pdf was not
+        self.ingest(self.batch)
+        self.assertEqual(self.titles("doc.pdf"), ["alpha", "beta"])
+        self.assertEqual(self.titles("other.pdf"), ["gamma"])
+
+
+class FakeBatchClient:
+    """Minimal stand-in for the files/batches parts of the OpenAI client."""
+
+    def __init__(self, output):
+        self.output = output
+        self.status = "in_progress"
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _create_file(self, file, purpose):
+        self.uploaded = file.read()
+        return SimpleNamespace(id="file-in")
+
+    def _content(self, file_id):
+        return io.BytesIO(self.output)
+
+    def _create_batch(self, **kwargs):
+        self.batch_args = kwargs
+        return SimpleNamespace(id="batch-1", status="validating")
+
+    def _retrieve(self, batch_id):
+        done = self.status == "completed"
+        return SimpleNamespace(id=batch_id, status=self.status,
+                               output_file_id="file-out" if done else None,
+                               error_file_id=None,
+                               request_counts=SimpleNamespace(total=1, completed=int(done), failed=0))
+
+
+class TestSubmitAndFetch(unittest.TestCase):
+
+    def test_submit_and_fetch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            batch = Path(tmp) / "batch.jsonl"
+            write_batch(batch, [("doc.pdf::0001", chat_body("alpha"))])
+            client = FakeBatchClient(output=b'{"custom_id": "doc.pdf::0001"}\n')
+
+            self.assertEqual(submit_batch(client, batch), "batch-1")
+            self.assertEqual(client.batch_args["endpoint"], "/v1/chat/completions")
+            self.assertEqual(load_state(batch)["batch_id"], "batch-1")
+            with self.assertRaises(BatchError):
+                submit_batch(client, batch)
+
+            self.assertEqual(fetch_batch(client, batch), "in_progress")
+            self.assertFalse(results_path(batch).exists())
+
+            client.status = "completed"
+            self.assertEqual(fetch_batch(client, batch), "completed")
+            self.assertEqual(results_path(batch).read_bytes(), client.output)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestLocalBatch))
+    suite.addTests(loader.loadTestsFromTestCase(TestSubmitAndFetch))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
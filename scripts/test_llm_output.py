@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the tolerant LLM output parser (llm_output.py).
+"""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llm_output import ParseStats, parse_units, response_format
+
+
+def titles(units):
+    return [u["title"] for u in units]
+
+
+class TestParseUnits(unittest.TestCase):
+    """Tests for parse_units()."""
+
+    def setUp(self):
+        self.stats = ParseStats()
+
+    def test_structured_envelope(self):
+        content = '{"units": [{"title": "a", "source": {"name": "s"}}, {"title": "b"}]}'
+        self.assertEqual(titles(parse_units(content, self.stats)), ["a", "b"])
+        self.assertEqual(self.stats.dropped, 0)
+
+    def test_json_lines_with_noise(self):
+        content = 'Zde jsou jednotky:\n{"title": "a"}\n{"title": "b"},\n'
+        self.assertEqual(titles(parse_units(content, self.stats)), ["a", "b"])
+
+    def test_fenced_pretty_printed_array_with_trailing_commas(self):
+        content = '```json\n[\n  {\n    "title": "a",\n    "tags": ["x",],\n  },\n]\n```'
+        self.assertEqual(titles(parse_units(content, self.stats)), ["a"])
+        self.assertEqual(self.stats.repaired, 1)
+
+    def test_repair_leaves_strings_alone(self):
+        """Commas before brackets inside strings survive the trailing-comma repair."""
+        content = r'[{"title": "a, ]", "description": "viz {x, }", "tags": ["\", ]",],},]'
+        units = parse_units(content, self.stats)
+        self.assertEqual(units, [{"title": "a, ]", "description": "viz {x, }", "tags": ['", ]']}])
+        self.assertEqual(self.stats.repaired, 1)
+
+    def test_valid_json_is_not_repaired(self):
+        content = '{"units": [{"title": "a, ]", "description": "[1, 2, ]"}]}'
+        self.assertEqual(parse_units(content, self.stats), [{"title": "a, ]", "description": "[1, 2, ]"}])
+        self.assertEqual(self.stats.repaired, 0)
+
+    def test_broken_unit_dropped_others_kept(self):
+        content = '[{"title": "a"}, {"title": "b" "c"}, {"title": "d"}]'
+        self.assertEqual(titles(parse_units(content, self.stats)), ["a", "d"])
+        self.assertEqual(self.stats.dropped, 1)
+
+    def test_truncated_response(self):
+        """Complete units before the max_tokens cut-off are recovered."""
+        content = '{"units": [{"title": "a"}, {"title": "b", "descr'
+        self.assertEqual(titles(parse_units(content, self.stats)), ["a"])
+        self.assertEqual(self.stats.dropped, 1)
+
+    def test_empty_response(self):
+        self.assertEqual(parse_units(None, self.stats), [])
+        self.assertEqual(parse_units("  ", self.stats), [])
+        self.assertEqual(self.stats.empty, 2)
+
+    def test_response_format_wraps_unit_schema(self):
+        fmt = response_format()
+        schema = fmt["json_schema"]["schema"]
+        unit = schema["properties"]["units"]["items"]
+        self.assertEqual(fmt["type"], "json_schema")
+        self.assertIn("title", unit["properties"])
+        self.assertNotIn("$schema", unit)
+        # "uri" is not a supported structured-output format
+        self.assertNotIn("format", unit["properties"]["source"]["properties"]["url"])
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestParseUnits))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
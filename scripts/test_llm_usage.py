@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Unit tests for LLM usage accounting and budget-aware scheduling (llm_usage.py).
+Time is simulated: the injected clock only moves when the scheduler sleeps
+or a scripted completion takes its latency.
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llm_usage import (TPM_WINDOW, BudgetExceeded, ExtractionScheduler, UsageLedger, call_cost,
+                       usage_tokens)
+
+MODEL = "gpt-4o-mini"
+MESSAGES = [{"role": "user", "content": "Shrň úhradovou vyhlášku."}]
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedClient:
+    """client.chat.completions.create() returning the scripted usages in order."""
+
+    def __init__(self, clock, usages, latency=1.0):
+        self.clock = clock
+        self.usages = list(usages)
+        self.latency = latency
+        self.calls = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, **kwargs):
+        self.calls.append(self.clock.now)
+        self.clock.now += self.latency
+        usage = self.usages.pop(0)
+        if isinstance(usage, Exception):
+            raise usage
+        return SimpleNamespace(usage=usage)
+
+
+def usage(prompt, completion, cached=0):
+    return {"prompt_tokens": prompt, "completion_tokens": completion,
+            "prompt_tokens_details": {"cached_tokens": cached}}
+
+
+class TestUsageAccounting(unittest.TestCase):
+
+    def test_usage_tokens_from_dict_and_object(self):
+        self.assertEqual(usage_tokens(usage(100, 20, cached=60)), (100, 60, 20))
+        details = SimpleNamespace(cached_tokens=None)
+        self.assertEqual(usage_tokens(SimpleNamespace(prompt_tokens=5, completion_tokens=3,
+                                                      prompt_tokens_details=details)), (5, 0, 3))
+        self.assertEqual(usage_tokens(None), (0, 0, 0))
+
+    def test_call_cost(self):
+        # 400k fresh + 600k cached input, 100k output at gpt-4o-mini prices
+        self.assertAlmostEqual(call_cost(MODEL, 1_000_000, 600_000, 100_000), 0.06 + 0.045 + 0.06)
+        self.assertAlmostEqual(call_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0, 0), 0.15)
+        self.assertAlmostEqual(call_cost("gpt-4o", 1_000_000, 0, 0, batch=True), 1.25)
+        self.assertIsNone(call_cost("unknown-model", 10, 0, 10))
+
+    def test_ledger_appends_every_call(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "logs" / "usage.jsonl"
+            clock = FakeClock()
+            ledger = UsageLedger("test", path=path, clock=clock)
+            ledger.record("doc.pdf", 1, MODEL, usage(1000, 200), latency=2.0)
+            ledger.record("doc.pdf", 2, MODEL, None, latency=0.5, error="timeout")
+            clock.now = 60.0
+
+            entries = [json.loads(line) for line in path.read_text().splitlines()]
+            self.assertEqual([e["chunk"] for e in entries], [1, 2])
+            self.assertEqual(entries[1]["error"], "timeout")
+            self.assertEqual({e["run_id"] for e in entries}, {ledger.run_id})
+            self.assertEqual((ledger.calls, ledger.errors, ledger.total_tokens), (2, 1, 1200))
+            self.assertEqual(ledger.throughput()["chunks_per_min"], 2.0)
+            self.assertEqual(ledger.throughput()["tokens_per_s"], 20.0)
+
+
+class TestExtractionScheduler(unittest.TestCase):
+
+    def scheduler(self, usages, latency=1.0, **kwargs):
+        self.clock = FakeClock()
+        self.client = ScriptedClient(self.clock, usages, latency)
+        self.ledger = UsageLedger("test", path=None, clock=self.clock)
+        return ExtractionScheduler(self.ledger, sleep=self.clock.sleep, clock=self.clock, **kwargs)
+
+    def complete(self, scheduler, chunk=1, max_tokens=500):
+        return scheduler.complete(self.client, document="doc.pdf", chunk=chunk, model=MODEL,
+                                  messages=MESSAGES, max_tokens=max_tokens)
+
+    def test_estimate_uses_the_run_average_completion(self):
+        scheduler = self.scheduler([usage(100, 200), usage(100, 400)])
+        prompt, completion = scheduler.estimate(MODEL, MESSAGES, 500)
+        self.assertGreater(prompt, 4)
+        self.assertEqual(completion, 500)
+        self.complete(scheduler, 1)
+        self.complete(scheduler, 2)
+        self.assertEqual(scheduler.estimate(MODEL, MESSAGES, 500)[1], 300)
+        self.assertEqual(scheduler.estimate(MODEL, MESSAGES, 250)[1], 250)
+
+    def test_token_budget_stops_before_the_call(self):
+        # 1,300 tokens used; the next call is estimated at its prompt plus
+        # the 400-token average completion, which would pass 1,600
+        scheduler = self.scheduler([usage(900, 400), usage(900, 400)], max_tokens=1600)
+        self.complete(scheduler, 1)
+        with self.assertRaises(BudgetExceeded) as raised:
+            self.complete(scheduler, 2)
+        self.assertIn("token budget 1,600", str(raised.exception))
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(self.ledger.calls, 1)
+
+    def test_cost_budget_stops_before_the_call(self):
+        # 1M prompt + 100k completion tokens cost $0.21 on gpt-4o-mini
+        scheduler = self.scheduler([usage(1_000_000, 100_000)] * 3, max_cost=0.45)
+        self.complete(scheduler, 1, max_tokens=200_000)
+        self.complete(scheduler, 2, max_tokens=200_000)
+        self.assertAlmostEqual(self.ledger.cost, 0.42)
+        # The next call's average completion alone costs $0.06
+        with self.assertRaises(BudgetExceeded) as raised:
+            self.complete(scheduler, 3, max_tokens=200_000)
+        self.assertIn("cost budget $0.45", str(raised.exception))
+        self.assertEqual(len(self.client.calls), 2)
+
+    def test_cost_budget_refuses_unpriced_models(self):
+        scheduler = self.scheduler([usage(100, 50)], max_cost=1.0)
+        with self.assertRaises(BudgetExceeded) as raised:
+            scheduler.complete(self.client, document="doc.pdf", chunk=1, model="local-llama",
+                               messages=MESSAGES, max_tokens=500)
+        self.assertIn("local-llama has no pricing", str(raised.exception))
+        self.assertEqual(self.client.calls, [])
+
+    def test_unpriced_calls_are_counted(self):
+        scheduler = self.scheduler([usage(100, 50)])
+        scheduler.complete(self.client, document="doc.pdf", chunk=1, model="local-llama",
+                           messages=MESSAGES, max_tokens=500)
+        self.assertEqual((self.ledger.unpriced, self.ledger.cost), (1, 0.0))
+
+    def test_tpm_limit_waits_for_the_window(self):
+        scheduler = self.scheduler([usage(500, 300)] * 3, tpm_limit=1000)
+        self.complete(scheduler, 1)
+        self.complete(scheduler, 2)
+        self.complete(scheduler, 3)
+        # Each call fills most of the limit, so the next one starts only when
+        # the previous one, counted when its response arrived, has left the window
+        self.assertEqual(self.client.calls[0], 0.0)
+        for previous, start in zip(self.client.calls, self.client.calls[1:]):
+            self.assertAlmostEqual(start - previous, 1.0 + TPM_WINDOW)
+        self.assertAlmostEqual(scheduler.waited, 2 * TPM_WINDOW)
+        self.assertEqual(len(self.clock.sleeps), 2)
+
+    def test_calls_within_the_limit_do_not_wait(self):
+        scheduler = self.scheduler([usage(50, 20)] * 5, tpm_limit=10_000)
+        for chunk in range(5):
+            self.complete(scheduler, chunk, max_tokens=50)
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertEqual(self.client.calls, [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_window_drops_calls_older_than_a_minute(self):
+        scheduler = self.scheduler([usage(400, 100)] * 2, tpm_limit=1000)
+        self.complete(scheduler, 1)
+        self.assertEqual(scheduler._window_tokens(), 500)
+        self.clock.now += TPM_WINDOW
+        self.assertEqual(scheduler._window_tokens(), 0)
+        self.complete(scheduler, 2)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_api_error_is_recorded_and_raised(self):
+        scheduler = self.scheduler([RuntimeError("rate limited"), usage(100, 50)], latency=2.0)
+        with self.assertRaises(RuntimeError):
+            self.complete(scheduler, 1)
+        self.assertEqual((self.ledger.calls, self.ledger.errors, self.ledger.latency), (1, 1, 2.0))
+        self.assertEqual(list(scheduler._window), [])
+        self.complete(scheduler, 1)
+        self.assertEqual((self.ledger.calls, self.ledger.total_tokens), (2, 150))
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestUsageAccounting))
+    suite.addTests(loader.loadTestsFromTestCase(TestExtractionScheduler))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the cached, page-parallel PDF text extraction (pdf_text.py).
+pdftotext and pdfinfo are replaced by stub executables on PATH; a "PDF" is a
+text file holding its page count and a label.
+"""
+import json
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pdf_text import CACHE_VERSION, extract_pdf_pages, extract_text_from_pdf
+
+PDFTOTEXT = """
+import json, os, sys
+args = sys.argv[1:]
+with open(os.environ["PDF_STUB_LOG"], "a") as log:
+    log.write(json.dumps(args) + "\\n")
+pages, label = open(args[-2]).read().split()
+first, last = 1, int(pages)
+if "-f" in args:
+    first, last = int(args[args.index("-f") + 1]), int(args[args.index("-l") + 1])
+sys.stdout.write("".join(f"{label} strana {n}\\n\\f" for n in range(first, last + 1)))
+"""
+
+PDFINFO = """
+import sys
+pages, _ = open(sys.argv[1]).read().split()
+print("Producer: stub")
+print(f"Pages:          {pages}")
+"""
+
+
+class TestPdfText(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        bin_dir = self.dir / "bin"
+        bin_dir.mkdir()
+        for name, code in (("pdftotext", PDFTOTEXT), ("pdfinfo", PDFINFO)):
+            path = bin_dir / name
+            path.write_text(f"#!{sys.executable}\n{code}")
+            path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        self.log = self.dir / "calls.jsonl"
+        env = patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}",
+                                      "PDF_STUB_LOG": str(self.log)})
+        env.start()
+        self.addCleanup(env.stop)
+        self.cache = self.dir / "cache"
+
+    def pdf(self, name, pages, label="Vyhláška"):
+        path = self.dir / name
+        path.write_text(f"{pages} {label}")
+        return path
+
+    def calls(self):
+        if not self.log.exists():
+            return []
+        return [json.loads(line) for line in self.log.read_text().splitlines()]
+
+    def ranges(self):
+        return [(int(c[c.index("-f") + 1]), int(c[c.index("-l") + 1])) if "-f" in c else None
+                for c in self.calls()]
+
+    def test_large_pdf_is_split_into_page_ranges(self):
+        doc = extract_pdf_pages(self.pdf("big.pdf", 40), cache_dir=self.cache, pages_per_range=16, workers=2)
+        self.assertEqual(sorted(self.ranges()), [(1, 16), (17, 32), (33, 40)])
+        self.assertEqual(len(doc.pages), 40)
+        self.assertEqual(doc.pages[16], "Vyhláška strana 17\n")
+        self.assertEqual(doc.page_for_offset(doc.text.index("strana 33")), 33)
+
+    def test_small_pdf_runs_once_without_range(self):
+        doc = extract_pdf_pages(self.pdf("small.pdf", 3), cache_dir=self.cache, pages_per_range=16)
+        self.assertEqual(self.ranges(), [None])
+        self.assertEqual(doc.text, "".join(f"Vyhláška strana {n}\n\f" for n in (1, 2, 3)))
+
+    def test_cache_hit_skips_pdftotext(self):
+        pdf = self.pdf("big.pdf", 20)
+        first = extract_pdf_pages(pdf, cache_dir=self.cache, pages_per_range=8)
+        self.assertEqual(len(self.calls()), 3)
+        self.assertTrue((self.cache / f"{first.sha256}.json").exists())
+
+        # Same content under another name and another range size: still a hit
+        copy = self.pdf("copy.pdf", 20)
+        second = extract_pdf_pages(copy, cache_dir=self.cache, pages_per_range=4)
+        self.assertEqual(len(self.calls()), 3)
+        self.assertEqual((second.sha256, second.pages), (first.sha256, first.pages))
+
+    def test_cache_miss_on_changed_content_or_version(self):
+        pdf = self.pdf("doc.pdf", 2)
+        old = extract_pdf_pages(pdf, cache_dir=self.cache)
+        pdf.write_text("2 Novela")
+        new = extract_pdf_pages(pdf, cache_dir=self.cache)
+        self.assertNotEqual(new.sha256, old.sha256)
+        self.assertEqual(new.pages[0], "Novela strana 1\n")
+        self.assertEqual(len(self.calls()), 2)
+
+        entry = self.cache / f"{new.sha256}.json"
+        entry.write_text(json.dumps({"version": CACHE_VERSION + 1, "pages": ["stale"]}))
+        self.assertEqual(extract_pdf_pages(pdf, cache_dir=self.cache).pages, new.pages)
+        self.assertEqual(len(self.calls()), 3)
+
+    def test_no_cache_always_extracts(self):
+        pdf = self.pdf("doc.pdf", 2)
+        extract_pdf_pages(pdf, cache_dir=self.cache, use_cache=False)
+        extract_pdf_pages(pdf, cache_dir=self.cache, use_cache=False)
+        self.assertEqual(len(self.calls()), 2)
+        self.assertFalse(self.cache.exists())
+
+    def test_failure_returns_none(self):
+        self.assertIsNone(extract_text_from_pdf(self.dir / "missing.pdf"))
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestPdfText))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the numpy query encoder (query_encoder.py) against sklearn.
+"""
+import io
+import sys
+import unittest
+import zipfile
+from pathlib import Path
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from query_encoder import QueryEncoder
+
+CORPUS = [
+    "Jednotná hodnota bodu pro ambulantní specialisty 0,98 Kč v roce 2026",
+    "Regulace preskripce léčivých přípravků a zdravotnických prostředků",
+    "Bonifikace za nové pacienty u praktických lékařů",
+    "Hodnota bodu pro praktické lékaře a kapitační platba",
+    "Ordinační hodiny a zveřejnění na webu pojišťovny",
+    "Limitace úhrad za hrazené služby a maximální úhrada",
+    "Kontrola vykazování výkonů revizním lékařem pojišťovny",
+    "Personální minimum a věcné technické vybavení ambulance",
+    "Úhrada výkonů ambulantních specialistů podle seznamu výkonů",
+    "Kapitační platba se navyšuje o bonifikaci za ordinační hodiny",
+]
+QUERIES = ["hodnota bodu 2026", "KAPITAČNÍ platba praktických lékařů", "regulace", "úplně neznámé slovo",
+           "", "ordinační hodiny ordinační hodiny pojišťovny"]
+
+
+def fit(**settings):
+    vectorizer = TfidfVectorizer(**settings).fit(CORPUS)
+    svd = TruncatedSVD(n_components=5, random_state=0).fit(vectorizer.transform(CORPUS))
+    return vectorizer, svd
+
+
+def sklearn_encode(vectorizer, svd, texts):
+    vectors = svd.transform(vectorizer.transform(texts))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class TestQueryEncoderParity(unittest.TestCase):
+
+    def assert_parity(self, **settings):
+        vectorizer, svd = fit(**settings)
+        encoder = QueryEncoder.from_sklearn(vectorizer, svd)
+        analyzer = vectorizer.build_analyzer()
+        for text in QUERIES + CORPUS:
+            self.assertEqual(sorted(encoder.analyze(text)), sorted(analyzer(text)), text)
+        np.testing.assert_allclose(encoder.encode_batch(QUERIES + CORPUS),
+                                   sklearn_encode(vectorizer, svd, QUERIES + CORPUS), atol=1e-6)
+
+    def test_generate_embeddings_settings(self):
+        self.assert_parity(max_features=5000, ngram_range=(1, 2), min_df=1, max_df=0.95)
+
+    def test_other_analyzer_settings(self):
+        self.assert_parity(ngram_range=(2, 3), sublinear_tf=True)
+        self.assert_parity(stop_words=["a", "za", "pro"], binary=True, lowercase=False)
+        self.assert_parity(use_idf=False, norm=None)
+
+    def test_unknown_terms_give_zero_vector(self):
+        encoder = QueryEncoder.from_sklearn(*fit())
+        vector = encoder.encode("qwertz")
+        self.assertEqual(vector.dtype, np.float32)
+        self.assertFalse(vector.any())
+
+    def test_saved_file_is_plain_arrays(self):
+        vectorizer, svd = fit(ngram_range=(1, 2))
+        buffer = io.BytesIO()
+        QueryEncoder.from_sklearn(vectorizer, svd).save(buffer)
+        with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as archive:
+            self.assertEqual(sorted(archive.namelist()), ["config.npy", "projection.npy", "terms.npy"])
+        buffer.seek(0)
+        loaded = QueryEncoder.load(buffer)
+        self.assertEqual(loaded.config["ngram_range"], [1, 2])
+        np.testing.assert_allclose(loaded.encode_batch(QUERIES), sklearn_encode(vectorizer, svd, QUERIES), atol=1e-6)
+
+    def test_custom_analyzers_are_refused(self):
+        vectorizer = TfidfVectorizer(analyzer="char_wb").fit(CORPUS)
+        svd = TruncatedSVD(n_components=3).fit(vectorizer.transform(CORPUS))
+        with self.assertRaisesRegex(ValueError, "analyzer"):
+            QueryEncoder.from_sklearn(vectorizer, svd)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestQueryEncoderParity))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -18,6 +18,11 @@ import numpy as np
 import pickle
 from pathlib import Path
 from datetime import datetime
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import iter_records
 
 # Configuration
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -197,12 +202,7 @@ TEST_QUERIES = [
 
 def load_knowledge_base():
     """Load knowledge units from JSONL."""
-    knowledge_units = {}
-    with open(KNOWLEDGE_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            unit = json.loads(line.strip())
-            knowledge_units[unit['id']] = unit
-    return knowledge_units
+    return {unit['id']: unit for unit in iter_records(KNOWLEDGE_FILE)}
 
 
 def load_embeddings():
@@ -216,11 +216,9 @@ def load_embeddings():
     # Load embeddings
     embedding_ids = []
     emb_list = []
-    with open(EMBEDDINGS_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            data = json.loads(line.strip())
-            embedding_ids.append(data['id'])
-            emb_list.append(data['embedding'])
+    for data in iter_records(EMBEDDINGS_FILE):
+        embedding_ids.append(data['id'])
+        emb_list.append(data['embedding'])
 
     embedding_matrix = np.array(emb_list)
 
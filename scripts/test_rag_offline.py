@@ -9,6 +9,11 @@ from pathlib import Path
 import pickle
 import argparse
 from datetime import datetime
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import read_records
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent.absolute()
@@ -47,13 +52,7 @@ def create_embedding_text(unit):
 
 def load_knowledge_base(input_file):
     """Load knowledge base from JSONL file."""
-    units = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                units.append(json.loads(line))
-    return units
+    return read_records(input_file)
 
 
 def search_similar(query, vectorizer, svd, units, embeddings, top_k=5):
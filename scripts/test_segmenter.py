@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the section-aware segmenter (segmenter.py).
+"""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from segmenter import parse_selector, segment_document
+
+# A decree in the layout pdftotext produces: pages end with a form feed and
+# appendix pages repeat the "Příloha č. N k vyhlášce" header
+PAGES = [
+    "VYHLÁŠKA\nze dne 20. listopadu 2025\n\nČÁST PRVNÍ\n\n§ 1\n"
+    "Hodnota bodu se stanoví podle přílohy č. 1.\n\n§ 2\nViz § 1 a přílohu č. 2.\n",
+    "ČÁST DRUHÁ\n\n§ 3\nÚčinnost.\n",
+    "Příloha č. 1 k vyhlášce č. 123/2025 Sb. - Všeobecní praktičtí lékaři\n\n"
+    "Čl. I\nHodnota bodu 1,30 Kč.\n",
+    "Příloha č. 1 k vyhlášce č. 123/2025 Sb.\nČl. II\nRegulace.\n",
+    "PŘÍLOHA č. 2a\n## Bonifikace\nText.\n### Podmínky\nDalší text.\n",
+]
+TEXT = "".join(page + "\f" for page in PAGES)
+
+
+def page_offsets(pages):
+    offsets, position = [], 0
+    for page in pages:
+        offsets.append(position)
+        position += len(page) + 1
+    return offsets
+
+
+class TestSegmenter(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = segment_document(TEXT, page_offsets(PAGES))
+
+    def test_tree_structure(self):
+        outline = [(s.key, [c.key for c in s.children]) for s in self.tree.root.children]
+        self.assertEqual(outline, [
+            ("cast:PRVNÍ", ["paragraf:1", "paragraf:2"]),
+            ("cast:DRUHÁ", ["paragraf:3"]),
+            ("priloha:1", ["clanek:I", "clanek:II"]),
+            ("priloha:2a", ["nadpis:2"]),
+        ])
+        heading = self.tree.find("nadpis", "2")
+        self.assertEqual((heading.title, [c.title for c in heading.children]), ("Bonifikace", ["Podmínky"]))
+
+    def test_references_are_not_headings(self):
+        self.assertEqual(len(self.tree.find_all("priloha")), 2)
+        self.assertEqual([s.label for s in self.tree.find_all("paragraf")], ["1", "2", "3"])
+
+    def test_sections_cover_their_text(self):
+        first = self.tree.find("paragraf", "1")
+        self.assertEqual(self.tree.text_of(first), "§ 1\nHodnota bodu se stanoví podle přílohy č. 1.\n\n")
+        self.assertEqual(self.tree.text_of(self.tree.find("§", "3")), "§ 3\nÚčinnost.\n\f")
+        for section in self.tree.sections():
+            for child in section.children:
+                self.assertTrue(section.start <= child.start < child.end <= section.end)
+        self.assertEqual(self.tree.root.children[-1].end, len(TEXT))
+
+    def test_repeated_page_header_continues_the_appendix(self):
+        appendix = self.tree.find("priloha", "1")
+        self.assertEqual(appendix.title, "k vyhlášce č. 123/2025 Sb. - Všeobecní praktičtí lékaři")
+        self.assertEqual((appendix.page_start, appendix.page_end), (3, 4))
+        self.assertIn("Regulace.", self.tree.text_of(appendix))
+        self.assertEqual((self.tree.find("cast", "PRVNÍ").page_start, self.tree.find("cast", "PRVNÍ").page_end),
+                         (1, 1))
+
+    def test_selectors(self):
+        self.assertEqual(parse_selector("příloha:3"), ("priloha", "3"))
+        self.assertEqual(parse_selector("§7"), ("paragraf", "7"))
+        self.assertEqual(parse_selector("cl"), ("clanek", None))
+        with self.assertRaises(ValueError):
+            parse_selector("kapitola:1")
+        selected = self.tree.select(["§2", "priloha:2A", "§2"])
+        self.assertEqual([s.key for s in selected], ["paragraf:2", "priloha:2a"])
+
+    def test_plain_text_without_headings(self):
+        tree = segment_document("Jen běžný text.\nBez nadpisů.\n")
+        self.assertEqual(list(tree.sections()), [])
+        self.assertIsNone(tree.root.page_start)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmenter))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -2,14 +2,20 @@
 """
 Validate the knowledge base dataset for schema compliance, duplicate IDs, and orphan references.
 
-This script performs comprehensive validation without external dependencies.
+Schema validation uses the shared compiled validator (kb_validate.py), with
+IDs restricted to UUIDs or the practical ku-NNN-slug format.
 """
 import json
-import re
+import sys
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from jsonl_io import iter_numbered
+from kb_validate import get_validator, validate_units
+
 # Paths - use relative paths from script location
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
@@ -18,159 +24,20 @@ SCHEMA_PATH = PROJECT_ROOT / "schemas" / "knowledge_unit.schema.json"
 DATASET_PATH = DATA_DIR / "knowledge_base_final.jsonl"
 OUTPUT_PATH = PROJECT_ROOT / "docs" / "analysis" / "validation_results.json"
 
-# ID patterns
-# Standard UUID format
-UUID_PATTERN = re.compile(
-    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
-    re.IGNORECASE
-)
-# Practical ID format used in the dataset:
-# - ku-NNN (short form)
-# - ku-NNN-slug (with slug)
-# - ku-NNN-slug-YYYY (with year suffix)
-# Allow Unicode letters (Czech diacritics) and underscores in slugs
-PRACTICAL_ID_PATTERN = re.compile(
-    r'^ku-\d{1,4}(-[\w-]+)?(-\d{4})?$',
-    re.IGNORECASE | re.UNICODE
-)
-
-# Date patterns
-DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
-DATETIME_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
-
-# Schema definitions (hardcoded for no-dependency validation)
-REQUIRED_FIELDS = ['id', 'type', 'domain', 'title', 'description', 'version', 'source', 'content', 'applicability']
-VALID_TYPES = ['rule', 'exception', 'risk', 'anti_pattern', 'condition', 'definition']
-VALID_DOMAINS = ['uhrady', 'provoz', 'compliance', 'financni-rizika', 'legislativa']
-
 
 def load_units(file_path):
-    """Load units from JSONL file."""
+    """Load units from a JSONL (or .jsonl.zst) file."""
     units = []
     errors = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                unit = json.loads(line)
-                unit['_line_num'] = line_num
-                units.append(unit)
-            except json.JSONDecodeError as e:
-                errors.append(f"Line {line_num}: JSON parse error - {e}")
+    for line_num, unit in iter_numbered(file_path, lambda n, e: errors.append(f"Line {n}: JSON parse error - {e}")):
+        unit['_line_num'] = line_num
+        units.append(unit)
     return units, errors
 
 
-def validate_required_fields(unit):
-    """Check that all required fields are present."""
-    missing = []
-    for field in REQUIRED_FIELDS:
-        if field not in unit:
-            missing.append(field)
-    return missing
-
-
-def validate_field_types(unit):
-    """Validate field types and values."""
-    errors = []
-
-    # ID must be valid (either UUID or practical format)
-    if 'id' in unit:
-        id_val = unit['id']
-        if not isinstance(id_val, str):
-            errors.append(f"'id' must be string, got {type(id_val).__name__}")
-        elif not (UUID_PATTERN.match(id_val) or PRACTICAL_ID_PATTERN.match(id_val)):
-            errors.append(f"Invalid ID format: {id_val} (expected UUID or ku-NNN-slug format)")
-
-    # Type must be valid enum
-    if 'type' in unit:
-        if unit['type'] not in VALID_TYPES:
-            errors.append(f"Invalid 'type' value: {unit['type']} (expected one of {VALID_TYPES})")
-
-    # Domain must be valid enum
-    if 'domain' in unit:
-        if unit['domain'] not in VALID_DOMAINS:
-            errors.append(f"Invalid 'domain' value: {unit['domain']} (expected one of {VALID_DOMAINS})")
-
-    # Title must be string
-    if 'title' in unit and not isinstance(unit['title'], str):
-        errors.append(f"'title' must be string, got {type(unit['title']).__name__}")
-
-    # Description must be string
-    if 'description' in unit and not isinstance(unit['description'], str):
-        errors.append(f"'description' must be string, got {type(unit['description']).__name__}")
-
-    # Version must be string
-    if 'version' in unit and not isinstance(unit['version'], str):
-        errors.append(f"'version' must be string, got {type(unit['version']).__name__}")
-
-    # Source validation
-    if 'source' in unit:
-        source = unit['source']
-        if not isinstance(source, dict):
-            errors.append(f"'source' must be object, got {type(source).__name__}")
-        else:
-            for required in ['name', 'url', 'retrieved_at']:
-                if required not in source:
-                    errors.append(f"'source.{required}' is required")
-
-    # Content must be object
-    if 'content' in unit and not isinstance(unit['content'], dict):
-        errors.append(f"'content' must be object, got {type(unit['content']).__name__}")
-
-    # Applicability validation
-    if 'applicability' in unit:
-        app = unit['applicability']
-        if not isinstance(app, dict):
-            errors.append(f"'applicability' must be object, got {type(app).__name__}")
-        else:
-            if 'specialties' not in app:
-                errors.append("'applicability.specialties' is required")
-            elif not isinstance(app['specialties'], list):
-                errors.append(f"'applicability.specialties' must be array")
-            if 'valid_from' not in app:
-                errors.append("'applicability.valid_from' is required")
-            elif not DATE_PATTERN.match(str(app.get('valid_from', ''))):
-                errors.append(f"'applicability.valid_from' must be date format (YYYY-MM-DD)")
-
-    # Tags must be array of strings
-    if 'tags' in unit:
-        if not isinstance(unit['tags'], list):
-            errors.append(f"'tags' must be array")
-        elif not all(isinstance(t, str) for t in unit['tags']):
-            errors.append(f"'tags' must be array of strings")
-
-    # Related units must be array of valid IDs
-    if 'related_units' in unit:
-        if not isinstance(unit['related_units'], list):
-            errors.append(f"'related_units' must be array")
-        else:
-            for i, ref in enumerate(unit['related_units']):
-                if not isinstance(ref, str):
-                    errors.append(f"'related_units[{i}]' must be string")
-                elif not (UUID_PATTERN.match(ref) or PRACTICAL_ID_PATTERN.match(ref)):
-                    # Allow short references too (legacy or special references)
-                    if len(ref) < 2:
-                        errors.append(f"'related_units[{i}]' has invalid reference: {ref}")
-
-    return errors
-
-
 def validate_unit(unit):
-    """Validate a single unit against schema rules."""
-    all_errors = []
-
-    # Check required fields
-    missing = validate_required_fields(unit)
-    if missing:
-        all_errors.append(f"Missing required fields: {missing}")
-
-    # Check field types and values
-    type_errors = validate_field_types(unit)
-    all_errors.extend(type_errors)
-
-    return all_errors
+    """Validate a single unit against the schema; returns all errors."""
+    return get_validator(SCHEMA_PATH, strict_ids=True).errors(unit)
 
 
 def check_duplicate_ids(units):
@@ -233,9 +100,9 @@ def main():
     valid_count = 0
     invalid_units = []
 
-    for unit in units:
+    all_errors = validate_units(units, SCHEMA_PATH, strict_ids=True)
+    for unit, errors in zip(units, all_errors):
         line_num = unit.get('_line_num')
-        errors = validate_unit(unit)
         if errors:
             invalid_units.append({
                 'id': unit.get('id', 'unknown'),
@@ -5,15 +5,21 @@ Upload the Klinická Knowledge Base MVP dataset to Hugging Face Hub.
 Version: 1.0.0-MVP
 Date: 2026-02-03
 """
-import json
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+
+from jsonl_io import iter_numbered
+from kb_validate import validate_units
+
 # Configuration
 DATASET_FILE = "data/knowledge_base_mvp.jsonl"
 EMBEDDINGS_FILE = "data/knowledge_base_embeddings.jsonl"
 SCHEMA_FILE = "schemas/knowledge_unit.schema.json"
 README_FILE = "DATASET_README.md"
+PARQUET_DIR = "build/hf/data"
 HF_REPO = "petrsovadina/klinicka-knowledge-base"
 
 def get_project_root() -> Path:
@@ -21,25 +27,22 @@ def get_project_root() -> Path:
     return Path(__file__).parent.absolute()
 
 def validate_dataset(dataset_path: Path) -> tuple[bool, int]:
-    """Validate the dataset file and return (is_valid, count)."""
+    """Validate the dataset file against the schema and return (is_valid, count)."""
     if not dataset_path.exists():
         print(f"ERROR: Dataset file not found at {dataset_path}")
         return False, 0
 
-    count = 0
+    units = []
+    lines = []
     errors = []
-    required_fields = ['id', 'type', 'domain', 'title', 'description', 'version', 'source', 'content', 'applicability']
-
-    with open(dataset_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            try:
-                data = json.loads(line)
-                count += 1
-                for field in required_fields:
-                    if field not in data:
-                        errors.append(f"Line {line_num}: Missing field '{field}' in unit {data.get('id', 'unknown')}")
-            except json.JSONDecodeError as e:
-                errors.append(f"Line {line_num}: Invalid JSON: {e}")
+    for line_num, unit in iter_numbered(dataset_path, lambda n, e: errors.append(f"Line {n}: Invalid JSON: {e}")):
+        units.append(unit)
+        lines.append(line_num)
+
+    schema_path = get_project_root() / SCHEMA_FILE
+    for line_num, unit, unit_errors in zip(lines, units, validate_units(units, schema_path)):
+        for error in unit_errors:
+            errors.append(f"Line {line_num}: {error} in unit {unit.get('id', 'unknown')}")
 
     if errors:
         print("Validation warnings:")
@@ -48,7 +51,7 @@ def validate_dataset(dataset_path: Path) -> tuple[bool, int]:
         if len(errors) > 10:
             print(f"  ... and {len(errors) - 10} more")
 
-    return len(errors) == 0, count
+    return len(errors) == 0, len(units)
 
 def print_instructions(project_root: Path):
     """Print upload instructions."""
@@ -83,6 +86,15 @@ def print_instructions(project_root: Path):
     print(f"huggingface-cli upload {HF_REPO} {SCHEMA_FILE} schemas/knowledge_unit.schema.json --repo-type dataset")
     print(f"huggingface-cli upload {HF_REPO} {README_FILE} README.md --repo-type dataset")
     print()
+    print("# 4. Columnar copy for the dataset viewer and column-selective loaders")
+    print("python scripts/kb_parquet.py")
+    print(f"huggingface-cli upload {HF_REPO} {PARQUET_DIR} data --include '*.parquet' --repo-type dataset")
+    print()
+    print("# 5. Later releases: upload only the shards that changed")
+    print(f"python scripts/hf_upload.py build {DATASET_FILE}")
+    print("python scripts/hf_upload.py push --dataset knowledge_base_mvp --dry-run")
+    print("python scripts/hf_upload.py push --dataset knowledge_base_mvp")
+    print()
     print("Option 3: Using Python SDK")
     print("-" * 40)
     print("""
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the WikiSkripta crawl helpers (wikiskripta_downloader.py).
+The MediaWiki API is replaced by a scripted scheduler.
+"""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from wikiskripta_downloader import BATCH_SIZE, get_category_titles, get_title_redirects
+
+
+class ScriptedScheduler:
+    """Answers scheduler.get(params) with a function and records the requests."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.requests = []
+
+    def get(self, params):
+        self.requests.append(dict(params))
+        return self.answer(params)
+
+
+def redirects_api(redirects):
+    """prop=redirects over {target: [sources]}, two redirects per response."""
+    def answer(params):
+        pages = {}
+        offset = int(params.get("rdcontinue", 0))
+        more = False
+        for i, title in enumerate(params["titles"].split("|")):
+            sources = redirects.get(title, [])
+            page = {"pageid": i, "ns": 0, "title": title}
+            if sources[offset:offset + 2]:
+                page["redirects"] = [{"ns": 0, "title": s} for s in sources[offset:offset + 2]]
+            more = more or len(sources) > offset + 2
+            pages[str(i)] = page
+        data = {"query": {"pages": pages}}
+        if more:
+            data["continue"] = {"rdcontinue": str(offset + 2), "continue": "||"}
+        return data
+    return answer
+
+
+class TestTitleRedirects(unittest.TestCase):
+
+    def test_redirects_of_selected_titles_only(self):
+        titles = [f"Stránka {i}" for i in range(BATCH_SIZE + 10)]
+        scheduler = ScriptedScheduler(redirects_api({
+            "Stránka 0": ["IM", "Infarkt", "AIM"],
+            f"Stránka {BATCH_SIZE + 1}": ["Alias"],
+        }))
+        aliases = get_title_redirects(titles, scheduler=scheduler)
+        self.assertEqual(aliases, {"IM": "Stránka 0", "Infarkt": "Stránka 0", "AIM": "Stránka 0",
+                                   "Alias": f"Stránka {BATCH_SIZE + 1}"})
+        # Two title batches, the first continued once
+        self.assertEqual(len(scheduler.requests), 3)
+        self.assertEqual(len(scheduler.requests[0]["titles"].split("|")), BATCH_SIZE)
+        self.assertEqual(scheduler.requests[2]["titles"].split("|"), titles[BATCH_SIZE:])
+
+    def test_no_titles_no_requests(self):
+        scheduler = ScriptedScheduler(redirects_api({}))
+        self.assertEqual(get_title_redirects([], scheduler=scheduler), {})
+        self.assertEqual(scheduler.requests, [])
+
+
+class TestCategoryTitles(unittest.TestCase):
+
+    def test_depth_limit_and_cycles(self):
+        tree = {
+            "Kategorie:Kardiologie": [("Infarkt", 0), ("Kategorie:Arytmie", 14)],
+            "Kategorie:Arytmie": [("Fibrilace síní", 0), ("Kategorie:Kardiologie", 14),
+                                  ("Kategorie:Vzácné", 14)],
+            "Kategorie:Vzácné": [("Brugada", 0)],
+        }
+        scheduler = ScriptedScheduler(lambda params: {"query": {"categorymembers": [
+            {"ns": ns, "title": title} for title, ns in tree[params["cmtitle"]]]}})
+
+        pages = get_category_titles(["Kardiologie"], max_depth=1, scheduler=scheduler)
+        self.assertEqual(pages, {"Infarkt": ["Kategorie:Kardiologie"],
+                                 "Fibrilace síní": ["Kategorie:Kardiologie > Kategorie:Arytmie"]})
+        self.assertEqual(len(scheduler.requests), 2)
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestTitleRedirects))
+    suite.addTests(loader.loadTestsFromTestCase(TestCategoryTitles))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the adaptive MediaWiki request scheduler (wikiskripta_scheduler.py).
+Time is simulated: the injected clock only moves when the scheduler sleeps
+or a scripted response takes its latency.
+"""
+import sys
+import unittest
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from wikiskripta_scheduler import RequestScheduler, SchedulerError
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self.reason = "Scripted"
+        self.headers = headers or {}
+        self._data = data if data is not None else {"query": {}}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} {self.reason}", response=self)
+
+
+class ScriptedSession:
+    """Returns (or raises) the scripted responses in order; each takes `latency` seconds."""
+
+    def __init__(self, clock, responses, latency=0.1):
+        self.clock = clock
+        self.responses = list(responses)
+        self.latency = latency
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((self.clock.now, dict(params)))
+        self.clock.now += self.latency
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def scheduler(self, responses, latency=0.1, **kwargs):
+        self.clock = FakeClock()
+        self.session = ScriptedSession(self.clock, responses, latency)
+        kwargs.setdefault("start_delay", 0.4)
+        return RequestScheduler(self.session, "https://wiki.example/api.php", min_delay=0.1, max_delay=5.0,
+                                sleep=self.clock.sleep, clock=self.clock, **kwargs)
+
+    def test_fast_responses_shorten_the_pause(self):
+        scheduler = self.scheduler([FakeResponse() for _ in range(12)])
+        for _ in range(12):
+            self.assertEqual(scheduler.get({"action": "query"}), {"query": {}})
+        self.assertEqual(scheduler.delay, 0.1)
+        self.assertEqual(self.session.calls[0][1]["maxlag"], 5)
+        gaps = [b[0] - a[0] for a, b in zip(self.session.calls, self.session.calls[1:])]
+        self.assertAlmostEqual(gaps[0], 0.1 + 0.4 * 0.8)
+
+    def test_slow_responses_lengthen_the_pause(self):
+        scheduler = self.scheduler([FakeResponse(), FakeResponse()], latency=2.0)
+        scheduler.get({})
+        self.assertAlmostEqual(scheduler.delay, 0.6)
+
+    def test_retry_after_is_honoured(self):
+        scheduler = self.scheduler([FakeResponse(429, headers={"Retry-After": "7"}), FakeResponse()])
+        scheduler.get({})
+        (first, _), (second, _) = self.session.calls
+        self.assertAlmostEqual(second - first, 0.1 + 0.8 + 7)
+        self.assertEqual((scheduler.requests, scheduler.retries), (2, 1))
+        self.assertAlmostEqual(scheduler.delay, 0.8 * 0.8)
+
+    def test_maxlag_waits_and_retries(self):
+        lagged = FakeResponse(data={"error": {"code": "maxlag", "info": "Waiting for db: 6 seconds lagged"}})
+        scheduler = self.scheduler([lagged, lagged, FakeResponse(data={"query": {"pages": {}}})])
+        self.assertEqual(scheduler.get({}), {"query": {"pages": {}}})
+        starts = [at for at, _ in self.session.calls]
+        self.assertAlmostEqual(starts[1] - starts[0], 0.1 + 0.6 + 5.0)
+        self.assertAlmostEqual(starts[2] - starts[1], 0.1 + 0.9 + 5.0)
+        self.assertEqual(scheduler.retries, 2)
+
+    def test_other_api_errors_raise(self):
+        error = FakeResponse(data={"error": {"code": "badvalue", "info": "Unrecognized value for parameter"}})
+        scheduler = self.scheduler([error])
+        with self.assertRaises(SchedulerError) as raised:
+            scheduler.get({"action": "query", "list": "nope"})
+        self.assertEqual(raised.exception.code, "badvalue")
+        self.assertIn("Unrecognized value", str(raised.exception))
+        self.assertEqual((scheduler.requests, scheduler.retries), (1, 0))
+
+    def test_backoff_then_give_up(self):
+        failures = [requests.ConnectionError("reset"), requests.Timeout("slow"),
+                    FakeResponse(503), FakeResponse(502)]
+        scheduler = self.scheduler(failures, max_retries=3)
+        with self.assertRaises(SchedulerError) as raised:
+            scheduler.get({})
+        self.assertIn("502", str(raised.exception))
+        self.assertEqual((scheduler.requests, scheduler.retries), (4, 4))
+        self.assertEqual(scheduler.delay, 5.0)
+        # Each retry waits the (slowed) pause plus a jittered backoff of at most 4 × max_delay
+        starts = [at for at, _ in self.session.calls]
+        for gap in (b - a for a, b in zip(starts, starts[1:])):
+            self.assertGreaterEqual(gap, 0.8)
+            self.assertLessEqual(gap, 0.1 + 5.0 + 20.0)
+
+    def test_http_errors_that_are_not_transient_raise(self):
+        scheduler = self.scheduler([FakeResponse(404)])
+        with self.assertRaises(requests.HTTPError):
+            scheduler.get({})
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestRequestScheduler))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
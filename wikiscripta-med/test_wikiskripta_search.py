@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the WikiSkripta full-text index (wikiskripta_search.py).
+"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from wikiskripta_search import SearchIndex, build_index, build_match_query
+from wikiskripta_store import ArticleStore, save_aliases
+
+
+def article(title, text):
+    """Článek ve formátu, který ukládá downloader (hlavička, oddělovač, text)."""
+    return (f"# {title}\n\n> **Zdroj:** https://www.wikiskripta.eu/w/{title.replace(' ', '_')}  \n"
+            f"> **Licence:** CC BY 4.0\n\n---\n\n{text}\n")
+
+
+ARTICLES = {
+    "Cévní mozková příhoda": "Náhlá porucha prokrvení mozku, ischemická nebo hemoragická.",
+    "Infarkt myokardu": "Nekróza myokardu z ischemie. Infarkt se léčí perkutánní intervencí.",
+    "Pneumonie": "Zánět plicního parenchymu; komplikací může být infarkt plic.",
+    "Plicní embolie": "Embolie do plicnice. Infarkt plic, infarkt plic a znovu infarkt plic.",
+}
+
+
+class TestMatchQuery(unittest.TestCase):
+
+    def test_words_are_quoted_and_last_is_prefix(self):
+        self.assertEqual(build_match_query("infarkt myo"), '"infarkt" "myo"*')
+        self.assertEqual(build_match_query("  "), "")
+
+    def test_operators_lose_their_meaning(self):
+        self.assertEqual(build_match_query('srdce AND NOT "plíce" OR title:(x*)'),
+                         '"srdce" "AND" "NOT" "plíce" "OR" "title" "x"*')
+        self.assertEqual(build_match_query("NEAR(a b, 2) ^c -d"), '"NEAR" "a" "b" "2" "c" "d"*')
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.index = SearchIndex(self.root)
+        self.addCleanup(self.index.close)
+        for title, text in ARTICLES.items():
+            self.index.add(title, article(title, text), commit=False)
+        self.index.commit()
+
+    def titles(self, query, **kwargs):
+        return [h.title for h in self.index.search(query, **kwargs)]
+
+    def test_diacritics_and_case_are_ignored(self):
+        self.assertEqual(self.titles("cevni mozkova prihoda"), ["Cévní mozková příhoda"])
+        self.assertEqual(self.titles("NEKRÓZA"), ["Infarkt myokardu"])
+        # Poslední slovo je prefix: "plicni" najde i "plicního"
+        self.assertEqual(self.titles("plicni"), ["Plicní embolie", "Pneumonie"])
+
+    def test_bm25_ranks_title_matches_and_frequent_terms_first(self):
+        # Shoda v názvu > častá shoda v textu > jediná shoda v textu
+        self.assertEqual(self.titles("infarkt"), ["Infarkt myokardu", "Plicní embolie", "Pneumonie"])
+        scores = [h.score for h in self.index.search("infarkt")]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(self.titles("infarkt", limit=1), ["Infarkt myokardu"])
+
+    def test_snippet_highlights_matches_from_the_body(self):
+        hit = self.index.search("parenchymu")[0]
+        self.assertIn("**parenchymu**", hit.snippet)
+        self.assertNotIn("\n", hit.snippet)
+        # Hlavička článku (zdroj, licence) se neindexuje
+        self.assertEqual(self.titles("licence"), [])
+
+    def test_only_the_last_word_is_a_prefix(self):
+        self.assertEqual(self.titles("pneum"), ["Pneumonie"])
+        self.assertEqual(self.titles("zánět plicn"), ["Pneumonie"])
+        self.assertEqual(self.titles("zán plicního"), [])
+
+    def test_operators_in_user_input_do_not_fail(self):
+        for query in ('infarkt AND', 'NOT infarkt', '"infarkt', 'title:infarkt', 'NEAR(infarkt plic)',
+                      'infarkt OR', '(', '*', '-'):
+            with self.subTest(query=query):
+                self.index.search(query)
+        self.assertEqual(self.titles("infarkt OR pneumonie"), [])
+        self.assertEqual(self.titles("?!"), [])
+
+    def test_add_replace_and_remove(self):
+        self.index.add("Hypertenze", article("Hypertenze", "Vysoký krevní tlak."))
+        self.assertEqual(self.titles("krevni tlak"), ["Hypertenze"])
+        self.assertEqual(len(self.index), 5)
+
+        self.index.add("Hypertenze", article("Hypertenze", "Zvýšený systolický tlak."))
+        self.assertEqual(self.titles("krevni"), [])
+        self.assertEqual(self.titles("systolicky"), ["Hypertenze"])
+        self.assertEqual(len(self.index), 5)
+
+        self.index.remove("Hypertenze")
+        self.assertEqual(self.titles("systolicky"), [])
+        self.assertNotIn("Hypertenze", self.index)
+        self.assertEqual(len(self.index), 4)
+
+
+    def test_redirect_alias_puts_the_target_first(self):
+        save_aliases(self.root, {"IM": "AIM", "AIM": "Infarkt myokardu", "CMP": "Cévní mozková příhoda",
+                                 "Nekróza": "Infarkt myokardu", "Stará stránka": "Smazaný článek"})
+        hits = self.index.search("im")
+        self.assertEqual(hits[0].title, "Infarkt myokardu")
+        self.assertEqual(hits[0].snippet, "↪ přesměrováno z: IM")
+        self.assertGreater(hits[0].score, max((h.score for h in hits[1:]), default=0.0))
+
+        # Cíl, který by jinak nebyl mezi výsledky, i shoda bez diakritiky
+        self.assertEqual(self.titles("cmp"), ["Cévní mozková příhoda"])
+        self.assertEqual(self.titles("stara stranka"), [])
+        # Cíl je ve výsledcích jen jednou, i když odpovídá i textem
+        hits = self.index.search("nekroza")
+        self.assertEqual([(h.title, h.snippet) for h in hits], [("Infarkt myokardu", "↪ přesměrováno z: Nekróza")])
+        self.assertEqual(self.titles("infarkt"), ["Infarkt myokardu", "Plicní embolie", "Pneumonie"])
+
+
+class TestBuildIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+
+    def search(self, query):
+        with SearchIndex(self.root) as index:
+            return [h.title for h in index.search(query)], len(index)
+
+    def test_directory_rebuild_drops_deleted_articles(self):
+        for i, (title, text) in enumerate(ARTICLES.items()):
+            (self.root / f"clanek_{i}.md").write_text(article(title, text), encoding="utf-8")
+        (self.root / "IM.md").write_text("# IM\n\n*Přesměrování na: Infarkt myokardu*\n", encoding="utf-8")
+        self.assertEqual(build_index(self.root), 4)
+
+        (self.root / "clanek_1.md").unlink()
+        self.assertEqual(build_index(self.root), 3)
+        self.assertEqual(self.search("nekroza"), ([], 3))
+        self.assertEqual(self.search("pneumonie"), (["Pneumonie"], 3))
+
+    def test_packed_rebuild_drops_articles_not_in_the_store(self):
+        with ArticleStore(self.root) as store:
+            for title, text in ARTICLES.items():
+                store.put(title, article(title, text))
+        with SearchIndex(self.root) as index:
+            index.add("Smazaný článek", article("Smazaný článek", "Nekróza."))
+        self.assertEqual(build_index(self.root), 4)
+        self.assertEqual(self.search("nekroza"), (["Infarkt myokardu"], 4))
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestMatchQuery))
+    suite.addTests(loader.loadTestsFromTestCase(TestSearchIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestBuildIndex))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the packed WikiSkripta article store (wikiskripta_store.py).
+"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from wikiskripta_store import ArticleStore, is_packed, redirect_target, resolve_title
+
+ARTICLES = {
+    "Akutní infarkt myokardu": "# Akutní infarkt myokardu\n\nNekróza myokardu.",
+    "Infarkt plic": "# Infarkt plic\n\nPlicní embolie.",
+    "Čerstvý INFARKT": "# Čerstvý INFARKT\n\nText.",
+    "Pneumonie": "# Pneumonie\n\nZánět plic.",
+    "Úraz hlavy": "# Úraz hlavy\n\nKraniocerebrální poranění.",
+}
+
+
+class TestArticleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.store = ArticleStore(self.root)
+        self.addCleanup(self.store.close)
+        for title, markdown in ARTICLES.items():
+            self.store.put(title, markdown, revision=1)
+
+    def titles(self, **kwargs):
+        return [e.title for e in self.store.titles(**kwargs)]
+
+    def test_put_and_get(self):
+        self.assertTrue(is_packed(self.root))
+        self.assertEqual(self.store.get("Pneumonie"), ARTICLES["Pneumonie"])
+        self.assertIsNone(self.store.get("Neexistuje"))
+        self.assertIn("Úraz hlavy", self.store)
+        self.assertEqual(len(self.store), 5)
+        self.assertEqual(self.store.total_words(), sum(len(m.split()) for m in ARTICLES.values()))
+
+    def test_overwrite_keeps_counts_and_tracks_waste(self):
+        old = self.store.entry("Pneumonie")
+        self.store.put("Pneumonie", "# Pneumonie\n\nKomunitní zánět plic.", revision=2)
+        self.assertEqual(len(self.store), 5)
+        self.assertEqual(self.store.entry("Pneumonie").revision, 2)
+        self.assertEqual(self.store.get("Pneumonie"), "# Pneumonie\n\nKomunitní zánět plic.")
+        self.assertEqual(self.store.wasted_bytes(), old.length)
+        self.assertEqual(self.store.total_words(), sum(len(m.split()) for m in ARTICLES.values()) + 1)
+
+    def test_prefix_listing(self):
+        self.assertEqual(self.titles(prefix="Infarkt"), ["Infarkt plic"])
+        self.assertEqual(self.store.count("Infarkt"), 1)
+        self.assertEqual(self.titles(limit=2, offset=1), sorted(ARTICLES)[1:3])
+
+    def test_contains_ignores_case_anywhere_in_the_title(self):
+        expected = ["Akutní infarkt myokardu", "Infarkt plic", "Čerstvý INFARKT"]
+        self.assertEqual(self.titles(contains="infarkt"), expected)
+        self.assertEqual(self.store.count(contains="infarkt"), 3)
+        # Velikost písmen i u znaků mimo ASCII
+        self.assertEqual(self.titles(contains="čERSTVÝ"), ["Čerstvý INFARKT"])
+        self.assertEqual(self.titles(contains="ÚRAZ"), ["Úraz hlavy"])
+        self.assertEqual(self.titles(contains="infarkt", limit=1, offset=1), ["Infarkt plic"])
+        self.assertEqual(self.titles(prefix="Akutní", contains="MYOKARD"), ["Akutní infarkt myokardu"])
+        self.assertEqual(self.store.count(contains="xyz"), 0)
+
+    def test_reopen_reads_the_catalog(self):
+        self.store.close()
+        with ArticleStore(self.root) as store:
+            self.assertEqual(len(store), 5)
+            self.assertEqual([e.title for e in store.titles(contains="plic")], ["Infarkt plic"])
+
+
+class TestRedirects(unittest.TestCase):
+
+    def test_redirect_target(self):
+        self.assertEqual(redirect_target("#PŘESMĚRUJ [[Infarkt myokardu]]"), "Infarkt myokardu")
+        self.assertEqual(redirect_target("#redirect [[Pneumonie#Léčba|léčba]]"), "Pneumonie")
+        self.assertIsNone(redirect_target("Běžný text"))
+
+    def test_resolve_title_follows_chains_and_stops_on_cycles(self):
+        aliases = {"IM": "Infarkt", "Infarkt": "Akutní infarkt myokardu", "A": "B", "B": "A"}
+        self.assertEqual(resolve_title("IM", aliases), "Akutní infarkt myokardu")
+        self.assertEqual(resolve_title("A", aliases), "B")
+        self.assertEqual(resolve_title("Pneumonie", aliases), "Pneumonie")
+
+
+def run_tests():
+    """Run all unit tests and return results."""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestArticleStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestRedirects))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == "__main__":
+    success = run_tests()
+    sys.exit(0 if success else 1)
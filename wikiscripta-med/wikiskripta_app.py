@@ -14,6 +14,13 @@ import requests
 from pathlib import Path
 from datetime import datetime
 
+from wikiskripta_downloader import CATEGORY_DEPTH, get_category_titles, get_title_redirects
+from wikiskripta_scheduler import RequestScheduler
+from wikiskripta_search import SearchIndex, build_index, index_exists
+from wikiskripta_store import (ALIASES_NAME, ArticleStore, is_packed, load_aliases,
+                               load_categories, merge_categories, redirect_target,
+                               save_aliases, save_categories)
+
 # ─── Konfigurace ─────────────────────────────────────────────────────────────
 API_URL       = "https://www.wikiskripta.eu/api.php"
 PROGRESS_FILE = Path("wikiskripta_progress.json")
@@ -137,42 +144,82 @@ def wikitext_to_markdown(wikitext: str, title: str) -> str:
     return header + text.strip() + "\n"
 
 
-def run_download(output_dir: Path, delay: float, max_pages: int | None):
+def run_download(output_dir: Path, delay_range: tuple, max_pages: int | None, packed: bool = False,
+                 categories: list | None = None, depth: int = CATEGORY_DEPTH):
     """Spustí stahování – voláno v samostatném threadu."""
     session = requests.Session()
     session.headers.update({"User-Agent": "WikiSkriptaDownloader/1.0 (streamlit)"})
+    # Adaptivní pauza v rozsahu ze slideru, respektuje Retry-After a maxlag
+    scheduler = RequestScheduler(session, API_URL,
+                                 min_delay=delay_range[0], max_delay=delay_range[1])
     output_dir.mkdir(parents=True, exist_ok=True)
+    store = ArticleStore(output_dir) if packed else None
+    index = SearchIndex(output_dir)
+    aliases = load_aliases(output_dir)
+
+    def close_outputs():
+        if store is not None:
+            store.close()
+        index.close()
+        save_aliases(output_dir, aliases)
 
     prog = read_progress()
     prog.update({"status": "running", "current": 0, "success": 0,
-                 "errors": 0, "skipped": 0, "log": [],
+                 "errors": 0, "skipped": 0, "redirects": 0, "log": [],
                  "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                  "finished_at": None, "output_dir": str(output_dir)})
     write_progress(prog)
 
     # Získej seznam stránek
     titles = []
-    params = {"action": "query", "list": "allpages",
-              "aplimit": 50, "apnamespace": 0, "format": "json"}
+    params = {"action": "query", "list": "allpages", "aplimit": 50, "apnamespace": 0,
+              "apfilterredir": "nonredirects", "format": "json"}
+    # Přesměrování – jen cíle přes generator + redirects, obsah se nestahuje
+    redir_params = {"action": "query", "generator": "allpages", "gaplimit": 50,
+                    "gapnamespace": 0, "gapfilterredir": "redirects",
+                    "redirects": 1, "format": "json"}
     try:
-        while True:
-            resp = session.get(API_URL, params=params, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-            titles.extend(p["title"] for p in data["query"]["allpages"])
-            prog["total"] = len(titles)
+        if categories:
+            # Jen stromy vybraných kategorií a přesměrování na jejich stránky
+            found = get_category_titles(categories, depth, max_pages,
+                                        scheduler=scheduler)
+            titles = sorted(found)[:max_pages] if max_pages else sorted(found)
+            save_categories(output_dir, merge_categories(load_categories(output_dir), found))
+            found_aliases = get_title_redirects(titles, scheduler=scheduler)
+            aliases.update(found_aliases)
+            prog["redirects"] = len(found_aliases)
             write_progress(prog)
-            if "continue" not in data:
-                break
-            params["apcontinue"] = data["continue"]["apcontinue"]
-            if max_pages and len(titles) >= max_pages:
-                titles = titles[:max_pages]
-                break
-            time.sleep(delay)
+        else:
+            while True:
+                data = scheduler.get(params)
+                titles.extend(p["title"] for p in data["query"]["allpages"])
+                prog["total"] = len(titles)
+                write_progress(prog)
+                if "continue" not in data:
+                    break
+                params["apcontinue"] = data["continue"]["apcontinue"]
+                if max_pages and len(titles) >= max_pages:
+                    titles = titles[:max_pages]
+                    break
+            n_redirects = 0
+            while True:
+                data = scheduler.get(redir_params)
+                for r in data.get("query", {}).get("redirects", []):
+                    aliases[r["from"]] = r["to"]
+                    n_redirects += 1
+                prog["redirects"] = n_redirects
+                write_progress(prog)
+                if "continue" not in data:
+                    break
+                redir_params.update(data["continue"])
+                if max_pages and n_redirects >= max_pages:
+                    break
+        save_aliases(output_dir, aliases)
     except Exception as e:
         prog["status"] = "error"
         prog["log"].append(f"FATAL: {e}")
         write_progress(prog)
+        close_outputs()
         return
 
     prog["total"] = len(titles)
@@ -185,38 +232,50 @@ def run_download(output_dir: Path, delay: float, max_pages: int | None):
             prog["status"] = "stopped"
             prog["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             write_progress(prog)
+            close_outputs()
             return
 
         filename = output_dir / f"{sanitize_filename(title)}.md"
         prog["current"] = i
         prog["current_title"] = title
 
-        if filename.exists():
+        if (title in store) if packed else filename.exists():
             prog["skipped"] += 1
             write_progress(prog)
             continue
 
         try:
             p2 = {"action": "query", "titles": title, "prop": "revisions",
-                  "rvprop": "content", "rvslots": "main", "format": "json"}
-            r2 = session.get(API_URL, params=p2, timeout=30)
-            r2.raise_for_status()
-            page = next(iter(r2.json()["query"]["pages"].values()))
+                  "rvprop": "content|ids", "rvslots": "main", "format": "json"}
+            page = next(iter(scheduler.get(p2)["query"]["pages"].values()))
             if "missing" in page:
                 prog["errors"] += 1
                 write_progress(prog)
                 continue
-            wikitext = page["revisions"][0]["slots"]["main"]["*"]
+            revision = page["revisions"][0]
+            wikitext = revision["slots"]["main"]["*"]
+            target = redirect_target(wikitext)
+            if target is not None:
+                aliases[title] = target
+                prog["redirects"] += 1
+                write_progress(prog)
+                continue
             md = wikitext_to_markdown(wikitext, title)
-            filename.write_text(md, encoding="utf-8")
+            if packed:
+                store.put(title, md, revision=revision.get("revid"))
+            else:
+                filename.write_text(md, encoding="utf-8")
+            index.add(title, md)
             prog["success"] += 1
         except Exception as e:
             prog["errors"] += 1
             entry = f"[{i}] CHYBA: {title[:40]} – {e}"
             prog["log"] = (prog["log"] + [entry])[-50:]  # max 50 záznamů
 
+        prog["delay"] = round(scheduler.delay, 3)
         write_progress(prog)
-        time.sleep(delay)
+
+    close_outputs()
 
     prog["status"] = "done"
     prog["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -227,8 +286,19 @@ def run_download(output_dir: Path, delay: float, max_pages: int | None):
 with st.sidebar:
     st.markdown("## ⚙️ Nastavení")
     output_dir_str = st.text_input("📁 Výstupní složka", value=str(DEFAULT_OUT))
-    delay = st.slider("⏱ Pauza mezi requesty (s)", 0.1, 2.0, 0.3, 0.05,
-                      help="Respektuj server – nedoporučuji pod 0.2 s")
+    delay_range = st.slider("⏱ Rozsah pauzy mezi requesty (s)", 0.05, 5.0, (0.1, 2.0), 0.05,
+                            help="Pauza se přizpůsobuje odezvě serveru v tomto rozsahu; "
+                                 "Retry-After a maxlag se respektují vždy")
+    packed_mode = st.toggle("📦 Zabalený formát (pack + katalog)", value=False,
+                            help="Ukládá články do jednoho souboru s indexem – "
+                                 "rychlé procházení i při desítkách tisíc článků")
+    categories_str = st.text_area("🗂 Jen kategorie (jedna na řádek)", value="",
+                                  placeholder="Kardiologie\nVeřejné zdravotnictví",
+                                  help="Prázdné = celá wiki. Jinak se stáhnou jen stránky "
+                                       "ze stromů uvedených kategorií.")
+    categories = [c.strip() for c in categories_str.splitlines() if c.strip()]
+    category_depth = st.slider("Hloubka podkategorií", 0, 6, CATEGORY_DEPTH,
+                               disabled=not categories)
     test_mode = st.toggle("🧪 Testovací režim", value=False)
     max_pages = None
     if test_mode:
@@ -252,9 +322,27 @@ prog = read_progress()
 status = prog.get("status", "idle")
 output_dir = Path(output_dir_str)
 
-# Počet stažených souborů na disku
-md_files = sorted(output_dir.glob("*.md")) if output_dir.exists() else []
-n_files = len([f for f in md_files if f.name != "_INDEX.md"])
+
+@st.cache_resource
+def open_store(path: str) -> ArticleStore:
+    """Jedno sdílené připojení ke katalogu pro všechna překreslení."""
+    return ArticleStore(Path(path))
+
+
+@st.cache_resource
+def open_index(path: str) -> SearchIndex:
+    return SearchIndex(Path(path))
+
+
+# Počet stažených článků – z katalogu (O(1)), jinak z adresáře
+store = open_store(str(output_dir)) if is_packed(output_dir) else None
+index = open_index(str(output_dir)) if index_exists(output_dir) else None
+if store is not None:
+    md_files = []
+    n_files = len(store)
+else:
+    md_files = sorted(output_dir.glob("*.md")) if output_dir.exists() else []
+    n_files = len([f for f in md_files if f.name != "_INDEX.md"])
 
 tab_down, tab_files, tab_help = st.tabs(["📥 Stahování", "📁 Prohlížeč souborů", "📖 Jak použít"])
 
@@ -293,7 +381,8 @@ with tab_down:
                 PROGRESS_FILE.unlink(missing_ok=True)
                 t = threading.Thread(
                     target=run_download,
-                    args=(output_dir, delay, max_pages if test_mode else None),
+                    args=(output_dir, delay_range, max_pages if test_mode else None, packed_mode,
+                          categories, category_depth),
                     daemon=True,
                 )
                 t.start()
@@ -321,7 +410,8 @@ with tab_down:
         st.progress(0.0, text="Čeká na spuštění…")
 
     if status == "running" and prog.get("current_title"):
-        st.caption(f"📄 Zpracovávám: *{prog['current_title']}*")
+        st.caption(f"📄 Zpracovávám: *{prog['current_title']}*"
+                   + (f"  |  ⏱ pauza {prog['delay']:.2f} s" if prog.get("delay") is not None else ""))
 
     st.write("")
 
@@ -348,6 +438,10 @@ with tab_down:
             <div class="metric-value">{n_files:,}</div>
         </div>""", unsafe_allow_html=True)
 
+    if prog.get("redirects"):
+        st.caption(f"↪ Přesměrování: {prog['redirects']:,} – uložena jako aliasy "
+                   f"v `{ALIASES_NAME}`, ne jako samostatné soubory")
+
     # Log chyb
     log_entries = prog.get("log", [])
     if log_entries:
@@ -375,29 +469,73 @@ with tab_files:
 
         with col_list:
             search = st.text_input("🔍 Hledat článek", placeholder="např. Pneumonie")
-
-            # Filtruj soubory
-            display_files = [f for f in md_files if f.name != "_INDEX.md"]
-            if search:
-                display_files = [f for f in display_files
-                                 if search.lower() in f.stem.lower()]
-
-            st.caption(f"Zobrazuji {min(len(display_files), 200)} z {len(display_files)} výsledků")
+            fulltext = st.toggle("📝 Hledat v textu článků", value=index is not None,
+                                 disabled=index is None,
+                                 help="Fulltext bez ohledu na diakritiku, řazeno podle relevance")
+            if index is None or len(index) < n_files:
+                if st.button("🗂 Zaindexovat články", disabled=status == "running"):
+                    with st.spinner("Indexuji…"):
+                        open_index.clear()
+                        build_index(output_dir)
+                    st.rerun()
 
             # Inicializuj výběr
             if "selected_file" not in st.session_state:
                 st.session_state.selected_file = None
+            if "selected_title" not in st.session_state:
+                st.session_state.selected_title = None
+
+            if search and fulltext and index is not None:
+                # Dotaz jen nad indexem – soubory s články se nečtou
+                t0 = time.perf_counter()
+                hits = index.search(search, limit=200)
+                st.caption(f"{len(hits)} výsledků za {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+                for h in hits:
+                    if st.button(h.title[:45], key=f"hit_{h.title}", use_container_width=True):
+                        st.session_state.selected_title = h.title
+                        st.session_state.selected_file = (
+                            output_dir / f"{sanitize_filename(h.title)}.md")
+                    st.caption(h.snippet)
+            elif store is not None:
+                # Podřetězec v názvech bez ohledu na velikost písmen, jen nad
+                # katalogem – bez procházení adresáře a čtení článků
+                entries = store.titles(contains=search, limit=200)
+                n_matches = store.count(contains=search)
+                st.caption(f"Zobrazuji {len(entries)} z {n_matches} výsledků")
+
+                for e in entries:
+                    if st.button(e.title[:45], key=f"title_{e.title}", use_container_width=True):
+                        st.session_state.selected_title = e.title
+            else:
+                # Filtruj soubory
+                display_files = [f for f in md_files if f.name != "_INDEX.md"]
+                if search:
+                    display_files = [f for f in display_files
+                                     if search.lower() in f.stem.lower()]
+
+                st.caption(f"Zobrazuji {min(len(display_files), 200)} z {len(display_files)} výsledků")
 
-            for f in display_files[:200]:
-                label = f.stem[:45]
-                if st.button(label, key=f"file_{f.name}", use_container_width=True):
-                    st.session_state.selected_file = f
+                for f in display_files[:200]:
+                    label = f.stem[:45]
+                    if st.button(label, key=f"file_{f.name}", use_container_width=True):
+                        st.session_state.selected_file = f
 
         with col_preview:
-            sel = st.session_state.get("selected_file")
-            if sel and sel.exists():
-                content = sel.read_text(encoding="utf-8")
-                word_count = len(content.split())
+            content = None
+            if store is not None:
+                sel_entry = (store.entry(st.session_state.selected_title)
+                             if st.session_state.get("selected_title") else None)
+                if sel_entry:
+                    content = store.read(sel_entry)
+                    word_count = sel_entry.words
+            else:
+                sel = st.session_state.get("selected_file")
+                if sel and sel.exists():
+                    content = sel.read_text(encoding="utf-8")
+                    word_count = len(content.split())
+
+            if content is not None:
                 char_count = len(content)
                 c1, c2 = st.columns(2)
                 c1.metric("Slov", f"{word_count:,}")
@@ -11,30 +11,44 @@ Použití:
     python3 wikiskripta_downloader.py              # stáhne vše
     python3 wikiskripta_downloader.py --test 50    # testovací běh (50 stránek)
     python3 wikiskripta_downloader.py --resume     # pokračuje od posledního bodu
+    python3 wikiskripta_downloader.py --packed     # zabalený formát (pack + katalog)
+    python3 wikiskripta_downloader.py --category "Kardiologie" --depth 2
+                                                   # jen stromy vybraných kategorií
 
 Výstup: složka ./wikiskripta_markdown/ s .md soubory
+        (s --packed: articles.pack + catalog.sqlite, viz wikiskripta_store.py)
+        a aliases.json s mapou přesměrování (zdroj → cíl)
 """
 
 import requests
 import re
 import sys
-import time
 import argparse
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 
+from wikiskripta_scheduler import RequestScheduler
+from wikiskripta_search import SearchIndex
+from wikiskripta_store import (ALIASES_NAME, CATEGORIES_NAME, ArticleStore, load_aliases,
+                               load_categories, merge_categories, redirect_target,
+                               save_aliases, save_categories)
+
 # ── Konfigurace ─────────────────────────────────────────────────────────────
 API_URL    = "https://www.wikiskripta.eu/api.php"
 OUTPUT_DIR = Path("wikiskripta_markdown")
 LOG_FILE   = Path("wikiskripta_download.log")
-DELAY      = 0.3    # sekund mezi requesty
+MIN_DELAY  = 0.05   # nejkratší pauza mezi requesty (s) – plánovač se přizpůsobí
+MAX_DELAY  = 5.0    # nejdelší pauza mezi requesty (s)
 BATCH_SIZE = 50     # stránek na jeden seznam-request
+CATEGORY_DEPTH = 2  # výchozí hloubka zanoření podkategorií
 # ────────────────────────────────────────────────────────────────────────────
 
 SESSION = requests.Session()
 SESSION.headers.update({
     "User-Agent": "WikiSkriptaDownloader/1.0 (educational KB; petr.sovadina9@gmail.com)"
 })
+SCHEDULER = RequestScheduler(SESSION, API_URL, min_delay=MIN_DELAY, max_delay=MAX_DELAY)
 
 
 # ── Pomocné funkce ───────────────────────────────────────────────────────────
@@ -135,15 +149,14 @@ def get_all_page_titles(max_pages=None) -> list:
         "list": "allpages",
         "aplimit": BATCH_SIZE,
         "apnamespace": 0,
+        "apfilterredir": "nonredirects",
         "format": "json",
     }
     print("Stahuji seznam stranck...")
     batch = 0
 
     while True:
-        resp = SESSION.get(API_URL, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
+        data = SCHEDULER.get(params)
         titles.extend(p["title"] for p in data["query"]["allpages"])
         batch += 1
 
@@ -158,37 +171,171 @@ def get_all_page_titles(max_pages=None) -> list:
             titles = titles[:max_pages]
             break
 
-        time.sleep(DELAY)
-
     print(f"Celkem stranck: {len(titles)}\n")
     return titles
 
 
-def get_page_wikitext(title: str):
+def category_title(name: str) -> str:
+    """Doplní prefix jmenného prostoru kategorií, pokud chybí."""
+    name = name.strip()
+    if name.split(":", 1)[0] in ("Kategorie", "Category"):
+        return name
+    return f"Kategorie:{name}"
+
+
+def get_category_titles(categories, max_depth=CATEGORY_DEPTH, max_pages=None,
+                        scheduler=SCHEDULER) -> dict:
+    """Projde stromy kategorií do šířky a vrátí {název stránky: [kategoriové cesty]}.
+
+    Podkategorie se zanořují nejvýš do ``max_depth`` úrovní pod kořenovou
+    kategorií; každá kategorie se navštíví jen jednou, takže cykly ve
+    stromu kategorií (na wiki běžné) nevedou k zacyklení.
+    """
+    pages = {}
+    visited = set()
+    queue = deque((category_title(c), [category_title(c)], 0) for c in categories)
+    print(f"Prochazim kategorie (hloubka {max_depth})...")
+
+    while queue:
+        category, path, depth = queue.popleft()
+        if category in visited:
+            continue
+        visited.add(category)
+        path_str = " > ".join(path)
+
+        params = {
+            "action": "query",
+            "list": "categorymembers",
+            "cmtitle": category,
+            "cmtype": "page|subcat",
+            "cmnamespace": "0|14",
+            "cmlimit": BATCH_SIZE,
+            "format": "json",
+        }
+        while True:
+            data = scheduler.get(params)
+            for member in data["query"]["categorymembers"]:
+                if member["ns"] == 14:
+                    if depth < max_depth and member["title"] not in visited:
+                        queue.append((member["title"], path + [member["title"]], depth + 1))
+                else:
+                    known = pages.setdefault(member["title"], [])
+                    if path_str not in known:
+                        known.append(path_str)
+
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+
+        if len(visited) % 20 == 0:
+            print(f"   ... {len(visited)} kategorii, {len(pages)} stranek")
+        if max_pages and len(pages) >= max_pages:
+            break
+
+    print(f"Kategorii: {len(visited)}, stranek: {len(pages)}\n")
+    return pages
+
+
+def get_redirect_aliases(max_pages=None) -> dict:
+    """Mapa přesměrování zdroj → cíl bez stahování obsahu přesměrovacích stránek.
+
+    Generátor allpages vybere jen přesměrování a parametr ``redirects``
+    nechá API rovnou vrátit jejich cíle.
+    """
+    aliases = {}
+    params = {
+        "action": "query",
+        "generator": "allpages",
+        "gaplimit": BATCH_SIZE,
+        "gapnamespace": 0,
+        "gapfilterredir": "redirects",
+        "redirects": 1,
+        "format": "json",
+    }
+    print("Stahuji seznam presmerovani...")
+
+    while True:
+        data = SCHEDULER.get(params)
+        for r in data.get("query", {}).get("redirects", []):
+            aliases[r["from"]] = r["to"]
+
+        if "continue" not in data:
+            break
+        params.update(data["continue"])
+
+        if max_pages and len(aliases) >= max_pages:
+            break
+
+    print(f"Celkem presmerovani: {len(aliases)}\n")
+    return aliases
+
+
+def get_title_redirects(titles, scheduler=SCHEDULER) -> dict:
+    """Mapa přesměrování zdroj → cíl jen pro zadané cílové stránky.
+
+    ``prop=redirects`` vrací přesměrování vedoucí na dávku až BATCH_SIZE
+    stránek, takže počet requestů roste s výběrem, ne s celou wiki.
+    """
+    aliases = {}
+    titles = list(titles)
+    print("Stahuji presmerovani na vybrane stranky...")
+
+    for start in range(0, len(titles), BATCH_SIZE):
+        params = {
+            "action": "query",
+            "titles": "|".join(titles[start:start + BATCH_SIZE]),
+            "prop": "redirects",
+            "rdprop": "title",
+            "rdnamespace": 0,
+            "rdlimit": "max",
+            "format": "json",
+        }
+        while True:
+            data = scheduler.get(params)
+            for page in data.get("query", {}).get("pages", {}).values():
+                for r in page.get("redirects", []):
+                    aliases[r["title"]] = page["title"]
+
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+
+    print(f"Celkem presmerovani: {len(aliases)}\n")
+    return aliases
+
+
+def get_page_revision(title: str):
+    """Vrátí (wikitext, revid) aktuální revize stránky, nebo None."""
     params = {
         "action": "query",
         "titles": title,
         "prop": "revisions",
-        "rvprop": "content",
+        "rvprop": "content|ids",
         "rvslots": "main",
         "format": "json",
     }
-    resp = SESSION.get(API_URL, params=params, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
+    data = SCHEDULER.get(params)
     page = next(iter(data["query"]["pages"].values()))
     if "missing" in page:
         return None
     try:
-        return page["revisions"][0]["slots"]["main"]["*"]
+        revision = page["revisions"][0]
+        return revision["slots"]["main"]["*"], revision.get("revid")
     except (KeyError, IndexError):
         return None
 
 
+def get_page_wikitext(title: str):
+    page = get_page_revision(title)
+    return page[0] if page else None
+
+
 # ── Hlavní logika ────────────────────────────────────────────────────────────
 
-def download_all(max_pages=None):
+def download_all(max_pages=None, packed=False, categories=None, depth=CATEGORY_DEPTH):
     OUTPUT_DIR.mkdir(exist_ok=True)
+    store = ArticleStore(OUTPUT_DIR) if packed else None
+    index = SearchIndex(OUTPUT_DIR)
     errors = []
 
     print("=" * 60)
@@ -197,53 +344,83 @@ def download_all(max_pages=None):
     print(f"  Zahajeno:        {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     if max_pages:
         print(f"  Limit:           {max_pages} stranck (testovaci rezim)")
+    if packed:
+        print(f"  Format:          pack + katalog")
+    if categories:
+        print(f"  Kategorie:       {', '.join(categories)} (hloubka {depth})")
     print("=" * 60 + "\n")
 
-    titles = get_all_page_titles(max_pages)
+    if categories:
+        found = get_category_titles(categories, depth, max_pages)
+        titles = sorted(found)[:max_pages] if max_pages else sorted(found)
+        save_categories(OUTPUT_DIR, merge_categories(load_categories(OUTPUT_DIR), found))
+    else:
+        titles = get_all_page_titles(max_pages)
     total   = len(titles)
     success = 0
     skipped = 0
-    redirects = 0
+
+    # Přesměrování → aliases.json (žádné stub soubory ani stahování obsahu)
+    # (s kategoriemi jen přesměrování na vybrané stránky)
+    aliases = load_aliases(OUTPUT_DIR)
+    aliases.update(get_title_redirects(titles) if categories else get_redirect_aliases(max_pages))
+    save_aliases(OUTPUT_DIR, aliases)
 
     for i, title in enumerate(titles, 1):
         filename = OUTPUT_DIR / f"{sanitize_filename(title)}.md"
 
         # Resume podpora – přeskočit existující
-        if filename.exists():
+        if (title in store) if packed else filename.exists():
             skipped += 1
             continue
 
         try:
-            wikitext = get_page_wikitext(title)
-            if wikitext is None:
+            page = get_page_revision(title)
+            if page is None:
                 errors.append(f"MISSING\t{title}")
                 continue
+            wikitext, revid = page
 
-            markdown = wikitext_to_markdown(wikitext, title)
+            # Stránka se mezitím mohla změnit na přesměrování
+            target = redirect_target(wikitext)
+            if target is not None:
+                aliases[title] = target
+                continue
 
-            # Počítej přesměrování zvlášť
-            if "*Přesměrování na:" in markdown:
-                redirects += 1
+            markdown = wikitext_to_markdown(wikitext, title)
 
-            filename.write_text(markdown, encoding="utf-8")
+            if packed:
+                store.put(title, markdown, revision=revid)
+            else:
+                filename.write_text(markdown, encoding="utf-8")
+            index.add(title, markdown)
             success += 1
 
             if i % 200 == 0 or i <= 3:
                 pct = i / total * 100
-                print(f"[{i:>5}/{total}] {pct:5.1f}%  OK: {title[:55]}")
+                print(f"[{i:>5}/{total}] {pct:5.1f}%  OK: {title[:55]}  "
+                      f"(pauza {SCHEDULER.delay:.2f} s)")
 
         except Exception as e:
             errors.append(f"ERROR\t{title}\t{e}")
             print(f"  CHYBA [{i}/{total}]: {title[:40]} - {e}", file=sys.stderr)
 
-        time.sleep(DELAY)
+    if store is not None:
+        store.close()
+    index.close()
+    save_aliases(OUTPUT_DIR, aliases)
 
     # ── Souhrn ──────────────────────────────────────────────────────────────
     print("\n" + "=" * 60)
     print(f"  Uspesne ulozeno:  {success}")
-    print(f"  Presmerovani:     {redirects} (zahrnuty v uspesnych)")
+    print(f"  Presmerovani:     {len(aliases)} (aliasy v {ALIASES_NAME})")
+    if categories:
+        print(f"  Kategorie:        cesty clanku v {CATEGORIES_NAME}")
     print(f"  Preskoceno:       {skipped} (uz existovaly)")
     print(f"  Chyby:            {len(errors)}")
+    stats = SCHEDULER.stats()
+    print(f"  Requesty:         {stats['requests']} (opakovani {stats['retries']}, "
+          f"posledni pauza {stats['delay']} s)")
     print(f"  Slozka:           {OUTPUT_DIR.resolve()}")
     print("=" * 60)
 
@@ -260,7 +437,7 @@ def download_all(max_pages=None):
         f"| Stranck celkem | {success} |\n"
         f"| Zdroj | https://www.wikiskripta.eu |\n"
         f"| Licence | Creative Commons BY 4.0 |\n"
-        f"| Format | Markdown (.md) |\n\n"
+        f"| Format | {'Pack + katalog (articles.pack, catalog.sqlite)' if packed else 'Markdown (.md)'} |\n\n"
         f"## Jak vektorizovat\n\n"
         f"```python\n"
         f"# Příklad s LangChain\n"
@@ -280,5 +457,19 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Stahuje WikiSkripta jako Markdown")
     parser.add_argument("--test", type=int, metavar="N",
                         help="Testovaci rezim: stahne jen prvnich N stranck")
+    parser.add_argument("--packed", action="store_true",
+                        help="Ukladat do packu s katalogem misto jednotlivych .md souboru")
+    parser.add_argument("--category", action="append", metavar="NAZEV",
+                        help="Stahnout jen stranky ze stromu kategorie (lze opakovat)")
+    parser.add_argument("--depth", type=int, default=CATEGORY_DEPTH,
+                        help=f"Max. hloubka podkategorii (vychozi {CATEGORY_DEPTH})")
+    parser.add_argument("--min-delay", type=float, default=MIN_DELAY,
+                        help=f"Nejkratsi pauza mezi requesty v s (vychozi {MIN_DELAY})")
+    parser.add_argument("--max-delay", type=float, default=MAX_DELAY,
+                        help=f"Nejdelsi pauza mezi requesty v s (vychozi {MAX_DELAY})")
     args = parser.parse_args()
-    download_all(max_pages=args.test)
+    SCHEDULER.min_delay = args.min_delay
+    SCHEDULER.max_delay = args.max_delay
+    SCHEDULER.delay = min(max(SCHEDULER.delay, args.min_delay), args.max_delay)
+    download_all(max_pages=args.test, packed=args.packed,
+                 categories=args.category, depth=args.depth)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Adaptive MediaWiki Request Scheduler
+====================================
+Sdílený plánovač requestů pro oba crawlery (CLI downloader i Streamlit app).
+
+Místo pevné pauzy mezi requesty se rozestup přizpůsobuje serveru:
+
+- rychlé odpovědi → pauza se postupně zkracuje (až na ``min_delay``),
+- pomalé odpovědi nebo chyby → pauza se prodlouží (až na ``max_delay``),
+- ``Retry-After`` (HTTP 429/503) a MediaWiki ``maxlag`` chyby → čeká se
+  přesně tak dlouho, jak server žádá,
+- přechodné chyby (timeout, spojení, 5xx) → opakování s exponenciálním
+  backoffem a náhodným jitterem,
+- ostatní MediaWiki chyby (``{"error": ...}``) → ``SchedulerError`` s kódem
+  a popisem chyby, bez opakování.
+
+Použití:
+    scheduler = RequestScheduler(session, API_URL, min_delay=0.1, max_delay=2.0)
+    data = scheduler.get({"action": "query", ...})
+"""
+
+import random
+import time
+from typing import Optional
+
+import requests
+
+# ── Konfigurace ─────────────────────────────────────────────────────────────
+MIN_DELAY    = 0.05   # nejkratší pauza mezi requesty (s)
+MAX_DELAY    = 5.0    # nejdelší pauza mezi requesty (s)
+START_DELAY  = 0.3    # počáteční pauza – původní pevné DELAY
+MAXLAG       = 5      # https://www.mediawiki.org/wiki/Manual:Maxlag_parameter
+FAST_LATENCY = 0.3    # odpověď rychlejší než tohle → zrychlit
+SLOW_LATENCY = 1.5    # odpověď pomalejší než tohle → zpomalit
+MAX_RETRIES  = 5
+# ────────────────────────────────────────────────────────────────────────────
+
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+class SchedulerError(Exception):
+    """Request se nepodařil ani po všech opakováních, nebo API vrátilo chybu."""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class RequestScheduler:
+    """Plánovač GET requestů na MediaWiki API s adaptivní rychlostí."""
+
+    def __init__(self, session: requests.Session, api_url: str,
+                 min_delay: float = MIN_DELAY, max_delay: float = MAX_DELAY,
+                 start_delay: float = START_DELAY, maxlag: Optional[int] = MAXLAG,
+                 max_retries: int = MAX_RETRIES, timeout: float = 30,
+                 sleep=time.sleep, clock=time.monotonic):
+        self.session = session
+        self.api_url = api_url
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min(max(start_delay, min_delay), max_delay)
+        self.maxlag = maxlag
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._sleep = sleep
+        self._clock = clock
+        self._next_at = 0.0
+        self.requests = 0
+        self.retries = 0
+        self.waited = 0.0
+
+    # ── Řízení rychlosti ────────────────────────────────────────────────────
+
+    def _wait_turn(self):
+        wait = self._next_at - self._clock()
+        if wait > 0:
+            self._sleep(wait)
+            self.waited += wait
+
+    def _schedule_next(self, extra: float = 0.0):
+        self._next_at = self._clock() + self.delay + extra
+
+    def _speed_up(self):
+        self.delay = max(self.min_delay, self.delay * 0.8)
+
+    def _slow_down(self, factor: float = 2.0):
+        self.delay = min(self.max_delay, max(self.delay, self.min_delay) * factor)
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponenciální backoff s plným jitterem."""
+        return random.uniform(0, min(self.max_delay * 4, self.delay * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(resp) -> Optional[float]:
+        value = resp.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    # ── Request ─────────────────────────────────────────────────────────────
+
+    def get(self, params: dict) -> dict:
+        """Provede GET na API a vrátí JSON; opakuje přechodné chyby."""
+        params = dict(params)
+        if self.maxlag is not None:
+            params.setdefault("maxlag", self.maxlag)
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            self._wait_turn()
+            started = self._clock()
+            self.requests += 1
+            try:
+                resp = self.session.get(self.api_url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                self._slow_down()
+                self._schedule_next(self._backoff(attempt))
+                self.retries += 1
+                continue
+            latency = self._clock() - started
+
+            if resp.status_code in TRANSIENT_STATUS:
+                last_error = requests.HTTPError(f"{resp.status_code} {resp.reason}", response=resp)
+                self._slow_down()
+                retry_after = self._retry_after(resp)
+                self._schedule_next(retry_after if retry_after is not None
+                                    else self._backoff(attempt))
+                self.retries += 1
+                continue
+            resp.raise_for_status()
+
+            data = resp.json()
+            error = data.get("error") if isinstance(data, dict) else None
+            if error and error.get("code") == "maxlag":
+                # Replikace databáze nestíhá – server žádá o strpení
+                last_error = SchedulerError(f"maxlag: {error.get('info', '')}", "maxlag")
+                self._slow_down(1.5)
+                retry_after = self._retry_after(resp)
+                self._schedule_next(retry_after if retry_after is not None else 5.0)
+                self.retries += 1
+                continue
+            if error:
+                # Chyba v požadavku (neplatný parametr, ...) – opakování nepomůže
+                self._schedule_next()
+                code = error.get("code", "unknown")
+                raise SchedulerError(f"API chyba {code}: {error.get('info', '')}", code)
+
+            if latency < FAST_LATENCY:
+                self._speed_up()
+            elif latency > SLOW_LATENCY:
+                self._slow_down(1.5)
+            self._schedule_next()
+            return data
+
+        raise SchedulerError(f"Request selhal po {self.max_retries + 1} pokusech: {last_error}")
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "delay": round(self.delay, 3),
+            "waited_s": round(self.waited, 1),
+        }
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+WikiSkripta Full-text Search
+============================
+Perzistentní invertovaný index nad těly stažených článků (SQLite FTS5).
+
+- řazení výsledků podle BM25 (název má vyšší váhu než text),
+- vyhledávání bez ohledu na diakritiku a velikost písmen
+  ("cevni mozkova prihoda" najde "Cévní mozková příhoda"),
+- úryvky se zvýrazněnými shodami přímo z indexu – při dotazu se
+  nečtou soubory s články,
+- průběžná aktualizace: downloader po uložení stránky volá ``add()``,
+- překlad názvů přes mapu přesměrování (aliases.json): dotaz "IM"
+  vrátí na prvním místě cílový článek "Infarkt myokardu".
+
+Index leží ve výstupní složce jako search_index.sqlite a funguje pro
+adresářový i zabalený formát (viz wikiskripta_store.py).
+
+Použití:
+    python3 wikiskripta_search.py build wikiskripta_markdown
+    python3 wikiskripta_search.py query wikiskripta_markdown "infarkt myokardu"
+"""
+
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from wikiskripta_store import (ALIASES_NAME, ArticleStore, alias_key, is_packed,
+                               load_aliases, resolve_title, stub_redirect_target,
+                               title_from_markdown)
+
+# ── Konfigurace ─────────────────────────────────────────────────────────────
+INDEX_NAME     = "search_index.sqlite"
+TITLE_WEIGHT   = 10.0   # váha shody v názvu vůči shodě v textu (BM25)
+SNIPPET_TOKENS = 16     # délka úryvku ve slovech
+# ────────────────────────────────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id    INTEGER PRIMARY KEY,
+    title TEXT UNIQUE NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(
+    title, body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    title: str
+    score: float
+    snippet: str
+
+
+def index_exists(root: Path) -> bool:
+    return (root / INDEX_NAME).exists()
+
+
+def article_body(markdown: str) -> str:
+    """Odstraní hlavičku článku (nadpis, zdroj, licence) – indexuje se jen text."""
+    _, sep, body = markdown.partition("\n---\n")
+    return body.strip() if sep else markdown
+
+
+def build_match_query(query: str) -> str:
+    """Převede volný text na bezpečný FTS5 dotaz (AND všech slov).
+
+    Každé slovo se uzavře do uvozovek, takže operátory FTS5 (AND, NEAR,
+    dvojtečky, závorky) v uživatelském vstupu nemají zvláštní význam.
+    Jako prefix se hledá jen poslední (rozepsané) slovo – rozvinutí
+    prefixu na všechny odpovídající termy je nejdražší část dotazu.
+    """
+    tokens = [f'"{token}"' for token in _TOKEN_RE.findall(query)]
+    if tokens:
+        tokens[-1] += "*"
+    return " ".join(tokens)
+
+
+class SearchIndex:
+    """Invertovaný index nad články s inkrementální aktualizací."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / INDEX_NAME
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._aliases = {}
+        self._alias_keys = {}
+        self._aliases_mtime = None
+
+    def _load_aliases(self):
+        """Načte aliases.json znovu jen tehdy, když se od minula změnil."""
+        path = self.root / ALIASES_NAME
+        mtime = path.stat().st_mtime if path.exists() else None
+        if mtime != self._aliases_mtime:
+            self._aliases = load_aliases(self.root)
+            self._alias_keys = {alias_key(src): src for src in self._aliases}
+            self._aliases_mtime = mtime
+
+    def resolve(self, query: str):
+        """Vrátí (alias, cílový název), pokud dotaz přesně odpovídá přesměrování."""
+        self._load_aliases()
+        source = self._alias_keys.get(alias_key(query))
+        if source is None:
+            return None
+        return source, resolve_title(source, self._aliases)
+
+    def add(self, title: str, markdown: str, commit: bool = True):
+        """Přidá nebo nahradí článek v indexu."""
+        body = article_body(markdown)
+        with self._lock:
+            row = self._db.execute("SELECT id FROM docs WHERE title = ?", (title,)).fetchone()
+            if row:
+                doc_id = row[0]
+                self._db.execute("DELETE FROM fts WHERE rowid = ?", (doc_id,))
+            else:
+                doc_id = self._db.execute("INSERT INTO docs (title) VALUES (?)", (title,)).lastrowid
+            self._db.execute("INSERT INTO fts (rowid, title, body) VALUES (?, ?, ?)",
+                             (doc_id, title, body))
+            if commit:
+                self._db.commit()
+
+    def remove(self, title: str):
+        with self._lock:
+            row = self._db.execute("SELECT id FROM docs WHERE title = ?", (title,)).fetchone()
+            if row:
+                self._db.execute("DELETE FROM fts WHERE rowid = ?", (row[0],))
+                self._db.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+                self._db.commit()
+
+    def prune(self, keep) -> int:
+        """Odstraní z indexu články, které nejsou v ``keep``; vrátí jejich počet."""
+        keep = set(keep)
+        with self._lock:
+            stale = [(doc_id,) for doc_id, title in self._db.execute("SELECT id, title FROM docs")
+                     if title not in keep]
+            self._db.executemany("DELETE FROM fts WHERE rowid = ?", stale)
+            self._db.executemany("DELETE FROM docs WHERE id = ?", stale)
+            self._db.commit()
+        return len(stale)
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def __contains__(self, title: str) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM docs WHERE title = ?", (title,)
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """Vrátí nejrelevantnější články (nejlepší první) s úryvky."""
+        match = build_match_query(query)
+        if not match:
+            return []
+        rows = self._db.execute(
+            f"""
+            SELECT title,
+                   bm25(fts, {TITLE_WEIGHT}, 1.0) AS rank,
+                   snippet(fts, 1, '**', '**', '…', {SNIPPET_TOKENS})
+            FROM fts
+            WHERE fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, limit),
+        )
+        # bm25() vrací záporné skóre (menší = lepší) – otočíme znaménko
+        hits = [SearchHit(title, -rank, " ".join(snippet.split()))
+                for title, rank, snippet in rows]
+
+        # Dotaz je název přesměrování → cílový článek na první místo
+        resolved = self.resolve(query)
+        if resolved and resolved[1] in self:
+            source, target = resolved
+            top = max((h.score for h in hits), default=0.0)
+            hits = [SearchHit(target, top + 1.0, f"↪ přesměrováno z: {source}")] + [
+                h for h in hits if h.title != target][:limit - 1]
+        return hits
+
+    def optimize(self):
+        """Sloučí segmenty indexu – vhodné po velkém (pře)indexování."""
+        with self._lock:
+            self._db.execute("INSERT INTO fts (fts) VALUES ('optimize')")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_index(root: Path, progress=None) -> int:
+    """(Pře)indexuje všechny články ve složce – adresářové i zabalené úložiště.
+
+    Články, které mezitím ze složky zmizely, se z indexu odstraní.
+    """
+    indexed = 0
+    titles = set()
+    with SearchIndex(root) as index:
+        if is_packed(root):
+            with ArticleStore(root) as store:
+                for entry in store:
+                    index.add(entry.title, store.read(entry), commit=False)
+                    titles.add(entry.title)
+                    indexed += 1
+                    if progress and indexed % 500 == 0:
+                        progress(indexed)
+        else:
+            for path in root.glob("*.md"):
+                if path.name == "_INDEX.md":
+                    continue
+                markdown = path.read_text(encoding="utf-8")
+                if stub_redirect_target(markdown) is not None:
+                    continue  # starý stub přesměrování – řeší aliases.json
+                title = title_from_markdown(path, markdown)
+                index.add(title, markdown, commit=False)
+                titles.add(title)
+                indexed += 1
+                if progress and indexed % 500 == 0:
+                    progress(indexed)
+        index.commit()
+        index.prune(titles)
+        index.optimize()
+    return indexed
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fulltextovy index nad clanky WikiSkripta")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="Preindexuje vsechny clanky ve slozce")
+    p_build.add_argument("directory", type=Path)
+    p_query = sub.add_parser("query", help="Vyhleda clanky")
+    p_query.add_argument("directory", type=Path)
+    p_query.add_argument("query")
+    p_query.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        n = build_index(args.directory, progress=lambda n: print(f"   ... {n} clanku"))
+        print(f"Zaindexovano clanku: {n} ({time.perf_counter() - start:.1f} s)")
+    else:
+        with SearchIndex(args.directory) as index:
+            start = time.perf_counter()
+            hits = index.search(args.query, limit=args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            for hit in hits:
+                print(f"{hit.score:7.2f}  {hit.title}\n         {hit.snippet}")
+            print(f"\n{len(hits)} vysledku za {elapsed:.1f} ms")
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+WikiSkripta Packed Store
+========================
+Volitelný "zabalený" formát úložiště stažených článků.
+
+Místo tisíců malých .md souborů v jedné složce se články zapisují za sebe
+do jednoho append-only souboru (articles.pack). Ke každému článku vede
+záznam v katalogu (catalog.sqlite): název, offset, délka, počet slov
+a revize. Díky indexu nad názvem je:
+
+- vyhledání článku podle názvu O(log n) + jeden seek do packu,
+- počet článků a slov O(1) (udržuje se v tabulce meta),
+- výpis / stránkování / filtrování podle prefixu O(log n + k),
+- hledání podřetězce v názvech bez ohledu na velikost písmen jedním
+  průchodem katalogu (jen názvy, pack se nečte),
+
+takže UI nemusí při každém překreslení procházet adresář.
+
+Použití:
+    store = ArticleStore(Path("wikiskripta_markdown"))
+    store.put("Pneumonie", markdown, revision=123456)
+    text = store.get("Pneumonie")
+    store.close()
+
+    python3 wikiskripta_store.py import wikiskripta_markdown   # migrace .md → pack
+    python3 wikiskripta_store.py export wikiskripta_markdown   # pack → .md
+
+Přesměrování (#PŘESMĚRUJ / #REDIRECT) se neukládají jako články, ale do
+jediné mapy aliasů aliases.json (zdrojový název → cílový název), kterou
+používá vyhledávání k překladu názvů v dotazu. Při stahování podle
+kategorií se obdobně do categories.json zapisují kategoriové cesty článků
+(název → ["Kategorie:A > Kategorie:B", ...]) pro pozdější filtrování.
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+# ── Konfigurace ─────────────────────────────────────────────────────────────
+PACK_NAME    = "articles.pack"
+CATALOG_NAME = "catalog.sqlite"
+ALIASES_NAME = "aliases.json"
+CATEGORIES_NAME = "categories.json"
+# ────────────────────────────────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    title    TEXT PRIMARY KEY,
+    offset   INTEGER NOT NULL,
+    length   INTEGER NOT NULL,
+    words    INTEGER NOT NULL,
+    revision INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('articles', 0), ('words', 0);
+"""
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Jeden záznam katalogu – kde v packu leží článek a co o něm víme."""
+    title: str
+    offset: int
+    length: int
+    words: int
+    revision: Optional[int] = None
+
+
+def is_packed(root: Path) -> bool:
+    """Vrátí True, pokud složka obsahuje zabalené úložiště."""
+    return (root / CATALOG_NAME).exists()
+
+
+class ArticleStore:
+    """Append-only pack článků s indexovaným SQLite katalogem.
+
+    Přepsání existujícího článku připíše novou verzi na konec packu a
+    přesměruje na ni katalog; starý záznam zůstane v packu jako "mrtvý"
+    prostor (viz ``wasted_bytes``), dokud se úložiště nepřepíše exportem
+    a novým importem.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.pack_path = self.root / PACK_NAME
+        self.catalog_path = self.root / CATALOG_NAME
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.catalog_path, check_same_thread=False)
+        # WAL – Streamlit čte katalog, zatímco downloader zapisuje
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # SQLite LOWER() zná jen ASCII – "Č" by na "č" nepřevedl
+        self._db.create_function("casefold", 1, str.casefold, deterministic=True)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._pack = open(self.pack_path, "ab+")
+
+    # ── Zápis ───────────────────────────────────────────────────────────────
+
+    def put(self, title: str, markdown: str, revision: Optional[int] = None) -> CatalogEntry:
+        """Připíše článek na konec packu a zaeviduje ho v katalogu."""
+        data = markdown.encode("utf-8")
+        words = len(markdown.split())
+        with self._lock:
+            self._pack.seek(0, 2)
+            offset = self._pack.tell()
+            self._pack.write(data)
+            self._pack.flush()
+
+            old = self._db.execute(
+                "SELECT words FROM articles WHERE title = ?", (title,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO articles (title, offset, length, words, revision) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (title, offset, len(data), words, revision),
+            )
+            if old is None:
+                self._db.execute("UPDATE meta SET value = value + 1 WHERE key = 'articles'")
+                self._db.execute("UPDATE meta SET value = value + ? WHERE key = 'words'", (words,))
+            else:
+                self._db.execute("UPDATE meta SET value = value + ? WHERE key = 'words'",
+                                 (words - old[0],))
+            self._db.commit()
+        return CatalogEntry(title, offset, len(data), words, revision)
+
+    # ── Čtení ───────────────────────────────────────────────────────────────
+
+    def entry(self, title: str) -> Optional[CatalogEntry]:
+        row = self._db.execute(
+            "SELECT title, offset, length, words, revision FROM articles WHERE title = ?",
+            (title,),
+        ).fetchone()
+        return CatalogEntry(*row) if row else None
+
+    def get(self, title: str) -> Optional[str]:
+        """Náhodný přístup k článku podle názvu (index + jeden seek)."""
+        entry = self.entry(title)
+        if entry is None:
+            return None
+        return self.read(entry)
+
+    def read(self, entry: CatalogEntry) -> str:
+        with self._lock:
+            self._pack.seek(entry.offset)
+            data = self._pack.read(entry.length)
+        return data.decode("utf-8")
+
+    def __contains__(self, title: str) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM articles WHERE title = ?", (title,)
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._meta("articles")
+
+    def total_words(self) -> int:
+        return self._meta("words")
+
+    def wasted_bytes(self) -> int:
+        """Velikost přepsaných (už neodkazovaných) záznamů v packu."""
+        live = self._db.execute("SELECT COALESCE(SUM(length), 0) FROM articles").fetchone()[0]
+        return self.pack_path.stat().st_size - live
+
+    def titles(self, prefix: str = "", limit: int = 200, offset: int = 0,
+               contains: str = "") -> list:
+        """Seřazený výpis záznamů katalogu, volitelně jen s daným prefixem
+        názvu a/nebo s názvy obsahujícími ``contains``.
+
+        Prefix se převádí na rozsahový dotaz nad primárním klíčem, takže
+        nevyžaduje průchod celým katalogem. ``contains`` nerozlišuje velikost
+        písmen ("infarkt" najde "Akutní infarkt myokardu") a prochází názvy
+        celého katalogu.
+        """
+        where, params = self._filter(prefix, contains)
+        rows = self._db.execute(
+            "SELECT title, offset, length, words, revision FROM articles"
+            f"{where} ORDER BY title LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        return [CatalogEntry(*row) for row in rows]
+
+    def count(self, prefix: str = "", contains: str = "") -> int:
+        if not prefix and not contains:
+            return len(self)
+        where, params = self._filter(prefix, contains)
+        return self._db.execute(f"SELECT COUNT(*) FROM articles{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _filter(prefix: str, contains: str):
+        """Podmínka WHERE (a její parametry) pro ``titles`` a ``count``."""
+        conditions, params = [], []
+        if prefix:
+            conditions.append("title >= ? AND title < ?")
+            params += [prefix, prefix + "\U0010ffff"]
+        if contains:
+            conditions.append("instr(casefold(title), ?) > 0")
+            params.append(contains.casefold())
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def __iter__(self) -> Iterator[CatalogEntry]:
+        rows = self._db.execute(
+            "SELECT title, offset, length, words, revision FROM articles ORDER BY offset"
+        ).fetchall()
+        return (CatalogEntry(*row) for row in rows)
+
+    def _meta(self, key: str) -> int:
+        return self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    # ── Správa ──────────────────────────────────────────────────────────────
+
+    def close(self):
+        with self._lock:
+            self._pack.close()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ── Aliasy (přesměrování) ────────────────────────────────────────────────────
+
+_REDIRECT_RE = re.compile(r'^\s*#(?:PŘESMĚRUJ|REDIRECT)\s*\[\[([^\]|#]+)', re.IGNORECASE)
+_REDIRECT_STUB_RE = re.compile(r'^\*Přesměrování na: (.+)\*$', re.MULTILINE)
+
+
+def redirect_target(wikitext: str) -> Optional[str]:
+    """Cíl přesměrování z wikitextu, nebo None pro běžnou stránku."""
+    m = _REDIRECT_RE.match(wikitext)
+    return m.group(1).strip() if m else None
+
+
+def alias_key(title: str) -> str:
+    """Normalizovaný klíč pro porovnání názvů (bez diakritiky a velikosti písmen)."""
+    decomposed = unicodedata.normalize("NFKD", title.replace("_", " "))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def _load_map(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+
+def _save_map(path: Path, mapping: dict):
+    """Zapíše JSON mapu atomicky (přes dočasný soubor)."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(dict(sorted(mapping.items())), ensure_ascii=False, indent=1),
+                   encoding="utf-8")
+    tmp.replace(path)
+
+
+def load_aliases(root: Path) -> dict:
+    return _load_map(Path(root) / ALIASES_NAME)
+
+
+def save_aliases(root: Path, aliases: dict):
+    _save_map(Path(root) / ALIASES_NAME, aliases)
+
+
+def resolve_title(title: str, aliases: dict, max_hops: int = 5) -> str:
+    """Přeloží název přes (i řetězená) přesměrování; cykly se přeruší."""
+    seen = {title}
+    for _ in range(max_hops):
+        target = aliases.get(title)
+        if target is None or target in seen:
+            break
+        seen.add(target)
+        title = target
+    return title
+
+
+# ── Kategorie ────────────────────────────────────────────────────────────────
+
+def load_categories(root: Path) -> dict:
+    """Mapa název článku → seznam kategoriových cest, kudy byl nalezen."""
+    return _load_map(Path(root) / CATEGORIES_NAME)
+
+
+def save_categories(root: Path, categories: dict):
+    _save_map(Path(root) / CATEGORIES_NAME, categories)
+
+
+def merge_categories(existing: dict, found: dict) -> dict:
+    """Sloučí nově nalezené cesty do existující mapy (bez duplicit)."""
+    for title, paths in found.items():
+        known = existing.setdefault(title, [])
+        known.extend(p for p in paths if p not in known)
+    return existing
+
+
+# ── Migrace ──────────────────────────────────────────────────────────────────
+
+def title_from_markdown(path: Path, markdown: str) -> str:
+    """Původní název článku – první řádek '# Název', jinak jméno souboru."""
+    first = markdown.split("\n", 1)[0]
+    if first.startswith("# "):
+        return first[2:].strip()
+    return path.stem
+
+
+def stub_redirect_target(markdown: str) -> Optional[str]:
+    """Cíl přesměrování ze starého stub souboru ('*Přesměrování na: X*')."""
+    if len(markdown) > 1000:
+        return None
+    m = _REDIRECT_STUB_RE.search(markdown)
+    return m.group(1).strip() if m else None
+
+
+def import_directory(root: Path) -> int:
+    """Zabalí existující .md soubory ze složky do packu (soubory nemaže).
+
+    Stuby přesměrování se nebalí jako články, ale přidají se do aliases.json.
+    """
+    imported = 0
+    aliases = load_aliases(root)
+    with ArticleStore(root) as store:
+        for path in sorted(root.glob("*.md")):
+            if path.name == "_INDEX.md":
+                continue
+            markdown = path.read_text(encoding="utf-8")
+            title = title_from_markdown(path, markdown)
+            target = stub_redirect_target(markdown)
+            if target is not None:
+                aliases[title] = target
+                continue
+            if title in store:
+                continue
+            store.put(title, markdown)
+            imported += 1
+    save_aliases(root, aliases)
+    return imported
+
+
+def export_directory(root: Path, sanitize) -> int:
+    """Rozbalí pack zpět do jednotlivých .md souborů."""
+    exported = 0
+    with ArticleStore(root) as store:
+        for entry in store.titles(limit=-1):
+            path = root / f"{sanitize(entry.title)}.md"
+            path.write_text(store.read(entry), encoding="utf-8")
+            exported += 1
+    return exported
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    from wikiskripta_downloader import sanitize_filename
+
+    parser = argparse.ArgumentParser(description="Sprava zabaleneho uloziste WikiSkripta")
+    parser.add_argument("command", choices=["import", "export", "stats"])
+    parser.add_argument("directory", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        print(f"Zabaleno clanku: {import_directory(args.directory)}")
+    elif args.command == "export":
+        print(f"Rozbaleno clanku: {export_directory(args.directory, sanitize_filename)}")
+    else:
+        with ArticleStore(args.directory) as store:
+            print(f"Clanku:        {len(store):,}")
+            print(f"Slov:          {store.total_words():,}")
+            print(f"Pack:          {store.pack_path.stat().st_size / 1024:.1f} KB")
+            print(f"Mrtvy prostor: {store.wasted_bytes() / 1024:.1f} KB")
+        print(f"Aliasu:        {len(load_aliases(args.directory)):,}")